@@ -1,12 +1,36 @@
+import importlib
 import os
 import logging
 import sys
+import click
 from flask import Flask, jsonify
-from app.config import config
+from app.config import config, database_binds, engine_options
 from app.extensions import db, migrate, jwt, cors
 from app.modules.metrics import init_metrics, track_login, track_token_operation
 
 
+# Modules defining the models (string relationships resolve across them, and
+# bootstrap-db's create_all needs every table)
+MODEL_MODULES = (
+    'app.modules.user.models',
+    'app.modules.company.models',
+    'app.modules.services.models',
+    'app.modules.notifications.models',
+    'app.modules.forms.models',
+    'app.modules.documents.models',
+    'app.modules.tags.models',
+    'app.modules.audit.models',
+    'app.modules.client_entity.models',
+    'app.modules.leads.models',
+    'app.modules.letters.models',
+    'app.modules.smsf_data_sheet.models',
+    'app.modules.blog.models',
+    'app.modules.ato_alerts.models',
+    'app.modules.analytics.models',
+    'app.jobs.models',
+)
+
+
 def setup_logging(app):
     """Configure logging to output to stdout for docker logs"""
     # Remove default handlers
@@ -39,6 +63,10 @@ def create_app(config_name=None):
 
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    if not app.config.get('SQLALCHEMY_ENGINE_OPTIONS'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    if not app.config.get('SQLALCHEMY_BINDS'):
+        app.config['SQLALCHEMY_BINDS'] = database_binds(app.config)
     app.url_map.strict_slashes = False  # Fix 308 redirects
 
     # Setup logging for docker/gunicorn
@@ -50,152 +78,13 @@ def create_app(config_name=None):
     jwt.init_app(app)
 
     # =========================================================================
-    # DATABASE SETUP - Create tables from SQLAlchemy models (if they don't exist)
-    # This preserves existing data while ensuring schema matches models
+    # MODELS - Import every model module so SQLAlchemy knows about them. Creating
+    # tables and seeding data is `flask bootstrap-db` (app/bootstrap.py), run
+    # once per deployment, so building the app touches no database
     # =========================================================================
-    with app.app_context():
-        # Import all models so SQLAlchemy knows about them
-        from app.modules.user.models import Role, User
-        from app.modules.company.models import Company
-        from app.modules.services.models import Service, ServiceRequest, Query, Invoice, Task, ClientServicePricing
-        from app.modules.notifications.models import Notification, EmailTemplate
-        from app.modules.forms.models import Form, FormQuestion, FormResponse
-        from app.modules.documents.models import Document
-        from app.modules.tags.models import ClientTag
-        from app.modules.audit.models import ActivityLog
-        from app.modules.client_entity.models import ClientEntity
-        from app.modules.leads.models import Lead
-        from app.modules.letters.models import AuditLetter
-        from app.modules.smsf_data_sheet.models import SMSFDataSheet
-        from app.modules.blog.models import Blog
-        from app.modules.ato_alerts.models import AtoAlert
-        import bcrypt
-
-        # Create tables that don't exist (preserves existing data)
-        # Wrapped to handle race condition when multiple gunicorn workers start simultaneously
-        try:
-            db.create_all()
-            app.logger.info('Database tables verified/created from SQLAlchemy models.')
-        except Exception as e:
-            db.session.rollback()
-            if 'already exists' in str(e) or 'duplicate key' in str(e):
-                app.logger.info('Database tables already exist (another worker already initialised them).')
-            else:
-                raise
+    for module in MODEL_MODULES:
+        importlib.import_module(module)
 
-        # Seed essential data only if missing
-        try:
-            # Create roles if missing
-            Role.get_or_create_default_roles()
-
-            # Create company if missing
-            company = Company.query.filter_by(name='AusSuperSource').first()
-            if not company:
-                company = Company(
-                    name='AusSuperSource',
-                    trading_name='AusSuperSource Pty Ltd',
-                    email='info@aussupersource.com.au',
-                    phone='',
-                    address_line1='Sydney',
-                    city='Sydney',
-                    state='NSW',
-                    postcode='2000',
-                    country='Australia',
-                    plan_type='enterprise',
-                    max_users=100,
-                    max_clients=10000,
-                    # AusSuperSource branding
-                    primary_color='#1B72BE',
-                    secondary_color='#1A2E5A',
-                    tertiary_color='#3a9ef0',
-                    logo_url='/assets/aussupersource-logo.png'
-                )
-                db.session.add(company)
-                db.session.flush()
-                app.logger.info(f'Company created: {company.name}')
-
-            # Create admin user if missing
-            admin_user = User.query.filter_by(email='aggarwal.adarsh98@gmail.com').first()
-            if not admin_user:
-                super_admin_role = Role.query.filter_by(name=Role.SUPER_ADMIN).first()
-                admin_user = User(
-                    email='aggarwal.adarsh98@gmail.com',
-                    role_id=super_admin_role.id,
-                    company_id=company.id,
-                    first_name='Adarsh',
-                    last_name='Aggarwal',
-                    is_active=True,
-                    is_verified=True,
-                    is_first_login=False,
-                    two_fa_enabled=False
-                )
-                # Set password using bcrypt (Big@200650078296)
-                admin_user.password_hash = bcrypt.hashpw('Big@200650078296'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                db.session.add(admin_user)
-                app.logger.info('Admin user created: aggarwal.adarsh98@gmail.com')
-
-            db.session.commit()
-
-            # Seed default blogs if empty
-            try:
-                if Blog.query.count() == 0:
-                    default_blogs = [
-                        Blog(
-                            title='2025 SMSF Compliance Changes: What Accountants Need to Know',
-                            slug='2025-smsf-compliance-changes',
-                            excerpt='Stay ahead of the latest regulatory updates affecting SMSF audits and compliance.',
-                            category='Compliance',
-                            author='Yateender Gupta',
-                            read_time='5 min read',
-                            image='https://images.unsplash.com/photo-1554224155-8d04cb21cd6c?w=600&h=400&fit=crop',
-                            featured=True,
-                        ),
-                        Blog(
-                            title='Partner Auditing: How to Scale Your SMSF Practice',
-                            slug='partner-auditing-scale-practice',
-                            excerpt='Discover how partnering with a specialist SMSF audit provider can help you grow.',
-                            category='Practice Growth',
-                            author='Sharat Sharma',
-                            read_time='4 min read',
-                            image='https://images.unsplash.com/photo-1460925895917-afdab827c52f?w=600&h=400&fit=crop',
-                        ),
-                    ]
-                    for b in default_blogs:
-                        db.session.add(b)
-                    db.session.commit()
-                    app.logger.info('Default blogs seeded.')
-            except Exception as e:
-                db.session.rollback()
-                app.logger.warning(f'Could not seed blogs: {e}')
-
-            # Seed default ATO alerts if empty
-            try:
-                if AtoAlert.query.count() == 0:
-                    default_alerts = [
-                        AtoAlert(
-                            title='SMSF annual return deadline extended to 28 February 2026',
-                            type='update',
-                            link='https://www.ato.gov.au/super/self-managed-super-funds/',
-                            priority=1,
-                        ),
-                        AtoAlert(
-                            title='New contribution caps for 2025-26: Concessional $30,000',
-                            type='alert',
-                            link='https://www.ato.gov.au/super/self-managed-super-funds/contributions-and-rollovers/',
-                            priority=2,
-                        ),
-                    ]
-                    for a in default_alerts:
-                        db.session.add(a)
-                    db.session.commit()
-                    app.logger.info('Default ATO alerts seeded.')
-            except Exception as e:
-                db.session.rollback()
-                app.logger.warning(f'Could not seed ATO alerts: {e}')
-
-        except Exception as e:
-            db.session.rollback()
-            app.logger.warning(f'Could not seed initial data: {e}')
     # =========================================================================
     # Get CORS origins from config (supports environment-based configuration)
     cors_origins = app.config.get('CORS_ORIGINS', [
@@ -231,8 +120,10 @@ def create_app(config_name=None):
         app.logger.warning(f'Could not initialize Prometheus metrics: {e}')
 
     # Initialize background job scheduler (APScheduler)
-    # Only start in main process, not in reloader or CLI commands
-    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    # Only in web processes (gunicorn, run.py) - not in worker.py or CLI commands,
+    # which would run every cron job once more - and not in the reloader
+    if app.config.get('APP_PROCESS_ROLE') == 'web' and (
+            not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
         try:
             from app.jobs import init_scheduler
             init_scheduler(app)
@@ -1266,4 +1157,65 @@ Due Date: {due_date}</p>
         print(f"DONE: Imported {imported}, Skipped {skipped}")
         print("Default password for all imported users: TempPass123!")
 
+    @app.cli.command('refresh-analytics-rollups')
+    @click.option('--full', is_flag=True, help='Rebuild every day instead of only changed ones')
+    def refresh_analytics_rollups(full):
+        """Refresh the daily analytics rollups used by the revenue/lodgement reports"""
+        from app.modules.analytics.services import AnalyticsRollupService
+
+        result = AnalyticsRollupService.refresh(full=full)
+        print(f"Rebuilt {result['days']} days across {result['companies']} companies")
+
+    @app.cli.command('build-geoip-index')
+    @click.option('--force', is_flag=True, help='Rebuild even if the index is newer than the CSV')
+    def build_geoip_index(force):
+        """Compile the GEOIP_DATABASE_PATH CSV into its memory-mapped lookup index"""
+        from app.modules.audit.services.ip_database import CSVRangeDatabase
+
+        path = app.config.get('GEOIP_DATABASE_PATH')
+        if not path or path.lower().endswith('.mmdb'):
+            print('GEOIP_DATABASE_PATH is not an IP range CSV - nothing to build')
+            return
+        if not force and not CSVRangeDatabase.index_is_stale(path, f'{path}.idx'):
+            print(f'{path}.idx is up to date')
+            return
+        count = CSVRangeDatabase.build_index(path, f'{path}.idx')
+        print(f'Indexed {count} IP ranges into {path}.idx')
+
+    @app.cli.command('maintain-audit-partitions')
+    def maintain_audit_partitions():
+        """Create upcoming access/activity log partitions and apply the retention policy"""
+        from app.modules.audit.services import AuditPartitionService
+
+        result = AuditPartitionService.maintain()
+        print(f"Created {len(result['created'])} partitions, archived {len(result['archived'])}, "
+              f"deleted {sum(result['deleted'].values())} expired rows")
+
+    @app.cli.command('requeue-dead-jobs')
+    @click.option('--queue', default=None, help='Only requeue jobs of this queue')
+    def requeue_dead_jobs(queue):
+        """Retry dead-lettered background jobs"""
+        from app.jobs.queue import JobQueue
+
+        count = JobQueue.requeue_dead(queue)
+        print(f'Requeued {count} dead jobs')
+
+    @app.cli.command('bootstrap-db')
+    @click.option('--force', is_flag=True, help='Run even if the database is already at the current version')
+    @click.option('--demo', is_flag=True, help='Also create the demo users, services and data when bootstrapping')
+    def bootstrap_db(force, demo):
+        """Create missing tables and seed essential data (once per bootstrap version)"""
+        from app.bootstrap import DatabaseBootstrap
+
+        result = DatabaseBootstrap.run(force=force)
+        if not result['bootstrapped']:
+            print(f"Database already bootstrapped (version {result['version']})")
+            return
+        print(f"Database bootstrapped (version {result['version']})")
+
+        if demo:
+            context = click.get_current_context()
+            for command in (init_db, create_sample_services, create_demo_data):
+                context.invoke(command)
+
     return app
@@ -0,0 +1,228 @@
+"""
+Database Bootstrap
+==================
+
+Creates the schema and the essential seed data once per deployment, instead
+of in create_app() (which every gunicorn worker, worker.py and each `flask`
+CLI process calls):
+
+- `flask bootstrap-db` runs db.create_all() (missing tables only) and seeds
+  the default roles, the AusSuperSource company and super admin, and the
+  default blog posts and ATO alerts - each only when missing
+- The schema_bootstrap table records the BOOTSTRAP_VERSION that last ran; a
+  database already at this version is left alone after one query, so the
+  command is cheap to re-run on every deploy
+- On Postgres an advisory lock serialises concurrent runs: the others wait
+  for it, then find the new version and skip
+
+It is a release step, run after the SQL migrations (scripts/deploy.sh, the
+bootstrap service in docker-compose.yml, entrypoint.sh) - never on container
+start, so the web and worker containers start at import time only.
+Bump BOOTSTRAP_VERSION when models gain tables or the seed data changes.
+"""
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict
+
+import bcrypt
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, inspect, insert, select, text, update
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Kept out of db.metadata: it belongs to the bootstrap, not to any module
+bootstrap_state = Table(
+    'schema_bootstrap', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('version', Integer, nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+class DatabaseBootstrap:
+    """Idempotent, versioned schema creation and seeding"""
+
+    BOOTSTRAP_VERSION = 1
+
+    # Postgres advisory lock key so concurrent containers bootstrap once
+    ADVISORY_LOCK_KEY = 7305004
+
+    @classmethod
+    def run(cls, force: bool = False) -> Dict:
+        """
+        Create missing tables and seed data unless the database is already bootstrapped.
+
+        Args:
+            force: Run even if the database is at BOOTSTRAP_VERSION
+
+        Returns:
+            Dict with the database version and whether this call bootstrapped it
+        """
+        version = cls.current_version()
+        if not force and version >= cls.BOOTSTRAP_VERSION:
+            return {'version': version, 'bootstrapped': False}
+
+        with cls._lock():
+            # Another process may have finished while this one waited for the lock
+            version = cls.current_version()
+            if not force and version >= cls.BOOTSTRAP_VERSION:
+                return {'version': version, 'bootstrapped': False}
+
+            db.create_all()
+            try:
+                cls._seed()
+                cls._set_version(max(version, cls.BOOTSTRAP_VERSION))
+            except Exception:
+                db.session.rollback()
+                raise
+
+        logger.info(f'Database bootstrapped: version {version} -> {cls.BOOTSTRAP_VERSION}')
+        return {'version': cls.BOOTSTRAP_VERSION, 'bootstrapped': True}
+
+    @staticmethod
+    def current_version() -> int:
+        """Bootstrap version recorded in the database (0 before the first bootstrap)"""
+        if not inspect(db.engine).has_table(bootstrap_state.name):
+            return 0
+        return db.session.execute(
+            select(bootstrap_state.c.version).where(bootstrap_state.c.id == 1)
+        ).scalar() or 0
+
+    @classmethod
+    @contextmanager
+    def _lock(cls):
+        """Hold a session advisory lock on Postgres (no-op elsewhere)"""
+        if db.engine.dialect.name != 'postgresql':
+            yield
+            return
+
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': cls.ADVISORY_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': cls.ADVISORY_LOCK_KEY})
+
+    @staticmethod
+    def _set_version(version: int):
+        bootstrap_state.create(db.engine, checkfirst=True)
+        values = {'version': version, 'applied_at': datetime.utcnow()}
+        updated = db.session.execute(
+            update(bootstrap_state).where(bootstrap_state.c.id == 1).values(**values)
+        ).rowcount
+        if not updated:
+            db.session.execute(insert(bootstrap_state).values(id=1, **values))
+        db.session.commit()
+
+    @classmethod
+    def _seed(cls):
+        """Essential data, each item created only if missing"""
+        from app.modules.user.models import Role
+
+        Role.get_or_create_default_roles()
+        cls._seed_company_admin()
+        cls._seed_blogs()
+        cls._seed_ato_alerts()
+        db.session.commit()
+
+    @staticmethod
+    def _seed_company_admin():
+        from app.modules.company.models import Company
+        from app.modules.user.models import Role, User
+
+        company = Company.query.filter_by(name='AusSuperSource').first()
+        if not company:
+            company = Company(
+                name='AusSuperSource',
+                trading_name='AusSuperSource Pty Ltd',
+                email='info@aussupersource.com.au',
+                phone='',
+                address_line1='Sydney',
+                city='Sydney',
+                state='NSW',
+                postcode='2000',
+                country='Australia',
+                plan_type='enterprise',
+                max_users=100,
+                max_clients=10000,
+                # AusSuperSource branding
+                primary_color='#1B72BE',
+                secondary_color='#1A2E5A',
+                tertiary_color='#3a9ef0',
+                logo_url='/assets/aussupersource-logo.png'
+            )
+            db.session.add(company)
+            db.session.flush()
+            logger.info(f'Company created: {company.name}')
+
+        admin_user = User.query.filter_by(email='aggarwal.adarsh98@gmail.com').first()
+        if not admin_user:
+            super_admin_role = Role.query.filter_by(name=Role.SUPER_ADMIN).first()
+            admin_user = User(
+                email='aggarwal.adarsh98@gmail.com',
+                role_id=super_admin_role.id,
+                company_id=company.id,
+                first_name='Adarsh',
+                last_name='Aggarwal',
+                is_active=True,
+                is_verified=True,
+                is_first_login=False,
+                two_fa_enabled=False
+            )
+            # Set password using bcrypt (Big@200650078296)
+            admin_user.password_hash = bcrypt.hashpw('Big@200650078296'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            db.session.add(admin_user)
+            logger.info('Admin user created: aggarwal.adarsh98@gmail.com')
+
+    @staticmethod
+    def _seed_blogs():
+        from app.modules.blog.models import Blog
+
+        if Blog.query.count() > 0:
+            return
+        db.session.add_all([
+            Blog(
+                title='2025 SMSF Compliance Changes: What Accountants Need to Know',
+                slug='2025-smsf-compliance-changes',
+                excerpt='Stay ahead of the latest regulatory updates affecting SMSF audits and compliance.',
+                category='Compliance',
+                author='Yateender Gupta',
+                read_time='5 min read',
+                image='https://images.unsplash.com/photo-1554224155-8d04cb21cd6c?w=600&h=400&fit=crop',
+                featured=True,
+            ),
+            Blog(
+                title='Partner Auditing: How to Scale Your SMSF Practice',
+                slug='partner-auditing-scale-practice',
+                excerpt='Discover how partnering with a specialist SMSF audit provider can help you grow.',
+                category='Practice Growth',
+                author='Sharat Sharma',
+                read_time='4 min read',
+                image='https://images.unsplash.com/photo-1460925895917-afdab827c52f?w=600&h=400&fit=crop',
+            ),
+        ])
+        logger.info('Default blogs seeded.')
+
+    @staticmethod
+    def _seed_ato_alerts():
+        from app.modules.ato_alerts.models import AtoAlert
+
+        if AtoAlert.query.count() > 0:
+            return
+        db.session.add_all([
+            AtoAlert(
+                title='SMSF annual return deadline extended to 28 February 2026',
+                type='update',
+                link='https://www.ato.gov.au/super/self-managed-super-funds/',
+                priority=1,
+            ),
+            AtoAlert(
+                title='New contribution caps for 2025-26: Concessional $30,000',
+                type='alert',
+                link='https://www.ato.gov.au/super/self-managed-super-funds/contributions-and-rollovers/',
+                priority=2,
+            ),
+        ])
+        logger.info('Default ATO alerts seeded.')
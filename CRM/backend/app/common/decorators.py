@@ -1,7 +1,9 @@
 from functools import wraps
 from flask import jsonify, g
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request, get_jwt
+from sqlalchemy.orm import joinedload
 
+from app.extensions import db
 from app.modules.user.models import User
 
 
@@ -55,8 +57,7 @@ def roles_required(*allowed_roles):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            user = get_current_user()
 
             if not user:
                 return jsonify({'error': 'User not found'}), 404
@@ -80,8 +81,7 @@ def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -101,8 +101,7 @@ def super_admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -122,8 +121,7 @@ def accountant_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -143,8 +141,7 @@ def invoice_admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -164,8 +161,7 @@ def senior_accountant_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -181,9 +177,28 @@ def senior_accountant_required(fn):
 
 
 def get_current_user():
-    """Helper function to get the current authenticated user"""
+    """
+    Helper function to get the current authenticated user.
+
+    The user is loaded together with its role and company in one query and
+    kept on flask.g, so stacked decorators and the route body share a single
+    lookup per request.
+    """
     user_id = get_jwt_identity()
-    return User.query.get(user_id)
+
+    cached = g.get('_current_user')
+    if cached is not None and cached[0] == user_id:
+        # Reuse only while the user is still attached to the active session
+        if cached[1] is None or cached[1] in db.session:
+            return cached[1]
+
+    user = User.query.options(
+        joinedload(User.role),
+        joinedload(User.company)
+    ).filter(User.id == user_id).first() if user_id else None
+
+    g._current_user = (user_id, user)
+    return user
 
 
 def plan_feature_required(feature_name):
@@ -199,8 +214,7 @@ def plan_feature_required(feature_name):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            user = get_current_user()
 
             if not user:
                 return jsonify({'error': 'User not found'}), 404
@@ -243,8 +257,7 @@ def plan_limit_check(limit_type):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            user = get_current_user()
 
             if not user:
                 return jsonify({'error': 'User not found'}), 404
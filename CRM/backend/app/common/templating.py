@@ -0,0 +1,126 @@
+"""
+Placeholder templating utilities
+
+Email subjects and bodies, automation messages and workflow payloads use
+simple placeholders ({client_name}, {{request.id}}) rather than Jinja. A
+template is compiled once into alternating literal text and placeholder
+segments, so rendering is a single linear join no matter how many context
+keys there are, and compiled templates are cached for reuse across
+recipients.
+
+Rendering rules (unchanged from the str.replace loops this replaces):
+- A placeholder whose name is in the context becomes str(value), or '' for
+  a falsy value
+- A placeholder whose name is not in the context is left as written
+
+Usage:
+    compiled = TemplateRenderer.compile(template.body_html, key=('email_template', template.id))
+    bodies = compiled.render_many(contexts)
+"""
+import re
+from typing import Dict, Iterable, List
+
+from app.common.cache import LRUCache
+
+# {name} placeholders (email templates, custom bulk and automation emails)
+PLACEHOLDER = re.compile(r'\{([\w.]+)\}')
+
+# {{name}} placeholders (workflow automations)
+DOUBLE_BRACE_PLACEHOLDER = re.compile(r'\{\{([\w.]+)\}\}')
+
+
+class CompiledTemplate:
+    """Template text split into literal text and placeholder segments"""
+
+    __slots__ = ('source', 'literals', 'names', 'placeholders')
+
+    def __init__(self, source: str, pattern=PLACEHOLDER):
+        self.source = source
+        self.literals = []      # Text before each placeholder, then the trailing text
+        self.names = []         # Placeholder names
+        self.placeholders = []  # Placeholders as written (kept when not in the context)
+
+        position = 0
+        for match in pattern.finditer(source):
+            self.literals.append(source[position:match.start()])
+            self.names.append(match.group(1))
+            self.placeholders.append(match.group(0))
+            position = match.end()
+        self.literals.append(source[position:])
+
+    def render(self, context: dict) -> str:
+        """Fill the placeholders from context in one pass"""
+        if not self.names:
+            return self.source
+
+        parts = [self.literals[0]]
+        for name, placeholder, literal in zip(self.names, self.placeholders, self.literals[1:]):
+            if name in context:
+                value = context[name]
+                parts.append(str(value) if value else '')
+            else:
+                parts.append(placeholder)
+            parts.append(literal)
+        return ''.join(parts)
+
+    def render_many(self, contexts: Iterable[dict]) -> List[str]:
+        """Render one output per context"""
+        return [self.render(context) for context in contexts]
+
+    def tagged(self, tag: str) -> str:
+        """Template text with each placeholder replaced by tag.format(name) (provider-side substitution)"""
+        parts = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            parts.append(tag.format(name))
+            parts.append(literal)
+        return ''.join(parts)
+
+    def substitutions(self, context: dict, tag: str) -> Dict[str, str]:
+        """Values of the tagged() tags for one context, filled by the same rules as render()"""
+        values = {}
+        for name, placeholder in zip(self.names, self.placeholders):
+            if name in context:
+                values[tag.format(name)] = str(context[name]) if context[name] else ''
+            else:
+                values[tag.format(name)] = placeholder
+        return values
+
+
+class TemplateRenderer:
+    """Compiles placeholder templates and caches the compiled form"""
+
+    _cache = LRUCache(maxsize=512)
+
+    @classmethod
+    def compile(cls, source: str, key: tuple = None, pattern=PLACEHOLDER) -> CompiledTemplate:
+        """
+        Compiled form of a template, from the cache when possible.
+
+        Args:
+            source: Template text
+            key: Stable cache key for stored templates (e.g. ('email_template.body', id,
+                 updated_at)); the text itself is the key when omitted
+            pattern: Placeholder syntax
+
+        Returns:
+            CompiledTemplate
+        """
+        source = source or ''
+        cache_key = (pattern.pattern, key if key is not None else source)
+        compiled = cls._cache.get(cache_key)
+        # The source check also catches edits not yet reflected in updated_at
+        if compiled is None or compiled.source != source:
+            compiled = CompiledTemplate(source, pattern)
+            cls._cache.set(cache_key, compiled)
+        return compiled
+
+    @classmethod
+    def render(cls, source: str, context: dict, key: tuple = None, pattern=PLACEHOLDER) -> str:
+        """Render a template with one context"""
+        return cls.compile(source, key, pattern).render(context)
+
+    @classmethod
+    def render_many(cls, source: str, contexts: Iterable[dict], key: tuple = None,
+                    pattern=PLACEHOLDER) -> List[str]:
+        """Render a template once per context against a single compiled form"""
+        return cls.compile(source, key, pattern).render_many(contexts)
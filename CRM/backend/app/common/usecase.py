@@ -8,6 +8,8 @@ from abc import ABC, abstractmethod
 from typing import TypeVar, Generic, Any
 from dataclasses import dataclass
 
+from app.db_routing import reads_from_replica
+
 T = TypeVar('T')
 
 
@@ -52,8 +54,16 @@ class BaseQueryUseCase(BaseUseCase):
     """
     Base class for read-only use cases (queries).
     These should not modify any data.
+
+    Set read_replica = True on heavy queries (reports, dashboards) to run
+    execute() against the read replica when one is configured.
     """
-    pass
+    read_replica = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.read_replica and 'execute' in vars(cls):
+            cls.execute = reads_from_replica(cls.execute)
 
 
 class BaseCommandUseCase(BaseUseCase):
@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,6 +17,31 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Postgres engine (see engine_options below). Each process holds up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW connections: size them for the gunicorn
+    # threads plus scheduler/audit threads (or the worker's job concurrency)
+    APP_PROCESS_ROLE = os.getenv('APP_PROCESS_ROLE', 'cli')  # web (gunicorn), worker (worker.py) or cli
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # Reconnect connections older than this
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '10'))
+    # Per-role timeouts in milliseconds ('web=30000,worker=600000', or one number for
+    # every role); roles not listed (cli: migrations, seeding) have no timeout
+    DB_STATEMENT_TIMEOUT_MS = os.getenv('DB_STATEMENT_TIMEOUT_MS', 'web=30000,worker=600000')
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = os.getenv('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', 'web=60000,worker=300000')
+    # Connecting through PgBouncer in transaction pooling mode: no client-side pool
+    # and no startup options (set the timeouts on the database role instead)
+    DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'false').lower() == 'true'
+    # Read replica (see app/db_routing.py) for analytics, search and exports;
+    # unset, everything reads the primary. Reports are slower than web requests,
+    # so the replica has its own statement timeouts
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL', '')
+    DB_REPLICA_STATEMENT_TIMEOUT_MS = os.getenv('DB_REPLICA_STATEMENT_TIMEOUT_MS', 'web=120000,worker=600000')
+    # Read-your-writes: after a request commits a write, its remaining reads use the primary
+    DB_REPLICA_STICKY = os.getenv('DB_REPLICA_STICKY', 'true').lower() == 'true'
+
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -96,6 +122,77 @@ class Config:
     GOOGLE_APPS_SCRIPT_URL = os.getenv('GOOGLE_APPS_SCRIPT_URL', '')
     GOOGLE_APPS_SCRIPT_FOLDER_ID = os.getenv('GOOGLE_APPS_SCRIPT_FOLDER_ID', '')
 
+    # Global search backend: 'auto' uses the tsvector/pg_trgm (Postgres) or FTS5 (SQLite)
+    # index when installed, 'ilike' forces unindexed ILIKE matching
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+
+    # Minutes between incremental refreshes of the daily analytics rollups
+    ANALYTICS_ROLLUP_REFRESH_MINUTES = int(os.getenv('ANALYTICS_ROLLUP_REFRESH_MINUTES', '5'))
+
+    # IP geolocation for access logs: local MMDB (.mmdb) or IP range CSV database
+    # looked up in-process; the HTTP APIs only enrich logs from a background job
+    GEOIP_DATABASE_PATH = os.getenv('GEOIP_DATABASE_PATH', '')
+    GEOIP_CACHE_SIZE = int(os.getenv('GEOIP_CACHE_SIZE', '10000'))
+    GEOIP_CACHE_TTL_SECONDS = int(os.getenv('GEOIP_CACHE_TTL_SECONDS', '86400'))
+    GEOIP_HTTP_ENRICHMENT = os.getenv('GEOIP_HTTP_ENRICHMENT', 'missing')  # missing, always or off
+
+    # Access/activity log writes: 'buffered' batches them on a background thread,
+    # 'sync' writes each row immediately on its own connection
+    AUDIT_SINK_MODE = os.getenv('AUDIT_SINK_MODE', 'buffered')
+    AUDIT_SINK_QUEUE_SIZE = int(os.getenv('AUDIT_SINK_QUEUE_SIZE', '10000'))  # Rows buffered before writes fall back to sync
+    AUDIT_SINK_BATCH_SIZE = int(os.getenv('AUDIT_SINK_BATCH_SIZE', '500'))
+    AUDIT_SINK_FLUSH_SECONDS = float(os.getenv('AUDIT_SINK_FLUSH_SECONDS', '1'))
+
+    # Monthly access/activity log partitions (Postgres, see upgrade_db_5.sql), maintained daily.
+    # Months older than the retention are detached (kept as standalone tables) or dropped;
+    # 0 keeps everything
+    AUDIT_PARTITION_PREMAKE_MONTHS = int(os.getenv('AUDIT_PARTITION_PREMAKE_MONTHS', '3'))
+    ACCESS_LOG_RETENTION_MONTHS = int(os.getenv('ACCESS_LOG_RETENTION_MONTHS', '12'))
+    ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv('ACTIVITY_LOG_RETENTION_MONTHS', '0'))
+    AUDIT_ARCHIVE_MODE = os.getenv('AUDIT_ARCHIVE_MODE', 'detach')  # detach or drop
+
+    # Background job queue (processed by worker.py)
+    # Every deployment runs worker.py (the worker service in docker-compose.yml,
+    # run-with-worker.sh in the production images). JOB_QUEUE_EAGER=true runs
+    # tasks inline in the request instead - for tests, or a local server started
+    # without a worker; failed tasks are then only logged, never retried
+    JOB_QUEUE_EAGER = os.getenv('JOB_QUEUE_EAGER', 'false').lower() == 'true'
+    JOB_QUEUE_CONCURRENCY = os.getenv('JOB_QUEUE_CONCURRENCY', 'default=4,email=4,automations=2')  # Max running jobs per queue
+    JOB_QUEUE_POLL_SECONDS = float(os.getenv('JOB_QUEUE_POLL_SECONDS', '2'))
+    JOB_QUEUE_LEASE_SECONDS = int(os.getenv('JOB_QUEUE_LEASE_SECONDS', '300'))  # Reclaim jobs of dead workers after this
+    JOB_QUEUE_BACKOFF_SECONDS = int(os.getenv('JOB_QUEUE_BACKOFF_SECONDS', '30'))  # Doubles with each failed attempt
+    JOB_QUEUE_BACKOFF_MAX_SECONDS = int(os.getenv('JOB_QUEUE_BACKOFF_MAX_SECONDS', '3600'))
+
+    # Requests running more SQL statements than this are logged as over budget
+    # (catches N+1 query loops); 0 disables the check
+    DB_QUERY_BUDGET = int(os.getenv('DB_QUERY_BUDGET', '50'))
+
+    # Scheduled email dispatch (scheduler job every SCHEDULED_EMAIL_POLL_SECONDS)
+    SCHEDULED_EMAIL_POLL_SECONDS = int(os.getenv('SCHEDULED_EMAIL_POLL_SECONDS', '60'))
+    SCHEDULED_EMAIL_PAGE_SIZE = int(os.getenv('SCHEDULED_EMAIL_PAGE_SIZE', '500'))  # Users resolved from recipient_filter at a time
+    SCHEDULED_EMAIL_BATCH_SIZE = int(os.getenv('SCHEDULED_EMAIL_BATCH_SIZE', '50'))  # Sends between progress commits
+    SCHEDULED_EMAIL_LEASE_SECONDS = int(os.getenv('SCHEDULED_EMAIL_LEASE_SECONDS', '300'))  # Resume emails of dead workers after this
+
+    # Resolved email clients cached per company; updating an email config drops the
+    # entry in the process serving the update, other processes pick it up after the TTL
+    EMAIL_CLIENT_CACHE_SIZE = int(os.getenv('EMAIL_CLIENT_CACHE_SIZE', '1000'))
+    EMAIL_CLIENT_CACHE_TTL_SECONDS = int(os.getenv('EMAIL_CLIENT_CACHE_TTL_SECONDS', '300'))
+
+    # SMTP connection pool (per host, port and username); SMTP_POOL_MAX_IDLE=0 disables pooling
+    SMTP_POOL_MAX_IDLE = int(os.getenv('SMTP_POOL_MAX_IDLE', '4'))  # Idle connections kept per server
+    SMTP_POOL_IDLE_TIMEOUT_SECONDS = int(os.getenv('SMTP_POOL_IDLE_TIMEOUT_SECONDS', '60'))
+    SMTP_POOL_NOOP_AFTER_SECONDS = int(os.getenv('SMTP_POOL_NOOP_AFTER_SECONDS', '10'))  # NOOP check before reusing older connections
+    SMTP_POOL_MAX_MESSAGES = int(os.getenv('SMTP_POOL_MAX_MESSAGES', '100'))  # Messages before a connection is retired
+
+    # Renewal reminder emails sent concurrently by the daily job
+    RENEWAL_REMINDER_WORKERS = int(os.getenv('RENEWAL_REMINDER_WORKERS', '8'))
+
+    # Email provider API calls per second, per process ('provider=rate,...'; unlisted providers are unlimited).
+    # Each gunicorn worker and worker.py process has its own limit: divide the account limit between them
+    EMAIL_PROVIDER_RATE_LIMITS = os.getenv(
+        'EMAIL_PROVIDER_RATE_LIMITS', 'mailersend=0.25,sendgrid=10,smtp2go=10,smtp=5,graph=4'
+    )
+
     # OTP Settings
     OTP_EXPIRY_MINUTES = 10
     OTP_LENGTH = 6
@@ -114,6 +211,106 @@ class Config:
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:3000,http://localhost:3001,http://127.0.0.1:5173,http://127.0.0.1:3000,http://127.0.0.1:3001').split(',')
 
 
+# =============================================================================
+# DATABASE ENGINE OPTIONS
+# =============================================================================
+# SQLALCHEMY_ENGINE_OPTIONS for Postgres, built from the DB_* settings:
+# - Pool sizing, overflow, checkout timeout, recycle and pre-ping
+# - statement_timeout and idle_in_transaction_session_timeout per process role,
+#   sent as connection startup options so they cost no extra round trip
+# - DB_PGBOUNCER: no client-side pool (NullPool - PgBouncer does the pooling) and
+#   no startup options, which PgBouncer rejects (set the timeouts on the database
+#   role instead: ALTER ROLE <user> SET statement_timeout = '30s')
+# Other databases (SQLite in tests and local runs) keep Flask-SQLAlchemy's defaults.
+# The read replica bind gets the same options with the replica statement timeouts.
+
+def role_setting(value, role: str) -> Optional[int]:
+    """
+    Value of a per-role setting for a process role.
+
+    Args:
+        value: A number for every role, or 'web=30000,worker=600000'
+        role: Process role
+
+    Returns:
+        The role's value, None if the role is not listed
+    """
+    value = str(value or '').strip()
+    if '=' not in value:
+        return int(value) if value else None
+
+    for item in value.split(','):
+        name, _, setting = item.strip().partition('=')
+        if name == role and setting:
+            return int(setting)
+    return None
+
+
+def engine_options(config) -> Dict:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    Args:
+        config: App config (mapping)
+
+    Returns:
+        Engine keyword arguments ({} for non-Postgres databases)
+    """
+    if not config.get('SQLALCHEMY_DATABASE_URI', '').startswith('postgres'):
+        return {}
+
+    role = config.get('APP_PROCESS_ROLE', 'web')
+    connect_args = {
+        'application_name': f"crm-{role}",
+        'connect_timeout': config.get('DB_CONNECT_TIMEOUT', 10)
+    }
+
+    if config.get('DB_PGBOUNCER'):
+        from sqlalchemy.pool import NullPool
+        return {'poolclass': NullPool, 'connect_args': connect_args}
+
+    session_options = []
+    statement_timeout = role_setting(config.get('DB_STATEMENT_TIMEOUT_MS'), role)
+    if statement_timeout:
+        session_options.append(f'-c statement_timeout={statement_timeout}')
+    idle_timeout = role_setting(config.get('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS'), role)
+    if idle_timeout:
+        session_options.append(f'-c idle_in_transaction_session_timeout={idle_timeout}')
+    if session_options:
+        connect_args['options'] = ' '.join(session_options)
+
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'connect_args': connect_args
+    }
+
+
+def database_binds(config) -> Dict:
+    """
+    SQLALCHEMY_BINDS for the configured read replica.
+
+    Args:
+        config: App config (mapping)
+
+    Returns:
+        {'replica': engine options with its url}, or {} without DATABASE_REPLICA_URL
+    """
+    url = config.get('DATABASE_REPLICA_URL')
+    if not url:
+        return {}
+
+    options = engine_options({
+        **config,
+        'SQLALCHEMY_DATABASE_URI': url,
+        'DB_STATEMENT_TIMEOUT_MS': config.get('DB_REPLICA_STATEMENT_TIMEOUT_MS')
+    })
+    return {'replica': {'url': url, **options}}
+
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -128,6 +325,8 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    JOB_QUEUE_EAGER = True
+    AUDIT_SINK_MODE = 'sync'
 
 
 config = {
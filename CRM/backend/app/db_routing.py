@@ -0,0 +1,118 @@
+"""
+Read Replica Routing
+
+With DATABASE_REPLICA_URL set, the replica is the 'replica' entry of
+SQLALCHEMY_BINDS and db.session is a RoutingSession, which sends a statement
+to the replica only when all of these hold:
+- It runs inside read_replica() / @reads_from_replica (analytics, search,
+  CSV/Excel exports and BaseQueryUseCase subclasses with read_replica = True)
+- It is a plain SELECT or a UNION of SELECTs (no FOR UPDATE) - flushes,
+  UPDATE/DELETE statements, text() statements and session.connection()
+  always use the primary
+- The session has no flushed, uncommitted writes (the replica cannot see them)
+- With DB_REPLICA_STICKY (read-your-writes), the session has not committed a
+  write yet: the replica may lag behind the primary, so once a request has
+  written, the rest of it reads the primary
+
+Everything else - including every unmarked read - keeps using the primary,
+and without a replica configured the markers do nothing.
+
+Usage:
+    @reads_from_replica
+    class AnalyticsService: ...
+
+    with read_replica():
+        rows = query.all()
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import CompoundSelect, Select
+
+REPLICA_BIND = 'replica'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+class RoutingSession(Session):
+    """Session that sends marked read-only SELECTs to the read replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._routes_to_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _execute_internal(self, statement, params=None, *, bind_arguments=None, **kwargs):
+        # A UNION of ORM queries reaches get_bind() without its statement, so
+        # pass it along for routing (execute(), scalars() and scalar() all come here)
+        if isinstance(statement, CompoundSelect):
+            bind_arguments = {'clause': statement, **(bind_arguments or {})}
+        return super()._execute_internal(statement, params, bind_arguments=bind_arguments, **kwargs)
+
+    def _routes_to_replica(self, clause) -> bool:
+        if not _use_replica.get() or self._flushing:
+            return False
+        if not isinstance(clause, (Select, CompoundSelect)) or clause._for_update_arg is not None:
+            return False
+        if self.info.get('pending_writes'):
+            return False
+        if self.info.get('wrote') and current_app.config.get('DB_REPLICA_STICKY', True):
+            return False
+        return REPLICA_BIND in self._db.engines
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session.info['pending_writes'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('pending_writes', False):
+        session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('pending_writes', None)
+
+
+@contextmanager
+def read_replica():
+    """Run the SELECTs of the block against the read replica (when configured)"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def reads_from_replica(target):
+    """
+    Decorator: run a function, or every public method of a class, in read_replica().
+
+    Args:
+        target: Function (route, use case method) or class (service, repository)
+
+    Returns:
+        The wrapped function, or the class with its public methods wrapped
+    """
+    if isinstance(target, type):
+        for name, attribute in list(vars(target).items()):
+            if name.startswith('_'):
+                continue
+            if isinstance(attribute, (staticmethod, classmethod)):
+                setattr(target, name, type(attribute)(reads_from_replica(attribute.__func__)))
+            elif callable(attribute):
+                setattr(target, name, reads_from_replica(attribute))
+        return target
+
+    @wraps(target)
+    def wrapper(*args, **kwargs):
+        with read_replica():
+            return target(*args, **kwargs)
+    return wrapper
@@ -1,14 +1,31 @@
 """
 Background Jobs Module
 Uses APScheduler for scheduling recurring tasks
+
+The scheduler runs inside the web processes, whose connections carry the web
+statement and idle-in-transaction timeouts. Scheduled jobs (rollup rebuilds,
+retention deletes, reminder runs) raise them to the worker role's values for
+each of their transactions with SET LOCAL (Postgres only).
 """
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict
+
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 import atexit
 
+from app.config import role_setting
+
 scheduler = None
 
+# Timeouts SET LOCAL on every transaction begun by the current scheduled job
+_job_timeouts = ContextVar('job_timeouts', default=None)
+
 
 def init_scheduler(app):
     """
@@ -37,9 +54,62 @@ def init_scheduler(app):
         replace_existing=True
     )
 
+    from app.jobs.analytics_rollups import refresh_analytics_rollups, rebuild_analytics_rollups
+
+    # Fold changed requests into the analytics rollups every few minutes,
+    # starting at boot so the reports are not empty until the first interval
+    rollup_minutes = app.config.get('ANALYTICS_ROLLUP_REFRESH_MINUTES', 5)
+    scheduler.add_job(
+        func=lambda: run_with_app_context(app, refresh_analytics_rollups),
+        trigger=IntervalTrigger(minutes=rollup_minutes),
+        id='analytics_rollup_refresh',
+        name='Refresh analytics rollups',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now()
+    )
+
+    # Rebuild the analytics rollups nightly at 2:30 AM
+    scheduler.add_job(
+        func=lambda: run_with_app_context(app, rebuild_analytics_rollups),
+        trigger=CronTrigger(hour=2, minute=30),
+        id='nightly_analytics_rollup_rebuild',
+        name='Rebuild analytics rollups',
+        replace_existing=True
+    )
+
+    from app.jobs.audit_partitions import maintain_audit_partitions
+
+    # Create upcoming audit log partitions and archive expired ones daily at 3 AM
+    scheduler.add_job(
+        func=lambda: run_with_app_context(app, maintain_audit_partitions),
+        trigger=CronTrigger(hour=3, minute=0),
+        id='daily_audit_partition_maintenance',
+        name='Maintain audit log partitions',
+        replace_existing=True
+    )
+
+    from app.jobs.scheduled_emails import dispatch_scheduled_emails
+
+    # Send due scheduled emails (several processes may poll; claims use SKIP LOCKED)
+    scheduled_email_seconds = app.config.get('SCHEDULED_EMAIL_POLL_SECONDS', 60)
+    scheduler.add_job(
+        func=lambda: run_with_app_context(app, dispatch_scheduled_emails),
+        trigger=IntervalTrigger(seconds=scheduled_email_seconds),
+        id='scheduled_email_dispatch',
+        name='Dispatch scheduled emails',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
     # Start the scheduler
     scheduler.start()
-    app.logger.info('APScheduler started - Daily renewal reminders scheduled for 8:00 AM')
+    app.logger.info(
+        f'APScheduler started - Daily renewal reminders scheduled for 8:00 AM, '
+        f'analytics rollups every {rollup_minutes} minutes'
+    )
 
     # Shut down the scheduler when exiting the app
     atexit.register(lambda: shutdown_scheduler())
@@ -55,11 +125,42 @@ def run_with_app_context(app, func):
         app: Flask application instance
         func: Function to run
     """
-    with app.app_context():
-        try:
-            return func()
-        except Exception as e:
-            app.logger.error(f'Scheduled job error: {str(e)}')
+    token = _job_timeouts.set(job_timeouts(app.config))
+    try:
+        with app.app_context():
+            try:
+                return func()
+            except Exception as e:
+                app.logger.error(f'Scheduled job error: {str(e)}')
+    finally:
+        _job_timeouts.reset(token)
+
+
+def job_timeouts(config) -> Dict[str, int]:
+    """
+    Postgres timeouts for scheduled jobs: the worker role's, not the web role's.
+
+    Args:
+        config: App config (mapping)
+
+    Returns:
+        Setting name -> milliseconds, for the timeouts the worker role sets
+    """
+    timeouts = {}
+    for setting, key in (('statement_timeout', 'DB_STATEMENT_TIMEOUT_MS'),
+                         ('idle_in_transaction_session_timeout', 'DB_IDLE_IN_TRANSACTION_TIMEOUT_MS')):
+        value = role_setting(config.get(key), 'worker')
+        if value:
+            timeouts[setting] = value
+    return timeouts
+
+
+@event.listens_for(Engine, 'begin')
+def _set_job_timeouts(connection):
+    timeouts = _job_timeouts.get()
+    if timeouts and connection.dialect.name == 'postgresql':
+        for setting, value in timeouts.items():
+            connection.exec_driver_sql(f'SET LOCAL {setting} = {int(value)}')
 
 
 def shutdown_scheduler():
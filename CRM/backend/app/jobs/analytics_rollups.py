@@ -0,0 +1,31 @@
+"""
+Analytics Rollups Job
+Keeps the daily analytics rollup table in step with service requests
+"""
+from flask import current_app
+
+
+def refresh_analytics_rollups(full: bool = False):
+    """
+    Refresh the daily analytics rollups.
+    Called by the scheduler every few minutes (incremental) and nightly (full).
+
+    Args:
+        full: Rebuild every day instead of only those changed since the last run
+
+    Returns:
+        dict: Number of companies and days rebuilt
+    """
+    from app.modules.analytics.services import AnalyticsRollupService
+
+    try:
+        return AnalyticsRollupService.refresh(full=full)
+
+    except Exception as e:
+        current_app.logger.error(f'Analytics rollup refresh failed: {str(e)}')
+        raise
+
+
+def rebuild_analytics_rollups():
+    """Rebuild the whole rollup table (picks up deleted requests)"""
+    return refresh_analytics_rollups(full=True)
@@ -0,0 +1,23 @@
+"""
+Audit Partitions Job
+Creates upcoming access/activity log partitions and applies the retention policy
+"""
+from flask import current_app
+
+
+def maintain_audit_partitions():
+    """
+    Create next months' audit log partitions and archive expired ones.
+    Called by the scheduler daily.
+
+    Returns:
+        dict: Partitions created and archived, rows deleted per table
+    """
+    from app.modules.audit.services import AuditPartitionService
+
+    try:
+        return AuditPartitionService.maintain()
+
+    except Exception as e:
+        current_app.logger.error(f'Audit partition maintenance failed: {str(e)}')
+        raise
@@ -0,0 +1,66 @@
+"""
+Background Job model
+Rows of the database-backed job queue processed by the worker (worker.py).
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class BackgroundJob(db.Model):
+    """
+    A queued call of a @background_task function.
+
+    Lifecycle: pending -> running -> succeeded, or back to pending with a
+    later run_at after a failure, until max_attempts is reached and the job
+    is dead-lettered (status 'dead'). Dead jobs stay in the table for
+    inspection and can be re-queued with `flask requeue-dead-jobs`.
+    """
+    __tablename__ = 'background_jobs'
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_DEAD = 'dead'
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(50), nullable=False, default='default')
+    task = db.Column(db.String(255), nullable=False)  # Dotted path of the task function
+    args = db.Column(db.JSON, default=list)
+    kwargs = db.Column(db.JSON, default=dict)
+
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Not claimed before this time
+
+    # Set while running; a job whose lease expired (worker died) is claimed again
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_background_jobs_claim', 'queue', 'status', 'run_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'queue': self.queue,
+            'task': self.task,
+            'args': self.args,
+            'kwargs': self.kwargs,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.task} {self.status}>'
@@ -0,0 +1,345 @@
+"""
+Background Job Queue
+====================
+Database-backed queue for slow side effects (emails, in-app notifications,
+webhooks, third-party pushes) so they run in the worker process instead of
+inside the HTTP request.
+
+Usage:
+    from app.jobs.queue import background_task
+
+    @background_task(queue='email')
+    def notify_admins_of_new_request(request_id):
+        ...
+
+    # In a usecase, after committing the request:
+    notify_admins_of_new_request.delay(request.id)
+
+Arguments are stored as JSON, so pass IDs rather than model instances.
+Jobs are claimed per queue by worker.py with FOR UPDATE SKIP LOCKED on
+Postgres. A failed job is retried with exponential backoff, and after
+max_attempts failures it is dead-lettered (status 'dead').
+
+With JOB_QUEUE_EAGER enabled (tests, or a local server started without a
+worker) .delay() runs the task inline, so emails are still sent and
+automations still run; a failing task is logged and not retried.
+"""
+import functools
+import importlib
+import json
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, func, or_, text
+
+from app.extensions import db
+from app.jobs.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Registered task name -> BackgroundTask
+_tasks = {}
+
+
+class BackgroundTask:
+    """A function that can be run now, or enqueued with .delay()"""
+
+    def __init__(self, func, queue: str, max_attempts: int):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.name = f'{func.__module__}.{func.__qualname__}'
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs) -> Optional[BackgroundJob]:
+        """
+        Enqueue a call of this task and commit it.
+
+        Returns:
+            The queued BackgroundJob, or None when the task ran inline (eager mode)
+        """
+        return JobQueue.enqueue(self, args=args, kwargs=kwargs)
+
+
+def background_task(queue: str = 'default', max_attempts: int = 5):
+    """
+    Register a function as a background task.
+
+    Args:
+        queue: Queue the task's jobs are placed on (concurrency is limited per queue)
+        max_attempts: Attempts before a failing job is dead-lettered
+    """
+    def decorator(func):
+        task = BackgroundTask(func, queue=queue, max_attempts=max_attempts)
+        _tasks[task.name] = task
+        return task
+    return decorator
+
+
+def get_task(name: str) -> Optional[BackgroundTask]:
+    """Look up a registered task, importing its module if it is not loaded yet"""
+    if name not in _tasks:
+        module_name = name.rsplit('.', 1)[0]
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            return None
+    return _tasks.get(name)
+
+
+class JobQueue:
+    """Enqueues, claims and runs background jobs"""
+
+    # Namespace of the Postgres advisory locks serialising claims per queue
+    ADVISORY_LOCK_NAMESPACE = 7305002
+
+    @classmethod
+    def enqueue(cls, task: BackgroundTask, args=(), kwargs=None,
+                run_at: datetime = None, commit: bool = True) -> Optional[BackgroundJob]:
+        """
+        Add a job for a task to its queue.
+
+        Args:
+            task: Task registered with @background_task
+            args: Positional arguments (JSON serialisable)
+            kwargs: Keyword arguments (JSON serialisable)
+            run_at: Earliest time the job may run (default: now)
+            commit: Commit the session (set False to enqueue inside a larger transaction)
+
+        Returns:
+            The queued BackgroundJob, or None when the task ran inline (eager mode)
+        """
+        args = list(args)
+        kwargs = kwargs or {}
+        # Fail at the call site, not in the worker, if a model instance is passed
+        json.dumps([args, kwargs])
+
+        if current_app.config.get('JOB_QUEUE_EAGER'):
+            try:
+                task(*args, **kwargs)
+            except Exception as e:
+                current_app.logger.error(f'Background task {task.name} failed: {str(e)}')
+            return None
+
+        job = BackgroundJob(
+            queue=task.queue,
+            task=task.name,
+            args=args,
+            kwargs=kwargs,
+            max_attempts=task.max_attempts,
+            run_at=run_at or datetime.utcnow()
+        )
+        db.session.add(job)
+        if commit:
+            db.session.commit()
+        return job
+
+    @classmethod
+    def claim(cls, queue: str, limit: int, worker_id: str) -> List[int]:
+        """
+        Lock up to `limit` due jobs of a queue for this worker.
+
+        The number of running jobs across all workers never exceeds the
+        queue's concurrency limit. Jobs whose lease expired (their worker
+        died) are claimed again.
+
+        Args:
+            queue: Queue name
+            limit: Free slots in this worker
+            worker_id: Identifier stored in locked_by
+
+        Returns:
+            IDs of the claimed jobs
+        """
+        now = datetime.utcnow()
+        lease = timedelta(seconds=current_app.config.get('JOB_QUEUE_LEASE_SECONDS', 300))
+
+        try:
+            cls._lock_queue(queue)
+
+            running = db.session.query(func.count(BackgroundJob.id)).filter(
+                BackgroundJob.queue == queue,
+                BackgroundJob.status == BackgroundJob.STATUS_RUNNING,
+                BackgroundJob.locked_until > now
+            ).scalar()
+            limit = min(limit, cls.concurrency_limits().get(queue, 1) - running)
+            if limit <= 0:
+                db.session.commit()
+                return []
+
+            query = BackgroundJob.query.filter(
+                BackgroundJob.queue == queue,
+                BackgroundJob.run_at <= now,
+                or_(
+                    BackgroundJob.status == BackgroundJob.STATUS_PENDING,
+                    and_(
+                        BackgroundJob.status == BackgroundJob.STATUS_RUNNING,
+                        BackgroundJob.locked_until <= now
+                    )
+                )
+            ).order_by(BackgroundJob.run_at, BackgroundJob.id).limit(limit)
+
+            if db.engine.dialect.name == 'postgresql':
+                query = query.with_for_update(skip_locked=True)
+
+            claimed = []
+            for job in query.all():
+                if job.attempts >= job.max_attempts:
+                    # Its lease expired on the final attempt
+                    cls._dead_letter(job, job.last_error or 'Lease expired on final attempt')
+                    continue
+                job.status = BackgroundJob.STATUS_RUNNING
+                job.attempts += 1
+                job.locked_by = worker_id
+                job.locked_until = now + lease
+                job.started_at = now
+                claimed.append(job.id)
+
+            db.session.commit()
+            return claimed
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def run(cls, job_id: int) -> bool:
+        """
+        Run a claimed job and record the outcome.
+
+        Args:
+            job_id: ID of a job claimed by this worker
+
+        Returns:
+            True if the task succeeded
+        """
+        job = db.session.get(BackgroundJob, job_id)
+        if job is None or job.status != BackgroundJob.STATUS_RUNNING:
+            return False
+
+        task = get_task(job.task)
+        if task is None:
+            cls._dead_letter(job, f'Unknown task {job.task}')
+            db.session.commit()
+            return False
+
+        args, kwargs = job.args or [], job.kwargs or {}
+        try:
+            task(*args, **kwargs)
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(BackgroundJob, job_id)
+            cls._record_failure(job, e)
+            db.session.commit()
+            return False
+
+        job = db.session.get(BackgroundJob, job_id)
+        job.status = BackgroundJob.STATUS_SUCCEEDED
+        job.finished_at = datetime.utcnow()
+        job.locked_by = None
+        job.locked_until = None
+        job.last_error = None
+        db.session.commit()
+        return True
+
+    @classmethod
+    def requeue_dead(cls, queue: str = None) -> int:
+        """
+        Move dead-lettered jobs back to pending with a fresh set of attempts.
+
+        Args:
+            queue: Only requeue this queue (default: all queues)
+
+        Returns:
+            Number of jobs requeued
+        """
+        query = BackgroundJob.query.filter(BackgroundJob.status == BackgroundJob.STATUS_DEAD)
+        if queue:
+            query = query.filter(BackgroundJob.queue == queue)
+
+        count = query.update({
+            'status': BackgroundJob.STATUS_PENDING,
+            'attempts': 0,
+            'run_at': datetime.utcnow(),
+            'finished_at': None
+        }, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    @classmethod
+    def prune(cls, older_than: timedelta) -> int:
+        """Delete succeeded jobs finished before the given age"""
+        count = BackgroundJob.query.filter(
+            BackgroundJob.status == BackgroundJob.STATUS_SUCCEEDED,
+            BackgroundJob.finished_at < datetime.utcnow() - older_than
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def concurrency_limits(config=None) -> Dict[str, int]:
+        """
+        Parse JOB_QUEUE_CONCURRENCY ('default=4,email=4,automations=2').
+
+        Returns:
+            Dict of queue name -> maximum jobs running at once across all workers
+        """
+        config = config or current_app.config
+        limits = {}
+        for item in config.get('JOB_QUEUE_CONCURRENCY', 'default=4').split(','):
+            name, _, value = item.strip().partition('=')
+            if name:
+                limits[name] = int(value or 1)
+        return limits
+
+    @classmethod
+    def backoff_seconds(cls, attempts: int) -> float:
+        """Exponential backoff with jitter before attempt number attempts + 1"""
+        base = current_app.config.get('JOB_QUEUE_BACKOFF_SECONDS', 30)
+        cap = current_app.config.get('JOB_QUEUE_BACKOFF_MAX_SECONDS', 3600)
+        delay = min(base * 2 ** (attempts - 1), cap)
+        return delay + random.uniform(0, delay * 0.1)
+
+    @classmethod
+    def _record_failure(cls, job: BackgroundJob, error: Exception):
+        """Schedule a retry, or dead-letter the job after its last attempt"""
+        message = f'{type(error).__name__}: {error}'
+        if job.attempts >= job.max_attempts:
+            cls._dead_letter(job, message)
+            return
+
+        delay = cls.backoff_seconds(job.attempts)
+        job.status = BackgroundJob.STATUS_PENDING
+        job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+        job.locked_by = None
+        job.locked_until = None
+        job.last_error = message
+        logger.warning(
+            f'Job {job.id} ({job.task}) failed on attempt {job.attempts}/{job.max_attempts}, '
+            f'retrying in {delay:.0f}s: {message}'
+        )
+
+    @staticmethod
+    def _dead_letter(job: BackgroundJob, message: str):
+        """Stop retrying a job"""
+        job.status = BackgroundJob.STATUS_DEAD
+        job.finished_at = datetime.utcnow()
+        job.locked_by = None
+        job.locked_until = None
+        job.last_error = message
+        logger.error(f'Job {job.id} ({job.task}) dead-lettered after {job.attempts} attempts: {message}')
+
+    @classmethod
+    def _lock_queue(cls, queue: str):
+        """Serialise claims on a queue across workers (Postgres only, held until commit)"""
+        if db.engine.dialect.name != 'postgresql':
+            return
+        db.session.execute(
+            text('SELECT pg_advisory_xact_lock(:namespace, hashtext(:queue))'),
+            {'namespace': cls.ADVISORY_LOCK_NAMESPACE, 'queue': queue}
+        )
@@ -0,0 +1,29 @@
+"""
+Scheduled Emails Job
+Sends ScheduledEmail rows whose scheduled_at has passed
+"""
+from flask import current_app
+
+
+def dispatch_scheduled_emails():
+    """
+    Claim and send due scheduled emails.
+    Called by the scheduler every SCHEDULED_EMAIL_POLL_SECONDS.
+
+    Returns:
+        dict: Emails processed, recipients sent and failed
+    """
+    from app.modules.notifications.services import ScheduledEmailDispatcher
+
+    try:
+        result = ScheduledEmailDispatcher.dispatch_due()
+        if result['emails']:
+            current_app.logger.info(
+                f'Scheduled emails dispatched: {result["emails"]} emails, '
+                f'{result["sent"]} sent, {result["failed"]} failed'
+            )
+        return result
+
+    except Exception as e:
+        current_app.logger.error(f'Scheduled email dispatch failed: {str(e)}')
+        raise
@@ -0,0 +1,115 @@
+"""
+Background Job Worker
+Polls the job queue and runs claimed jobs on a thread pool per queue.
+Started with `python worker.py`.
+"""
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from app.extensions import db
+from app.jobs.queue import JobQueue
+
+
+class JobWorker:
+    """
+    Runs background jobs until stopped.
+
+    Each queue has its own thread pool sized by JOB_QUEUE_CONCURRENCY, so a
+    backlog of slow webhooks cannot hold up email jobs. The limits are also
+    enforced across workers when claiming (see JobQueue.claim).
+    """
+
+    # Delete succeeded jobs older than this, checked hourly
+    PRUNE_AFTER = timedelta(days=7)
+    PRUNE_INTERVAL_SECONDS = 3600
+
+    def __init__(self, app, queues=None):
+        """
+        Args:
+            app: Flask application instance
+            queues: Queue names to process (default: every queue in JOB_QUEUE_CONCURRENCY)
+        """
+        self.app = app
+        limits = JobQueue.concurrency_limits(app.config)
+        if queues:
+            limits = {queue: limits.get(queue, 1) for queue in queues}
+        self.limits = limits
+
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval = app.config.get('JOB_QUEUE_POLL_SECONDS', 2)
+        self._executors = {
+            queue: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f'job-{queue}')
+            for queue, limit in limits.items()
+        }
+        self._in_flight = {queue: set() for queue in limits}
+        self._stopping = threading.Event()
+        self._last_prune = 0
+
+    def run(self):
+        """Process jobs until SIGTERM/SIGINT, then let running jobs finish"""
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        signal.signal(signal.SIGINT, lambda *_: self.stop())
+
+        self.app.logger.info(
+            f'Job worker {self.worker_id} started - queues: '
+            + ', '.join(f'{queue} ({limit})' for queue, limit in self.limits.items())
+        )
+
+        while not self._stopping.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                self.app.logger.error(f'Job worker poll failed: {str(e)}')
+                claimed = 0
+            if not claimed:
+                self._stopping.wait(self.poll_interval)
+
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        self.app.logger.info(f'Job worker {self.worker_id} stopped')
+
+    def stop(self):
+        """Stop claiming new jobs"""
+        self._stopping.set()
+
+    def run_once(self) -> int:
+        """
+        Claim jobs for every queue with free threads and submit them.
+
+        Returns:
+            Number of jobs claimed
+        """
+        claimed = 0
+        with self.app.app_context():
+            for queue, limit in self.limits.items():
+                in_flight = {future for future in self._in_flight[queue] if not future.done()}
+                self._in_flight[queue] = in_flight
+
+                free = limit - len(in_flight)
+                if free <= 0:
+                    continue
+
+                for job_id in JobQueue.claim(queue, free, self.worker_id):
+                    in_flight.add(self._executors[queue].submit(self._run_job, job_id))
+                    claimed += 1
+
+            if time.monotonic() - self._last_prune > self.PRUNE_INTERVAL_SECONDS:
+                self._last_prune = time.monotonic()
+                JobQueue.prune(self.PRUNE_AFTER)
+
+        return claimed
+
+    def _run_job(self, job_id: int):
+        """Run one job in its own app context (and so its own session)"""
+        with self.app.app_context():
+            try:
+                JobQueue.run(job_id)
+            except Exception as e:
+                self.app.logger.error(f'Job {job_id} could not be recorded: {str(e)}')
+            finally:
+                db.session.remove()
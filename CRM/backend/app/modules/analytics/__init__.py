@@ -5,7 +5,8 @@ This module provides analytics and reporting functionality for the application,
 including dashboard metrics, workload analysis, and revenue breakdowns.
 
 Clean Architecture Structure:
-- services/: Business logic services (AnalyticsService)
+- models/: Pre-aggregated report tables (DailyRequestRollup)
+- services/: Business logic services (AnalyticsService, AnalyticsRollupService)
 - routes/: API route handlers
 
 For backward compatibility, key exports are available at the module level:
@@ -0,0 +1,9 @@
+"""
+Analytics module models
+"""
+from .daily_rollup import DailyRequestRollup, RollupWatermark
+
+__all__ = [
+    'DailyRequestRollup',
+    'RollupWatermark',
+]
@@ -0,0 +1,56 @@
+"""
+Daily Request Rollup models
+Pre-aggregated service request totals used by the analytics reports.
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class DailyRequestRollup(db.Model):
+    """
+    Service request totals for one company, day, service, client and status.
+
+    The day is the request's completion date, or its creation date while it is
+    not yet completed. Rows are rebuilt per (company, day) by
+    AnalyticsRollupService, so reports only scan the days in their date range.
+    """
+    __tablename__ = 'analytics_daily_rollups'
+
+    company_id = db.Column(db.String(36), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    service_id = db.Column(db.Integer, primary_key=True)
+    client_id = db.Column(db.String(36), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+
+    request_count = db.Column(db.Integer, nullable=False, default=0)
+    paid_count = db.Column(db.Integer, nullable=False, default=0)
+    paid_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)  # invoice_amount of paid requests
+    # Paid requests with a completion date (the revenue reports' date ranges filter on completed_at)
+    paid_completed_count = db.Column(db.Integer, nullable=False, default=0)
+    paid_completed_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    invoiced_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)  # invoice_amount of all requests
+    # Requests with a completion date, and their invoice_amount (the lodgement summary)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_invoiced_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    labor_hours = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_analytics_daily_rollups_company_day', 'company_id', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<DailyRequestRollup {self.company_id} {self.day} {self.service_id} {self.status}>'
+
+
+class RollupWatermark(db.Model):
+    """Highest source updated_at already folded into a rollup table"""
+    __tablename__ = 'analytics_rollup_watermarks'
+
+    name = db.Column(db.String(100), primary_key=True)
+    watermark = db.Column(db.DateTime)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RollupWatermark {self.name} {self.watermark}>'
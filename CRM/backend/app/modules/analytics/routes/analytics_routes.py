@@ -30,9 +30,12 @@ GET /api/analytics/revenue/by-service
 
 GET /api/analytics/lodgement-summary
     Get lodgement/completion summary over time.
-    Query params: period (monthly, quarterly, yearly)
+    Query params: period (monthly, quarterly, yearly), date_from, date_to
     Required role: Admin or higher
 
+The revenue and lodgement reports read from the daily rollup table, which the
+scheduler refreshes every ANALYTICS_ROLLUP_REFRESH_MINUTES.
+
 Security Notes:
 --------------
 - Super admin can view analytics for any company using company_id param
@@ -185,7 +188,21 @@ def get_lodgement_summary():
     if period not in ['monthly', 'quarterly', 'yearly']:
         return error_response('Invalid period. Use monthly, quarterly, or yearly', 400)
 
-    summary = AnalyticsService.get_lodgement_summary(company_id, period)
+    # Parse dates
+    date_from = None
+    date_to = None
+    if request.args.get('date_from'):
+        try:
+            date_from = datetime.fromisoformat(request.args.get('date_from'))
+        except ValueError:
+            pass
+    if request.args.get('date_to'):
+        try:
+            date_to = datetime.fromisoformat(request.args.get('date_to'))
+        except ValueError:
+            pass
+
+    summary = AnalyticsService.get_lodgement_summary(company_id, period, date_from, date_to)
     return success_response(summary)
 
 
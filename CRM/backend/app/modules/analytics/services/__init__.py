@@ -4,5 +4,6 @@ Analytics services module
 This module contains the business logic services for analytics.
 """
 from .analytics_service import AnalyticsService
+from .rollup_service import AnalyticsRollupService
 
-__all__ = ['AnalyticsService']
+__all__ = ['AnalyticsService', 'AnalyticsRollupService']
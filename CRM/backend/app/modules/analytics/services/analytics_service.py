@@ -4,9 +4,12 @@ Analytics module services
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from sqlalchemy import func, and_
+from sqlalchemy.orm import contains_eager, joinedload
+from app.db_routing import reads_from_replica
 from app.extensions import db
 
 
+@reads_from_replica
 class AnalyticsService:
     """Service for generating analytics and reports"""
 
@@ -50,8 +53,8 @@ class AnalyticsService:
     @staticmethod
     def get_accountant_workload(company_id: str) -> List[Dict[str, Any]]:
         """Get workload statistics for each accountant"""
-        from app.modules.services.models import ServiceRequest
         from app.modules.user.models import User, Role
+        from app.modules.services.services.workload_service import WorkloadService
 
         # Get all accountants in the company
         accountants = User.query.join(Role).filter(
@@ -59,30 +62,20 @@ class AnalyticsService:
             Role.name.in_(['accountant', 'admin'])
         ).all()
 
+        # Counts for every accountant come from one grouped (and briefly cached) query
+        workload = WorkloadService.get_company_workload(company_id)
+
         result = []
         for accountant in accountants:
-            # Count active assignments
-            active_count = ServiceRequest.query.filter(
-                ServiceRequest.assigned_accountant_id == accountant.id,
-                ServiceRequest.status.notin_(['completed'])
-            ).count()
-
-            # Count completed this month
-            first_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            completed_count = ServiceRequest.query.filter(
-                ServiceRequest.assigned_accountant_id == accountant.id,
-                ServiceRequest.status == 'completed',
-                ServiceRequest.completed_at >= first_of_month
-            ).count()
-
+            counts = workload.get(accountant.id, {})
             result.append({
                 'accountant': {
                     'id': accountant.id,
                     'email': accountant.email,
                     'full_name': accountant.full_name
                 },
-                'active_requests': active_count,
-                'completed_this_month': completed_count
+                'active_requests': counts.get('active_requests', 0),
+                'completed_this_month': counts.get('completed_this_month', 0)
             })
 
         return sorted(result, key=lambda x: x['active_requests'], reverse=True)
@@ -118,29 +111,27 @@ class AnalyticsService:
         date_from: datetime = None,
         date_to: datetime = None
     ) -> List[Dict[str, Any]]:
-        """Get revenue breakdown by client"""
-        from app.modules.services.models import ServiceRequest
+        """Get revenue breakdown by client (read from the daily rollups)"""
+        from app.modules.analytics.models import DailyRequestRollup
         from app.modules.user.models import User
 
+        paid_count, paid_revenue = AnalyticsService._paid_rollup_columns(date_from, date_to)
+
         query = db.session.query(
             User.id,
             User.email,
             User.first_name,
             User.last_name,
-            func.sum(ServiceRequest.invoice_amount).label('total_revenue'),
-            func.count(ServiceRequest.id).label('request_count')
-        ).join(ServiceRequest, ServiceRequest.user_id == User.id).filter(
-            User.company_id == company_id,
-            ServiceRequest.invoice_paid == True
+            func.sum(paid_revenue).label('total_revenue'),
+            func.sum(paid_count).label('request_count')
+        ).join(DailyRequestRollup, DailyRequestRollup.client_id == User.id).filter(
+            DailyRequestRollup.company_id == company_id,
+            paid_count > 0,
+            *AnalyticsService._rollup_date_filters(date_from, date_to)
         )
 
-        if date_from:
-            query = query.filter(ServiceRequest.completed_at >= date_from)
-        if date_to:
-            query = query.filter(ServiceRequest.completed_at <= date_to)
-
         query = query.group_by(User.id, User.email, User.first_name, User.last_name)
-        query = query.order_by(func.sum(ServiceRequest.invoice_amount).desc())
+        query = query.order_by(func.sum(paid_revenue).desc())
 
         results = query.all()
 
@@ -151,7 +142,7 @@ class AnalyticsService:
                 'full_name': f'{r.first_name or ""} {r.last_name or ""}'.strip() or r.email
             },
             'total_revenue': float(r.total_revenue) if r.total_revenue else 0,
-            'request_count': r.request_count
+            'request_count': int(r.request_count)
         } for r in results]
 
     @staticmethod
@@ -160,30 +151,26 @@ class AnalyticsService:
         date_from: datetime = None,
         date_to: datetime = None
     ) -> List[Dict[str, Any]]:
-        """Get revenue breakdown by service type"""
-        from app.modules.services.models import ServiceRequest, Service
-        from app.modules.user.models import User
+        """Get revenue breakdown by service type (read from the daily rollups)"""
+        from app.modules.analytics.models import DailyRequestRollup
+        from app.modules.services.models import Service
+
+        paid_count, paid_revenue = AnalyticsService._paid_rollup_columns(date_from, date_to)
 
         query = db.session.query(
             Service.id,
             Service.name,
             Service.category,
-            func.sum(ServiceRequest.invoice_amount).label('total_revenue'),
-            func.count(ServiceRequest.id).label('request_count')
-        ).join(ServiceRequest, ServiceRequest.service_id == Service.id).join(
-            User, ServiceRequest.user_id == User.id
-        ).filter(
-            User.company_id == company_id,
-            ServiceRequest.invoice_paid == True
+            func.sum(paid_revenue).label('total_revenue'),
+            func.sum(paid_count).label('request_count')
+        ).join(DailyRequestRollup, DailyRequestRollup.service_id == Service.id).filter(
+            DailyRequestRollup.company_id == company_id,
+            paid_count > 0,
+            *AnalyticsService._rollup_date_filters(date_from, date_to)
         )
 
-        if date_from:
-            query = query.filter(ServiceRequest.completed_at >= date_from)
-        if date_to:
-            query = query.filter(ServiceRequest.completed_at <= date_to)
-
         query = query.group_by(Service.id, Service.name, Service.category)
-        query = query.order_by(func.sum(ServiceRequest.invoice_amount).desc())
+        query = query.order_by(func.sum(paid_revenue).desc())
 
         results = query.all()
 
@@ -194,49 +181,83 @@ class AnalyticsService:
                 'category': r.category
             },
             'total_revenue': float(r.total_revenue) if r.total_revenue else 0,
-            'request_count': r.request_count
+            'request_count': int(r.request_count)
         } for r in results]
 
     @staticmethod
     def get_lodgement_summary(
         company_id: str,
-        period: str = 'monthly'  # monthly, quarterly, yearly
+        period: str = 'monthly',  # monthly, quarterly, yearly
+        date_from: datetime = None,
+        date_to: datetime = None
     ) -> Dict[str, Any]:
-        """Get lodgement/completion statistics over time"""
+        """Get lodgement/completion statistics over time (read from the daily rollups)"""
+        from app.modules.analytics.models import DailyRequestRollup
         from app.modules.services.models import ServiceRequest
-        from app.modules.user.models import User
-
-        # Use strftime for SQLite compatibility (works with PostgreSQL too)
-        if period == 'monthly':
-            period_expr = func.strftime('%Y-%m', ServiceRequest.completed_at)
-        elif period == 'quarterly':
-            # For quarterly, extract year and quarter
-            period_expr = func.strftime('%Y-Q', ServiceRequest.completed_at) + \
-                         func.cast((func.cast(func.strftime('%m', ServiceRequest.completed_at), db.Integer) - 1) / 3 + 1, db.String)
-        else:  # yearly
-            period_expr = func.strftime('%Y', ServiceRequest.completed_at)
 
-        query = db.session.query(
-            period_expr.label('period'),
-            func.count(ServiceRequest.id).label('completed_count'),
-            func.sum(ServiceRequest.invoice_amount).label('total_revenue')
-        ).join(User, ServiceRequest.user_id == User.id).filter(
-            User.company_id == company_id,
-            ServiceRequest.status == 'completed',
-            ServiceRequest.completed_at.isnot(None)
-        ).group_by(period_expr).order_by(period_expr)
-
-        results = query.all()
+        # Completions per day (completed requests without a completed_at are
+        # not lodgements); days are folded into periods here rather than with
+        # database-specific date formatting functions
+        results = db.session.query(
+            DailyRequestRollup.day,
+            func.sum(DailyRequestRollup.completed_count).label('completed_count'),
+            func.sum(DailyRequestRollup.completed_invoiced_amount).label('total_revenue')
+        ).filter(
+            DailyRequestRollup.company_id == company_id,
+            DailyRequestRollup.status == ServiceRequest.STATUS_COMPLETED,
+            DailyRequestRollup.completed_count > 0,
+            *AnalyticsService._rollup_date_filters(date_from, date_to)
+        ).group_by(DailyRequestRollup.day).order_by(DailyRequestRollup.day).all()
+
+        periods = {}
+        for r in results:
+            if period == 'monthly':
+                key = r.day.strftime('%Y-%m')
+            elif period == 'quarterly':
+                key = f'{r.day.year}-Q{(r.day.month - 1) // 3 + 1}'
+            else:  # yearly
+                key = str(r.day.year)
+
+            totals = periods.setdefault(key, {'completed_count': 0, 'total_revenue': 0.0})
+            totals['completed_count'] += int(r.completed_count or 0)
+            totals['total_revenue'] += float(r.total_revenue or 0)
 
         return {
             'period_type': period,
             'data': [{
-                'period': r.period,
-                'completed_count': r.completed_count,
-                'total_revenue': float(r.total_revenue) if r.total_revenue else 0
-            } for r in results]
+                'period': key,
+                'completed_count': totals['completed_count'],
+                'total_revenue': totals['total_revenue']
+            } for key, totals in periods.items()]
         }
 
+    @staticmethod
+    def _paid_rollup_columns(date_from: datetime = None, date_to: datetime = None) -> tuple:
+        """
+        Paid count and revenue rollup columns for a revenue breakdown.
+
+        A date range only counts paid requests completed within it (an open
+        request's rollup day is its creation date); without one every paid
+        request counts.
+        """
+        from app.modules.analytics.models import DailyRequestRollup
+
+        if date_from or date_to:
+            return DailyRequestRollup.paid_completed_count, DailyRequestRollup.paid_completed_revenue
+        return DailyRequestRollup.paid_count, DailyRequestRollup.paid_revenue
+
+    @staticmethod
+    def _rollup_date_filters(date_from: datetime = None, date_to: datetime = None) -> list:
+        """Inclusive day-range filters on the daily rollups"""
+        from app.modules.analytics.models import DailyRequestRollup
+
+        filters = []
+        if date_from:
+            filters.append(DailyRequestRollup.day >= date_from.date())
+        if date_to:
+            filters.append(DailyRequestRollup.day <= date_to.date())
+        return filters
+
     @staticmethod
     def get_dashboard_metrics(company_id: str) -> Dict[str, Any]:
         """Get key metrics for dashboard"""
@@ -323,7 +344,6 @@ class AnalyticsService:
         from app.modules.services.models.job_note import JobNote
         from app.modules.services.models.query import Query
         from app.modules.user.models import User, Role
-        from app.modules.client_entity.models import ClientEntity
 
         # Base filters
         base_filters = [User.company_id == company_id]
@@ -340,60 +360,72 @@ class AnalyticsService:
         if date_to:
             base_filters.append(ServiceRequest.created_at <= date_to)
 
-        # ============ SUMMARY METRICS ============
-
-        # Total requests count
-        total_requests = ServiceRequest.query.join(
-            User, ServiceRequest.user_id == User.id
-        ).filter(*base_filters).count()
+        # Per-request query counts and job note minutes, aggregated once and
+        # joined to every breakdown below (keeps the statement count fixed
+        # regardless of how many clients/requests the company has)
+        request_queries = db.session.query(
+            Query.service_request_id.label('service_request_id'),
+            func.count(Query.id).label('query_count')
+        ).group_by(Query.service_request_id).subquery('request_queries')
 
-        # Status breakdown
-        status_query = db.session.query(
-            ServiceRequest.status,
-            func.count(ServiceRequest.id)
-        ).join(User, ServiceRequest.user_id == User.id).filter(
-            *base_filters
-        ).group_by(ServiceRequest.status).all()
+        request_notes = db.session.query(
+            JobNote.service_request_id.label('service_request_id'),
+            func.sum(JobNote.time_spent_minutes).label('note_minutes')
+        ).group_by(JobNote.service_request_id).subquery('request_notes')
 
-        status_breakdown = {status: count for status, count in status_query}
+        query_count = func.coalesce(request_queries.c.query_count, 0)
+        note_minutes = func.coalesce(request_notes.c.note_minutes, 0)
 
-        # Total revenue (paid invoices only)
-        total_revenue = db.session.query(
-            func.sum(ServiceRequest.invoice_amount)
-        ).join(User, ServiceRequest.user_id == User.id).filter(
-            *base_filters,
-            ServiceRequest.invoice_paid == True
-        ).scalar() or 0
-
-        # Total time spent from labor_hours
-        labor_hours_total = db.session.query(
-            func.sum(ServiceRequest.labor_hours)
-        ).join(User, ServiceRequest.user_id == User.id).filter(
-            *base_filters
-        ).scalar() or 0
+        # ============ SUMMARY METRICS ============
 
-        # Additional time from job notes
-        job_notes_time = db.session.query(
-            func.sum(JobNote.time_spent_minutes)
-        ).join(
-            ServiceRequest, JobNote.service_request_id == ServiceRequest.id
+        # One grouped scan per status; totals are summed from the status rows
+        status_rows = db.session.query(
+            ServiceRequest.status,
+            func.count(ServiceRequest.id).label('request_count'),
+            func.sum(
+                db.case(
+                    (ServiceRequest.invoice_paid == True, ServiceRequest.invoice_amount),
+                    else_=0
+                )
+            ).label('revenue'),
+            func.sum(ServiceRequest.labor_hours).label('labor_hours'),
+            func.sum(note_minutes).label('note_minutes'),
+            func.sum(query_count).label('query_count')
         ).join(
             User, ServiceRequest.user_id == User.id
-        ).filter(*base_filters).scalar() or 0
+        ).outerjoin(
+            request_queries, request_queries.c.service_request_id == ServiceRequest.id
+        ).outerjoin(
+            request_notes, request_notes.c.service_request_id == ServiceRequest.id
+        ).filter(*base_filters).group_by(ServiceRequest.status).all()
 
-        total_time_spent_hours = float(labor_hours_total) + (job_notes_time / 60)
+        status_breakdown = {r.status: r.request_count for r in status_rows}
+        total_requests = sum(r.request_count for r in status_rows)
+        total_revenue = sum(float(r.revenue or 0) for r in status_rows)
+        labor_hours_total = sum(float(r.labor_hours or 0) for r in status_rows)
+        job_notes_time = sum(int(r.note_minutes or 0) for r in status_rows)
+        total_queries = sum(int(r.query_count or 0) for r in status_rows)
 
-        # Total queries count
-        total_queries = db.session.query(
-            func.count(Query.id)
-        ).join(
-            ServiceRequest, Query.service_request_id == ServiceRequest.id
-        ).join(
-            User, ServiceRequest.user_id == User.id
-        ).filter(*base_filters).scalar() or 0
+        total_time_spent_hours = labor_hours_total + (job_notes_time / 60)
 
         # ============ CLIENT BREAKDOWN ============
 
+        # Lifetime entity/query/job-note totals per client (not date filtered)
+        client_totals = db.session.query(
+            ServiceRequest.user_id.label('user_id'),
+            func.count(func.distinct(ServiceRequest.client_entity_id)).label('entity_count'),
+            func.sum(query_count).label('query_count'),
+            func.sum(note_minutes).label('note_minutes')
+        ).join(
+            User, ServiceRequest.user_id == User.id
+        ).outerjoin(
+            request_queries, request_queries.c.service_request_id == ServiceRequest.id
+        ).outerjoin(
+            request_notes, request_notes.c.service_request_id == ServiceRequest.id
+        ).filter(
+            User.company_id == company_id
+        ).group_by(ServiceRequest.user_id).subquery('client_totals')
+
         # Get clients with their metrics
         client_query = db.session.query(
             User.id,
@@ -407,11 +439,16 @@ class AnalyticsService:
                     else_=0
                 )
             ).label('total_revenue'),
-            func.sum(ServiceRequest.labor_hours).label('labor_hours')
+            func.sum(ServiceRequest.labor_hours).label('labor_hours'),
+            func.max(client_totals.c.entity_count).label('entity_count'),
+            func.max(client_totals.c.query_count).label('query_count'),
+            func.max(client_totals.c.note_minutes).label('note_minutes')
         ).join(
             ServiceRequest, ServiceRequest.user_id == User.id
         ).join(
             Role, User.role_id == Role.id
+        ).outerjoin(
+            client_totals, client_totals.c.user_id == User.id
         ).filter(
             User.company_id == company_id,
             Role.name == 'user'
@@ -427,67 +464,47 @@ class AnalyticsService:
             User.id, User.email, User.first_name, User.last_name
         ).order_by(func.count(ServiceRequest.id).desc())
 
-        client_results = client_query.all()
-
         clients = []
-        for client in client_results:
-            # Get entity count for this client
-            entity_count = db.session.query(
-                func.count(func.distinct(ServiceRequest.client_entity_id))
-            ).filter(
-                ServiceRequest.user_id == client.id,
-                ServiceRequest.client_entity_id.isnot(None)
-            ).scalar() or 0
-
-            # Get query count for this client's requests
-            query_count = db.session.query(
-                func.count(Query.id)
-            ).join(
-                ServiceRequest, Query.service_request_id == ServiceRequest.id
-            ).filter(ServiceRequest.user_id == client.id).scalar() or 0
-
-            # Get job notes time for this client
-            client_job_notes_time = db.session.query(
-                func.sum(JobNote.time_spent_minutes)
-            ).join(
-                ServiceRequest, JobNote.service_request_id == ServiceRequest.id
-            ).filter(ServiceRequest.user_id == client.id).scalar() or 0
-
+        for client in client_query.all():
             client_labor_hours = float(client.labor_hours) if client.labor_hours else 0
-            client_total_time = client_labor_hours + (client_job_notes_time / 60)
+            client_total_time = client_labor_hours + (int(client.note_minutes or 0) / 60)
 
             clients.append({
                 'client_id': client.id,
                 'client_name': f'{client.first_name or ""} {client.last_name or ""}'.strip() or client.email,
                 'client_email': client.email,
-                'entity_count': entity_count,
+                'entity_count': int(client.entity_count or 0),
                 'request_count': client.request_count,
                 'total_revenue': float(client.total_revenue) if client.total_revenue else 0,
                 'total_time_spent_hours': round(client_total_time, 2),
-                'query_count': query_count
+                'query_count': int(client.query_count or 0)
             })
 
         # ============ REQUEST DETAILS ============
 
-        # Get individual request details
-        requests_query = ServiceRequest.query.join(
+        # Get individual request details with service/client/entity loaded in the same statement
+        requests_query = db.session.query(
+            ServiceRequest,
+            query_count.label('query_count'),
+            note_minutes.label('note_minutes')
+        ).join(
             User, ServiceRequest.user_id == User.id
         ).join(
             Service, ServiceRequest.service_id == Service.id
+        ).outerjoin(
+            request_queries, request_queries.c.service_request_id == ServiceRequest.id
+        ).outerjoin(
+            request_notes, request_notes.c.service_request_id == ServiceRequest.id
+        ).options(
+            contains_eager(ServiceRequest.user),
+            contains_eager(ServiceRequest.service),
+            joinedload(ServiceRequest.client_entity)
         ).filter(*base_filters).order_by(ServiceRequest.created_at.desc()).limit(100)
 
         requests_detail = []
-        for req in requests_query.all():
-            # Get query count for this request
-            req_query_count = Query.query.filter_by(service_request_id=req.id).count()
-
-            # Get job notes time for this request
-            req_job_notes_time = db.session.query(
-                func.sum(JobNote.time_spent_minutes)
-            ).filter(JobNote.service_request_id == req.id).scalar() or 0
-
+        for req, req_query_count, req_job_notes_time in requests_query.all():
             req_labor_hours = float(req.labor_hours) if req.labor_hours else 0
-            req_total_time = req_labor_hours + (req_job_notes_time / 60)
+            req_total_time = req_labor_hours + (int(req_job_notes_time or 0) / 60)
 
             requests_detail.append({
                 'request_id': req.id,
@@ -500,7 +517,7 @@ class AnalyticsService:
                 'invoice_amount': float(req.invoice_amount) if req.invoice_amount else None,
                 'invoice_paid': req.invoice_paid,
                 'time_spent_hours': round(req_total_time, 2),
-                'query_count': req_query_count,
+                'query_count': int(req_query_count or 0),
                 'created_at': req.created_at.isoformat() if req.created_at else None
             })
 
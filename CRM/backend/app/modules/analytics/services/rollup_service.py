@@ -0,0 +1,209 @@
+"""
+Analytics rollup service
+
+Maintains the analytics_daily_rollups table that the revenue and lodgement
+reports read from, so their cost depends on the requested date range rather
+than on the size of the service_requests history.
+
+Refreshes are incremental: requests whose updated_at is at or after the stored
+watermark (less a small overlap for in-flight transactions) identify the
+(company, day) buckets to rebuild. Deleted requests and completion dates that
+are moved after the fact are only picked up by a full rebuild, which the
+scheduler runs nightly.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable
+
+from sqlalchemy import and_, func, insert, literal, select, text
+
+from app.extensions import db
+from app.modules.analytics.models import DailyRequestRollup, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsRollupService:
+    """Builds and incrementally refreshes the daily request rollups"""
+
+    WATERMARK_NAME = 'analytics_daily_rollups'
+
+    # Re-scan this far behind the watermark so rows committed late by
+    # long-running transactions are not skipped (rebuilding a bucket is idempotent)
+    WATERMARK_OVERLAP = timedelta(minutes=5)
+
+    # Postgres advisory lock key so concurrent workers don't rebuild the same buckets
+    ADVISORY_LOCK_KEY = 7305001
+
+    @classmethod
+    def refresh(cls, full: bool = False) -> Dict[str, int]:
+        """
+        Bring the rollup table up to date.
+
+        Args:
+            full: Rebuild every bucket instead of only those touched since the watermark
+
+        Returns:
+            Dict with the number of companies and days rebuilt
+        """
+        from app.modules.services.models import ServiceRequest
+
+        if not cls._try_lock():
+            logger.info('Analytics rollup refresh already running in another worker, skipping')
+            return {'companies': 0, 'days': 0, 'skipped': True}
+
+        state = db.session.get(RollupWatermark, cls.WATERMARK_NAME)
+        high_watermark = db.session.query(func.max(ServiceRequest.updated_at)).scalar()
+
+        try:
+            if full or state is None or state.watermark is None:
+                result = cls._rebuild_all()
+            else:
+                result = cls._rebuild_changed_since(state.watermark - cls.WATERMARK_OVERLAP)
+
+            if state is None:
+                state = RollupWatermark(name=cls.WATERMARK_NAME)
+                db.session.add(state)
+            if high_watermark is not None:
+                state.watermark = high_watermark
+            state.refreshed_at = datetime.utcnow()
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        logger.info(
+            f'Analytics rollups refreshed ({"full" if full else "incremental"}): '
+            f'{result["companies"]} companies, {result["days"]} days'
+        )
+        return result
+
+    @classmethod
+    def _rebuild_all(cls) -> Dict[str, int]:
+        """Replace every rollup row from the full request history"""
+        db.session.query(DailyRequestRollup).delete(synchronize_session=False)
+        db.session.execute(cls._insert_from(cls._aggregate_query()))
+
+        companies, days = db.session.query(
+            func.count(func.distinct(DailyRequestRollup.company_id)),
+            func.count(func.distinct(DailyRequestRollup.day))
+        ).one()
+        return {'companies': companies, 'days': days}
+
+    @classmethod
+    def _rebuild_changed_since(cls, since: datetime) -> Dict[str, int]:
+        """Rebuild the (company, day) buckets of requests updated since the given time"""
+        from app.modules.services.models import ServiceRequest
+        from app.modules.user.models import User
+
+        # A request can sit in its creation-day bucket until it completes, so
+        # both days are rebuilt to move it out of the old bucket
+        changed = db.session.query(
+            User.company_id,
+            func.date(ServiceRequest.created_at, type_=db.Date),
+            func.date(ServiceRequest.completed_at, type_=db.Date)
+        ).join(
+            User, ServiceRequest.user_id == User.id
+        ).filter(
+            ServiceRequest.updated_at >= since,
+            User.company_id.isnot(None)
+        ).distinct().all()
+
+        affected = defaultdict(set)
+        for company_id, created_day, completed_day in changed:
+            for day in (created_day, completed_day):
+                if day is not None:
+                    affected[company_id].add(day)
+
+        for company_id, days in affected.items():
+            cls._rebuild_days(company_id, days)
+
+        return {
+            'companies': len(affected),
+            'days': sum(len(days) for days in affected.values())
+        }
+
+    @classmethod
+    def _rebuild_days(cls, company_id: str, days: Iterable):
+        """Replace the rollup rows of one company for the given days"""
+        from app.modules.user.models import User
+
+        days = list(days)
+        db.session.query(DailyRequestRollup).filter(
+            DailyRequestRollup.company_id == company_id,
+            DailyRequestRollup.day.in_(days)
+        ).delete(synchronize_session=False)
+
+        query = cls._aggregate_query().where(
+            User.company_id == company_id,
+            cls._day_expression().in_(days)
+        )
+        db.session.execute(cls._insert_from(query))
+
+    @staticmethod
+    def _day_expression():
+        """Completion date, or creation date while the request is open"""
+        from app.modules.services.models import ServiceRequest
+
+        return func.date(
+            func.coalesce(ServiceRequest.completed_at, ServiceRequest.created_at),
+            type_=db.Date
+        )
+
+    @classmethod
+    def _aggregate_query(cls):
+        """SELECT producing one row per (company, day, service, client, status)"""
+        from app.modules.services.models import ServiceRequest
+        from app.modules.user.models import User
+
+        day = cls._day_expression()
+        status = func.coalesce(ServiceRequest.status, ServiceRequest.STATUS_PENDING)
+        paid = ServiceRequest.invoice_paid == True
+        completed = ServiceRequest.completed_at.isnot(None)
+        paid_completed = and_(paid, completed)
+
+        return select(
+            User.company_id,
+            day,
+            ServiceRequest.service_id,
+            ServiceRequest.user_id,
+            status,
+            func.count(ServiceRequest.id),
+            func.count(ServiceRequest.id).filter(paid),
+            func.coalesce(func.sum(ServiceRequest.invoice_amount).filter(paid), 0),
+            func.count(ServiceRequest.id).filter(paid_completed),
+            func.coalesce(func.sum(ServiceRequest.invoice_amount).filter(paid_completed), 0),
+            func.coalesce(func.sum(ServiceRequest.invoice_amount), 0),
+            func.count(ServiceRequest.id).filter(completed),
+            func.coalesce(func.sum(ServiceRequest.invoice_amount).filter(completed), 0),
+            func.coalesce(func.sum(ServiceRequest.labor_hours), 0),
+            literal(datetime.utcnow(), db.DateTime)
+        ).join(
+            User, ServiceRequest.user_id == User.id
+        ).where(
+            User.company_id.isnot(None)
+        ).group_by(
+            User.company_id, day, ServiceRequest.service_id, ServiceRequest.user_id, status
+        )
+
+    @staticmethod
+    def _insert_from(query):
+        """INSERT ... SELECT into the rollup table"""
+        return insert(DailyRequestRollup).from_select([
+            'company_id', 'day', 'service_id', 'client_id', 'status',
+            'request_count', 'paid_count', 'paid_revenue', 'paid_completed_count', 'paid_completed_revenue',
+            'invoiced_amount', 'completed_count', 'completed_invoiced_amount', 'labor_hours',
+            'refreshed_at'
+        ], query)
+
+    @classmethod
+    def _try_lock(cls) -> bool:
+        """Take a transaction-scoped advisory lock on Postgres (always succeeds elsewhere)"""
+        if db.engine.dialect.name != 'postgresql':
+            return True
+        return bool(db.session.execute(
+            text('SELECT pg_try_advisory_xact_lock(:key)'),
+            {'key': cls.ADVISORY_LOCK_KEY}
+        ).scalar())
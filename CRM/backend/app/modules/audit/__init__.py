@@ -6,7 +6,8 @@ and user impersonation functionality.
 
 Structure:
     models/         - Database models (ActivityLog, AccessLog, ImpersonationSession)
-    services/       - Business logic services (ActivityLogger, AccessLogger, GeolocationService)
+    services/       - Business logic services (ActivityLogger, AccessLogger, AuditSink, AuditPartitionService,
+                    GeolocationService)
     routes/         - API endpoints
     repositories.py - Data access layer
     usecases.py     - Use case implementations
@@ -30,7 +31,9 @@ from .models.access_log import AccessLog  # noqa: E402
 # Import services directly from subfolder
 from .services.activity_logger import ActivityLogger  # noqa: E402
 from .services.access_logger import AccessLogger  # noqa: E402
+from .services.audit_sink import AuditSink  # noqa: E402
 from .services.geolocation_service import GeolocationService  # noqa: E402
+from .services.partition_service import AuditPartitionService  # noqa: E402
 
 # Import routes to register endpoints (must be after blueprint creation)
 from .routes import audit_routes  # noqa: E402, F401
@@ -99,6 +102,8 @@ __all__ = [
     # Services
     'ActivityLogger',
     'AccessLogger',
+    'AuditSink',
+    'AuditPartitionService',
     'GeolocationService',
 
     # Repositories
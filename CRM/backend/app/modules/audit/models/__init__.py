@@ -3,9 +3,11 @@ Audit module models
 """
 from .audit_log import ActivityLog, ImpersonationSession
 from .access_log import AccessLog
+from .ip_geolocation import IPGeolocation
 
 __all__ = [
     'ActivityLog',
     'ImpersonationSession',
     'AccessLog',
+    'IPGeolocation',
 ]
@@ -66,6 +66,7 @@ class AccessLog(db.Model):
     company_id = db.Column(db.String(36), db.ForeignKey('companies.id', ondelete='SET NULL'), nullable=True)
 
     # Timestamps
+    # Monthly partition key on Postgres (upgrade_db_5.sql)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # Relationships
@@ -34,6 +34,7 @@ class ActivityLog(db.Model):
     user_agent = db.Column(db.String(500))
 
     # Timestamp
+    # Monthly partition key on Postgres (upgrade_db_5.sql)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # Relationships
@@ -0,0 +1,19 @@
+"""
+IP Geolocation model
+HTTP geolocation lookups shared by every process, so an IP is looked up over
+HTTP at most once per GEOIP_CACHE_TTL_SECONDS across all workers.
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class IPGeolocation(db.Model):
+    """Result of an HTTP geolocation lookup of one IP address"""
+    __tablename__ = 'ip_geolocations'
+
+    ip_address = db.Column(db.String(50), primary_key=True)
+    data = db.Column(db.JSON, nullable=False)  # GeolocationService lookup result
+    looked_up_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<IPGeolocation {self.ip_address}>'
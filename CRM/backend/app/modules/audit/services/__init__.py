@@ -2,11 +2,15 @@
 Audit module services
 """
 from .activity_logger import ActivityLogger
+from .audit_sink import AuditSink
 from .access_logger import AccessLogger
 from .geolocation_service import GeolocationService
+from .partition_service import AuditPartitionService
 
 __all__ = [
     'ActivityLogger',
     'AccessLogger',
+    'AuditPartitionService',
+    'AuditSink',
     'GeolocationService',
 ]
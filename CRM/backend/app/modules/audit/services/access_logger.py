@@ -2,9 +2,12 @@
 Access Logger Service
 Handles logging of user access events with geolocation and device information.
 """
+import uuid
+from datetime import datetime
 from flask import request, has_request_context, current_app
 from app.extensions import db
 from app.modules.audit.models import AccessLog
+from .audit_sink import AuditSink
 from .geolocation_service import GeolocationService
 
 
@@ -37,7 +40,7 @@ class AccessLogger:
             request_obj: Flask request object (uses current request if not provided)
 
         Returns:
-            AccessLog object
+            AccessLog object (detached - the row is written asynchronously by AuditSink)
         """
         # Use provided request or current request
         req = request_obj or (request if has_request_context() else None)
@@ -47,26 +50,22 @@ class AccessLogger:
             return None
 
         try:
+            from app.modules.user.models import User
+
             # Get full access information (IP, geolocation, device)
             access_info = GeolocationService.get_full_access_info(req)
 
+            user = db.session.get(User, user_id) if user_id else None
+
             # Get user for company_id if not provided
-            if company_id is None:
-                try:
-                    from app.modules.user.models import User
-                    user = User.query.get(user_id)
-                    if user:
-                        company_id = user.company_id
-                except Exception:
-                    pass
+            if company_id is None and user:
+                company_id = user.company_id
 
             # Check for suspicious access
             is_suspicious = False
             threat_level = 'low'
             if is_successful:
                 try:
-                    from app.modules.user.models import User
-                    user = User.query.get(user_id)
                     is_suspicious, threat_level, reasons = GeolocationService.check_suspicious_access(
                         access_info, user
                     )
@@ -77,8 +76,8 @@ class AccessLogger:
                 except Exception as e:
                     current_app.logger.warning(f'Error checking suspicious access: {str(e)}')
 
-            # Create access log entry
-            log_entry = AccessLog(
+            values = dict(
+                id=str(uuid.uuid4()),
                 user_id=user_id,
                 access_type=access_type,
                 ip_address=access_info.get('ip_address'),
@@ -121,13 +120,24 @@ class AccessLogger:
                 threat_level=threat_level,
 
                 # Company
-                company_id=company_id
+                company_id=company_id,
+                created_at=datetime.utcnow()
             )
 
-            db.session.add(log_entry)
-            db.session.flush()
+            after_write = None
+            if access_info.get('needs_enrichment'):
+                # Queued once the row is written, so the job always finds it. The sink runs
+                # this in its own app context: the commit is not the caller's transaction
+                from app.jobs.queue import JobQueue
+                from app.modules.audit.tasks import enrich_access_log_location
+                log_id = values['id']
+                after_write = lambda: JobQueue.enqueue(enrich_access_log_location, args=(log_id,))
 
-            return log_entry
+            # Written by the audit sink, outside the caller's transaction
+            AuditSink.submit(AccessLog, values, after_write=after_write)
+
+            # Detached copy for callers; not part of the session
+            return AccessLog(**values)
 
         except Exception as e:
             current_app.logger.error(f'Error logging access: {str(e)}')
@@ -248,72 +258,55 @@ class AccessLogger:
 
     @staticmethod
     def get_access_stats(user_id: str = None, company_id: str = None, days: int = 30):
-        """Get access statistics"""
+        """
+        Get access statistics.
+
+        All metrics come from one scan of the window grouped by (device type,
+        country); the created_at bound lets Postgres skip the monthly
+        partitions outside it.
+        """
         from datetime import datetime, timedelta
         from sqlalchemy import func
 
         since = datetime.utcnow() - timedelta(days=days)
-        query = AccessLog.query.filter(AccessLog.created_at >= since)
+        query = db.session.query(
+            AccessLog.device_type,
+            AccessLog.country_code,
+            func.count(AccessLog.id),
+            func.count(AccessLog.id).filter(
+                AccessLog.access_type == AccessLog.ACCESS_LOGIN,
+                AccessLog.is_successful == True
+            ),
+            func.count(AccessLog.id).filter(AccessLog.access_type == AccessLog.ACCESS_FAILED_LOGIN),
+            func.count(AccessLog.id).filter(AccessLog.is_suspicious == True)
+        ).filter(AccessLog.created_at >= since)
 
         if user_id:
-            query = query.filter_by(user_id=user_id)
-        if company_id:
-            query = query.filter_by(company_id=company_id)
-
-        # Total accesses
-        total = query.count()
-
-        # Successful logins
-        successful_logins = query.filter_by(
-            access_type=AccessLog.ACCESS_LOGIN,
-            is_successful=True
-        ).count()
-
-        # Failed logins
-        failed_logins = query.filter_by(
-            access_type=AccessLog.ACCESS_FAILED_LOGIN
-        ).count()
-
-        # Suspicious accesses
-        suspicious = query.filter_by(is_suspicious=True).count()
-
-        # Unique countries
-        countries = db.session.query(
-            AccessLog.country_code
-        ).filter(
-            AccessLog.created_at >= since,
-            AccessLog.country_code.isnot(None)
-        )
-        if user_id:
-            countries = countries.filter(AccessLog.user_id == user_id)
-        if company_id:
-            countries = countries.filter(AccessLog.company_id == company_id)
-
-        unique_countries = countries.distinct().count()
-
-        # Unique devices (by user agent)
-        devices = db.session.query(
-            AccessLog.device_type
-        ).filter(
-            AccessLog.created_at >= since
-        )
-        if user_id:
-            devices = devices.filter(AccessLog.user_id == user_id)
+            query = query.filter(AccessLog.user_id == user_id)
         if company_id:
-            devices = devices.filter(AccessLog.company_id == company_id)
+            query = query.filter(AccessLog.company_id == company_id)
 
+        total = successful_logins = failed_logins = suspicious = 0
+        countries = set()
         device_breakdown = {}
-        for row in devices.distinct().all():
-            if row[0]:
-                count = query.filter_by(device_type=row[0]).count()
-                device_breakdown[row[0]] = count
+        for device_type, country_code, count, successful, failed, flagged in query.group_by(
+            AccessLog.device_type, AccessLog.country_code
+        ):
+            total += count
+            successful_logins += successful
+            failed_logins += failed
+            suspicious += flagged
+            if country_code:
+                countries.add(country_code)
+            if device_type:
+                device_breakdown[device_type] = device_breakdown.get(device_type, 0) + count
 
         return {
             'total_accesses': total,
             'successful_logins': successful_logins,
             'failed_logins': failed_logins,
             'suspicious_accesses': suspicious,
-            'unique_countries': unique_countries,
+            'unique_countries': len(countries),
             'device_breakdown': device_breakdown,
             'period_days': days
         }
@@ -2,10 +2,13 @@
 Activity Logger Service
 Handles logging of user activities across the system.
 """
+import uuid
+from datetime import datetime
 from flask import request, has_request_context
 from flask_jwt_extended import get_jwt_identity
 from app.extensions import db
 from app.modules.audit.models import ActivityLog
+from .audit_sink import AuditSink
 
 
 class ActivityLogger:
@@ -30,6 +33,9 @@ class ActivityLogger:
             details: Additional details as dict
             performed_by_id: ID of user who performed the action (auto-detected if not provided)
             company_id: Company ID for scoping (auto-detected if not provided)
+
+        Returns:
+            ActivityLog object (detached - the row is written asynchronously by AuditSink)
         """
         # Auto-detect performer if not provided
         if performed_by_id is None and has_request_context():
@@ -38,11 +44,11 @@ class ActivityLogger:
             except Exception:
                 pass
 
-        # Auto-detect company if not provided
+        # Auto-detect company if not provided (the current user is usually already in the session)
         if company_id is None and performed_by_id:
             try:
                 from app.modules.user.models import User
-                user = User.query.get(performed_by_id)
+                user = db.session.get(User, performed_by_id)
                 if user:
                     company_id = user.company_id
             except Exception:
@@ -55,7 +61,8 @@ class ActivityLogger:
             ip_address = request.remote_addr
             user_agent = request.headers.get('User-Agent', '')[:500]
 
-        log_entry = ActivityLog(
+        values = dict(
+            id=str(uuid.uuid4()),
             entity_type=entity_type,
             entity_id=str(entity_id),
             action=action,
@@ -63,14 +70,15 @@ class ActivityLogger:
             performed_by_id=performed_by_id,
             company_id=company_id,
             ip_address=ip_address,
-            user_agent=user_agent
+            user_agent=user_agent,
+            created_at=datetime.utcnow()
         )
 
-        db.session.add(log_entry)
-        # Don't commit here - let the calling code manage transactions
-        db.session.flush()
+        # Written by the audit sink, outside the caller's transaction
+        AuditSink.submit(ActivityLog, values)
 
-        return log_entry
+        # Detached copy for callers; not part of the session
+        return ActivityLog(**values)
 
     @staticmethod
     def log_create(entity_type: str, entity_id: str, entity_data: dict = None, **kwargs):
@@ -0,0 +1,242 @@
+"""
+Audit Sink
+Buffers access/activity log rows in memory and bulk-inserts them from a
+background thread, outside the business transaction they describe.
+
+Modes (AUDIT_SINK_MODE):
+- buffered: rows are queued and written in batches by a flusher thread every
+  AUDIT_SINK_FLUSH_SECONDS (or as soon as AUDIT_SINK_BATCH_SIZE rows are
+  waiting). Remaining rows are flushed when the process exits.
+- sync: rows are written immediately on their own connection (testing config,
+  and the fallback when the buffer is full so audit rows are never dropped).
+
+after_write callbacks (e.g. queueing geo-IP enrichment) never run in the
+caller's app context, so whatever they commit is not the caller's business
+transaction. In buffered mode - including the buffer-full fallback - they run
+on a separate callback thread, so neither the request nor the flusher waits on
+them (with JOB_QUEUE_EAGER the enrichment makes an HTTP call). In sync mode
+they run inline, in a fresh app context with its own session.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import insert
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+MODE_BUFFERED = 'buffered'
+MODE_SYNC = 'sync'
+
+
+class AuditSink:
+    """Process-wide buffered writer for audit tables"""
+
+    _queue = None
+    _thread = None
+    _callbacks = None
+    _callback_thread = None
+    _pid = None
+    _app = None
+    _stopping = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, model, values: dict, after_write=None):
+        """
+        Queue one row for insertion.
+
+        Args:
+            model: Mapped class of the audit table (AccessLog, ActivityLog)
+            values: Column values, including the primary key
+            after_write: Optional callable run (in its own app context) once the row is committed
+        """
+        values = cls._complete_row(model, values)
+
+        if current_app.config.get('AUDIT_SINK_MODE', MODE_BUFFERED) == MODE_SYNC:
+            if cls._write_now(model, values) and after_write is not None:
+                with current_app._get_current_object().app_context():
+                    cls._run_callbacks([after_write])
+            return
+
+        cls._ensure_started()
+        try:
+            cls._queue.put_nowait((model, values, after_write))
+        except queue.Full:
+            # Slower, but audit rows are not dropped under load
+            logger.warning('Audit buffer full - writing audit row synchronously')
+            if cls._write_now(model, values):
+                cls._defer_callbacks([after_write])
+
+    @classmethod
+    def flush(cls):
+        """Write everything queued so far (blocks until done)"""
+        if cls._queue is None or cls._pid != os.getpid():
+            return
+        cls._write_batch(cls._drain())
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the flusher and callback threads, writing the remaining rows and running their callbacks"""
+        if cls._thread is None or cls._pid != os.getpid():
+            return
+        cls._stopping.set()
+        try:
+            cls._queue.put_nowait(None)  # Wake the flusher if it is waiting for rows
+        except queue.Full:
+            pass
+        cls._thread.join(timeout=10)
+        cls.flush()
+        cls._thread = None
+
+        cls._callbacks.put(None)
+        cls._callback_thread.join(timeout=10)
+        cls._callback_thread = None
+
+    @staticmethod
+    def _complete_row(model, values: dict) -> dict:
+        """Fill in column defaults so every row of a table has the same keys (needed for executemany)"""
+        row = {}
+        for column in model.__table__.columns:
+            if column.key in values:
+                row[column.key] = values[column.key]
+            elif column.default is not None and column.default.is_callable:
+                row[column.key] = column.default.arg(None)
+            elif column.default is not None and column.default.is_scalar:
+                row[column.key] = column.default.arg
+            else:
+                row[column.key] = None
+        return row
+
+    @classmethod
+    def _ensure_started(cls):
+        """Start the flusher thread on first use in this process (threads do not survive fork)"""
+        if cls._thread is not None and cls._pid == os.getpid():
+            return
+        with cls._lock:
+            if cls._thread is not None and cls._pid == os.getpid():
+                return
+            config = current_app.config
+            cls._app = current_app._get_current_object()
+            cls._queue = queue.Queue(maxsize=config.get('AUDIT_SINK_QUEUE_SIZE', 10000))
+            cls._stopping = threading.Event()
+            cls._pid = os.getpid()
+            cls._callbacks = queue.Queue()
+            cls._thread = threading.Thread(target=cls._run, name='audit-sink', daemon=True)
+            cls._thread.start()
+            cls._callback_thread = threading.Thread(
+                target=cls._run_callback_thread, name='audit-sink-callbacks', daemon=True
+            )
+            cls._callback_thread.start()
+            atexit.register(cls.shutdown)
+
+    @classmethod
+    def _run(cls):
+        """Flusher loop: wait for the first row, then batch up what arrives within the flush interval"""
+        interval = cls._app.config.get('AUDIT_SINK_FLUSH_SECONDS', 1.0)
+        batch_size = cls._app.config.get('AUDIT_SINK_BATCH_SIZE', 500)
+
+        while not cls._stopping.is_set():
+            try:
+                first = cls._queue.get(timeout=interval)
+            except queue.Empty:
+                continue
+            if first is None:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + interval
+            while len(batch) < batch_size and not cls._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = cls._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is not None:
+                    batch.append(item)
+            cls._write_batch(batch)
+
+    @classmethod
+    def _run_callback_thread(cls):
+        """Callback loop: run each after_write in its own app context until shutdown() sends None"""
+        while True:
+            callback = cls._callbacks.get()
+            if callback is None:
+                return
+            with cls._app.app_context():
+                cls._run_callbacks([callback])
+
+    @classmethod
+    def _defer_callbacks(cls, callbacks):
+        """Hand after_write callbacks to the callback thread"""
+        for callback in callbacks:
+            if callback is not None:
+                cls._callbacks.put(callback)
+
+    @classmethod
+    def _drain(cls, limit=None):
+        """Take up to limit queued rows without blocking"""
+        items = []
+        while limit is None or len(items) < limit:
+            try:
+                item = cls._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                items.append(item)
+        return items
+
+    @classmethod
+    def _write_batch(cls, batch):
+        """Insert a batch with one executemany per table, then hand the after_write callbacks to the callback thread"""
+        if not batch:
+            return
+
+        with cls._app.app_context():
+            rows = defaultdict(list)
+            for model, values, _ in batch:
+                rows[model].append(values)
+
+            try:
+                with db.engine.begin() as connection:
+                    for model, values in rows.items():
+                        connection.execute(insert(model.__table__), values)
+            except Exception as e:
+                # One bad row (e.g. a user deleted meanwhile) must not lose the batch
+                logger.warning(f'Audit batch insert failed, retrying rows one by one: {str(e)}')
+                cls._defer_callbacks(
+                    after_write for model, values, after_write in batch if cls._write_now(model, values)
+                )
+                return
+
+        cls._defer_callbacks(after_write for _, _, after_write in batch)
+
+    @staticmethod
+    def _write_now(model, values) -> bool:
+        """Insert a single row on its own connection and commit it; returns whether it was written"""
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(model.__table__), [values])
+        except Exception as e:
+            logger.error(f'Failed to write {model.__tablename__} row: {str(e)}')
+            return False
+        return True
+
+    @staticmethod
+    def _run_callbacks(callbacks):
+        for callback in callbacks:
+            if callback is None:
+                continue
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f'Audit after_write callback failed: {str(e)}')
@@ -1,16 +1,42 @@
 """
 Geolocation Service for IP address lookup and user agent parsing.
-Uses free IP geolocation APIs and user-agent parsing libraries.
+
+IP addresses are looked up in a local MMDB/CSV database (GEOIP_DATABASE_PATH)
+behind an in-process LRU cache, so logging an access never waits on a remote
+API. The free HTTP geolocation APIs are only used for optional enrichment,
+run as a background job after the access log is written (GEOIP_HTTP_ENRICHMENT).
+HTTP results are stored in the ip_geolocations table, shared by every process,
+and reused for GEOIP_CACHE_TTL_SECONDS.
 """
 import requests
 import re
+import time
+from datetime import datetime, timedelta
 from flask import current_app
+from sqlalchemy import insert, select, update
 from user_agents import parse as parse_user_agent
 
+from app.common.cache import LRUCache
+from app.extensions import db
+from .ip_database import DATABASE_ERRORS, open_ip_database
+
+# GEOIP_HTTP_ENRICHMENT modes
+ENRICH_MISSING = 'missing'  # Only IPs the local database does not know
+ENRICH_ALWAYS = 'always'    # Every public IP (adds ISP and proxy/hosting flags)
+ENRICH_OFF = 'off'
+
 
 class GeolocationService:
     """Service for getting location data from IP addresses and parsing user agents"""
 
+    # Lookup results keyed by IP address, created on first use from config
+    _cache = None
+
+    # Database paths that failed to open -> when to try again (skipped until
+    # then, so a missing or unreadable file is not reopened on every lookup)
+    _failed_databases = {}
+    DATABASE_RETRY_SECONDS = 300
+
     # Free IP Geolocation APIs (no API key required for basic usage)
     IP_API_URL = 'http://ip-api.com/json/{ip}?fields=status,message,country,countryCode,region,regionName,city,zip,lat,lon,timezone,isp,org,as,proxy,hosting,query'
     IPAPI_CO_URL = 'https://ipapi.co/{ip}/json/'
@@ -67,10 +93,10 @@ class GeolocationService:
     def lookup_ip(cls, ip_address):
         """
         Look up geolocation data for an IP address.
-        Uses multiple fallback APIs for reliability.
+        Uses the in-process cache and the local IP database only (no network calls).
 
         Returns:
-            dict with geolocation data or empty dict on failure
+            dict with geolocation data, with lookup_failed set if the IP is unknown
         """
         # Don't lookup private/local IPs
         if cls.is_private_ip(ip_address):
@@ -83,11 +109,47 @@ class GeolocationService:
                 'is_private': True
             }
 
+        cache = cls._get_cache()
+        cached = cache.get(ip_address)
+        if cached is not None:
+            return dict(cached)
+
+        result = cls._lookup_local(ip_address)
+        if result:
+            cache.set(ip_address, result)
+            return dict(result)
+
+        # Unknown locally - HTTP enrichment (if enabled) fills the access log in later
+        return {
+            'ip_address': ip_address,
+            'ip_type': cls.get_ip_type(ip_address),
+            'lookup_failed': True
+        }
+
+    @classmethod
+    def lookup_ip_http(cls, ip_address):
+        """
+        Look up an IP address with the HTTP geolocation APIs, unless a recent
+        result is cached in this process or in the ip_geolocations table.
+        Slow (up to two 5 second requests) - only called from background jobs.
+
+        Returns:
+            dict with geolocation data, or None if all APIs fail
+        """
+        cached = cls._get_cache().get(ip_address)
+        if cached is not None and cached.get('source') == 'http':
+            return dict(cached)
+
+        stored = cls._stored_http_result(ip_address)
+        if stored is not None:
+            cls._get_cache().set(ip_address, stored)
+            return dict(stored)
+
         # Try primary API (ip-api.com)
         try:
             result = cls._lookup_ip_api(ip_address)
             if result:
-                return result
+                return cls._cache_http_result(ip_address, result)
         except Exception as e:
             current_app.logger.warning(f'ip-api.com lookup failed: {str(e)}')
 
@@ -95,17 +157,98 @@ class GeolocationService:
         try:
             result = cls._lookup_ipapi_co(ip_address)
             if result:
-                return result
+                return cls._cache_http_result(ip_address, result)
         except Exception as e:
             current_app.logger.warning(f'ipapi.co lookup failed: {str(e)}')
 
-        # Return minimal data if all APIs fail
+        return None
+
+    @classmethod
+    def needs_enrichment(cls, geo_data):
+        """Whether an access with this lookup result should be enriched over HTTP"""
+        mode = current_app.config.get('GEOIP_HTTP_ENRICHMENT', ENRICH_MISSING)
+        if mode == ENRICH_OFF or geo_data.get('is_private') or geo_data.get('source') == 'http':
+            return False
+        if mode == ENRICH_ALWAYS:
+            return True
+        return bool(geo_data.get('lookup_failed'))
+
+    @classmethod
+    def _lookup_local(cls, ip_address):
+        """Look up an IP address in the configured local database"""
+        path = current_app.config.get('GEOIP_DATABASE_PATH')
+        if not path or cls._failed_databases.get(path, 0) > time.monotonic():
+            return None
+
+        try:
+            database = open_ip_database(path)
+        except DATABASE_ERRORS as e:
+            # Retried later: the file may be mounted or fixed after boot
+            cls._failed_databases[path] = time.monotonic() + cls.DATABASE_RETRY_SECONDS
+            current_app.logger.error(f'Could not open IP database {path}: {str(e)}')
+            return None
+        cls._failed_databases.pop(path, None)
+
+        try:
+            location = database.lookup(ip_address)
+        except DATABASE_ERRORS as e:
+            # A corrupt record affects one lookup, not the whole database
+            current_app.logger.warning(f'IP database lookup of {ip_address} failed: {str(e)}')
+            return None
+
+        if not location:
+            return None
         return {
             'ip_address': ip_address,
             'ip_type': cls.get_ip_type(ip_address),
-            'lookup_failed': True
+            'source': 'local',
+            **location
         }
 
+    @classmethod
+    def _cache_http_result(cls, ip_address, result):
+        """Cache an HTTP lookup here and in ip_geolocations, so no process looks the IP up again soon"""
+        from app.modules.audit.models import IPGeolocation
+
+        result['source'] = 'http'
+        cls._get_cache().set(ip_address, result)
+
+        # Own session: the caller's transaction (the access log update) is left alone
+        try:
+            with db.engine.begin() as connection:
+                values = {'data': result, 'looked_up_at': datetime.utcnow()}
+                updated = connection.execute(
+                    update(IPGeolocation).where(IPGeolocation.ip_address == ip_address).values(**values)
+                ).rowcount
+                if not updated:
+                    connection.execute(insert(IPGeolocation).values(ip_address=ip_address, **values))
+        except Exception as e:
+            current_app.logger.warning(f'Could not store geolocation of {ip_address}: {str(e)}')
+        return result
+
+    @classmethod
+    def _stored_http_result(cls, ip_address):
+        """HTTP lookup result another process stored within GEOIP_CACHE_TTL_SECONDS, or None"""
+        from app.modules.audit.models import IPGeolocation
+
+        ttl = current_app.config.get('GEOIP_CACHE_TTL_SECONDS', 86400)
+        stored = db.session.execute(
+            select(IPGeolocation.data).where(
+                IPGeolocation.ip_address == ip_address,
+                IPGeolocation.looked_up_at >= datetime.utcnow() - timedelta(seconds=ttl)
+            )
+        ).scalar()
+        return dict(stored) if stored else None
+
+    @classmethod
+    def _get_cache(cls):
+        if cls._cache is None:
+            cls._cache = LRUCache(
+                maxsize=current_app.config.get('GEOIP_CACHE_SIZE', 10000),
+                ttl=current_app.config.get('GEOIP_CACHE_TTL_SECONDS', 86400)
+            )
+        return cls._cache
+
     @classmethod
     def _lookup_ip_api(cls, ip_address):
         """Lookup using ip-api.com (free, no API key needed)"""
@@ -276,17 +419,21 @@ class GeolocationService:
             # Security flags
             'is_proxy': geo_data.get('is_proxy', False),
             'is_vpn': geo_data.get('is_proxy', False),  # ip-api returns proxy for VPNs too
-            'is_hosting': geo_data.get('is_hosting', False)
+            'is_hosting': geo_data.get('is_hosting', False),
+
+            # Location to be completed by a background HTTP lookup
+            'needs_enrichment': cls.needs_enrichment(geo_data)
         }
 
     @classmethod
-    def check_suspicious_access(cls, access_info, user=None):
+    def check_suspicious_access(cls, access_info, user=None, exclude_log_id=None):
         """
         Check if an access attempt appears suspicious.
 
         Args:
             access_info: dict from get_full_access_info
             user: Optional User object to check against historical data
+            exclude_log_id: Access log to leave out of the history (the one being checked)
 
         Returns:
             tuple (is_suspicious, threat_level, reasons)
@@ -318,10 +465,13 @@ class GeolocationService:
             from app.modules.audit.models import AccessLog
 
             # Get user's recent successful logins
-            recent_logs = AccessLog.query.filter_by(
+            history = AccessLog.query.filter_by(
                 user_id=user.id,
                 is_successful=True
-            ).order_by(AccessLog.created_at.desc()).limit(10).all()
+            )
+            if exclude_log_id:
+                history = history.filter(AccessLog.id != exclude_log_id)
+            recent_logs = history.order_by(AccessLog.created_at.desc()).limit(10).all()
 
             if recent_logs:
                 # Check if this is a new country
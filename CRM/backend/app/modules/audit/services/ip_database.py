@@ -0,0 +1,274 @@
+"""
+Local IP geolocation databases.
+
+Lookup backends used by GeolocationService so access logging does not wait on
+an HTTP geolocation API:
+
+- MMDBDatabase: MaxMind/DB-IP .mmdb files, read through the maxminddb reader
+  in memory-mapped mode.
+- CSVRangeDatabase: IP range CSV files (DB-IP lite, IP2Location LITE). The CSV
+  is compiled into a sorted fixed-width index file next to it by
+  `flask build-geoip-index` (run by docker-entrypoint.sh), which is
+  memory-mapped and binary searched, so a lookup touches a few pages instead
+  of loading the whole database into memory. The index is never built while
+  serving: a missing index makes the database fail to open.
+
+Use open_ip_database(path) to pick the backend from the file extension.
+"""
+import csv
+import ipaddress
+import itertools
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Optional
+
+try:
+    import maxminddb
+    MAXMINDDB_AVAILABLE = True
+except ImportError:
+    MAXMINDDB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Errors opening or reading a missing, unreadable or corrupt database
+DATABASE_ERRORS = (OSError, ImportError, ValueError, struct.error, csv.Error)
+if MAXMINDDB_AVAILABLE:
+    DATABASE_ERRORS += (maxminddb.InvalidDatabaseError,)
+
+
+class MMDBDatabase:
+    """GeoLite2/DB-IP City .mmdb database"""
+
+    def __init__(self, path: str):
+        if not MAXMINDDB_AVAILABLE:
+            raise ImportError('maxminddb package is not installed. Run: pip install maxminddb')
+        self.path = path
+        self._reader = maxminddb.open_database(path, maxminddb.MODE_MMAP)
+
+    def lookup(self, ip_address: str) -> Optional[Dict]:
+        """Location of an IP address, or None if it is not in the database"""
+        try:
+            record = self._reader.get(ip_address)
+        except ValueError:
+            return None
+        if not record:
+            return None
+
+        country = record.get('country') or record.get('registered_country') or {}
+        subdivision = (record.get('subdivisions') or [{}])[0]
+        location = record.get('location') or {}
+        return {
+            'country': country.get('names', {}).get('en'),
+            'country_code': country.get('iso_code'),
+            'region': subdivision.get('names', {}).get('en'),
+            'region_code': subdivision.get('iso_code'),
+            'city': (record.get('city') or {}).get('names', {}).get('en'),
+            'postal_code': (record.get('postal') or {}).get('code'),
+            'latitude': location.get('latitude'),
+            'longitude': location.get('longitude'),
+            'timezone': location.get('time_zone')
+        }
+
+    def close(self):
+        self._reader.close()
+
+
+class CSVRangeDatabase:
+    """
+    IP range CSV database, looked up through a memory-mapped index.
+
+    Index layout (all integers big-endian):
+        header   8s magic, uint32 record count, uint32 location section offset
+        records  16-byte first IP, 16-byte last IP, uint32 location offset
+        locations uint16 length + JSON object, one per distinct location
+
+    IPv4 addresses are stored IPv4-mapped (::ffff:a.b.c.d) so both families
+    share one sorted table, and 16-byte big-endian keys compare in address
+    order as plain bytes.
+    """
+
+    MAGIC = b'GEOIDX01'
+    HEADER = struct.Struct('>8sII')
+    RECORD = struct.Struct('>16s16sI')
+    LENGTH = struct.Struct('>H')
+
+    # CSV header names (lower case) -> location field
+    COLUMN_ALIASES = {
+        'ip_start': 'ip_start', 'ip_from': 'ip_start', 'start_ip': 'ip_start', 'network_start': 'ip_start',
+        'ip_end': 'ip_end', 'ip_to': 'ip_end', 'end_ip': 'ip_end', 'network_end': 'ip_end',
+        'country_code': 'country_code', 'country': 'country_code', 'country_iso_code': 'country_code',
+        'country_name': 'country',
+        'region': 'region', 'region_name': 'region', 'stateprov': 'region', 'subdivision': 'region',
+        'city': 'city', 'city_name': 'city',
+        'zip_code': 'postal_code', 'postal_code': 'postal_code',
+        'latitude': 'latitude', 'longitude': 'longitude',
+        'time_zone': 'timezone', 'timezone': 'timezone'
+    }
+
+    # Column order of header-less DB-IP "IP to City Lite" files
+    DBIP_CITY_LITE_COLUMNS = ['ip_start', 'ip_end', 'continent', 'country_code', 'region', 'city', 'latitude', 'longitude']
+
+    def __init__(self, path: str, index_path: str = None):
+        self.path = path
+        self.index_path = index_path or f'{path}.idx'
+
+        if not os.path.exists(self.index_path):
+            raise FileNotFoundError(f'{self.index_path} not found - run `flask build-geoip-index`')
+        if self.index_is_stale(path, self.index_path):
+            logger.warning(f'{self.index_path} is older than {path} - run `flask build-geoip-index`')
+
+        with open(self.index_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count, self._locations_offset = self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f'{self.index_path} is not an IP range index')
+
+    def lookup(self, ip_address: str) -> Optional[Dict]:
+        """Location of an IP address, or None if no range contains it"""
+        try:
+            key = self._key(ip_address)
+        except ValueError:
+            return None
+
+        # Last range whose first IP is <= key
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._mm[self._record_offset(middle):self._record_offset(middle) + 16] <= key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return None
+
+        _, last_ip, location_offset = self.RECORD.unpack_from(self._mm, self._record_offset(low - 1))
+        if key > last_ip:
+            return None
+        return self._read_location(location_offset)
+
+    def close(self):
+        self._mm.close()
+
+    def _record_offset(self, index: int) -> int:
+        return self.HEADER.size + index * self.RECORD.size
+
+    def _read_location(self, offset: int) -> Dict:
+        position = self._locations_offset + offset
+        (length,) = self.LENGTH.unpack_from(self._mm, position)
+        start = position + self.LENGTH.size
+        return json.loads(self._mm[start:start + length])
+
+    @staticmethod
+    def _key(value) -> bytes:
+        """16-byte sort key of an IP address (dotted/colon string or integer)"""
+        value = value.strip() if isinstance(value, str) else value
+        if isinstance(value, str) and value.isdigit():
+            value = int(value)
+        address = ipaddress.ip_address(value)
+        if address.version == 4:
+            address = ipaddress.IPv6Address(f'::ffff:{address}')
+        return address.packed
+
+    @staticmethod
+    def index_is_stale(csv_path: str, index_path: str) -> bool:
+        """Whether the index is missing or older than its CSV"""
+        return not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(csv_path)
+
+    @classmethod
+    def build_index(cls, csv_path: str, index_path: str) -> int:
+        """
+        Compile an IP range CSV into the sorted index format.
+
+        Args:
+            csv_path: Source CSV (with a header row, or DB-IP city lite column order)
+            index_path: Index file to (re)write
+
+        Returns:
+            Number of ranges indexed
+        """
+        records = []
+        locations = {}
+        location_data = bytearray()
+
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = csv.reader(f)
+            first = next(rows, None)
+            if first is None:
+                columns = cls.DBIP_CITY_LITE_COLUMNS
+            elif any(name.strip().lower() in cls.COLUMN_ALIASES for name in first):
+                columns = [cls.COLUMN_ALIASES.get(name.strip().lower(), name) for name in first]
+                first = None
+            else:
+                columns = cls.DBIP_CITY_LITE_COLUMNS
+
+            for row in itertools.chain([first] if first else [], rows):
+                values = dict(zip(columns, row))
+                try:
+                    start, end = cls._key(values['ip_start']), cls._key(values['ip_end'])
+                except (KeyError, ValueError):
+                    continue
+
+                location = {
+                    field: cls._clean(field, values.get(field))
+                    for field in ('country_code', 'country', 'region', 'city', 'postal_code',
+                                  'latitude', 'longitude', 'timezone')
+                    if values.get(field) not in (None, '', '-')
+                }
+                encoded = json.dumps(location, sort_keys=True, separators=(',', ':')).encode('utf-8')
+                if encoded not in locations:
+                    locations[encoded] = len(location_data)
+                    location_data += cls.LENGTH.pack(len(encoded)) + encoded
+                records.append((start, end, locations[encoded]))
+
+        records.sort()
+        locations_offset = cls.HEADER.size + len(records) * cls.RECORD.size
+
+        temp_path = f'{index_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, len(records), locations_offset))
+            for record in records:
+                f.write(cls.RECORD.pack(*record))
+            f.write(location_data)
+        os.replace(temp_path, index_path)
+        return len(records)
+
+    @staticmethod
+    def _clean(field, value):
+        if field in ('latitude', 'longitude'):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+        if field == 'country_code':
+            return value.upper()
+        return value
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def open_ip_database(path: str):
+    """
+    Open (once per process) the IP database at path.
+
+    Args:
+        path: .mmdb file, or IP range .csv file
+
+    Returns:
+        MMDBDatabase or CSVRangeDatabase
+    """
+    with _databases_lock:
+        database = _databases.get(path)
+        if database is None:
+            if path.lower().endswith('.mmdb'):
+                database = MMDBDatabase(path)
+            else:
+                database = CSVRangeDatabase(path)
+            _databases[path] = database
+        return database
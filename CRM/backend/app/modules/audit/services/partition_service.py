@@ -0,0 +1,176 @@
+"""
+Audit Partition Service
+Maintains the monthly partitions of access_logs and activity_logs and applies
+the retention policy to them.
+
+On Postgres the tables are range-partitioned by created_at (upgrade_db_5.sql)
+into <table>_pYYYYMM partitions plus a <table>_default catch-all. Maintenance
+creates the partitions for the coming months ahead of time, so inserts never
+land in the default partition, and archives months older than the retention:
+
+- AUDIT_ARCHIVE_MODE=detach: the partition is detached and kept as a standalone
+  table (for pg_dump / cold storage) - it no longer shows in queries
+- AUDIT_ARCHIVE_MODE=drop: the partition is dropped
+
+Unpartitioned tables (SQLite, or before the migration has run) apply the same
+retention with a DELETE.
+"""
+import logging
+import re
+from datetime import date, datetime, time
+from typing import Dict
+
+from flask import current_app
+from sqlalchemy import text
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DETACH = 'detach'
+ARCHIVE_DROP = 'drop'
+
+
+class AuditPartitionService:
+    """Creates, archives and prunes the monthly audit log partitions"""
+
+    # Partitioned table -> config key of its retention in months (0 keeps everything)
+    TABLES = {
+        'access_logs': 'ACCESS_LOG_RETENTION_MONTHS',
+        'activity_logs': 'ACTIVITY_LOG_RETENTION_MONTHS',
+    }
+
+    # Postgres advisory lock key so concurrent schedulers don't run the DDL twice
+    ADVISORY_LOCK_KEY = 7305003
+
+    @classmethod
+    def maintain(cls, now: datetime = None) -> Dict[str, list]:
+        """
+        Create upcoming partitions and apply the retention policy.
+
+        Args:
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            dict: Partitions created and archived, rows deleted per table
+        """
+        now = now or datetime.utcnow()
+        config = current_app.config
+        premake = config.get('AUDIT_PARTITION_PREMAKE_MONTHS', 3)
+        archive_mode = config.get('AUDIT_ARCHIVE_MODE', ARCHIVE_DETACH)
+        result = {'created': [], 'archived': [], 'deleted': {}}
+
+        with db.engine.begin() as connection:
+            postgres = connection.dialect.name == 'postgresql'
+            if postgres and not connection.execute(
+                text('SELECT pg_try_advisory_xact_lock(:key)'), {'key': cls.ADVISORY_LOCK_KEY}
+            ).scalar():
+                logger.info('Audit partition maintenance already running elsewhere - skipping')
+                return result
+
+            for table, retention_key in cls.TABLES.items():
+                retention = config.get(retention_key, 0)
+                cutoff = add_months(month_start(now), -retention) if retention else None
+
+                if postgres and cls._is_partitioned(connection, table):
+                    for offset in range(premake + 1):
+                        month = add_months(month_start(now), offset)
+                        if cls._create_partition(connection, table, month):
+                            result['created'].append(partition_name(table, month))
+                    if cutoff:
+                        result['archived'] += cls._archive_partitions(connection, table, cutoff, archive_mode)
+
+                if cutoff:
+                    # Leftovers in the default partition, or the whole table when unpartitioned
+                    deleted = connection.execute(
+                        text(f'DELETE FROM {cls._target(connection, table)} WHERE created_at < :cutoff'),
+                        {'cutoff': datetime.combine(cutoff, time())}
+                    ).rowcount
+                    if deleted:
+                        result['deleted'][table] = deleted
+
+        if result['created'] or result['archived'] or result['deleted']:
+            logger.info(f'Audit partition maintenance: {result}')
+        return result
+
+    @staticmethod
+    def _is_partitioned(connection, table: str) -> bool:
+        return connection.execute(text(
+            'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid '
+            'WHERE c.relname = :table AND pg_table_is_visible(c.oid)'
+        ), {'table': table}).first() is not None
+
+    @classmethod
+    def _target(cls, connection, table: str) -> str:
+        """Table the retention DELETE runs against"""
+        if connection.dialect.name == 'postgresql' and cls._is_partitioned(connection, table):
+            return f'{table}_default'
+        return table
+
+    @staticmethod
+    def _create_partition(connection, table: str, month: date) -> bool:
+        """
+        Create the partition for one month unless it exists.
+
+        Rows that already landed in the default partition for that month are
+        moved into the new table before it is attached (Postgres refuses to
+        attach a range the default partition still holds rows for).
+        """
+        name = partition_name(table, month)
+        if connection.execute(text('SELECT to_regclass(:name)'), {'name': name}).scalar():
+            return False
+
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        connection.execute(text(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)'))
+        connection.execute(text(
+            f'WITH moved AS (DELETE FROM {table}_default '
+            f'WHERE created_at >= :start AND created_at < :end RETURNING *) '
+            f'INSERT INTO {name} SELECT * FROM moved'
+        ), {'start': start, 'end': end})
+        connection.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+        return True
+
+    @staticmethod
+    def _archive_partitions(connection, table: str, cutoff: date, mode: str) -> list:
+        """Detach or drop the monthly partitions that end on or before cutoff"""
+        pattern = re.compile(rf'^{table}_p(\d{{4}})(\d{{2}})$')
+        partitions = connection.execute(text(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'JOIN pg_class p ON p.oid = i.inhparent '
+            'WHERE p.relname = :table AND pg_table_is_visible(p.oid)'
+        ), {'table': table}).scalars().all()
+
+        archived = []
+        for name in sorted(partitions):
+            match = pattern.match(name)
+            if not match:
+                continue
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            if add_months(month, 1) > cutoff:
+                continue
+
+            if mode == ARCHIVE_DROP:
+                connection.execute(text(f'DROP TABLE {name}'))
+            else:
+                connection.execute(text(f'ALTER TABLE {table} DETACH PARTITION {name}'))
+            archived.append(name)
+        return archived
+
+
+def month_start(value) -> date:
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month months after (or before, if negative) month"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of the partition holding one month of table"""
+    return f'{table}_p{month:%Y%m}'
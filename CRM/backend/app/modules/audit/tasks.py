@@ -0,0 +1,53 @@
+"""
+Audit Background Tasks
+
+HTTP geolocation enrichment of access logs, run in the job worker so login,
+token refresh and 2FA requests never wait on a remote geolocation API.
+"""
+from app.extensions import db
+from app.jobs.queue import background_task
+
+# Location fields copied from an HTTP lookup onto the access log
+LOCATION_FIELDS = (
+    'country', 'country_code', 'region', 'region_code', 'city', 'postal_code',
+    'latitude', 'longitude', 'timezone', 'isp', 'organization', 'as_number'
+)
+
+THREAT_LEVELS = ['low', 'medium', 'high']
+
+
+@background_task(queue='default', max_attempts=3)
+def enrich_access_log_location(access_log_id: str):
+    """Complete an access log's location and proxy flags from the HTTP geolocation APIs"""
+    from app.modules.audit.models import AccessLog
+    from app.modules.audit.services.geolocation_service import GeolocationService
+    from app.modules.user.models import User
+
+    log = db.session.get(AccessLog, access_log_id)
+    if not log:
+        return
+
+    geo_data = GeolocationService.lookup_ip_http(log.ip_address)
+    if not geo_data:
+        # Retried with backoff by the job queue
+        raise RuntimeError(f'Geolocation lookup failed for {log.ip_address}')
+
+    for field in LOCATION_FIELDS:
+        if geo_data.get(field) is not None:
+            setattr(log, field, geo_data[field])
+    log.is_proxy = geo_data.get('is_proxy', False)
+    log.is_vpn = geo_data.get('is_proxy', False)  # ip-api returns proxy for VPNs too
+
+    # Re-run the checks that depend on the location now that it is known
+    if log.is_successful:
+        is_suspicious, threat_level, reasons = GeolocationService.check_suspicious_access(
+            {**geo_data, 'is_vpn': log.is_vpn, 'is_tor': log.is_tor, 'device_type': log.device_type},
+            db.session.get(User, log.user_id),
+            exclude_log_id=log.id
+        )
+        if is_suspicious:
+            log.is_suspicious = True
+            current = THREAT_LEVELS.index(log.threat_level) if log.threat_level in THREAT_LEVELS else 0
+            log.threat_level = THREAT_LEVELS[max(current, THREAT_LEVELS.index(threat_level))]
+
+    db.session.commit()
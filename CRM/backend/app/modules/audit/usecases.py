@@ -75,6 +75,7 @@ class GetCompanyActivityUseCase(BaseQueryUseCase):
 
 class SearchActivityUseCase(BaseQueryUseCase):
     """Advanced search for activity logs"""
+    read_replica = True
 
     def __init__(self):
         self.activity_repo = ActivityLogRepository()
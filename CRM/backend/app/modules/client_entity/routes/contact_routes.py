@@ -25,7 +25,7 @@ POST /api/client-entities/<entity_id>/contacts/<contact_id>/end
 import logging
 from datetime import datetime
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 
 from .. import client_entity_bp
@@ -39,18 +39,13 @@ from ..usecases import (
     EndContactUseCase,
 )
 from ..repositories import ClientEntityRepository, ClientEntityContactRepository
-from app.modules.user.models import User, Role
+from app.modules.user.models import Role
+from app.common.decorators import get_current_user
 
 # Module-level logger
 logger = logging.getLogger(__name__)
 
 
-def get_current_user():
-    """Get the current authenticated user."""
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
-
-
 def error_response(message: str, status_code: int = 400):
     """Create an error response."""
     return jsonify({'error': message}), status_code
@@ -12,22 +12,17 @@ GET  /api/client-entities/<entity_id>/service-requests
 
 import logging
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 from .. import client_entity_bp
 from ..repositories import ClientEntityRepository
-from app.modules.user.models import User, Role
+from app.modules.user.models import Role
+from app.common.decorators import get_current_user
 
 # Module-level logger
 logger = logging.getLogger(__name__)
 
 
-def get_current_user():
-    """Get the current authenticated user."""
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
-
-
 def error_response(message: str, status_code: int = 400):
     """Create an error response."""
     return jsonify({'error': message}), status_code
@@ -67,6 +67,7 @@ from app.modules.company.usecases import (
     SetPrimaryContactUseCase
 )
 from app.modules.user.models import User, Role
+from app.modules.notifications.services import EmailService
 
 # Configure module-level logger
 logger = logging.getLogger(__name__)
@@ -1300,6 +1301,7 @@ def update_company_email_config(company_id):
             setattr(config, field, data[field])
 
     db.session.commit()
+    EmailService.invalidate_email_client(company_id)
 
     return jsonify({
         'success': True,
@@ -1781,6 +1783,7 @@ def update_system_email_config():
             setattr(config, field, data[field])
 
     db.session.commit()
+    EmailService.invalidate_email_client()
 
     return jsonify({
         'success': True,
@@ -21,6 +21,7 @@ CRUD Operations:
 Download/View:
     GET    /documents/<id>/download - Get download URL (short expiry)
     GET    /documents/<id>/view     - Get view URL (long expiry for browser)
+    GET    /documents/<id>/proxy    - Stream file content through the API (supports Range)
     GET    /documents/local/<file>  - Download local file (fallback)
 
 Sharing:
@@ -42,18 +43,25 @@ import os
 import logging
 import requests as http_requests
 from io import BytesIO
-from flask import request, jsonify, current_app, send_file, Response
+from flask import request, jsonify, current_app, send_file, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.modules.documents import documents_bp
 from app.modules.documents.services.document_service import DocumentService
 from app.modules.documents.models.document import Document
 from app.modules.documents.repositories.document_repository import DocumentRepository
-from app.modules.user.models import User, Role
+from app.common.decorators import get_current_user
+from app.modules.user.models import Role
 from app.modules.services.models import ServiceRequest
 
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+# Document proxy: bytes read from the storage provider per streamed chunk,
+# and the headers forwarded in each direction
+PROXY_CHUNK_SIZE = 64 * 1024
+PROXY_REQUEST_HEADERS = ('Range', 'If-Range', 'If-None-Match', 'If-Modified-Since')
+PROXY_RESPONSE_HEADERS = ('Content-Length', 'Content-Range', 'Content-Encoding', 'ETag', 'Last-Modified')
+
 
 @documents_bp.route('', methods=['POST'])
 @jwt_required()
@@ -103,7 +111,7 @@ def upload_document():
                 'error': 'Service request not found'
             }), 404
 
-        user = User.query.get(user_id)
+        user = get_current_user()
         # Users can only upload to their own requests
         # Admins/Accountants can upload to any request
         if user.role.name == Role.USER and service_request.user_id != user_id:
@@ -131,7 +139,7 @@ def upload_document():
 def list_documents():
     """List documents - filtered by service_request_id or user's documents"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_current_user()
 
     service_request_id = request.args.get('service_request_id')
 
@@ -172,7 +180,7 @@ def list_documents():
 def get_document(document_id):
     """Get document details"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_current_user()
 
     document = DocumentService.get_document(document_id)
     if not document:
@@ -209,7 +217,7 @@ def get_document(document_id):
 def get_download_url(document_id):
     """Get download URL for a document"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_current_user()
 
     document = DocumentService.get_document(document_id)
     if not document:
@@ -243,7 +251,7 @@ def get_download_url(document_id):
 def create_sharing_link(document_id):
     """Create a sharing link for a document"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_current_user()
 
     # Only admins and document owners can create sharing links
     document = DocumentService.get_document(document_id)
@@ -268,7 +276,7 @@ def create_sharing_link(document_id):
 def delete_document(document_id):
     """Delete a document"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_current_user()
 
     is_admin = user.role.name in [Role.SUPER_ADMIN, Role.ADMIN]
 
@@ -289,7 +297,7 @@ def delete_document(document_id):
 def get_view_url(document_id):
     """Get view URL for a document (longer expiry for viewing in browser)"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_current_user()
 
     document = DocumentService.get_document(document_id)
     if not document:
@@ -321,9 +329,15 @@ def get_view_url(document_id):
 @documents_bp.route('/<document_id>/proxy', methods=['GET'])
 @jwt_required(locations=['headers', 'query_string'])
 def proxy_document(document_id):
-    """Proxy document content through the server to avoid CORS/auth issues with external storage"""
+    """
+    Proxy document content through the server to avoid CORS/auth issues with external storage.
+
+    The provider's response is streamed to the client chunk by chunk rather than
+    buffered. Range/If-None-Match headers are forwarded, so partial (206) and
+    not-modified (304) responses are passed back as-is.
+    """
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_current_user()
 
     document = DocumentService.get_document(document_id)
     if not document:
@@ -344,35 +358,67 @@ def proxy_document(document_id):
     if not result.get('success') or not result.get('download_url'):
         return jsonify({'success': False, 'error': 'Could not get download URL'}), 500
 
+    # Conditional/partial request headers are passed through so the provider
+    # can answer with 206/304 (lets PDF viewers page through large files)
+    upstream_headers = {
+        name: request.headers[name]
+        for name in PROXY_REQUEST_HEADERS if name in request.headers
+    }
+
     try:
-        # Fetch file content from storage provider
-        resp = http_requests.get(result['download_url'], timeout=30, stream=True)
-        if resp.status_code != 200:
-            return jsonify({'success': False, 'error': f'Storage returned {resp.status_code}'}), 502
-
-        # Determine content type
-        content_type = document.mime_type or resp.headers.get('Content-Type', 'application/octet-stream')
-
-        return Response(
-            resp.content,
-            status=200,
-            content_type=content_type,
-            headers={
-                'Cache-Control': 'private, max-age=3600',
-                'Content-Disposition': f'inline; filename="{document.original_filename}"',
-            }
+        # Open the file at the storage provider without reading the body yet
+        resp = http_requests.get(
+            result['download_url'], headers=upstream_headers, timeout=30, stream=True
         )
     except Exception as e:
         logger.error(f'Proxy error for document {document_id}: {e}')
         return jsonify({'success': False, 'error': 'Failed to fetch document'}), 502
 
+    if resp.status_code not in (200, 206, 304, 416):
+        resp.close()
+        return jsonify({'success': False, 'error': f'Storage returned {resp.status_code}'}), 502
+
+    headers = {
+        'Cache-Control': 'private, max-age=3600',
+        'Content-Disposition': f'inline; filename="{document.original_filename}"',
+        'Accept-Ranges': resp.headers.get('Accept-Ranges', 'bytes'),
+    }
+    for name in PROXY_RESPONSE_HEADERS:
+        if name in resp.headers:
+            headers[name] = resp.headers[name]
+
+    if resp.status_code in (304, 416):
+        resp.close()
+        return Response(status=resp.status_code, headers=headers)
+
+    # Determine content type
+    content_type = document.mime_type or resp.headers.get('Content-Type', 'application/octet-stream')
+
+    def generate():
+        # Raw (undecoded) chunks so the forwarded Content-Length/Encoding stay valid
+        try:
+            for chunk in resp.raw.stream(PROXY_CHUNK_SIZE, decode_content=False):
+                yield chunk
+        except Exception as e:
+            logger.error(f'Proxy stream interrupted for document {document_id}: {e}')
+        finally:
+            resp.close()
+
+    return Response(
+        stream_with_context(generate()),
+        status=resp.status_code,
+        content_type=content_type,
+        headers=headers,
+        direct_passthrough=True
+    )
+
 
 @documents_bp.route('/local/<filename>', methods=['GET'])
 @jwt_required()
 def download_local_file(filename):
     """Download a locally stored file (fallback when blob storage not configured)"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_current_user()
 
     # Find document by stored filename
     document = DocumentRepository.get_by_stored_filename(filename)
@@ -452,7 +498,7 @@ def get_user_documents(user_id):
     Only admins/accountants can access documents for other users.
     """
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({
@@ -8,6 +8,8 @@ import os
 from datetime import datetime, timedelta
 from flask import current_app
 
+from app.modules.documents.services.storage.upload_stream import as_stream, stream_size
+
 try:
     from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient, generate_blob_sas, BlobSasPermissions, ContentSettings
     AZURE_AVAILABLE = True
@@ -136,14 +138,9 @@ class BlobStorageClient:
             unique_id = str(uuid.uuid4())
             stored_filename = f'{unique_id}{file_ext}'
 
-            # Get file content
-            if hasattr(file_stream, 'read'):
-                file_stream.seek(0)
-                file_content = file_stream.read()
-            else:
-                file_content = file_stream
-
-            file_size = len(file_content)
+            # Size the file without reading it; the SDK reads it block by block
+            stream = as_stream(file_stream)
+            file_size = stream_size(stream)
 
             # Determine container and blob path based on available info
             if company_name:
@@ -172,7 +169,8 @@ class BlobStorageClient:
             content_type = self._get_content_type(file_ext)
 
             blob_client.upload_blob(
-                file_content,
+                stream,
+                length=file_size,
                 overwrite=True,
                 content_settings=ContentSettings(content_type=content_type)
             )
@@ -209,12 +207,7 @@ class BlobStorageClient:
             dict with blob_name, blob_url
         """
         try:
-            # Get file content
-            if hasattr(file_stream, 'read'):
-                file_stream.seek(0)
-                file_content = file_stream.read()
-            else:
-                file_content = file_stream
+            stream = as_stream(file_stream)
 
             # Get file extension for content type
             file_ext = os.path.splitext(blob_name)[1].lower() if '.' in blob_name else ''
@@ -227,7 +220,8 @@ class BlobStorageClient:
             content_type = self._get_content_type(file_ext)
 
             blob_client.upload_blob(
-                file_content,
+                stream,
+                length=stream_size(stream),
                 overwrite=True,
                 content_settings=ContentSettings(content_type=content_type)
             )
@@ -0,0 +1,189 @@
+"""
+Microsoft Graph Auth & Transport
+================================
+Process-wide helpers shared by the Graph-backed storage clients
+(SharePoint, OneDrive):
+
+- GraphTokenCache: app-only (client credentials) access tokens, cached per
+  tenant/app registration and refreshed shortly before they expire.
+- create_pooled_session: a keep-alive GraphSession with a connection pool,
+  so consecutive Graph calls reuse the same TLS connection. A 401 on a
+  request made with a cached token (revoked, or rotated credentials) drops
+  that token and retries the request once with a new one.
+
+Storage clients are instantiated per request, so anything that should outlive
+a request lives here at module/class level.
+"""
+import threading
+import time
+
+import msal
+import requests
+from requests.adapters import HTTPAdapter
+
+GRAPH_SCOPES = ['https://graph.microsoft.com/.default']
+
+
+class GraphTokenCache:
+    """Thread-safe cache of Graph access tokens keyed by (tenant, client_id)"""
+
+    # Refresh this many seconds before the token's reported expiry
+    REFRESH_MARGIN_SECONDS = 300
+
+    _apps = {}
+    _tokens = {}          # key -> (access token, expires at)
+    _replaced = {}        # key -> last token dropped after a 401 (for requests still in flight)
+    _key_locks = {}
+    _lock = threading.Lock()  # Guards the dicts only - never held during a token request
+
+    @classmethod
+    def get_token(cls, tenant_id, client_id, client_secret):
+        """
+        Get a valid access token, acquiring a new one only when the cached
+        token is missing or about to expire.
+
+        Args:
+            tenant_id: Azure AD tenant ID
+            client_id: App registration (client) ID
+            client_secret: App registration secret
+
+        Returns:
+            str: Bearer access token
+        """
+        if not all([client_id, client_secret, tenant_id]):
+            raise ValueError('Graph API credentials not configured')
+
+        key = (tenant_id, client_id)
+        token = cls._cached(key)
+        if token:
+            return token
+
+        # One token request per app registration at a time: concurrent callers
+        # for the same key wait for it, other keys are not blocked
+        with cls._key_lock(key):
+            token = cls._cached(key)
+            if token:
+                return token
+            return cls._acquire(key, client_secret)
+
+    @classmethod
+    def refresh(cls, stale_token):
+        """
+        Replace a token Graph rejected (401) with a new one.
+
+        Args:
+            stale_token: Access token sent with the rejected request
+
+        Returns:
+            str: New access token, or None if the token was not issued by this cache
+        """
+        with cls._lock:
+            key = next((
+                key for key, (token, _) in cls._tokens.items()
+                if token == stale_token or cls._replaced.get(key) == stale_token
+            ), None)
+            app = cls._apps.get(key)
+        if key is None or app is None:
+            return None
+
+        with cls._key_lock(key):
+            with cls._lock:
+                current = cls._tokens.get(key)
+            if current and current[0] != stale_token:
+                # Another thread already replaced it
+                return current[0]
+            with cls._lock:
+                cls._replaced[key] = stale_token
+            cls.invalidate(*key)
+            return cls._acquire(key, app.client_credential)
+
+    @classmethod
+    def invalidate(cls, tenant_id=None, client_id=None):
+        """Drop a cached token (e.g. after a 401), or all tokens and apps if no key given"""
+        with cls._lock:
+            if tenant_id is None:
+                cls._apps.clear()
+                cls._tokens.clear()
+                cls._replaced.clear()
+            else:
+                cls._tokens.pop((tenant_id, client_id), None)
+
+    @classmethod
+    def _cached(cls, key):
+        """Cached token of a key unless it is about to expire"""
+        with cls._lock:
+            cached = cls._tokens.get(key)
+        if cached and cached[1] - cls.REFRESH_MARGIN_SECONDS > time.monotonic():
+            return cached[0]
+        return None
+
+    @classmethod
+    def _key_lock(cls, key):
+        with cls._lock:
+            lock = cls._key_locks.get(key)
+            if lock is None:
+                lock = cls._key_locks[key] = threading.Lock()
+            return lock
+
+    @classmethod
+    def _acquire(cls, key, client_secret):
+        """Request a token from Azure AD (called with the key's lock held) and cache it"""
+        tenant_id, client_id = key
+        with cls._lock:
+            app = cls._apps.get(key)
+        if app is None or app.client_credential != client_secret:
+            app = msal.ConfidentialClientApplication(
+                client_id,
+                authority=f'https://login.microsoftonline.com/{tenant_id}',
+                client_credential=client_secret
+            )
+
+        result = app.acquire_token_for_client(scopes=GRAPH_SCOPES)
+
+        if 'access_token' not in result:
+            raise Exception(f"Failed to get token: {result.get('error_description', 'Unknown error')}")
+
+        expires_at = time.monotonic() + int(result.get('expires_in', 3600))
+        with cls._lock:
+            cls._apps[key] = app
+            cls._tokens[key] = (result['access_token'], expires_at)
+        return result['access_token']
+
+
+class GraphSession(requests.Session):
+    """requests.Session that refreshes the bearer token and retries once when Graph answers 401"""
+
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+        if response.status_code != 401:
+            return response
+
+        headers = kwargs.get('headers') or {}
+        authorization = headers.get('Authorization', '')
+        if not authorization.startswith('Bearer '):
+            return response
+
+        token = GraphTokenCache.refresh(authorization[len('Bearer '):])
+        # A streamed body has already been consumed and cannot be sent again
+        if token is None or hasattr(kwargs.get('data'), 'read'):
+            return response
+
+        kwargs['headers'] = {**headers, 'Authorization': f'Bearer {token}'}
+        return super().request(method, url, *args, **kwargs)
+
+
+def create_pooled_session(pool_maxsize=10):
+    """
+    Create a keep-alive GraphSession with a connection pool.
+
+    Args:
+        pool_maxsize: Connections kept open per host (one per concurrent worker thread is enough)
+
+    Returns:
+        GraphSession
+    """
+    session = GraphSession()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -3,18 +3,25 @@ OneDrive Client
 ===============
 Microsoft Graph API client for OneDrive file operations.
 """
-import msal
-import requests
+import threading
 import uuid
 import os
 from flask import current_app
 
+from app.modules.documents.services.storage.graph_auth import GraphTokenCache, create_pooled_session
+from app.modules.documents.services.storage.upload_stream import (
+    UPLOAD_CHUNK_SIZE, as_stream, stream_size, iter_chunks
+)
+
 
 class OneDriveClient:
     """Microsoft Graph API client for OneDrive file operations"""
 
     GRAPH_API_ENDPOINT = 'https://graph.microsoft.com/v1.0'
 
+    _session = None
+    _session_lock = threading.Lock()
+
     def __init__(self):
         self.client_id = current_app.config.get('GRAPH_CLIENT_ID')
         self.client_secret = current_app.config.get('GRAPH_CLIENT_SECRET')
@@ -23,24 +30,17 @@ class OneDriveClient:
         self.root_folder = current_app.config.get('ONEDRIVE_FOLDER', 'CRM_Documents')
 
     def _get_access_token(self):
-        """Get access token using client credentials flow"""
-        if not all([self.client_id, self.client_secret, self.tenant_id]):
-            raise ValueError('Graph API credentials not configured')
-
-        authority = f'https://login.microsoftonline.com/{self.tenant_id}'
-
-        app = msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=authority,
-            client_credential=self.client_secret
-        )
-
-        result = app.acquire_token_for_client(scopes=['https://graph.microsoft.com/.default'])
-
-        if 'access_token' in result:
-            return result['access_token']
-        else:
-            raise Exception(f"Failed to get token: {result.get('error_description', 'Unknown error')}")
+        """Get access token using client credentials flow (cached until shortly before expiry)"""
+        return GraphTokenCache.get_token(self.tenant_id, self.client_id, self.client_secret)
+
+    @property
+    def session(self):
+        """Keep-alive HTTP session shared by all OneDrive clients in this process"""
+        if OneDriveClient._session is None:
+            with OneDriveClient._session_lock:
+                if OneDriveClient._session is None:
+                    OneDriveClient._session = create_pooled_session()
+        return OneDriveClient._session
 
     def _get_headers(self):
         """Get authorization headers"""
@@ -56,7 +56,7 @@ class OneDriveClient:
 
             # Check if folder exists
             check_url = f'{self.GRAPH_API_ENDPOINT}/users/{self.onedrive_user_id}/drive/root:/{folder_path}'
-            response = requests.get(check_url, headers=headers)
+            response = self.session.get(check_url, headers=headers)
 
             if response.status_code == 200:
                 return response.json().get('id')
@@ -75,7 +75,7 @@ class OneDriveClient:
                 else:
                     check_url = f'{self.GRAPH_API_ENDPOINT}/users/{self.onedrive_user_id}/drive/root:/{current_path}'
 
-                response = requests.get(check_url, headers=headers)
+                response = self.session.get(check_url, headers=headers)
 
                 if response.status_code != 200:
                     # Create folder
@@ -91,14 +91,14 @@ class OneDriveClient:
                     }
 
                     headers_json = {**headers, 'Content-Type': 'application/json'}
-                    create_response = requests.post(create_url, headers=headers_json, json=folder_data)
+                    create_response = self.session.post(create_url, headers=headers_json, json=folder_data)
 
                     if create_response.status_code not in [200, 201]:
                         current_app.logger.error(f'Failed to create folder: {create_response.text}')
 
             # Get final folder ID
             final_url = f'{self.GRAPH_API_ENDPOINT}/users/{self.onedrive_user_id}/drive/root:/{folder_path}'
-            final_response = requests.get(final_url, headers=headers)
+            final_response = self.session.get(final_url, headers=headers)
 
             if final_response.status_code == 200:
                 return final_response.json().get('id')
@@ -137,13 +137,9 @@ class OneDriveClient:
             # Ensure folder exists
             self._ensure_folder_exists(folder_path)
 
-            # Get file content
-            if hasattr(file_stream, 'read'):
-                file_content = file_stream.read()
-            else:
-                file_content = file_stream
-
-            file_size = len(file_content)
+            # Size the file without reading it into memory
+            stream = as_stream(file_stream)
+            file_size = stream_size(stream)
 
             headers = self._get_headers()
 
@@ -152,7 +148,7 @@ class OneDriveClient:
                 upload_url = f'{self.GRAPH_API_ENDPOINT}/users/{self.onedrive_user_id}/drive/root:/{folder_path}/{stored_filename}:/content'
 
                 headers['Content-Type'] = 'application/octet-stream'
-                response = requests.put(upload_url, headers=headers, data=file_content)
+                response = self.session.put(upload_url, headers=headers, data=stream.read())
 
                 if response.status_code in [200, 201]:
                     result = response.json()
@@ -172,7 +168,7 @@ class OneDriveClient:
                     }
             else:
                 # For larger files, use upload session
-                return self._upload_large_file(file_content, folder_path, stored_filename)
+                return self._upload_large_file(stream, folder_path, stored_filename)
 
         except Exception as e:
             current_app.logger.error(f'Error uploading to OneDrive: {str(e)}')
@@ -181,9 +177,10 @@ class OneDriveClient:
                 'error': str(e)
             }
 
-    def _upload_large_file(self, file_content, folder_path, stored_filename):
-        """Upload large files using upload session"""
+    def _upload_large_file(self, file_stream, folder_path, stored_filename):
+        """Upload large files using upload session, reading one chunk at a time"""
         try:
+            stream = as_stream(file_stream)
             headers = self._get_headers()
             headers['Content-Type'] = 'application/json'
 
@@ -197,7 +194,7 @@ class OneDriveClient:
                 }
             }
 
-            session_response = requests.post(session_url, headers=headers, json=session_data)
+            session_response = self.session.post(session_url, headers=headers, json=session_data)
 
             if session_response.status_code != 200:
                 return {
@@ -206,16 +203,13 @@ class OneDriveClient:
                 }
 
             upload_url = session_response.json().get('uploadUrl')
-            file_size = len(file_content)
-
-            # Upload in chunks (10MB chunks)
-            chunk_size = 10 * 1024 * 1024
-            chunks = [file_content[i:i + chunk_size] for i in range(0, file_size, chunk_size)]
+            file_size = stream_size(stream)
 
             result = None
             start_byte = 0
 
-            for chunk in chunks:
+            # Upload in chunks (10MB chunks)
+            for chunk in iter_chunks(stream, UPLOAD_CHUNK_SIZE):
                 end_byte = start_byte + len(chunk) - 1
 
                 chunk_headers = {
@@ -223,7 +217,7 @@ class OneDriveClient:
                     'Content-Range': f'bytes {start_byte}-{end_byte}/{file_size}'
                 }
 
-                chunk_response = requests.put(upload_url, headers=chunk_headers, data=chunk)
+                chunk_response = self.session.put(upload_url, headers=chunk_headers, data=chunk)
 
                 if chunk_response.status_code in [200, 201]:
                     result = chunk_response.json()
@@ -263,7 +257,7 @@ class OneDriveClient:
             headers = self._get_headers()
 
             url = f'{self.GRAPH_API_ENDPOINT}/users/{self.onedrive_user_id}/drive/items/{item_id}'
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
 
             if response.status_code == 200:
                 result = response.json()
@@ -308,7 +302,7 @@ class OneDriveClient:
                 'scope': scope
             }
 
-            response = requests.post(url, headers=headers, json=link_data)
+            response = self.session.post(url, headers=headers, json=link_data)
 
             if response.status_code in [200, 201]:
                 result = response.json()
@@ -336,7 +330,7 @@ class OneDriveClient:
             headers = self._get_headers()
 
             url = f'{self.GRAPH_API_ENDPOINT}/users/{self.onedrive_user_id}/drive/items/{item_id}'
-            response = requests.delete(url, headers=headers)
+            response = self.session.delete(url, headers=headers)
 
             if response.status_code == 204:
                 return {'success': True}
@@ -359,7 +353,7 @@ class OneDriveClient:
             headers = self._get_headers()
 
             url = f'{self.GRAPH_API_ENDPOINT}/users/{self.onedrive_user_id}/drive/items/{item_id}'
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
 
             if response.status_code == 200:
                 return {
@@ -2,20 +2,38 @@
 SharePoint Client
 =================
 Microsoft Graph API client for SharePoint document library operations.
+
+Access tokens, the HTTP connection pool and resolved folder IDs are shared
+across instances (a client is created per request), so an upload only pays for
+the Graph calls that actually move data.
 """
-import msal
-import requests
+import threading
+import time
 import uuid
 import os
 import re
 from flask import current_app
 
+from app.modules.documents.services.storage.graph_auth import GraphTokenCache, create_pooled_session
+from app.modules.documents.services.storage.upload_stream import (
+    UPLOAD_CHUNK_SIZE, as_stream, stream_size, iter_chunks
+)
+
 
 class SharePointClient:
     """Microsoft Graph API client for SharePoint document library operations"""
 
     GRAPH_API_ENDPOINT = 'https://graph.microsoft.com/v1.0'
 
+    # Seconds a resolved folder path -> driveItem ID mapping is reused
+    FOLDER_CACHE_TTL_SECONDS = 600
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    _folder_ids = {}
+    _folder_lock = threading.Lock()
+
     def __init__(self):
         self.client_id = current_app.config.get('GRAPH_CLIENT_ID')
         self.client_secret = current_app.config.get('GRAPH_CLIENT_SECRET')
@@ -25,24 +43,17 @@ class SharePointClient:
         self.root_folder = current_app.config.get('SHAREPOINT_ROOT_FOLDER', 'CRM_Documents')
 
     def _get_access_token(self):
-        """Get access token using client credentials flow"""
-        if not all([self.client_id, self.client_secret, self.tenant_id]):
-            raise ValueError('Graph API credentials not configured')
-
-        authority = f'https://login.microsoftonline.com/{self.tenant_id}'
-
-        app = msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=authority,
-            client_credential=self.client_secret
-        )
-
-        result = app.acquire_token_for_client(scopes=['https://graph.microsoft.com/.default'])
-
-        if 'access_token' in result:
-            return result['access_token']
-        else:
-            raise Exception(f"Failed to get token: {result.get('error_description', 'Unknown error')}")
+        """Get access token using client credentials flow (cached until shortly before expiry)"""
+        return GraphTokenCache.get_token(self.tenant_id, self.client_id, self.client_secret)
+
+    @property
+    def session(self):
+        """Keep-alive HTTP session shared by all SharePoint clients in this process"""
+        if SharePointClient._session is None:
+            with SharePointClient._session_lock:
+                if SharePointClient._session is None:
+                    SharePointClient._session = create_pooled_session()
+        return SharePointClient._session
 
     def _get_headers(self):
         """Get authorization headers"""
@@ -85,18 +96,49 @@ class SharePointClient:
         else:
             raise ValueError('SharePoint site_id or drive_id must be configured')
 
+    def _get_cached_folder_id(self, drive_endpoint, folder_path):
+        """Get a previously resolved folder ID if it has not expired"""
+        with self._folder_lock:
+            cached = self._folder_ids.get((drive_endpoint, folder_path))
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+        return None
+
+    def _cache_folder_id(self, drive_endpoint, folder_path, folder_id):
+        """Remember a resolved folder ID"""
+        if not folder_id:
+            return
+        with self._folder_lock:
+            self._folder_ids[(drive_endpoint, folder_path)] = (
+                time.monotonic() + self.FOLDER_CACHE_TTL_SECONDS, folder_id
+            )
+
+    def _forget_folder(self, folder_path):
+        """Drop a cached folder (and its subfolders), e.g. after it was deleted in SharePoint"""
+        with self._folder_lock:
+            for key in list(self._folder_ids):
+                if key[1] == folder_path or key[1].startswith(f'{folder_path}/'):
+                    del self._folder_ids[key]
+
     def _ensure_folder_exists(self, folder_path):
         """Ensure a folder exists in SharePoint, create if not"""
         try:
-            headers = self._get_headers()
             drive_endpoint = self._get_drive_endpoint()
 
+            folder_id = self._get_cached_folder_id(drive_endpoint, folder_path)
+            if folder_id:
+                return folder_id
+
+            headers = self._get_headers()
+
             # Check if folder exists
             check_url = f'{drive_endpoint}/root:/{folder_path}'
-            response = requests.get(check_url, headers=headers)
+            response = self.session.get(check_url, headers=headers)
 
             if response.status_code == 200:
-                return response.json().get('id')
+                folder_id = response.json().get('id')
+                self._cache_folder_id(drive_endpoint, folder_path, folder_id)
+                return folder_id
 
             # Create folder if it doesn't exist - create each level
             parts = folder_path.split('/')
@@ -106,11 +148,17 @@ class SharePointClient:
                 parent_path = current_path if current_path else 'root'
                 current_path = f'{current_path}/{part}' if current_path else part
 
+                # Levels resolved by earlier uploads are known to exist
+                if self._get_cached_folder_id(drive_endpoint, current_path):
+                    continue
+
                 # Check if this part exists
                 check_url = f'{drive_endpoint}/root:/{current_path}'
-                response = requests.get(check_url, headers=headers)
+                response = self.session.get(check_url, headers=headers)
 
-                if response.status_code != 200:
+                if response.status_code == 200:
+                    self._cache_folder_id(drive_endpoint, current_path, response.json().get('id'))
+                else:
                     # Create folder
                     if parent_path == 'root':
                         create_url = f'{drive_endpoint}/root/children'
@@ -124,17 +172,26 @@ class SharePointClient:
                     }
 
                     headers_json = {**headers, 'Content-Type': 'application/json'}
-                    create_response = requests.post(create_url, headers=headers_json, json=folder_data)
+                    create_response = self.session.post(create_url, headers=headers_json, json=folder_data)
 
-                    if create_response.status_code not in [200, 201]:
+                    if create_response.status_code in [200, 201]:
+                        self._cache_folder_id(drive_endpoint, current_path, create_response.json().get('id'))
+                    else:
                         current_app.logger.error(f'Failed to create folder {part}: {create_response.text}')
 
+            # The last level's create/check response already carries the final folder ID
+            folder_id = self._get_cached_folder_id(drive_endpoint, folder_path)
+            if folder_id:
+                return folder_id
+
             # Get final folder ID
             final_url = f'{drive_endpoint}/root:/{folder_path}'
-            final_response = requests.get(final_url, headers=headers)
+            final_response = self.session.get(final_url, headers=headers)
 
             if final_response.status_code == 200:
-                return final_response.json().get('id')
+                folder_id = final_response.json().get('id')
+                self._cache_folder_id(drive_endpoint, folder_path, folder_id)
+                return folder_id
 
             return None
 
@@ -180,14 +237,9 @@ class SharePointClient:
             # Ensure folder exists
             self._ensure_folder_exists(folder_path)
 
-            # Get file content
-            if hasattr(file_stream, 'read'):
-                file_stream.seek(0)
-                file_content = file_stream.read()
-            else:
-                file_content = file_stream
-
-            file_size = len(file_content)
+            # Size the file without reading it into memory
+            stream = as_stream(file_stream)
+            file_size = stream_size(stream)
 
             headers = self._get_headers()
             drive_endpoint = self._get_drive_endpoint()
@@ -197,7 +249,7 @@ class SharePointClient:
                 upload_url = f'{drive_endpoint}/root:/{folder_path}/{stored_filename}:/content'
 
                 headers['Content-Type'] = 'application/octet-stream'
-                response = requests.put(upload_url, headers=headers, data=file_content)
+                response = self.session.put(upload_url, headers=headers, data=stream.read())
 
                 if response.status_code in [200, 201]:
                     result = response.json()
@@ -211,6 +263,9 @@ class SharePointClient:
                         'blob_name': f'{folder_path}/{stored_filename}'
                     }
                 else:
+                    if response.status_code == 404:
+                        # Folder was removed in SharePoint since it was cached
+                        self._forget_folder(folder_path)
                     current_app.logger.error(f'SharePoint upload failed: {response.text}')
                     return {
                         'success': False,
@@ -218,7 +273,7 @@ class SharePointClient:
                     }
             else:
                 # For larger files, use upload session
-                return self._upload_large_file(file_content, folder_path, stored_filename)
+                return self._upload_large_file(stream, folder_path, stored_filename)
 
         except Exception as e:
             current_app.logger.error(f'Error uploading to SharePoint: {str(e)}')
@@ -251,12 +306,19 @@ class SharePointClient:
             if folder_path:
                 self._ensure_folder_exists(folder_path)
 
-            # Get file content
-            if hasattr(file_stream, 'read'):
-                file_stream.seek(0)
-                file_content = file_stream.read()
-            else:
-                file_content = file_stream
+            stream = as_stream(file_stream)
+
+            # Files too large for a simple upload go through an upload session
+            if stream_size(stream) >= 4 * 1024 * 1024:
+                result = self._upload_large_file(stream, folder_path, filename)
+                if not result.get('success'):
+                    return result
+                return {
+                    'success': True,
+                    'sharepoint_url': result.get('sharepoint_url'),
+                    'web_url': result.get('sharepoint_web_url'),
+                    'item_id': result.get('sharepoint_item_id')
+                }
 
             headers = self._get_headers()
             drive_endpoint = self._get_drive_endpoint()
@@ -268,7 +330,7 @@ class SharePointClient:
                 upload_url = f'{drive_endpoint}/root:/{filename}:/content'
 
             headers['Content-Type'] = 'application/octet-stream'
-            response = requests.put(upload_url, headers=headers, data=file_content)
+            response = self.session.put(upload_url, headers=headers, data=stream.read())
 
             if response.status_code in [200, 201]:
                 result = response.json()
@@ -279,6 +341,8 @@ class SharePointClient:
                     'item_id': result.get('id')
                 }
             else:
+                if response.status_code == 404 and folder_path:
+                    self._forget_folder(folder_path)
                 current_app.logger.error(f'SharePoint raw upload failed: {response.text}')
                 return {
                     'success': False,
@@ -292,15 +356,22 @@ class SharePointClient:
                 'error': str(e)
             }
 
-    def _upload_large_file(self, file_content, folder_path, stored_filename):
-        """Upload large files using upload session (for files > 4MB)"""
+    def _upload_large_file(self, file_stream, folder_path, stored_filename):
+        """
+        Upload large files using upload session (for files > 4MB).
+
+        The file is read and sent one chunk at a time, so only a single chunk
+        is held in memory.
+        """
         try:
+            stream = as_stream(file_stream)
             headers = self._get_headers()
             headers['Content-Type'] = 'application/json'
             drive_endpoint = self._get_drive_endpoint()
 
             # Create upload session
-            session_url = f'{drive_endpoint}/root:/{folder_path}/{stored_filename}:/createUploadSession'
+            item_path = f'{folder_path}/{stored_filename}' if folder_path else stored_filename
+            session_url = f'{drive_endpoint}/root:/{item_path}:/createUploadSession'
 
             session_data = {
                 'item': {
@@ -309,25 +380,24 @@ class SharePointClient:
                 }
             }
 
-            session_response = requests.post(session_url, headers=headers, json=session_data)
+            session_response = self.session.post(session_url, headers=headers, json=session_data)
 
             if session_response.status_code != 200:
+                if session_response.status_code == 404:
+                    self._forget_folder(folder_path)
                 return {
                     'success': False,
                     'error': f'Failed to create upload session: {session_response.status_code}'
                 }
 
             upload_url = session_response.json().get('uploadUrl')
-            file_size = len(file_content)
-
-            # Upload in chunks (10MB chunks)
-            chunk_size = 10 * 1024 * 1024
-            chunks = [file_content[i:i + chunk_size] for i in range(0, file_size, chunk_size)]
+            file_size = stream_size(stream)
 
             result = None
             start_byte = 0
 
-            for chunk in chunks:
+            # Upload in chunks (10MB chunks)
+            for chunk in iter_chunks(stream, UPLOAD_CHUNK_SIZE):
                 end_byte = start_byte + len(chunk) - 1
 
                 chunk_headers = {
@@ -335,7 +405,7 @@ class SharePointClient:
                     'Content-Range': f'bytes {start_byte}-{end_byte}/{file_size}'
                 }
 
-                chunk_response = requests.put(upload_url, headers=chunk_headers, data=chunk)
+                chunk_response = self.session.put(upload_url, headers=chunk_headers, data=chunk)
 
                 if chunk_response.status_code in [200, 201]:
                     result = chunk_response.json()
@@ -355,7 +425,7 @@ class SharePointClient:
                     'sharepoint_web_url': result.get('webUrl'),
                     'stored_filename': stored_filename,
                     'file_size': file_size,
-                    'blob_name': f'{folder_path}/{stored_filename}'
+                    'blob_name': item_path
                 }
 
             return {
@@ -386,7 +456,7 @@ class SharePointClient:
             drive_endpoint = self._get_drive_endpoint()
 
             url = f'{drive_endpoint}/items/{item_id}'
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
 
             if response.status_code == 200:
                 result = response.json()
@@ -437,7 +507,7 @@ class SharePointClient:
                 'scope': scope
             }
 
-            response = requests.post(url, headers=headers, json=link_data)
+            response = self.session.post(url, headers=headers, json=link_data)
 
             if response.status_code in [200, 201]:
                 result = response.json()
@@ -467,7 +537,7 @@ class SharePointClient:
             drive_endpoint = self._get_drive_endpoint()
 
             url = f'{drive_endpoint}/items/{item_id}'
-            response = requests.delete(url, headers=headers)
+            response = self.session.delete(url, headers=headers)
 
             if response.status_code == 204:
                 return {'success': True}
@@ -491,7 +561,7 @@ class SharePointClient:
             drive_endpoint = self._get_drive_endpoint()
 
             url = f'{drive_endpoint}/items/{item_id}'
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
 
             if response.status_code == 200:
                 return {
@@ -518,7 +588,7 @@ class SharePointClient:
             drive_endpoint = self._get_drive_endpoint()
 
             url = f'{drive_endpoint}/root:/{folder_path}:/children'
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
 
             if response.status_code == 200:
                 items = response.json().get('value', [])
@@ -577,7 +647,7 @@ class SharePointClient:
                 folder_path = f'{self.root_folder}/{safe_client_name}'
 
             url = f'{drive_endpoint}/root:/{folder_path}'
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
 
             if response.status_code == 200:
                 return {
@@ -8,6 +8,8 @@ import requests
 from datetime import datetime, timedelta
 from flask import current_app
 
+from app.modules.documents.services.storage.upload_stream import MultipartFileStream, as_stream, stream_size
+
 
 class ZohoDriveClient:
     """Client for interacting with Zoho WorkDrive API"""
@@ -243,27 +245,25 @@ class ZohoDriveClient:
             file_ext = os.path.splitext(original_filename)[1].lower()
             stored_filename = f'{unique_id}{file_ext}'
 
-            # Upload file
-            headers = {
-                'Authorization': f'Zoho-oauthtoken {self.access_token}'
-            }
-
-            file_stream.seek(0)
-            file_content = file_stream.read()
-            file_size = len(file_content)
-            file_stream.seek(0)
+            # Upload file - the multipart body reads the file as it is sent
+            stream = as_stream(file_stream)
+            file_size = stream_size(stream)
 
             upload_url = f'{self.BASE_URL}/upload'
-            files = {
-                'content': (stored_filename, file_stream, 'application/octet-stream')
-            }
-            data = {
-                'parent_id': parent_id,
-                'filename': stored_filename,
-                'override-name-exist': 'false'
+            body = MultipartFileStream(
+                {
+                    'parent_id': parent_id,
+                    'filename': stored_filename,
+                    'override-name-exist': 'false'
+                },
+                'content', stored_filename, stream
+            )
+            headers = {
+                'Authorization': f'Zoho-oauthtoken {self.access_token}',
+                'Content-Type': body.content_type
             }
 
-            response = requests.post(upload_url, headers=headers, files=files, data=data)
+            response = requests.post(upload_url, headers=headers, data=body)
 
             if response.status_code in [200, 201]:
                 result = response.json()
@@ -41,11 +41,11 @@ GET  /api/imports/available-types
 """
 import logging
 from flask import Blueprint, request, Response
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 from app.modules.user.models import User
 from app.common.responses import success_response, error_response
-from app.common.decorators import admin_required, super_admin_required
+from app.common.decorators import admin_required, super_admin_required, get_current_user
 from app.modules.imports.usecases import (
     GetTemplateUseCase,
     ImportClientsUseCase,
@@ -60,12 +60,6 @@ logger = logging.getLogger(__name__)
 import_bp = Blueprint('imports', __name__, url_prefix='/api/imports')
 
 
-def get_current_user() -> User:
-    """Get current user from JWT."""
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
-
-
 # ============== Template Downloads ==============
 
 @import_bp.route('/templates/<data_type>', methods=['GET'])
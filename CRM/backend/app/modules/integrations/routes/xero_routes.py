@@ -74,10 +74,9 @@ def init_xero_routes(db, jwt_required, get_jwt_identity):
         return decorated
 
     def get_current_user():
-        """Get current user from JWT"""
-        from app.modules.user.models import User
-        user_id = get_jwt_identity()
-        return User.query.get(user_id)
+        """Get current user from JWT (shared per-request loader)"""
+        from app.common.decorators import get_current_user as load_current_user
+        return load_current_user()
 
     # ============== OAuth Routes ==============
 
@@ -12,9 +12,9 @@ Endpoints:
     GET  /callback         - OAuth callback handler
     POST /disconnect       - Disconnect from Xero
     GET  /status           - Get connection status
-    POST /sync/contacts    - Sync contacts to Xero
-    POST /sync/invoices    - Sync invoices to Xero
-    POST /sync/all         - Full sync
+    POST /sync/contacts    - Sync contacts to Xero (changed since last sync; ?full=true for all)
+    POST /sync/invoices    - Sync invoices to Xero (changed since last sync; ?full=true for all)
+    POST /sync/all         - Contacts and invoices
     GET  /sync/logs        - Get sync history
     POST /push/invoice/:id - Push single invoice
     POST /push/contact/:id - Push single contact
@@ -27,7 +27,7 @@ import secrets
 import logging
 from functools import wraps
 from flask import Blueprint, request, redirect, session, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 logger = logging.getLogger(__name__)
 
@@ -70,11 +70,15 @@ def xero_configured(f):
     return decorated
 
 
+def full_sync_requested() -> bool:
+    """?full=true pushes every record instead of only those changed since the last sync"""
+    return request.args.get('full', 'false').lower() in ('true', '1')
+
+
 def get_current_user():
-    """Get current user from JWT"""
-    from app.modules.user.models import User
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
+    """Get current user from JWT (shared per-request loader)"""
+    from app.common.decorators import get_current_user as load_current_user
+    return load_current_user()
 
 
 def success_response(data, message=None, status_code=200):
@@ -321,7 +325,7 @@ def sync_contacts():
     }
 
     sync_service = XeroSyncService(db, connection, models)
-    result = sync_service.sync_contacts(user_id=current_user.id, is_manual=True)
+    result = sync_service.sync_contacts(user_id=current_user.id, is_manual=True, full=full_sync_requested())
 
     if result['success']:
         return success_response(result, message='Contacts synced successfully')
@@ -361,7 +365,7 @@ def sync_invoices():
     }
 
     sync_service = XeroSyncService(db, connection, models)
-    result = sync_service.sync_invoices(user_id=current_user.id, is_manual=True)
+    result = sync_service.sync_invoices(user_id=current_user.id, is_manual=True, full=full_sync_requested())
 
     if result['success']:
         return success_response(result, message='Invoices synced successfully')
@@ -402,9 +406,10 @@ def sync_all():
 
     sync_service = XeroSyncService(db, connection, models)
 
+    full = full_sync_requested()
     results = {
-        'contacts': sync_service.sync_contacts(user_id=current_user.id, is_manual=True),
-        'invoices': sync_service.sync_invoices(user_id=current_user.id, is_manual=True)
+        'contacts': sync_service.sync_contacts(user_id=current_user.id, is_manual=True, full=full),
+        'invoices': sync_service.sync_invoices(user_id=current_user.id, is_manual=True, full=full)
     }
 
     return success_response(results, message='Full sync completed')
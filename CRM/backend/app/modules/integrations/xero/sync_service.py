@@ -6,6 +6,11 @@ Handles synchronization of data between CRM and Xero.
 - Invoices: CRM invoices <-> Xero invoices
 - Payments: Payment status sync
 
+Contacts and invoices are pushed in bulk: mappings are preloaded in one query,
+only records changed since the last successful sync (or never pushed, or whose
+last push failed) are sent, and they go to Xero XeroConfig.BATCH_SIZE per
+request, within the tenant's minute and day rate limits.
+
 This service is standalone and doesn't depend on existing CRM modules at import time.
 """
 
@@ -13,6 +18,8 @@ import logging
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Tuple
 
+from sqlalchemy import and_, or_
+
 logger = logging.getLogger(__name__)
 
 
@@ -57,7 +64,8 @@ class XeroSyncService:
         self.models = models
 
         # Import API client
-        from app.modules.integrations.xero.xero_client import XeroAPIClient, XeroAuthClient
+        from app.modules.integrations.xero.xero_client import XeroAPIClient, XeroAuthClient, XeroConfig
+        self.batch_size = XeroConfig.BATCH_SIZE
 
         # Check and refresh token if needed
         if self.connection.is_token_expired():
@@ -104,24 +112,57 @@ class XeroSyncService:
         self.db.session.flush()
         return log
 
+    def _last_successful_sync(self, sync_type: str) -> Optional[datetime]:
+        """Start time of the last completed sync of a type (None if there was none)"""
+        XeroSyncLog = self.models['XeroSyncLog']
+        log = XeroSyncLog.query.filter_by(
+            xero_connection_id=self.connection.id,
+            sync_type=sync_type,
+            status='completed'
+        ).order_by(XeroSyncLog.started_at.desc()).first()
+        return log.started_at if log else None
+
+    def _load_contact_mappings(self) -> Dict[str, Any]:
+        """All contact mappings of the connection by CRM user ID, in one query"""
+        XeroContactMapping = self.models['XeroContactMapping']
+        return {
+            mapping.crm_user_id: mapping
+            for mapping in XeroContactMapping.query.filter_by(xero_connection_id=self.connection.id)
+        }
+
+    def _batches(self, records: List) -> List[List]:
+        return [records[i:i + self.batch_size] for i in range(0, len(records), self.batch_size)]
+
+    @staticmethod
+    def _batch_item_error(item: Optional[Dict]) -> Optional[str]:
+        """Validation error of one element of a batch response (None if it was saved)"""
+        if item is None:
+            return 'Missing from Xero response'
+        if item.get('StatusAttributeString') == 'ERROR' or item.get('HasValidationErrors'):
+            messages = [error.get('Message', '') for error in item.get('ValidationErrors') or []]
+            return '; '.join(filter(None, messages)) or 'Rejected by Xero'
+        return None
+
     # ============== Contact Sync ==============
 
-    def sync_contacts(self, user_id: str = None, is_manual: bool = False) -> Dict[str, Any]:
+    def sync_contacts(self, user_id: str = None, is_manual: bool = False, full: bool = False) -> Dict[str, Any]:
         """
         Sync contacts between CRM and Xero.
 
         Args:
             user_id: ID of user triggering the sync
             is_manual: Whether this is a manual sync
+            full: Push every active user, not only those changed since the last sync
 
         Returns:
             Sync result with statistics
         """
+        since = None if full else self._last_successful_sync('contacts')
         sync_log = self._create_sync_log('contacts', 'bidirectional', user_id, is_manual)
 
         try:
             # Push CRM contacts to Xero
-            push_result = self._push_contacts_to_xero()
+            push_result = self._push_contacts_to_xero(since)
 
             # Pull Xero contacts to CRM (optional - for reference)
             # pull_result = self._pull_contacts_from_xero()
@@ -156,11 +197,48 @@ class XeroSyncService:
                 'sync_log_id': sync_log.id
             }
 
-    def _push_contacts_to_xero(self) -> Dict[str, Any]:
-        """Push CRM users (clients) to Xero as contacts"""
+    def _push_contacts_to_xero(self, since: datetime = None) -> Dict[str, Any]:
+        """
+        Push CRM users (clients) to Xero as contacts.
+
+        Args:
+            since: Only push users updated after this time, never pushed, or
+                   whose last push failed (all active users when None)
+        """
         User = self.models['User']
         XeroContactMapping = self.models['XeroContactMapping']
 
+        mappings = self._load_contact_mappings()
+
+        query = User.query.filter(
+            User.company_id == self.connection.company_id,
+            User.is_active == True
+        )
+        if since:
+            query = query.outerjoin(XeroContactMapping, and_(
+                XeroContactMapping.crm_user_id == User.id,
+                XeroContactMapping.xero_connection_id == self.connection.id
+            )).filter(or_(
+                User.updated_at > since,
+                XeroContactMapping.id.is_(None),
+                XeroContactMapping.last_synced_at.is_(None)
+            ))
+
+        return self._push_contact_batches(query.order_by(User.id).all(), mappings)
+
+    def _push_contact_batches(self, users: List, mappings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create or update users as Xero contacts, one request per batch.
+
+        Args:
+            users: Users to push
+            mappings: Contact mappings by CRM user ID; new mappings are added to it
+
+        Returns:
+            Push statistics
+        """
+        XeroContactMapping = self.models['XeroContactMapping']
+
         result = {
             'processed': 0,
             'created': 0,
@@ -169,57 +247,59 @@ class XeroSyncService:
             'errors': []
         }
 
-        # Get all active client users in the company
-        users = User.query.filter(
-            User.company_id == self.connection.company_id,
-            User.is_active == True
-        ).all()
-
-        for user in users:
-            result['processed'] += 1
-
-            try:
-                # Check if mapping exists
-                mapping = XeroContactMapping.query.filter_by(
-                    xero_connection_id=self.connection.id,
-                    crm_user_id=user.id
-                ).first()
+        for batch in self._batches(users):
+            result['processed'] += len(batch)
 
+            contacts = []
+            for user in batch:
                 contact_data = self._build_contact_data_from_user(user)
+                if user.id in mappings:
+                    contact_data['ContactID'] = mappings[user.id].xero_contact_id
+                contacts.append(contact_data)
+
+            response = self.api_client.save_contacts(contacts)
+            if not response or 'Contacts' not in response:
+                for user in batch:
+                    self._contact_failed(user, mappings, result, 'Xero request failed')
+                continue
+
+            now = datetime.utcnow()
+            returned = response['Contacts']
+            for index, user in enumerate(batch):
+                xero_contact = returned[index] if index < len(returned) else None
+                error = self._batch_item_error(xero_contact)
+                if error:
+                    self._contact_failed(user, mappings, result, error)
+                    continue
 
+                mapping = mappings.get(user.id)
                 if mapping:
-                    # Update existing contact
-                    response = self.api_client.update_contact(mapping.xero_contact_id, contact_data)
-                    if response:
-                        mapping.last_synced_at = datetime.utcnow()
-                        result['updated'] += 1
-                    else:
-                        result['failed'] += 1
-                        result['errors'].append(f"Failed to update contact for user {user.id}")
+                    mapping.last_synced_at = now
+                    result['updated'] += 1
                 else:
-                    # Create new contact
-                    response = self.api_client.create_contact(contact_data)
-                    if response and 'Contacts' in response:
-                        xero_contact = response['Contacts'][0]
-                        mapping = XeroContactMapping(
-                            xero_connection_id=self.connection.id,
-                            crm_user_id=user.id,
-                            xero_contact_id=xero_contact['ContactID'],
-                            xero_contact_name=xero_contact.get('Name'),
-                            last_synced_at=datetime.utcnow()
-                        )
-                        self.db.session.add(mapping)
-                        result['created'] += 1
-                    else:
-                        result['failed'] += 1
-                        result['errors'].append(f"Failed to create contact for user {user.id}")
-
-            except Exception as e:
-                result['failed'] += 1
-                result['errors'].append(f"Error syncing user {user.id}: {str(e)}")
+                    mappings[user.id] = mapping = XeroContactMapping(
+                        xero_connection_id=self.connection.id,
+                        crm_user_id=user.id,
+                        xero_contact_id=xero_contact['ContactID'],
+                        xero_contact_name=xero_contact.get('Name'),
+                        last_synced_at=now
+                    )
+                    self.db.session.add(mapping)
+                    result['created'] += 1
 
         return result
 
+    @staticmethod
+    def _contact_failed(user, mappings: Dict[str, Any], result: Dict[str, Any], error: str):
+        """Count a failed contact push; a mapped contact is retried by the next sync"""
+        mapping = mappings.get(user.id)
+        if mapping:
+            mapping.last_synced_at = None
+        result['failed'] += 1
+        result['errors'].append(
+            f"Failed to {'update' if mapping else 'create'} contact for user {user.id}: {error}"
+        )
+
     def _build_contact_data_from_user(self, user) -> Dict[str, Any]:
         """Build Xero contact data from CRM user"""
         contact = {
@@ -293,21 +373,23 @@ class XeroSyncService:
 
     # ============== Invoice Sync ==============
 
-    def sync_invoices(self, user_id: str = None, is_manual: bool = False) -> Dict[str, Any]:
+    def sync_invoices(self, user_id: str = None, is_manual: bool = False, full: bool = False) -> Dict[str, Any]:
         """
         Sync invoices between CRM and Xero.
 
         Args:
             user_id: ID of user triggering the sync
             is_manual: Whether this is a manual sync
+            full: Push every invoice, not only those changed since the last sync
 
         Returns:
             Sync result with statistics
         """
+        since = None if full else self._last_successful_sync('invoices')
         sync_log = self._create_sync_log('invoices', 'push', user_id, is_manual)
 
         try:
-            result = self._push_invoices_to_xero()
+            result = self._push_invoices_to_xero(since)
 
             sync_log.records_processed = result['processed']
             sync_log.records_created = result['created']
@@ -339,11 +421,16 @@ class XeroSyncService:
                 'sync_log_id': sync_log.id
             }
 
-    def _push_invoices_to_xero(self) -> Dict[str, Any]:
-        """Push CRM invoices to Xero"""
+    def _push_invoices_to_xero(self, since: datetime = None) -> Dict[str, Any]:
+        """
+        Push CRM invoices to Xero.
+
+        Args:
+            since: Only push invoices updated after this time, never pushed, or
+                   whose last push failed (all of the company's invoices when None)
+        """
         Invoice = self.models.get('Invoice')
         XeroInvoiceMapping = self.models['XeroInvoiceMapping']
-        XeroContactMapping = self.models['XeroContactMapping']
 
         result = {
             'processed': 0,
@@ -357,85 +444,125 @@ class XeroSyncService:
             result['errors'].append("Invoice model not available")
             return result
 
-        # Get invoices that need syncing (not yet synced or updated since last sync)
-        invoices = Invoice.query.filter(
-            Invoice.company_id == self.connection.company_id
-        ).all()
+        invoice_mappings = {
+            mapping.crm_invoice_id: mapping
+            for mapping in XeroInvoiceMapping.query.filter_by(xero_connection_id=self.connection.id)
+        }
+        contact_mappings = self._load_contact_mappings()
+
+        query = Invoice.query.filter(Invoice.company_id == self.connection.company_id)
+        if since:
+            query = query.outerjoin(XeroInvoiceMapping, and_(
+                XeroInvoiceMapping.crm_invoice_id == Invoice.id,
+                XeroInvoiceMapping.xero_connection_id == self.connection.id
+            )).filter(or_(
+                Invoice.updated_at > since,
+                XeroInvoiceMapping.id.is_(None),
+                XeroInvoiceMapping.sync_status != 'synced'
+            ))
+        invoices = query.order_by(Invoice.id).all()
+        result['processed'] = len(invoices)
+
+        # Paid and voided invoices can no longer be edited in Xero
+        invoices = [
+            invoice for invoice in invoices
+            if invoice.id not in invoice_mappings
+            or invoice_mappings[invoice.id].xero_invoice_status not in ['PAID', 'VOIDED']
+        ]
+
+        # Create the contacts of clients not in Xero yet, in batches
+        missing_client_ids = {
+            invoice.client_id for invoice in invoices if invoice.client_id not in contact_mappings
+        }
+        if missing_client_ids:
+            User = self.models['User']
+            clients = User.query.filter(User.id.in_(missing_client_ids)).order_by(User.id).all()
+            self._push_contact_batches(clients, contact_mappings)
 
+        pushable = []
         for invoice in invoices:
-            result['processed'] += 1
-
-            try:
-                # Check if mapping exists
-                mapping = XeroInvoiceMapping.query.filter_by(
-                    xero_connection_id=self.connection.id,
-                    crm_invoice_id=invoice.id
-                ).first()
-
-                # Get Xero contact ID for the client
-                contact_mapping = XeroContactMapping.query.filter_by(
-                    xero_connection_id=self.connection.id,
-                    crm_user_id=invoice.client_id
-                ).first()
-
-                if not contact_mapping:
-                    # Try to create contact first
-                    contact_result = self.push_single_contact_to_xero(invoice.client_id)
-                    if contact_result:
-                        contact_mapping = XeroContactMapping.query.filter_by(
-                            xero_connection_id=self.connection.id,
-                            crm_user_id=invoice.client_id
-                        ).first()
-
-                if not contact_mapping:
-                    result['failed'] += 1
-                    result['errors'].append(f"No Xero contact for invoice {invoice.id}")
+            if invoice.client_id in contact_mappings:
+                pushable.append(invoice)
+            else:
+                result['failed'] += 1
+                result['errors'].append(f"No Xero contact for invoice {invoice.id}")
+
+        for batch in self._batches(pushable):
+            line_items = self._load_line_items(Invoice, batch)
+            invoices_data = []
+            for invoice in batch:
+                invoice_data = self._build_invoice_data(
+                    invoice, contact_mappings[invoice.client_id].xero_contact_id, line_items[invoice.id]
+                )
+                if invoice.id in invoice_mappings:
+                    invoice_data['InvoiceID'] = invoice_mappings[invoice.id].xero_invoice_id
+                invoices_data.append(invoice_data)
+
+            response = self.api_client.save_invoices(invoices_data)
+            if not response or 'Invoices' not in response:
+                for invoice in batch:
+                    self._invoice_failed(invoice, invoice_mappings, result, 'Xero request failed')
+                continue
+
+            now = datetime.utcnow()
+            returned = response['Invoices']
+            for index, invoice in enumerate(batch):
+                xero_invoice = returned[index] if index < len(returned) else None
+                error = self._batch_item_error(xero_invoice)
+                if error:
+                    self._invoice_failed(invoice, invoice_mappings, result, error)
                     continue
 
-                invoice_data = self._build_invoice_data(invoice, contact_mapping.xero_contact_id)
-
+                mapping = invoice_mappings.get(invoice.id)
                 if mapping:
-                    # Update existing invoice (if not paid/voided)
-                    if mapping.xero_invoice_status not in ['PAID', 'VOIDED']:
-                        response = self.api_client.update_invoice(mapping.xero_invoice_id, invoice_data)
-                        if response:
-                            mapping.last_synced_at = datetime.utcnow()
-                            mapping.sync_status = 'synced'
-                            result['updated'] += 1
-                        else:
-                            mapping.sync_status = 'error'
-                            result['failed'] += 1
+                    mapping.xero_invoice_status = xero_invoice.get('Status', mapping.xero_invoice_status)
+                    mapping.last_synced_at = now
+                    mapping.sync_status = 'synced'
+                    mapping.sync_error = None
+                    result['updated'] += 1
                 else:
-                    # Create new invoice
-                    response = self.api_client.create_invoice(invoice_data)
-                    if response and 'Invoices' in response:
-                        xero_invoice = response['Invoices'][0]
-                        mapping = XeroInvoiceMapping(
-                            xero_connection_id=self.connection.id,
-                            crm_invoice_id=invoice.id,
-                            xero_invoice_id=xero_invoice['InvoiceID'],
-                            xero_invoice_number=xero_invoice.get('InvoiceNumber'),
-                            xero_invoice_status=xero_invoice.get('Status'),
-                            last_synced_at=datetime.utcnow(),
-                            sync_status='synced'
-                        )
-                        self.db.session.add(mapping)
-                        result['created'] += 1
-                    else:
-                        result['failed'] += 1
-                        result['errors'].append(f"Failed to create invoice {invoice.id}")
-
-            except Exception as e:
-                result['failed'] += 1
-                result['errors'].append(f"Error syncing invoice {invoice.id}: {str(e)}")
+                    mapping = XeroInvoiceMapping(
+                        xero_connection_id=self.connection.id,
+                        crm_invoice_id=invoice.id,
+                        xero_invoice_id=xero_invoice['InvoiceID'],
+                        xero_invoice_number=xero_invoice.get('InvoiceNumber'),
+                        xero_invoice_status=xero_invoice.get('Status'),
+                        last_synced_at=now,
+                        sync_status='synced'
+                    )
+                    self.db.session.add(mapping)
+                    result['created'] += 1
 
         return result
 
-    def _build_invoice_data(self, invoice, xero_contact_id: str) -> Dict[str, Any]:
-        """Build Xero invoice data from CRM invoice"""
+    @staticmethod
+    def _invoice_failed(invoice, mappings: Dict[str, Any], result: Dict[str, Any], error: str):
+        """Count a failed invoice push; a mapped invoice is retried by the next sync"""
+        mapping = mappings.get(invoice.id)
+        if mapping:
+            mapping.sync_status = 'error'
+            mapping.sync_error = error
+        result['failed'] += 1
+        result['errors'].append(
+            f"Failed to {'update' if mapping else 'create'} invoice {invoice.id}: {error}"
+        )
+
+    @staticmethod
+    def _load_line_items(Invoice, invoices: List) -> Dict[str, List]:
+        """Line items of a batch of invoices by invoice ID, in one query"""
+        InvoiceLineItem = Invoice.line_items.property.mapper.class_
+        line_items = {invoice.id: [] for invoice in invoices}
+        for item in InvoiceLineItem.query.filter(
+            InvoiceLineItem.invoice_id.in_(list(line_items))
+        ).order_by(InvoiceLineItem.invoice_id, InvoiceLineItem.order, InvoiceLineItem.id):
+            line_items[item.invoice_id].append(item)
+        return line_items
+
+    def _build_invoice_data(self, invoice, xero_contact_id: str, items: List = None) -> Dict[str, Any]:
+        """Build Xero invoice data from CRM invoice (items: preloaded line items)"""
         # Build line items
         line_items = []
-        for item in invoice.line_items:
+        for item in (invoice.line_items if items is None else items):
             line_items.append({
                 'Description': item.description,
                 'Quantity': float(item.quantity) if item.quantity else 1.0,
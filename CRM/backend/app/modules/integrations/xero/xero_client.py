@@ -14,11 +14,15 @@ Xero API Documentation: https://developer.xero.com/documentation/
 import os
 import json
 import logging
+import threading
+import time
 import requests
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from urllib.parse import urlencode
 
+from app.common.rate_limit import TokenBucket
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,7 +39,16 @@ class XeroConfig:
     CONNECTIONS_URL = 'https://api.xero.com/connections'
 
     # Xero API base URL
-    API_BASE_URL = 'https://api.xero.com/api.xro/2.0'
+    API_BASE_URL = os.environ.get('XERO_API_BASE_URL', 'https://api.xero.com/api.xro/2.0')
+
+    # Xero API limits per tenant (calls per minute and per day) and the most
+    # contacts/invoices sent in one batch request
+    CALLS_PER_MINUTE = int(os.environ.get('XERO_CALLS_PER_MINUTE', 60))
+    CALLS_PER_DAY = int(os.environ.get('XERO_CALLS_PER_DAY', 5000))
+    BATCH_SIZE = min(int(os.environ.get('XERO_BATCH_SIZE', 50)), 50)
+
+    # Longest Retry-After (seconds) waited out before retrying a rate-limited call once
+    MAX_RETRY_AFTER = int(os.environ.get('XERO_MAX_RETRY_AFTER', 60))
 
     # OAuth scopes needed for integration
     SCOPES = [
@@ -225,6 +238,45 @@ class XeroAuthClient:
             return False
 
 
+class XeroRateLimiter:
+    """
+    Process-wide token buckets per Xero tenant, one for the minute limit and one
+    for the day limit. Every API call takes a token from both.
+    """
+
+    _buckets = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def acquire(cls, tenant_id: str) -> float:
+        """
+        Wait for a call slot for a tenant.
+
+        Returns:
+            Seconds spent waiting
+        """
+        minute, day = cls.buckets(tenant_id)
+        return day.acquire() + minute.acquire()
+
+    @classmethod
+    def buckets(cls, tenant_id: str):
+        """Minute and day buckets of a tenant"""
+        with cls._lock:
+            buckets = cls._buckets.get(tenant_id)
+            if buckets is None:
+                buckets = cls._buckets[tenant_id] = (
+                    TokenBucket(XeroConfig.CALLS_PER_MINUTE / 60.0, capacity=XeroConfig.CALLS_PER_MINUTE),
+                    TokenBucket(XeroConfig.CALLS_PER_DAY / 86400.0, capacity=XeroConfig.CALLS_PER_DAY)
+                )
+            return buckets
+
+    @classmethod
+    def reset(cls):
+        """Forget all buckets (limits changed)"""
+        with cls._lock:
+            cls._buckets.clear()
+
+
 class XeroAPIClient:
     """
     Xero API client for making authenticated API calls.
@@ -239,17 +291,18 @@ class XeroAPIClient:
         invoice = api_client.create_invoice(invoice_data)
     """
 
-    def __init__(self, access_token: str, tenant_id: str):
+    def __init__(self, access_token: str, tenant_id: str, base_url: str = None):
         """
         Initialize Xero API client.
 
         Args:
             access_token: Valid Xero access token
             tenant_id: Xero tenant ID (organization ID)
+            base_url: API base URL (defaults to XeroConfig.API_BASE_URL)
         """
         self.access_token = access_token
         self.tenant_id = tenant_id
-        self.base_url = XeroConfig.API_BASE_URL
+        self.base_url = base_url or XeroConfig.API_BASE_URL
 
     def _get_headers(self) -> Dict[str, str]:
         """Get headers for API requests"""
@@ -276,25 +329,33 @@ class XeroAPIClient:
         url = f"{self.base_url}{endpoint}"
 
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self._get_headers(),
-                json=data,
-                params=params
-            )
-
-            if response.status_code in [200, 201]:
-                return response.json()
-            elif response.status_code == 401:
-                logger.error("Xero API: Unauthorized - token may be expired")
-                return None
-            elif response.status_code == 429:
-                logger.warning("Xero API: Rate limited")
-                return None
-            else:
-                logger.error(f"Xero API error: {response.status_code} - {response.text}")
-                return None
+            for attempt in range(2):
+                XeroRateLimiter.acquire(self.tenant_id)
+                response = requests.request(
+                    method=method,
+                    url=url,
+                    headers=self._get_headers(),
+                    json=data,
+                    params=params
+                )
+
+                if response.status_code in [200, 201]:
+                    return response.json()
+                elif response.status_code == 401:
+                    logger.error("Xero API: Unauthorized - token may be expired")
+                    return None
+                elif response.status_code == 429:
+                    # Another process used up the tenant's limit; wait once if Xero says it is short
+                    retry_after = int(response.headers.get('Retry-After', 0) or 0)
+                    if attempt == 0 and 0 < retry_after <= XeroConfig.MAX_RETRY_AFTER:
+                        logger.warning(f"Xero API: Rate limited - retrying in {retry_after}s")
+                        time.sleep(retry_after)
+                        continue
+                    logger.warning("Xero API: Rate limited")
+                    return None
+                else:
+                    logger.error(f"Xero API error: {response.status_code} - {response.text}")
+                    return None
 
         except Exception as e:
             logger.error(f"Xero API request failed: {str(e)}")
@@ -347,6 +408,18 @@ class XeroAPIClient:
         contact_data['ContactID'] = contact_id
         return self._make_request('POST', '/Contacts', data={'Contacts': [contact_data]})
 
+    def save_contacts(self, contacts: List[Dict]) -> Optional[Dict]:
+        """
+        Create or update up to XeroConfig.BATCH_SIZE contacts in one call
+        (contacts with a ContactID are updated).
+
+        Returns:
+            Response whose Contacts are in request order, each with
+            StatusAttributeString OK or ERROR (and ValidationErrors)
+        """
+        return self._make_request('POST', '/Contacts', data={'Contacts': contacts},
+                                  params={'summarizeErrors': 'false'})
+
     def search_contacts(self, search_term: str) -> Optional[Dict]:
         """Search contacts by name or email"""
         params = {
@@ -409,6 +482,18 @@ class XeroAPIClient:
         invoice_data['InvoiceID'] = invoice_id
         return self._make_request('POST', '/Invoices', data={'Invoices': [invoice_data]})
 
+    def save_invoices(self, invoices: List[Dict]) -> Optional[Dict]:
+        """
+        Create or update up to XeroConfig.BATCH_SIZE invoices in one call
+        (invoices with an InvoiceID are updated).
+
+        Returns:
+            Response whose Invoices are in request order, each with
+            StatusAttributeString OK or ERROR (and ValidationErrors)
+        """
+        return self._make_request('POST', '/Invoices', data={'Invoices': invoices},
+                                  params={'summarizeErrors': 'false'})
+
     def void_invoice(self, invoice_id: str) -> Optional[Dict]:
         """Void an invoice"""
         return self._make_request('POST', '/Invoices', data={
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from functools import wraps
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from app.db_routing import reads_from_replica
 from app.extensions import db
 from ..models.lead import Lead
 
@@ -302,6 +303,7 @@ def admin_delete_lead(lead_id):
 
 @leads_bp.route('/admin/leads/export', methods=['GET'])
 @admin_required
+@reads_from_replica
 def admin_export_leads():
     """Export all leads"""
     try:
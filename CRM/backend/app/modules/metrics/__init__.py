@@ -7,11 +7,14 @@ from .prometheus_metrics import (
     track_submission,
     track_login,
     track_token_operation,
+    track_email_client_cache,
     update_active_users,
     update_total_users,
     track_db_query,
     update_db_pool_stats,
     collect_system_metrics,
+    collect_process_metrics,
+    metrics_registry,
 )
 
 __all__ = [
@@ -21,9 +24,12 @@ __all__ = [
     'track_submission',
     'track_login',
     'track_token_operation',
+    'track_email_client_cache',
     'update_active_users',
     'update_total_users',
     'track_db_query',
     'update_db_pool_stats',
     'collect_system_metrics',
+    'collect_process_metrics',
+    'metrics_registry',
 ]
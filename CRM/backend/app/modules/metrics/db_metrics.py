@@ -0,0 +1,168 @@
+"""
+Database Query Metrics
+
+SQLAlchemy event hooks that feed the database metrics:
+- Every statement is timed (DB_QUERY_LATENCY) by operation and endpoint, and
+  counted (DB_QUERY_COUNT) also by statement fingerprint - a short hash of the
+  SQL with literals, bind parameters and IN lists collapsed, so the same query
+  with different values shares one series
+- Pool checkout/checkin keep the pool size, active, overflow and utilisation
+  gauges current, labelled by bind (primary, replica)
+- Each request counts its queries; a request running more than DB_QUERY_BUDGET
+  statements (0 disables the check) is logged with its most repeated statements,
+  which is how N+1 query loops show up
+"""
+
+import hashlib
+import re
+import time
+import weakref
+from collections import Counter as FingerprintCounter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.common.cache import LRUCache
+from app.extensions import db
+from app.modules.metrics.prometheus_metrics import (
+    DB_QUERIES_PER_REQUEST, DB_QUERY_BUDGET_EXCEEDED, get_endpoint_label, track_db_query, update_db_pool_stats
+)
+
+# Statement text -> (operation, fingerprint, normalized SQL); SQLAlchemy reuses
+# compiled statement strings, so this stays small
+_fingerprints = LRUCache(maxsize=4096)
+
+# Fingerprint -> normalized SQL, for the query budget log
+_statements = LRUCache(maxsize=4096)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_BIND_PARAMETER = re.compile(r'%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?')
+_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROW_LIST = re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def normalize_statement(statement: str) -> str:
+    """SQL with literals and parameters replaced by ? and value lists collapsed"""
+    normalized = _STRING_LITERAL.sub('?', statement)
+    normalized = _BIND_PARAMETER.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    normalized = _VALUE_LIST.sub('(?)', normalized)
+    normalized = _ROW_LIST.sub('(?)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+def fingerprint_statement(statement: str):
+    """
+    Operation, fingerprint and normalized text of a statement.
+
+    Returns:
+        Tuple of (operation, 12-character fingerprint, normalized SQL)
+    """
+    cached = _fingerprints.get(statement)
+    if cached is None:
+        normalized = normalize_statement(statement)
+        keyword = normalized.split(' ', 1)[0].upper()
+        operation = keyword if keyword in OPERATIONS else 'OTHER'
+        fingerprint = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+        cached = (operation, fingerprint, normalized)
+        _fingerprints.set(statement, cached)
+        _statements.set(fingerprint, normalized)
+    return cached
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_start_time')
+    duration = time.perf_counter() - started.pop() if started else 0.0
+    operation, fingerprint, _ = fingerprint_statement(statement)
+
+    if has_request_context():
+        endpoint = get_endpoint_label()
+        g.db_query_count = g.get('db_query_count', 0) + 1
+        g.setdefault('db_query_fingerprints', FingerprintCounter())[fingerprint] += 1
+    else:
+        endpoint = 'background'
+
+    track_db_query(operation, duration, endpoint=endpoint, fingerprint=fingerprint)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements
+    started = exception_context.connection.info.get('query_start_time') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+_watched_pools = weakref.WeakSet()
+
+
+def watch_pool(pool, bind='primary'):
+    """Update the pool gauges (with the given bind label) on every checkout and checkin of a pool"""
+    if pool in _watched_pools:
+        return
+    _watched_pools.add(pool)
+
+    def update_pool_stats(returning=0):
+        # StaticPool/NullPool have no size or checkout count
+        size = pool.size() if hasattr(pool, 'size') else 1
+        active = max(pool.checkedout() - returning, 0) if hasattr(pool, 'checkedout') else 0
+        overflow = pool.overflow() if hasattr(pool, 'overflow') else 0
+        # QueuePool keeps max_overflow private; -1 means unbounded
+        max_overflow = getattr(pool, '_max_overflow', 0)
+        capacity = size + max_overflow if max_overflow >= 0 else None
+        update_db_pool_stats(size, active, overflow, capacity, bind=bind)
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        update_pool_stats()
+
+    def on_checkin(dbapi_connection, connection_record):
+        # Fires before the pool takes the connection back
+        update_pool_stats(returning=1)
+
+    event.listen(pool, 'checkout', on_checkout)
+    event.listen(pool, 'checkin', on_checkin)
+
+
+def check_query_budget(response):
+    """after_request hook: log requests that ran more queries than DB_QUERY_BUDGET"""
+    count = g.get('db_query_count', 0)
+    endpoint = get_endpoint_label()
+    DB_QUERIES_PER_REQUEST.labels(endpoint=endpoint).observe(count)
+
+    budget = current_app.config.get('DB_QUERY_BUDGET', 0)
+    if budget and count > budget:
+        DB_QUERY_BUDGET_EXCEEDED.labels(endpoint=endpoint).inc()
+        most_common = g.db_query_fingerprints.most_common(3)
+        repeated = ', '.join(f'{fingerprint} x{times}' for fingerprint, times in most_common)
+        current_app.logger.warning(
+            f'Query budget exceeded: {request.method} {endpoint} ran {count} queries '
+            f'(budget {budget}); most repeated: {repeated}; '
+            f'top statement: {_statements.get(most_common[0][0], "")[:300]}'
+        )
+    return response
+
+
+def init_db_metrics(app):
+    """Register the SQLAlchemy event hooks (statement hooks once per process) and the query budget check"""
+    listeners = [
+        ('before_cursor_execute', _before_cursor_execute),
+        ('after_cursor_execute', _after_cursor_execute),
+        ('handle_error', _handle_error),
+    ]
+    for name, listener in listeners:
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            watch_pool(engine.pool, bind=bind_key or 'primary')
+
+    app.after_request(check_query_budget)
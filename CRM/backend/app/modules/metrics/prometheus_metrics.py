@@ -6,19 +6,34 @@ Provides comprehensive monitoring including:
 - System metrics (CPU, memory, disk)
 - Application-specific metrics (active users, database connections)
 - Business metrics (requests created, invoices generated)
+
+Multiprocess mode (gunicorn, see gunicorn.conf.py): when PROMETHEUS_MULTIPROC_DIR
+is set before prometheus_client is imported, every worker writes its samples to
+files in that directory and /metrics aggregates all workers' files. System-wide
+gauges are sampled by one collector process at a time (whichever worker holds
+the collector lock file), not on every scrape.
 """
 
+import os
 import time
 import psutil
 import threading
 from functools import wraps
 from flask import request, g, Response
 from prometheus_client import (
-    Counter, Histogram, Gauge, Summary, Info,
+    Counter, Histogram, Gauge, Summary,
     CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST,
     multiprocess, REGISTRY
 )
 
+try:
+    import fcntl
+except ImportError:  # Windows: every process samples the system gauges
+    fcntl = None
+
+# Endpoint label of requests that matched no route (keeps label cardinality bounded)
+UNMATCHED_ENDPOINT = 'unmatched'
+
 
 # =============================================================================
 # METRIC DEFINITIONS
@@ -75,94 +90,141 @@ STATUS_5XX = Counter(
 REQUESTS_IN_PROGRESS = Gauge(
     'http_requests_in_progress',
     'Number of HTTP requests currently being processed',
-    ['method', 'endpoint']
+    ['method', 'endpoint'],
+    multiprocess_mode='livesum'
 )
 
 # System Metrics
 CPU_USAGE = Gauge(
     'system_cpu_usage_percent',
-    'Current CPU usage percentage'
+    'Current CPU usage percentage',
+    multiprocess_mode='mostrecent'
 )
 
 MEMORY_USAGE = Gauge(
     'system_memory_usage_bytes',
-    'Current memory usage in bytes'
+    'Current memory usage in bytes',
+    multiprocess_mode='mostrecent'
 )
 
 MEMORY_USAGE_PERCENT = Gauge(
     'system_memory_usage_percent',
-    'Current memory usage percentage'
+    'Current memory usage percentage',
+    multiprocess_mode='mostrecent'
 )
 
 MEMORY_AVAILABLE = Gauge(
     'system_memory_available_bytes',
-    'Available memory in bytes'
+    'Available memory in bytes',
+    multiprocess_mode='mostrecent'
 )
 
 DISK_USAGE_PERCENT = Gauge(
     'system_disk_usage_percent',
     'Disk usage percentage',
-    ['mount_point']
+    ['mount_point'],
+    multiprocess_mode='mostrecent'
 )
 
+# Process metrics (summed over live workers in multiprocess mode)
 OPEN_FILE_DESCRIPTORS = Gauge(
     'app_open_file_descriptors',
-    'Number of open file descriptors'
+    'Number of open file descriptors',
+    multiprocess_mode='livesum'
 )
 
 PROCESS_CPU_PERCENT = Gauge(
     'process_cpu_usage_percent',
-    'Process CPU usage percentage'
+    'Process CPU usage percentage',
+    multiprocess_mode='livesum'
 )
 
 PROCESS_MEMORY_BYTES = Gauge(
     'process_memory_bytes',
-    'Process memory usage in bytes'
+    'Process memory usage in bytes',
+    multiprocess_mode='livesum'
 )
 
 PROCESS_THREADS = Gauge(
     'process_threads_total',
-    'Number of threads in the process'
+    'Number of threads in the process',
+    multiprocess_mode='livesum'
 )
 
-# Database Metrics
+# Database Metrics (fed by the SQLAlchemy hooks in db_metrics.py)
 DB_QUERY_COUNT = Counter(
     'database_queries_total',
     'Total database queries executed',
-    ['operation']  # SELECT, INSERT, UPDATE, DELETE
+    ['operation', 'endpoint', 'fingerprint']  # SELECT/INSERT/UPDATE/DELETE/OTHER, route, statement hash
 )
 
+# No fingerprint label: each label set costs a series per bucket, and the
+# counter already breaks queries down by statement
 DB_QUERY_LATENCY = Histogram(
     'database_query_duration_seconds',
     'Database query latency in seconds',
-    ['operation'],
+    ['operation', 'endpoint'],
     buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
 )
 
+DB_QUERIES_PER_REQUEST = Histogram(
+    'database_queries_per_request',
+    'Database queries executed per HTTP request',
+    ['endpoint'],
+    buckets=[1, 2, 5, 10, 20, 50, 100, 200, 500]
+)
+
+DB_QUERY_BUDGET_EXCEEDED = Counter(
+    'database_query_budget_exceeded_total',
+    'HTTP requests that ran more queries than DB_QUERY_BUDGET',
+    ['endpoint']
+)
+
 DB_CONNECTION_POOL_SIZE = Gauge(
     'database_connection_pool_size',
-    'Database connection pool size'
+    'Database connection pool size',
+    ['bind'],  # 'primary' or the SQLALCHEMY_BINDS key (replica)
+    multiprocess_mode='livesum'
 )
 
 DB_CONNECTIONS_ACTIVE = Gauge(
     'database_connections_active',
-    'Number of active database connections'
+    'Number of active database connections',
+    ['bind'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    'database_connection_pool_overflow',
+    'Connections open beyond the pool size (up to DB_MAX_OVERFLOW)',
+    ['bind'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_UTILISATION = Gauge(
+    'database_connection_pool_utilisation',
+    'Checked-out connections as a fraction of pool size plus overflow (1.0 = callers wait)',
+    ['bind'],
+    multiprocess_mode='livemax'
 )
 
 # Application Metrics
 ACTIVE_USERS = Gauge(
     'app_active_users_total',
-    'Number of currently active/logged-in users'
+    'Number of currently active/logged-in users',
+    multiprocess_mode='mostrecent'
 )
 
 TOTAL_USERS = Gauge(
     'app_total_users',
-    'Total number of registered users'
+    'Total number of registered users',
+    multiprocess_mode='mostrecent'
 )
 
 TOTAL_CLIENTS = Gauge(
     'app_total_clients',
-    'Total number of client users'
+    'Total number of client users',
+    multiprocess_mode='mostrecent'
 )
 
 # Business Metrics
@@ -204,10 +266,19 @@ AUTH_TOKEN_OPERATIONS = Counter(
     ['operation']  # issued, refreshed, revoked, expired
 )
 
-# App Info
-APP_INFO = Info(
-    'app',
-    'Application information'
+# Cache Metrics
+EMAIL_CLIENT_CACHE = Counter(
+    'email_client_cache_lookups_total',
+    'Email client cache lookups by company',
+    ['result']  # hit, miss
+)
+
+# App Info (a gauge rather than Info, which multiprocess mode does not support)
+APP_INFO = Gauge(
+    'app_info',
+    'Application information',
+    ['version', 'environment', 'app_name'],
+    multiprocess_mode='max'
 )
 
 
@@ -216,7 +287,7 @@ APP_INFO = Info(
 # =============================================================================
 
 def collect_system_metrics():
-    """Collect system-level metrics"""
+    """Collect system-wide metrics (CPU, memory, disk)"""
     try:
         # CPU
         CPU_USAGE.set(psutil.cpu_percent(interval=None))
@@ -235,7 +306,13 @@ def collect_system_metrics():
             except (PermissionError, OSError):
                 pass
 
-        # Process-specific metrics
+    except Exception as e:
+        print(f"Error collecting system metrics: {e}")
+
+
+def collect_process_metrics():
+    """Collect metrics of the current process"""
+    try:
         process = psutil.Process()
         PROCESS_CPU_PERCENT.set(process.cpu_percent())
         PROCESS_MEMORY_BYTES.set(process.memory_info().rss)
@@ -248,20 +325,60 @@ def collect_system_metrics():
             pass
 
     except Exception as e:
-        print(f"Error collecting system metrics: {e}")
+        print(f"Error collecting process metrics: {e}")
+
+
+def multiprocess_dir():
+    """Shared metrics directory when running in multiprocess mode (None otherwise)"""
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or None
+
+
+_collector_lock = None
+
+
+def is_system_collector():
+    """
+    Whether this process samples the system-wide gauges. In multiprocess mode
+    one process holds an exclusive lock on a file in the metrics directory; the
+    lock is released when it exits, and the next worker to try takes over.
+    """
+    global _collector_lock
+    directory = multiprocess_dir()
+    if _collector_lock is not None or not directory or fcntl is None:
+        return True
+
+    lock_file = open(os.path.join(directory, 'system_metrics.lock'), 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _collector_lock = lock_file
+    return True
 
 
 def start_metrics_collector(interval=15):
-    """Start background thread to collect system metrics periodically"""
+    """Start background thread to collect process (and, in one process, system) metrics periodically"""
     def collector():
         while True:
-            collect_system_metrics()
+            collect_process_metrics()
+            if is_system_collector():
+                collect_system_metrics()
             time.sleep(interval)
 
     thread = threading.Thread(target=collector, daemon=True)
     thread.start()
 
 
+def metrics_registry():
+    """Registry to expose: all workers' samples in multiprocess mode, else this process's"""
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
 # =============================================================================
 # MIDDLEWARE / DECORATORS
 # =============================================================================
@@ -270,15 +387,19 @@ def init_metrics(app):
     """Initialize Prometheus metrics for Flask app"""
 
     # Set app info
-    APP_INFO.info({
-        'version': '1.0.0',
-        'environment': app.config.get('ENV', 'production'),
-        'app_name': 'pointers-crm'
-    })
+    APP_INFO.labels(
+        version='1.0.0',
+        environment=app.config.get('ENV', 'production'),
+        app_name='pointers-crm'
+    ).set(1)
 
     # Start system metrics collector
     start_metrics_collector()
 
+    # Count and time every SQL statement, and check per-request query budgets
+    from app.modules.metrics.db_metrics import init_db_metrics
+    init_db_metrics(app)
+
     @app.before_request
     def before_request():
         """Record request start time and increment in-progress counter"""
@@ -362,10 +483,8 @@ def init_metrics(app):
     # Metrics endpoint
     @app.route('/metrics')
     def metrics():
-        """Prometheus metrics endpoint"""
-        # Collect latest system metrics before returning
-        collect_system_metrics()
-        return Response(generate_latest(REGISTRY), mimetype=CONTENT_TYPE_LATEST)
+        """Prometheus metrics endpoint (system gauges come from the background collector)"""
+        return Response(generate_latest(metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
 
     app.logger.info("Prometheus metrics initialized")
 
@@ -375,7 +494,8 @@ def get_endpoint_label():
     if request.url_rule:
         # Use the URL rule pattern (e.g., /api/users/<id> instead of /api/users/123)
         return request.url_rule.rule
-    return request.path
+    # Not request.path: scanners probing random URLs would create a series each
+    return UNMATCHED_ENDPOINT
 
 
 # =============================================================================
@@ -408,6 +528,11 @@ def track_token_operation(operation):
     AUTH_TOKEN_OPERATIONS.labels(operation=operation).inc()
 
 
+def track_email_client_cache(hit=True):
+    """Track email client cache hits and misses"""
+    EMAIL_CLIENT_CACHE.labels(result='hit' if hit else 'miss').inc()
+
+
 def update_active_users(count):
     """Update the number of active users"""
     ACTIVE_USERS.set(count)
@@ -419,13 +544,16 @@ def update_total_users(total, clients):
     TOTAL_CLIENTS.set(clients)
 
 
-def track_db_query(operation, duration):
+def track_db_query(operation, duration, endpoint='background', fingerprint=''):
     """Track database query metrics"""
-    DB_QUERY_COUNT.labels(operation=operation).inc()
-    DB_QUERY_LATENCY.labels(operation=operation).observe(duration)
+    DB_QUERY_COUNT.labels(operation=operation, endpoint=endpoint, fingerprint=fingerprint).inc()
+    DB_QUERY_LATENCY.labels(operation=operation, endpoint=endpoint).observe(duration)
 
 
-def update_db_pool_stats(pool_size, active_connections):
-    """Update database connection pool stats"""
-    DB_CONNECTION_POOL_SIZE.set(pool_size)
-    DB_CONNECTIONS_ACTIVE.set(active_connections)
+def update_db_pool_stats(pool_size, active_connections, overflow=0, capacity=None, bind='primary'):
+    """Update database connection pool stats (capacity: most connections the pool opens)"""
+    DB_CONNECTION_POOL_SIZE.labels(bind=bind).set(pool_size)
+    DB_CONNECTIONS_ACTIVE.labels(bind=bind).set(active_connections)
+    DB_POOL_OVERFLOW.labels(bind=bind).set(max(overflow, 0))
+    capacity = capacity or pool_size
+    DB_POOL_UTILISATION.labels(bind=bind).set(active_connections / capacity if capacity else 0)
@@ -11,13 +11,16 @@ Clean architecture module for handling notifications including:
 
 Structure:
 ---------
-- models/       - Database models (Notification, EmailTemplate, ScheduledEmail, EmailAutomation)
+- models/       - Database models (Notification, EmailTemplate, ScheduledEmail, ScheduledEmailRecipient,
+                  EmailAutomation)
 - repositories/ - Data access layer (NotificationRepository, EmailTemplateRepository)
-- services/     - Business services (NotificationService, EmailService, BulkEmailRecipientService)
+- services/     - Business services (NotificationService, EmailService, BulkEmailRecipientService,
+                  BulkEmailSender, ScheduledEmailDispatcher)
+- tasks.py      - Background tasks (bulk email campaign dispatch)
 - usecases/     - Use case implementations
 - schemas/      - Validation schemas (Marshmallow)
 - routes/       - API endpoints
-- clients/      - Email provider clients (SMTP, Graph, MailerSend, SendGrid)
+- clients/      - Email provider clients (SMTP with a connection pool, Graph, MailerSend, SendGrid)
 
 Backward Compatibility:
 ----------------------
@@ -41,6 +44,7 @@ from app.modules.notifications.models import (  # noqa: E402
     Notification,
     EmailTemplate,
     ScheduledEmail,
+    ScheduledEmailRecipient,
     EmailAutomation,
     EmailAutomationLog,
 )
@@ -51,6 +55,8 @@ from app.modules.notifications.services import (  # noqa: E402
     NotificationService,  # Backward compatible alias (points to EmailService)
     EmailService,
     BulkEmailRecipientService,
+    BulkEmailSender,
+    ScheduledEmailDispatcher,
 )
 
 # Clients - Export at module level for backward compatibility
@@ -102,6 +108,7 @@ __all__ = [
     'Notification',
     'EmailTemplate',
     'ScheduledEmail',
+    'ScheduledEmailRecipient',
     'EmailAutomation',
     'EmailAutomationLog',
 
@@ -109,6 +116,8 @@ __all__ = [
     'NotificationService',  # Backward compatible (alias for EmailService)
     'EmailService',
     'BulkEmailRecipientService',
+    'BulkEmailSender',
+    'ScheduledEmailDispatcher',
 
     # Clients
     'GraphAPIClient',
@@ -10,6 +10,7 @@ from flask import current_app
 class GraphAPIClient:
     """Microsoft Graph API client for sending emails"""
 
+    PROVIDER = 'graph'
     GRAPH_API_ENDPOINT = 'https://graph.microsoft.com/v1.0'
 
     def __init__(self):
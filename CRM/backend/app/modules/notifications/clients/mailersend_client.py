@@ -2,12 +2,19 @@
 MailerSend Email Client for sending emails via MailerSend API
 Uses HTTP API instead of SMTP - works better with Docker/cloud environments
 """
+import re
+
+import requests
 from flask import current_app
 
 
 class MailerSendClient:
     """MailerSend client for sending emails via HTTP API"""
 
+    PROVIDER = 'mailersend'
+    BULK_API_URL = 'https://api.mailersend.com/v1/bulk-email'
+    BATCH_SIZE = 500  # Email objects accepted per bulk-email request
+
     def __init__(self, api_key=None, sender_email=None, sender_name=None):
         """
         Initialize MailerSend client.
@@ -93,6 +100,62 @@ class MailerSendClient:
             current_app.logger.error(f'[MailerSend] {error_msg}')
             return {'success': False, 'error': error_msg}
 
+    def send_batch(self, messages, throttle=None):
+        """
+        Send personalised emails through the bulk-email endpoint, BATCH_SIZE per request.
+
+        MailerSend queues bulk requests and delivers them asynchronously, so an
+        accepted request counts as sent for every message in it.
+
+        Args:
+            messages: List of dicts with to, subject and html
+            throttle: Optional callable invoked before each API request (rate limiting)
+
+        Returns:
+            List of dicts with success status and error if failed, one per message
+        """
+        if not self.is_configured():
+            return [{'success': False, 'error': 'MailerSend not configured properly'}] * len(messages)
+
+        results = []
+        for start in range(0, len(messages), self.BATCH_SIZE):
+            chunk = messages[start:start + self.BATCH_SIZE]
+            payload = [
+                {
+                    'from': {'email': self.sender_email, 'name': self.sender_name},
+                    'to': [{'email': message['to'], 'name': message['to'].split('@')[0]}],
+                    'subject': message['subject'],
+                    'html': message['html'],
+                    'text': re.sub(r'<[^>]+>', '', message['html'].replace('<br>', '\n').replace('</p>', '\n\n'))
+                }
+                for message in chunk
+            ]
+
+            if throttle:
+                throttle()
+            try:
+                response = requests.post(
+                    self.BULK_API_URL,
+                    headers={'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'},
+                    json=payload,
+                    timeout=60
+                )
+                if response.status_code == 202:
+                    current_app.logger.info(
+                        f'[MailerSend] Bulk request accepted for {len(chunk)} emails: '
+                        f'{response.json().get("bulk_email_id")}'
+                    )
+                    results.extend({'success': True} for _ in chunk)
+                    continue
+                error_msg = f'Bulk request failed ({response.status_code}): {response.text[:500]}'
+            except Exception as e:
+                error_msg = f'Bulk request failed: {str(e)}'
+
+            current_app.logger.error(f'[MailerSend] {error_msg}')
+            results.extend({'success': False, 'error': error_msg} for _ in chunk)
+
+        return results
+
     def send_email_with_attachment(self, to_email, subject, body,
                                    attachment_bytes, attachment_name,
                                    attachment_content_type='application/octet-stream',
@@ -2,6 +2,8 @@
 SendGrid Email Client for sending emails via SendGrid API
 Uses HTTPS (port 443) - works even when SMTP ports are blocked
 """
+import json
+
 import requests
 from flask import current_app
 
@@ -9,7 +11,11 @@ from flask import current_app
 class SendGridClient:
     """SendGrid client for sending emails via REST API"""
 
+    PROVIDER = 'sendgrid'
     API_URL = "https://api.sendgrid.com/v3/mail/send"
+    BATCH_SIZE = 1000  # Personalizations accepted per mail/send request
+    SUBSTITUTION_TAG = '-{}-'  # Placeholder {name} becomes -name- in a shared body
+    MAX_SUBSTITUTION_BYTES = 10000  # SendGrid's limit per personalization; larger ones are sent rendered
 
     def __init__(self, api_key=None, sender_email=None, sender_name=None):
         """
@@ -100,6 +106,80 @@ class SendGridClient:
             current_app.logger.error(f'[SendGrid] {error_msg}')
             return {'success': False, 'error': error_msg}
 
+    def send_batch(self, messages, throttle=None):
+        """
+        Send emails with one mail/send request per template (up to BATCH_SIZE recipients).
+
+        SendGrid personalizations carry their own recipient, subject and
+        substitutions but share the request's content. Messages that include their
+        compiled 'template' and 'context' (ScheduledEmailDispatcher) share one body
+        with a substitution tag per placeholder, filled per personalization, so a
+        personalised campaign costs one request per BATCH_SIZE recipients. Other
+        messages are grouped by identical rendered HTML.
+
+        Args:
+            messages: List of dicts with to, subject and html (optionally template and context)
+            throttle: Optional callable invoked before each API request (rate limiting)
+
+        Returns:
+            List of dicts with success status and error if failed, one per message
+        """
+        if not self.is_configured():
+            return [{'success': False, 'error': 'SendGrid not configured properly'}] * len(messages)
+
+        # Body -> [(message index, substitutions or None)]
+        by_body = {}
+        for index, message in enumerate(messages):
+            template = message.get('template')
+            substitutions = None
+            if template is not None and template.names:
+                substitutions = template.substitutions(message.get('context') or {}, self.SUBSTITUTION_TAG)
+                if len(json.dumps(substitutions)) > self.MAX_SUBSTITUTION_BYTES:
+                    substitutions = None
+            if substitutions is None:
+                by_body.setdefault(message['html'], []).append((index, None))
+            else:
+                by_body.setdefault(template.tagged(self.SUBSTITUTION_TAG), []).append((index, substitutions))
+
+        results = [None] * len(messages)
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        for body, entries in by_body.items():
+            for start in range(0, len(entries), self.BATCH_SIZE):
+                chunk = entries[start:start + self.BATCH_SIZE]
+                personalizations = []
+                for i, substitutions in chunk:
+                    personalization = {"to": [{"email": messages[i]['to']}], "subject": messages[i]['subject']}
+                    if substitutions:
+                        personalization["substitutions"] = substitutions
+                    personalizations.append(personalization)
+                payload = {
+                    "personalizations": personalizations,
+                    "from": {"email": self.sender_email, "name": self.sender_name},
+                    "content": [{"type": "text/html", "value": body}]
+                }
+
+                if throttle:
+                    throttle()
+                try:
+                    response = requests.post(self.API_URL, json=payload, headers=headers, timeout=60)
+                    if response.status_code in [200, 201, 202]:
+                        result = {'success': True}
+                    else:
+                        result = {'success': False,
+                                  'error': f'SendGrid API error: {response.status_code} - {response.text}'}
+                except Exception as e:
+                    result = {'success': False, 'error': f'Failed to send email via SendGrid: {str(e)}'}
+
+                if not result['success']:
+                    current_app.logger.error(f'[SendGrid] {result["error"]}')
+                for i, _ in chunk:
+                    results[i] = result
+
+        return results
+
     def send_email_to_multiple(self, to_emails, subject, body, is_html=True):
         """
         Send email to multiple recipients.
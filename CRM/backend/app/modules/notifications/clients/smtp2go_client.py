@@ -11,6 +11,7 @@ from flask import current_app
 class SMTP2GoClient:
     """SMTP2GO client for sending emails via HTTP API"""
 
+    PROVIDER = 'smtp2go'
     API_URL = "https://api.smtp2go.com/v3/email/send"
 
     def __init__(self, api_key=None, sender_email=None, sender_name=None):
@@ -1,6 +1,7 @@
 """
 SMTP Email Client for sending emails via Gmail/Outlook/Custom SMTP
 Supports both company-level and system-level SMTP configurations
+Sends reuse authenticated sessions from SMTPConnectionPool
 """
 import smtplib
 import ssl
@@ -12,6 +13,8 @@ from email import encoders
 from datetime import datetime
 from flask import current_app
 
+from app.modules.notifications.clients.smtp_pool import SMTPConnectionPool
+
 # Global CC email - set via GLOBAL_CC_EMAIL env var if needed (empty = disabled)
 GLOBAL_CC_EMAIL = os.getenv('GLOBAL_CC_EMAIL', '')
 
@@ -19,6 +22,8 @@ GLOBAL_CC_EMAIL = os.getenv('GLOBAL_CC_EMAIL', '')
 class SMTPClient:
     """SMTP client for sending emails via Gmail, Outlook, or custom SMTP servers"""
 
+    PROVIDER = 'smtp'
+
     def __init__(self, config=None):
         """
         Initialize SMTP client with configuration.
@@ -78,7 +83,7 @@ class SMTPClient:
         ])
 
     def _get_connection(self):
-        """Create and return SMTP connection"""
+        """Create and return a new SMTP connection (sends go through SMTPConnectionPool)"""
         if self.smtp_use_ssl:
             # Use SSL from the start (port 465 typically)
             context = ssl.create_default_context()
@@ -151,9 +156,7 @@ class SMTPClient:
             if GLOBAL_CC_EMAIL:
                 recipients.append(GLOBAL_CC_EMAIL)
 
-            server = self._get_connection()
-            server.sendmail(self.sender_email, recipients, msg.as_string())
-            server.quit()
+            SMTPConnectionPool.sendmail(self, recipients, msg.as_string())
 
             current_app.logger.info(f'[SMTP] Email sent to {to_email} (CC: {GLOBAL_CC_EMAIL})')
             return {'success': True}
@@ -200,38 +203,60 @@ class SMTPClient:
             'errors': []
         }
 
-        try:
-            server = self._get_connection()
-
-            for email in to_emails:
-                try:
-                    msg = self._create_message(email, subject, body, is_html)
-                    # Include CC in recipients
-                    recipients = [email]
-                    if GLOBAL_CC_EMAIL:
-                        recipients.append(GLOBAL_CC_EMAIL)
-                    server.sendmail(self.sender_email, recipients, msg.as_string())
-                    results['sent'] += 1
-                except Exception as e:
-                    results['failed'] += 1
-                    results['errors'].append(f'{email}: {str(e)}')
-
-            server.quit()
-
-            if results['failed'] > 0:
-                results['success'] = results['sent'] > 0
+        for email in to_emails:
+            try:
+                msg = self._create_message(email, subject, body, is_html)
+                # Include CC in recipients
+                recipients = [email]
+                if GLOBAL_CC_EMAIL:
+                    recipients.append(GLOBAL_CC_EMAIL)
+                SMTPConnectionPool.sendmail(self, recipients, msg.as_string())
+                results['sent'] += 1
+            except Exception as e:
+                results['failed'] += 1
+                results['errors'].append(f'{email}: {str(e)}')
+
+        if results['failed'] > 0:
+            results['success'] = results['sent'] > 0
+            current_app.logger.error(f'[SMTP] Failed to send {results["failed"]} of {len(to_emails)} bulk emails')
+
+        return results
+
+    def send_batch(self, messages, throttle=None):
+        """
+        Send personalised emails over pooled SMTP connections.
 
-            return results
+        Args:
+            messages: List of dicts with to, subject and html
+            throttle: Optional callable invoked before each message (rate limiting)
 
-        except Exception as e:
-            error_msg = f'Failed to send bulk emails: {str(e)}'
-            current_app.logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
-                'sent': results.get('sent', 0),
-                'failed': len(to_emails) - results.get('sent', 0)
-            }
+        Returns:
+            List of dicts with success status and error if failed, one per message
+        """
+        if not self.is_configured():
+            return [{'success': False, 'error': 'SMTP not configured properly'}] * len(messages)
+
+        results = []
+        for message in messages:
+            if throttle:
+                throttle()
+            try:
+                msg = self._create_message(message['to'], message['subject'], message['html'])
+                recipients = [message['to']]
+                if GLOBAL_CC_EMAIL:
+                    recipients.append(GLOBAL_CC_EMAIL)
+                SMTPConnectionPool.sendmail(self, recipients, msg.as_string())
+                results.append({'success': True})
+            except (smtplib.SMTPException, OSError) as e:
+                results.append({'success': False, 'error': f'SMTP error: {str(e)}'})
+            except Exception as e:
+                # e.g. a header that cannot be encoded - fails this message only
+                results.append({'success': False, 'error': f'Failed to send email: {str(e)}'})
+
+        current_app.logger.info(
+            f'[SMTP] Batch sent: {sum(1 for r in results if r["success"])}/{len(messages)} to {self.smtp_host}'
+        )
+        return results
 
     def send_email_with_attachment(self, to_email, subject, body,
                                    attachment_bytes, attachment_name,
@@ -300,9 +325,7 @@ class SMTPClient:
             if GLOBAL_CC_EMAIL:
                 recipients.append(GLOBAL_CC_EMAIL)
 
-            server = self._get_connection()
-            server.sendmail(self.sender_email, recipients, msg.as_string())
-            server.quit()
+            SMTPConnectionPool.sendmail(self, recipients, msg.as_string())
 
             current_app.logger.info(f'[SMTP] Email with attachment sent to {to_email} (CC: {GLOBAL_CC_EMAIL})')
             return {'success': True}
@@ -0,0 +1,168 @@
+"""
+SMTP Connection Pool
+Keeps authenticated SMTP sessions open between sends, per server, credentials
+and sender, so bursts of notifications pay the TCP + TLS + AUTH handshake once.
+A session is only reused by a client with the same password (the key holds its
+hash), so one company's settings can never borrow another's authenticated session.
+
+- Idle connections are closed once idle longer than SMTP_POOL_IDLE_TIMEOUT_SECONDS
+  (servers drop idle sessions on their own, typically after a few minutes)
+- A connection idle longer than SMTP_POOL_NOOP_AFTER_SECONDS is checked with NOOP
+  before it is reused
+- A connection is retired after SMTP_POOL_MAX_MESSAGES messages
+- A send on a reused connection the server has dropped is retried once on a fresh one
+
+At most SMTP_POOL_MAX_IDLE idle connections are kept per key; 0 disables pooling.
+"""
+import hashlib
+import smtplib
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app
+
+
+class PooledConnection:
+    """An authenticated SMTP session and its usage"""
+
+    def __init__(self, key, server):
+        self.key = key
+        self.server = server
+        self.messages = 0
+        self.reused = False
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Process-wide pool of SMTP sessions shared by all SMTPClient instances"""
+
+    _idle = defaultdict(list)  # key -> [PooledConnection], most recently used last
+    _lock = threading.Lock()
+
+    @staticmethod
+    def key(client) -> tuple:
+        """Pool key of an SMTPClient (SSL and STARTTLS sessions are not interchangeable)"""
+        password_hash = hashlib.sha256((client.smtp_password or '').encode()).hexdigest()
+        return (
+            client.smtp_host, int(client.smtp_port), client.smtp_username, password_hash,
+            bool(client.smtp_use_ssl), bool(client.smtp_use_tls), client.sender_email
+        )
+
+    @classmethod
+    def sendmail(cls, client, recipients, message: str):
+        """
+        Send one message over a pooled connection of the client's server.
+
+        Args:
+            client: Configured SMTPClient
+            recipients: Envelope recipients
+            message: Serialised message
+
+        Raises:
+            smtplib.SMTPException / OSError: Send failed (after one reconnect
+            if a reused connection had been dropped)
+        """
+        for attempt in range(2):
+            connection = cls.checkout(client)
+            try:
+                connection.server.sendmail(client.sender_email, recipients, message)
+            except smtplib.SMTPResponseException as e:
+                # 421: the server is closing the session; other rejections leave it usable
+                if e.smtp_code == 421:
+                    cls.discard(connection)
+                else:
+                    cls.checkin(connection)
+                raise
+            except smtplib.SMTPRecipientsRefused:
+                cls.checkin(connection)
+                raise
+            except OSError:
+                # Dropped session (SMTPServerDisconnected) or socket error
+                cls.discard(connection)
+                if connection.reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                cls.discard(connection)
+                raise
+
+            connection.messages += 1
+            cls.checkin(connection)
+            return
+
+    @classmethod
+    def checkout(cls, client) -> PooledConnection:
+        """Take a healthy idle connection for the client, or open a new one"""
+        key = cls.key(client)
+        config = current_app.config
+        idle_timeout = config.get('SMTP_POOL_IDLE_TIMEOUT_SECONDS', 60)
+        noop_after = config.get('SMTP_POOL_NOOP_AFTER_SECONDS', 10)
+
+        while True:
+            with cls._lock:
+                idle = cls._idle.get(key)
+                connection = idle.pop() if idle else None
+            if connection is None:
+                return PooledConnection(key, client._get_connection())
+
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for > idle_timeout:
+                cls._close(connection)
+                continue
+            if idle_for > noop_after and not cls._healthy(connection):
+                cls._close(connection)
+                continue
+
+            connection.reused = True
+            return connection
+
+    @classmethod
+    def checkin(cls, connection: PooledConnection):
+        """Return a connection to the pool, or close it if it is spent or the pool is full"""
+        config = current_app.config
+        if connection.messages >= config.get('SMTP_POOL_MAX_MESSAGES', 100):
+            cls._close(connection)
+            return
+
+        connection.last_used = time.monotonic()
+        with cls._lock:
+            idle = cls._idle[connection.key]
+            if len(idle) < config.get('SMTP_POOL_MAX_IDLE', 4):
+                idle.append(connection)
+                return
+        cls._close(connection)
+
+    @classmethod
+    def discard(cls, connection: PooledConnection):
+        """Drop a connection that failed"""
+        cls._close(connection, quit=False)
+
+    @classmethod
+    def close_all(cls, key: tuple = None):
+        """Close the idle connections of one server (all of them if key is None)"""
+        with cls._lock:
+            if key is None:
+                connections = [c for idle in cls._idle.values() for c in idle]
+                cls._idle.clear()
+            else:
+                connections = cls._idle.pop(key, [])
+        for connection in connections:
+            cls._close(connection)
+
+    @staticmethod
+    def _healthy(connection: PooledConnection) -> bool:
+        try:
+            return connection.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _close(connection: PooledConnection, quit: bool = True):
+        try:
+            if quit:
+                connection.server.quit()
+            else:
+                connection.server.close()
+        except (smtplib.SMTPException, OSError):
+            pass
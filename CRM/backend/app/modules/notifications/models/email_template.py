@@ -2,6 +2,7 @@
 EmailTemplate Model - Customizable email templates
 """
 from datetime import datetime
+from app.common.templating import TemplateRenderer
 from app.extensions import db
 
 
@@ -80,17 +81,23 @@ class EmailTemplate(db.Model):
             # Super admin sees all
             return cls.query.filter_by(is_active=True).order_by(cls.name).all()
 
+    def compiled(self):
+        """Compiled subject and body, cached by (template id, updated_at)"""
+        version = (self.id, self.updated_at) if self.id else None
+        return (
+            TemplateRenderer.compile(self.subject, key=version and ('email_template.subject',) + version),
+            TemplateRenderer.compile(self.body_html, key=version and ('email_template.body',) + version)
+        )
+
     def render(self, context):
         """Render template with given context variables"""
-        subject = self.subject
-        body = self.body_html
-
-        for key, value in context.items():
-            placeholder = f'{{{key}}}'
-            subject = subject.replace(placeholder, str(value) if value else '')
-            body = body.replace(placeholder, str(value) if value else '')
+        subject, body = self.compiled()
+        return subject.render(context), body.render(context)
 
-        return subject, body
+    def render_many(self, contexts):
+        """Render template once per context, returning (subject, body) pairs"""
+        subject, body = self.compiled()
+        return [(subject.render(context), body.render(context)) for context in contexts]
 
     def to_dict(self, include_company=False, include_service=False):
         data = {
@@ -36,6 +36,14 @@ class ScheduledEmail(db.Model):
     sent_count = db.Column(db.Integer, default=0)
     failed_count = db.Column(db.Integer, default=0)
 
+    # Dispatch progress (ScheduledEmailDispatcher): the worker holding the lease,
+    # and how far recipient_filter has been expanded into recipient rows
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+    recipient_cursor = db.Column(db.String(36))  # Last user ID paged from recipient_filter
+    recipients_resolved = db.Column(db.Boolean, default=False)
+    notify_in_app = db.Column(db.Boolean, default=False)  # Also create an in-app notification per recipient
+
     # Metadata
     created_by = db.Column(db.String(36), db.ForeignKey('users.id', ondelete='SET NULL'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -46,6 +54,8 @@ class ScheduledEmail(db.Model):
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_scheduled_emails')
     recipient_user = db.relationship('User', foreign_keys=[recipient_user_id])
     template = db.relationship('EmailTemplate', backref='scheduled_emails')
+    recipients = db.relationship('ScheduledEmailRecipient', backref='scheduled_email', lazy='dynamic',
+                                 cascade='all, delete-orphan')
 
     # Status constants
     STATUS_PENDING = 'pending'
@@ -98,5 +108,49 @@ class ScheduledEmail(db.Model):
 
         return data
 
+    def to_progress_dict(self):
+        """Delivery progress of a bulk email campaign"""
+        sent, failed = self.sent_count or 0, self.failed_count or 0
+        total = self.recipients_count or 0
+        return {
+            'campaign_id': self.id,
+            'status': self.status,
+            'recipients_count': total,
+            'recipients_resolved': bool(self.recipients_resolved),
+            'sent_count': sent,
+            'failed_count': failed,
+            'pending_count': max(total - sent - failed, 0),
+            'percent_complete': round((sent + failed) * 100 / total, 1) if total else (
+                100.0 if self.status in (self.STATUS_SENT, self.STATUS_FAILED) else 0.0
+            ),
+            'error_message': self.error_message
+        }
+
     def __repr__(self):
         return f'<ScheduledEmail {self.id} scheduled for {self.scheduled_at}>'
+
+
+class ScheduledEmailRecipient(db.Model):
+    """Delivery state of one recipient of a scheduled email, so a crashed dispatch resumes without resending"""
+    __tablename__ = 'scheduled_email_recipients'
+
+    id = db.Column(db.Integer, primary_key=True)
+    scheduled_email_id = db.Column(db.Integer, db.ForeignKey('scheduled_emails.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id', ondelete='SET NULL'))
+    email = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sent, failed
+    error_message = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.UniqueConstraint('scheduled_email_id', 'email', name='uq_scheduled_email_recipient'),
+        db.Index('idx_scheduled_email_recipients_status', 'scheduled_email_id', 'status'),
+    )
+
+    # Status constants
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    def __repr__(self):
+        return f'<ScheduledEmailRecipient {self.email} ({self.status})>'
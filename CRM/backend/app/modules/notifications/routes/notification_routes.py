@@ -29,7 +29,8 @@ Bulk Email:
     POST   /notifications/bulk-email           - Send to user IDs
     GET    /notifications/bulk-email/filters   - Get filter options
     POST   /notifications/bulk-email/preview   - Preview recipients
-    POST   /notifications/bulk-email/filtered  - Send to filtered users
+    POST   /notifications/bulk-email/filtered  - Send to filtered users (returns a campaign ID)
+    GET    /notifications/bulk-email/campaigns/<id> - Campaign delivery progress
 
 Scheduled Emails:
     POST   /notifications/scheduled-emails      - Create scheduled email
@@ -51,7 +52,8 @@ Author: CRM Development Team
 """
 
 import logging
-from flask import request
+from datetime import datetime
+from flask import current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError as MarshmallowValidationError
 
@@ -62,6 +64,7 @@ from app.modules.notifications import notifications_bp
 from app.modules.notifications.services import EmailService, BulkEmailRecipientService
 from app.modules.notifications.services.notification_service import NotificationService
 from app.modules.notifications.models import EmailTemplate, ScheduledEmail, EmailAutomation
+from app.modules.notifications.tasks import dispatch_campaign
 from app.modules.notifications.usecases import (
     CreateScheduledEmailUseCase, UpdateScheduledEmailUseCase,
     CancelScheduledEmailUseCase, ListScheduledEmailsUseCase, GetScheduledEmailUseCase,
@@ -70,6 +73,7 @@ from app.modules.notifications.usecases import (
     GetEmailAutomationUseCase, GetAutomationLogsUseCase
 )
 from app.common.decorators import get_current_user, admin_required, accountant_required
+from app.common.templating import TemplateRenderer
 from app.common.responses import success_response, error_response
 from app.extensions import db
 
@@ -360,12 +364,8 @@ def send_bulk_email():
             if template:
                 subject, body = template.render(email_context)
             else:
-                subject = custom_subject
-                body = custom_body
-                for key, value in email_context.items():
-                    placeholder = f'{{{key}}}'
-                    subject = subject.replace(placeholder, str(value) if value else '')
-                    body = body.replace(placeholder, str(value) if value else '')
+                subject = TemplateRenderer.render(custom_subject, email_context)
+                body = TemplateRenderer.render(custom_body, email_context)
 
             EmailService.send_email(
                 to_email=recipient.email,
@@ -474,80 +474,73 @@ def send_filtered_bulk_email():
         if not template:
             return error_response('Template not found', 404)
 
-    # Get filtered recipients
-    recipients = BulkEmailRecipientService.get_filtered_recipients(user.company_id, filter_criteria)
+    recipients_count = BulkEmailRecipientService.count_filtered_recipients(user.company_id, filter_criteria)
 
-    if not recipients:
+    if not recipients_count:
         return error_response('No recipients match the filter criteria', 400)
 
-    # If scheduling for later, create a scheduled email instead
+    # Sent now or later, the email is a scheduled email expanded and sent by
+    # ScheduledEmailDispatcher (batched, rate-limited, resumable)
+    scheduled_time = datetime.utcnow()
     if schedule_at:
-        from datetime import datetime
         try:
             scheduled_time = datetime.fromisoformat(schedule_at.replace('Z', '+00:00'))
         except (ValueError, AttributeError):
             return error_response('Invalid schedule_at format. Use ISO 8601.', 400)
 
-        scheduled_email = ScheduledEmail(
-            company_id=user.company_id,
-            recipient_type=ScheduledEmail.RECIPIENT_FILTER,
-            recipient_filter=filter_criteria,
-            subject=custom_subject or (template.subject if template else ''),
-            body_html=custom_body or (template.body_html if template else ''),
-            template_id=template_id,
-            template_context=context,
-            scheduled_at=scheduled_time,
-            recipients_count=len(recipients),
-            created_by=user.id
-        )
-        db.session.add(scheduled_email)
-        db.session.commit()
+    scheduled_email = ScheduledEmail(
+        company_id=user.company_id,
+        recipient_type=ScheduledEmail.RECIPIENT_FILTER,
+        recipient_filter=filter_criteria,
+        subject=custom_subject or (template.subject if template else ''),
+        body_html=custom_body or (template.body_html if template else ''),
+        template_id=template_id,
+        template_context=context,
+        scheduled_at=scheduled_time,
+        recipients_count=recipients_count,
+        notify_in_app=bool(request.json.get('notify_in_app', False)),
+        created_by=user.id
+    )
+    db.session.add(scheduled_email)
+    db.session.commit()
 
+    if schedule_at:
         return success_response({
             'scheduled': True,
             'scheduled_email_id': scheduled_email.id,
-            'recipients_count': len(recipients),
+            'recipients_count': recipients_count,
             'scheduled_at': schedule_at
         }, status_code=201)
 
-    # Send immediately
-    sent_count = 0
-    failed_count = 0
+    # Send now: the campaign runs in the job worker and its progress is
+    # polled from GET /bulk-email/campaigns/<campaign_id>. Without a worker
+    # (eager mode) .delay() would send it inside this request, so it is left
+    # due for the scheduled email dispatcher's next poll instead
+    if not current_app.config.get('JOB_QUEUE_EAGER'):
+        dispatch_campaign.delay(scheduled_email.id)
+        db.session.refresh(scheduled_email)
 
-    for recipient in recipients:
-        try:
-            email_context = {
-                **context,
-                'client_name': recipient.full_name,
-                'client_email': recipient.email,
-                'first_name': recipient.first_name,
-                'last_name': recipient.last_name
-            }
+    return success_response({
+        **scheduled_email.to_progress_dict(),
+        'total_recipients': recipients_count
+    }, status_code=202)
 
-            if template:
-                subject, body = template.render(email_context)
-            else:
-                subject = custom_subject
-                body = custom_body
-                for key, value in email_context.items():
-                    placeholder = f'{{{key}}}'
-                    subject = subject.replace(placeholder, str(value) if value else '')
-                    body = body.replace(placeholder, str(value) if value else '')
 
-            EmailService.send_email(
-                to_email=recipient.email,
-                subject=subject,
-                body_html=body
-            )
-            sent_count += 1
-        except Exception as e:
-            failed_count += 1
+@notifications_bp.route('/bulk-email/campaigns/<int:campaign_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_bulk_email_campaign(campaign_id):
+    """Get the delivery progress of a bulk email campaign"""
+    user = get_current_user()
 
-    return success_response({
-        'sent_count': sent_count,
-        'failed_count': failed_count,
-        'total_recipients': len(recipients)
-    })
+    if not user or not user.company_id:
+        return error_response('Company not found', 400)
+
+    campaign = ScheduledEmail.query.filter_by(id=campaign_id, company_id=user.company_id).first()
+    if not campaign:
+        return error_response('Campaign not found', 404)
+
+    return success_response({'campaign': campaign.to_progress_dict()})
 
 
 # ============== Scheduled Email Routes ==============
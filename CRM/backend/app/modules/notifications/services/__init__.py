@@ -7,6 +7,8 @@ which contains all the email sending functionality that was previously in Notifi
 from app.modules.notifications.services.notification_service import NotificationService as InAppNotificationService
 from app.modules.notifications.services.email_service import EmailService
 from app.modules.notifications.services.bulk_email_service import BulkEmailRecipientService
+from app.modules.notifications.services.bulk_sender import BulkEmailSender
+from app.modules.notifications.services.scheduled_email_dispatcher import ScheduledEmailDispatcher
 
 # For backward compatibility, NotificationService is aliased to EmailService
 # The original NotificationService had both email and in-app notification methods
@@ -19,4 +21,6 @@ __all__ = [
     'EmailService',         # Email-specific service
     'InAppNotificationService',  # In-app notification service
     'BulkEmailRecipientService',  # Bulk email filtering service
+    'BulkEmailSender',      # Batched, rate-limited sends
+    'ScheduledEmailDispatcher',  # Sends due scheduled emails
 ]
@@ -11,8 +11,14 @@ class BulkEmailRecipientService:
 
     @classmethod
     def get_filtered_recipients(cls, company_id: str, filter_criteria: dict) -> list:
+        """Get users matching the filter criteria (see filtered_recipients_query)"""
+        return cls.filtered_recipients_query(company_id, filter_criteria).all()
+
+    @classmethod
+    def filtered_recipients_query(cls, company_id: str, filter_criteria: dict):
         """
-        Get users matching the filter criteria.
+        Query for the users matching the filter criteria, for callers that page
+        through large recipient lists instead of loading them at once.
 
         Filter criteria can include:
         - roles: list of role names (e.g., ['client', 'accountant'])
@@ -104,7 +110,7 @@ class BulkEmailRecipientService:
         if exclude_ids:
             query = query.filter(~User.id.in_(exclude_ids))
 
-        return query.all()
+        return query
 
     @classmethod
     def count_filtered_recipients(cls, company_id: str, filter_criteria: dict) -> int:
@@ -0,0 +1,92 @@
+"""
+BulkEmailSender - Sends batches of personalised emails through one client
+=========================================================================
+
+Uses the client's provider-native batch call when it has one (MailerSend
+bulk-email, SendGrid personalizations, one SMTP connection per batch) and
+falls back to one send_email call per message otherwise. Every provider call
+first takes a token from that provider's rate limiter
+(EMAIL_PROVIDER_RATE_LIMITS, calls per second).
+
+The token buckets are per process: every gunicorn worker and worker.py process
+has its own, so the provider sees up to the configured rate times the number of
+sending processes. Divide the provider's account limit by that number when
+setting EMAIL_PROVIDER_RATE_LIMITS.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from flask import current_app
+
+from app.common.rate_limit import TokenBucket
+
+
+class BulkEmailSender:
+    """Batch sending with per-provider rate limits"""
+
+    _limiters = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def send(cls, client, messages: List[dict]) -> List[Optional[str]]:
+        """
+        Send a batch of messages.
+
+        Args:
+            client: Email client from EmailService._get_email_client
+            messages: List of dicts with to, subject and html
+
+        Returns:
+            Error message for each failed message, None for each one sent (same order)
+        """
+        limiter = cls.limiter(getattr(client, 'PROVIDER', type(client).__name__.lower()))
+        throttle = limiter.acquire if limiter else None
+
+        if hasattr(client, 'send_batch'):
+            outcomes = client.send_batch(messages, throttle=throttle)
+        else:
+            outcomes = []
+            for message in messages:
+                if throttle:
+                    throttle()
+                try:
+                    outcomes.append(client.send_email(message['to'], message['subject'], message['html']))
+                except Exception as e:
+                    outcomes.append({'success': False, 'error': str(e)})
+
+        return [cls._error(outcome) for outcome in outcomes]
+
+    @classmethod
+    def limiter(cls, provider: str) -> Optional[TokenBucket]:
+        """This process's rate limiter of a provider (None if it is not limited)"""
+        rate = cls.rate_limits().get(provider)
+        if not rate:
+            return None
+        with cls._lock:
+            limiter = cls._limiters.get(provider)
+            if limiter is None or limiter.rate != rate:
+                limiter = cls._limiters[provider] = TokenBucket(rate)
+            return limiter
+
+    @staticmethod
+    def rate_limits(config=None) -> Dict[str, float]:
+        """
+        Parse EMAIL_PROVIDER_RATE_LIMITS ('mailersend=0.25,smtp=5').
+
+        Returns:
+            Dict of provider -> calls per second
+        """
+        config = config or current_app.config
+        limits = {}
+        for item in config.get('EMAIL_PROVIDER_RATE_LIMITS', '').split(','):
+            name, _, value = item.strip().partition('=')
+            if name and value:
+                limits[name] = float(value)
+        return limits
+
+    @staticmethod
+    def _error(outcome) -> Optional[str]:
+        """Clients return {'success': ...} dicts, the Graph client a bool"""
+        if isinstance(outcome, dict):
+            return None if outcome.get('success') else (outcome.get('error') or 'Send failed')
+        return None if outcome else 'Send failed'
@@ -19,6 +19,7 @@ Features:
 - In-app notification management
 - Bulk email with recipient filtering
 - Company-specific SMTP configuration
+- Resolved email clients cached per company (dropped on email config updates)
 - PDF invoice attachments
 
 Usage:
@@ -38,10 +39,12 @@ Author: CRM Development Team
 import logging
 from flask import current_app
 from sqlalchemy import and_, or_
+from app.common.cache import LRUCache
 from app.extensions import db
 from app.modules.notifications.models.notification import Notification
 from app.modules.notifications.clients.graph_client import GraphAPIClient
 from app.modules.notifications.clients.smtp_client import SMTPClient, EmailClientFactory
+from app.modules.notifications.clients.smtp_pool import SMTPConnectionPool
 from app.modules.notifications.clients.mailersend_client import MailerSendClient
 from app.modules.notifications.clients.smtp2go_client import SMTP2GoClient
 from app.modules.user.models import User, Role
@@ -62,6 +65,11 @@ class EmailService:
     - Microsoft Graph API
     """
 
+    # Resolved email clients keyed by company ID ('' for none), created on first use
+    # from config. Entries are dropped when the company (or system) email config is
+    # updated, and expire after EMAIL_CLIENT_CACHE_TTL_SECONDS for other processes.
+    _client_cache = None
+
     # ============== Email Templates ==============
 
     @staticmethod
@@ -252,7 +260,7 @@ class EmailService:
     @classmethod
     def _get_email_client(cls, company_id=None):
         """
-        Get the appropriate email client.
+        Get the appropriate email client, reusing the one resolved earlier for the company.
         Priority: SMTP2GO > MailerSend > Graph API > Company SMTP > System SMTP
 
         Args:
@@ -261,6 +269,61 @@ class EmailService:
         Returns:
             Email client (SMTP2GoClient, MailerSendClient, GraphAPIClient, or SMTPClient)
         """
+        from app.modules.metrics import track_email_client_cache
+
+        cache = cls._get_client_cache()
+        key = company_id or ''
+        # Cached as a 1-tuple so "no client configured" is cached too
+        entry = cache.get(key)
+        track_email_client_cache(hit=entry is not None)
+        if entry is None:
+            client, cacheable = cls._resolve_email_client(company_id)
+            entry = (client,)
+            if cacheable:
+                cache.set(key, entry)
+        return entry[0]
+
+    @classmethod
+    def invalidate_email_client(cls, company_id=None):
+        """
+        Forget cached email clients after an email config update.
+
+        Args:
+            company_id: Company whose config changed (None for the system config,
+                        which every company may fall back to)
+        """
+        cache = cls._get_client_cache()
+        if company_id is None:
+            clients = [entry[0] for entry in cache.values()]
+            cache.clear()
+        else:
+            entry = cache.pop(company_id)
+            clients = [entry[0]] if entry else []
+
+        # Pooled sessions may be authenticated with the old credentials
+        for client in clients:
+            if isinstance(client, SMTPClient):
+                SMTPConnectionPool.close_all(SMTPConnectionPool.key(client))
+
+    @classmethod
+    def _get_client_cache(cls):
+        if cls._client_cache is None:
+            cls._client_cache = LRUCache(
+                maxsize=current_app.config.get('EMAIL_CLIENT_CACHE_SIZE', 1000),
+                ttl=current_app.config.get('EMAIL_CLIENT_CACHE_TTL_SECONDS', 300)
+            )
+        return cls._client_cache
+
+    @classmethod
+    def _resolve_email_client(cls, company_id=None):
+        """
+        Build the email client for a company from the provider settings and email configs.
+
+        Returns:
+            tuple: (client or None, cacheable) - not cacheable when the company config
+            could not be read and the result is only a fallback
+        """
+        cacheable = True
         current_app.logger.info(f'[EmailClient] Getting email client for company_id: {company_id}')
 
         # Try SMTP2GO first (primary - reliable delivery)
@@ -276,7 +339,7 @@ class EmailService:
             )
             if client.is_configured():
                 current_app.logger.info(f'[EmailClient] Using SMTP2GO API')
-                return client
+                return client, cacheable
 
         # Try MailerSend second (works best with Docker/cloud)
         mailersend_api_key = current_app.config.get('MAILERSEND_API_KEY')
@@ -291,7 +354,7 @@ class EmailService:
             )
             if client.is_configured():
                 current_app.logger.info(f'[EmailClient] Using MAILERSEND API')
-                return client
+                return client, cacheable
 
         # If company_id provided, try company-specific config
         if company_id:
@@ -303,11 +366,13 @@ class EmailService:
                         current_app.logger.info(f'[EmailClient] Using COMPANY SMTP: host={client.smtp_host}, port={client.smtp_port}, username={client.smtp_username}')
                     else:
                         current_app.logger.info(f'[EmailClient] Using company {client_type} client')
-                    return client
+                    return client, cacheable
                 else:
                     current_app.logger.info(f'[EmailClient] No company SMTP config found or not enabled')
             except Exception as e:
                 current_app.logger.error(f'[EmailClient] Error getting company config: {str(e)}')
+                # Transient (e.g. database) error: fall back for this send only
+                cacheable = False
 
         # Try system SMTP from environment variables
         current_app.logger.info(f'[EmailClient] Checking system SMTP from env vars...')
@@ -329,13 +394,13 @@ class EmailService:
             client = SMTPClient(smtp_config)
             if client.is_configured():
                 current_app.logger.info(f'[EmailClient] Using SYSTEM SMTP (env vars): {smtp_config["smtp_host"]}:{smtp_config["smtp_port"]}')
-                return client
+                return client, cacheable
             else:
                 current_app.logger.warning(f'[EmailClient] System SMTP not fully configured')
 
         # No email client configured - log warning
         current_app.logger.warning('[EmailClient] No email client configured - emails will not be sent')
-        return None
+        return None, cacheable
 
     # ============== Email Sending Methods ==============
 
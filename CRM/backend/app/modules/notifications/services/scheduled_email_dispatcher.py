@@ -0,0 +1,305 @@
+"""
+ScheduledEmailDispatcher - Sends due ScheduledEmail rows
+=======================================================
+
+Run every minute by the scheduler (every web process starts one), so several
+dispatchers poll at once:
+
+- Due emails are claimed with SELECT ... FOR UPDATE SKIP LOCKED (Postgres) and
+  leased to one worker. A worker that dies leaves its lease to expire, after
+  which another worker resumes the email.
+- recipient_filter is expanded lazily, one page of users at a time (keyset on
+  users.id), into scheduled_email_recipients rows.
+- Pending recipients are sent through the company's email client in batches
+  (BulkEmailSender: provider batch endpoints, per-provider rate limits); each
+  batch commits the per-recipient outcome (plus in-app notifications, inserted
+  in bulk, when notify_in_app is set) and renews the lease, so a resumed email
+  only sends to recipients that are still pending.
+"""
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from flask import current_app
+from sqlalchemy import and_, insert, or_, update
+
+from app.common.templating import TemplateRenderer
+from app.extensions import db
+from app.modules.notifications.models.notification import Notification
+from app.modules.notifications.models.scheduled_email import ScheduledEmail, ScheduledEmailRecipient
+from app.modules.notifications.services.bulk_email_service import BulkEmailRecipientService
+from app.modules.notifications.services.bulk_sender import BulkEmailSender
+from app.modules.user.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledEmailDispatcher:
+    """Claims due scheduled emails and delivers them with resumable progress"""
+
+    @classmethod
+    def dispatch_due(cls, worker_id: str = None, limit: int = 5, email_id: int = None) -> Dict[str, int]:
+        """
+        Claim and send the scheduled emails that are due.
+
+        Args:
+            worker_id: Lease owner name (defaults to host:pid)
+            limit: Most emails claimed in one run
+            email_id: Only this email (bulk email campaigns sent right away)
+
+        Returns:
+            dict: Emails processed, recipients sent and failed
+        """
+        worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        result = {'emails': 0, 'sent': 0, 'failed': 0}
+
+        for claimed_id in cls.claim(worker_id, limit, email_id):
+            progress = cls.process(claimed_id, worker_id)
+            result['emails'] += 1
+            result['sent'] += progress['sent']
+            result['failed'] += progress['failed']
+        return result
+
+    @classmethod
+    def claim(cls, worker_id: str, limit: int = 5, email_id: int = None) -> List[int]:
+        """
+        Lease due emails (pending, or processing with an expired lease) to a worker.
+
+        Args:
+            worker_id: Lease owner name
+            limit: Most emails to claim
+            email_id: Only claim this email
+
+        Returns:
+            IDs of the claimed emails
+        """
+        now = datetime.utcnow()
+        try:
+            query = ScheduledEmail.query.filter(
+                ScheduledEmail.scheduled_at <= now,
+                or_(
+                    ScheduledEmail.status == ScheduledEmail.STATUS_PENDING,
+                    and_(
+                        ScheduledEmail.status == ScheduledEmail.STATUS_PROCESSING,
+                        or_(ScheduledEmail.locked_until.is_(None), ScheduledEmail.locked_until <= now)
+                    )
+                )
+            )
+            if email_id is not None:
+                query = query.filter(ScheduledEmail.id == email_id)
+            query = query.order_by(ScheduledEmail.scheduled_at, ScheduledEmail.id).limit(limit)
+
+            if db.engine.dialect.name == 'postgresql':
+                query = query.with_for_update(skip_locked=True)
+
+            claimed = []
+            for scheduled in query.all():
+                scheduled.status = ScheduledEmail.STATUS_PROCESSING
+                scheduled.locked_by = worker_id
+                scheduled.locked_until = now + cls._lease()
+                claimed.append(scheduled.id)
+
+            db.session.commit()
+            return claimed
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def process(cls, email_id: int, worker_id: str) -> Dict[str, int]:
+        """
+        Send a claimed email to its pending recipients, resolving more as needed.
+
+        Args:
+            email_id: ID of an email claimed by this worker
+            worker_id: Lease owner name
+
+        Returns:
+            dict: Recipients sent and failed by this run
+        """
+        from app.modules.notifications.services.email_service import EmailService
+
+        progress = {'sent': 0, 'failed': 0}
+        scheduled = db.session.get(ScheduledEmail, email_id)
+        if scheduled is None or scheduled.locked_by != worker_id:
+            return progress
+
+        client = EmailService._get_email_client(scheduled.company_id)
+        if client is None:
+            cls._finish(scheduled, error='No email client configured')
+            return progress
+
+        compiled = cls._compile(scheduled)
+        batch_size = current_app.config.get('SCHEDULED_EMAIL_BATCH_SIZE', 50)
+        while True:
+            if not cls._renew_lease(email_id, worker_id):
+                logger.warning(f'Lost lease on scheduled email {email_id} - stopping')
+                return progress
+
+            batch = scheduled.recipients.filter_by(
+                status=ScheduledEmailRecipient.STATUS_PENDING
+            ).order_by(ScheduledEmailRecipient.id).limit(batch_size).all()
+
+            if not batch:
+                if scheduled.recipients_resolved:
+                    break
+                cls._resolve_next_page(scheduled)
+                db.session.commit()
+                continue
+
+            users = {
+                user.id: user for user in User.query.filter(
+                    User.id.in_([r.user_id for r in batch if r.user_id])
+                )
+            }
+            messages = [
+                cls._render(compiled, scheduled, users.get(recipient.user_id), recipient.email)
+                for recipient in batch
+            ]
+            try:
+                errors = BulkEmailSender.send(client, messages)
+            except Exception as e:
+                # Fail the batch rather than leave it pending, or it is resent
+                # every time the lease expires
+                logger.error(f'Sending a batch of scheduled email {email_id} failed: {str(e)}')
+                errors = [f'Failed to send email: {str(e)}'] * len(messages)
+
+            notifications = []
+            now = datetime.utcnow()
+            for recipient, message, error in zip(batch, messages, errors):
+                if error:
+                    recipient.status = ScheduledEmailRecipient.STATUS_FAILED
+                    recipient.error_message = error
+                    scheduled.failed_count = (scheduled.failed_count or 0) + 1
+                    progress['failed'] += 1
+                    continue
+
+                recipient.status = ScheduledEmailRecipient.STATUS_SENT
+                recipient.sent_at = now
+                scheduled.sent_count = (scheduled.sent_count or 0) + 1
+                progress['sent'] += 1
+                if scheduled.notify_in_app and recipient.user_id:
+                    notifications.append({
+                        'user_id': recipient.user_id,
+                        'title': message['subject'][:200],
+                        'message': 'You have a new email from your accountant. Please check your inbox.',
+                        'type': Notification.TYPE_INFO,
+                        'is_read': False,
+                        'created_at': now
+                    })
+
+            if notifications:
+                db.session.execute(insert(Notification), notifications)
+            db.session.commit()
+
+        cls._finish(scheduled)
+        return progress
+
+    @classmethod
+    def _resolve_next_page(cls, scheduled):
+        """Add the next page of recipients as pending rows (all of them for a single recipient)"""
+        if scheduled.recipient_type == ScheduledEmail.RECIPIENT_SINGLE:
+            user = scheduled.recipient_user
+            email = scheduled.recipient_email or (user.email if user else None)
+            if email:
+                db.session.add(ScheduledEmailRecipient(
+                    scheduled_email_id=scheduled.id,
+                    user_id=user.id if user else None,
+                    email=email
+                ))
+            scheduled.recipients_resolved = True
+            scheduled.recipients_count = 1 if email else 0
+            return
+
+        page_size = current_app.config.get('SCHEDULED_EMAIL_PAGE_SIZE', 500)
+        query = BulkEmailRecipientService.filtered_recipients_query(
+            scheduled.company_id, scheduled.recipient_filter or {}
+        )
+        if scheduled.recipient_cursor:
+            query = query.filter(User.id > scheduled.recipient_cursor)
+        page = query.order_by(User.id).limit(page_size).all()
+
+        candidates = {}
+        for user in page:
+            if user.email and user.email not in candidates:
+                candidates[user.email] = user.id
+        if candidates:
+            existing = {
+                email for (email,) in db.session.query(ScheduledEmailRecipient.email).filter(
+                    ScheduledEmailRecipient.scheduled_email_id == scheduled.id,
+                    ScheduledEmailRecipient.email.in_(list(candidates))
+                )
+            }
+            db.session.add_all([
+                ScheduledEmailRecipient(scheduled_email_id=scheduled.id, user_id=user_id, email=email)
+                for email, user_id in candidates.items() if email not in existing
+            ])
+            db.session.flush()
+
+        if page:
+            scheduled.recipient_cursor = page[-1].id
+        if len(page) < page_size:
+            scheduled.recipients_resolved = True
+        scheduled.recipients_count = scheduled.recipients.count()
+
+    @staticmethod
+    def _compile(scheduled):
+        """Compiled subject and body, shared by every recipient of the email"""
+        if scheduled.template and not scheduled.body_html:
+            return scheduled.template.compiled()
+        return TemplateRenderer.compile(scheduled.subject), TemplateRenderer.compile(scheduled.body_html)
+
+    @staticmethod
+    def _render(compiled, scheduled, user, email) -> dict:
+        """
+        Message for one recipient, with the per-recipient placeholders filled in.
+
+        Also carries the compiled body and the context, so clients that substitute
+        on the provider side (SendGrid) send one body for the whole batch.
+        """
+        context = {
+            **(scheduled.template_context or {}),
+            'client_name': user.full_name if user else '',
+            'client_email': email,
+            'first_name': user.first_name if user else '',
+            'last_name': user.last_name if user else ''
+        }
+        subject, body = compiled
+        return {'to': email, 'subject': subject.render(context), 'html': body.render(context),
+                'template': body, 'context': context}
+
+    @classmethod
+    def _renew_lease(cls, email_id: int, worker_id: str) -> bool:
+        """Extend the lease if this worker still holds it"""
+        renewed = db.session.execute(
+            update(ScheduledEmail).where(
+                ScheduledEmail.id == email_id,
+                ScheduledEmail.locked_by == worker_id,
+                ScheduledEmail.status == ScheduledEmail.STATUS_PROCESSING
+            ).values(locked_until=datetime.utcnow() + cls._lease()),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        db.session.commit()
+        return renewed == 1
+
+    @staticmethod
+    def _finish(scheduled, error: str = None):
+        """Mark the email sent (or failed if nothing could be delivered) and release the lease"""
+        if error is None and not scheduled.sent_count and scheduled.failed_count:
+            error = f'All {scheduled.failed_count} recipients failed'
+
+        scheduled.status = ScheduledEmail.STATUS_FAILED if error else ScheduledEmail.STATUS_SENT
+        scheduled.error_message = error or (
+            f'{scheduled.failed_count} of {scheduled.recipients_count} recipients failed'
+            if scheduled.failed_count else None
+        )
+        scheduled.sent_at = datetime.utcnow()
+        scheduled.locked_by = None
+        scheduled.locked_until = None
+        db.session.commit()
+
+    @staticmethod
+    def _lease() -> timedelta:
+        return timedelta(seconds=current_app.config.get('SCHEDULED_EMAIL_LEASE_SECONDS', 300))
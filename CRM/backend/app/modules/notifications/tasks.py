@@ -0,0 +1,24 @@
+"""
+Notification Background Tasks
+
+Bulk email campaigns are dispatched here in the job worker, so the bulk email
+request only creates the campaign and returns its ID.
+"""
+import os
+import socket
+
+from app.jobs.queue import background_task
+
+
+@background_task(queue='email')
+def dispatch_campaign(scheduled_email_id: int):
+    """Send a bulk email campaign (a scheduled email due now) to its recipients"""
+    from app.modules.notifications.services.scheduled_email_dispatcher import ScheduledEmailDispatcher
+
+    # If this worker dies mid-send, the periodic dispatcher resumes the
+    # campaign once its lease expires
+    ScheduledEmailDispatcher.dispatch_due(
+        worker_id=f'job:{socket.gethostname()}:{os.getpid()}',
+        limit=1,
+        email_id=scheduled_email_id
+    )
@@ -4,6 +4,7 @@ Email Automation Use Cases - Business logic for email automation
 from datetime import datetime, timedelta
 from marshmallow import ValidationError
 
+from app.common.templating import TemplateRenderer
 from app.extensions import db
 from app.modules.notifications.models.email_automation import EmailAutomation, EmailAutomationLog
 from app.modules.notifications.models.email_template import EmailTemplate
@@ -279,15 +280,10 @@ class TriggerAutomationUseCase:
                 if automation.template:
                     subject, body = automation.template.render(email_context)
                     if automation.custom_subject:
-                        subject = automation.custom_subject
-                        for key, value in email_context.items():
-                            subject = subject.replace(f'{{{key}}}', str(value) if value else '')
+                        subject = TemplateRenderer.render(automation.custom_subject, email_context)
                 else:
-                    subject = automation.custom_subject or ''
-                    body = automation.custom_body or ''
-                    for key, value in email_context.items():
-                        subject = subject.replace(f'{{{key}}}', str(value) if value else '')
-                        body = body.replace(f'{{{key}}}', str(value) if value else '')
+                    subject = TemplateRenderer.render(automation.custom_subject, email_context)
+                    body = TemplateRenderer.render(automation.custom_body, email_context)
 
                 # Handle delay
                 if automation.delay_minutes > 0:
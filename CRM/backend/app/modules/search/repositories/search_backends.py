@@ -0,0 +1,298 @@
+"""
+Search Backends - Indexed text matching for the search repository
+
+Each backend knows how to narrow a users / service requests / documents query
+down to rows matching a search string and how those rows should be ranked.
+The repository builds the entity query (company scoping, role/tag/status
+filters) and hands it to the backend, so all backends share the same filters.
+
+Backends:
+- PostgresSearchBackend: trigger-maintained ``search_vector`` (tsvector, GIN)
+  and ``search_text`` (pg_trgm GIN) columns from sql_migrations/upgrade_db_2.sql
+- SqliteFtsSearchBackend: FTS5 trigram tables kept in sync by triggers
+  (used by the testing config)
+- IlikeSearchBackend: unindexed ``ILIKE '%q%'`` fallback for databases
+  where neither index is available
+"""
+import logging
+import re
+from typing import List, Tuple
+
+from flask import current_app
+from sqlalchemy import Float, String, Text, false, func, inspect, literal_column, or_, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# pg_trgm and the FTS5 trigram tokenizer can only use their index for 3+ characters
+MIN_TRIGRAM_LENGTH = 3
+
+
+class IlikeSearchBackend:
+    """Unindexed fallback that ORs ILIKE over the searchable columns"""
+
+    name = 'ilike'
+
+    def match_users(self, query, term: str) -> Tuple[object, List]:
+        """
+        Restrict a User query to rows matching the search term.
+
+        Args:
+            query: User query with all non-text filters applied
+            term: Raw search string
+
+        Returns:
+            Tuple of (filtered query, list of ORDER BY clauses ranking the matches)
+        """
+        from app.modules.user.models import User
+
+        pattern = f'%{term}%'
+        return query.filter(
+            or_(
+                User.email.ilike(pattern),
+                User.first_name.ilike(pattern),
+                User.last_name.ilike(pattern),
+                User.phone.ilike(pattern),
+                User.company_name.ilike(pattern)
+            )
+        ), []
+
+    def match_requests(self, query, term: str) -> Tuple[object, List]:
+        """Restrict a ServiceRequest query (already joined to User) to matching rows"""
+        from app.modules.services.models import Service, ServiceRequest
+        from app.modules.user.models import User
+
+        pattern = f'%{term}%'
+        return query.join(Service).filter(
+            or_(
+                Service.name.ilike(pattern),
+                ServiceRequest.internal_notes.ilike(pattern),
+                User.email.ilike(pattern),
+                User.first_name.ilike(pattern),
+                User.last_name.ilike(pattern)
+            )
+        ), []
+
+    def match_documents(self, query, term: str) -> Tuple[object, List]:
+        """Restrict a Document query to matching rows"""
+        from app.modules.documents.models import Document
+
+        pattern = f'%{term}%'
+        return query.filter(
+            or_(
+                Document.original_filename.ilike(pattern),
+                Document.description.ilike(pattern)
+            )
+        ), []
+
+
+class PostgresSearchBackend(IlikeSearchBackend):
+    """
+    tsvector + pg_trgm backend.
+
+    Matches a row when its ``search_vector`` satisfies a prefix tsquery built
+    from the search words, or when ``search_text`` contains the raw string
+    (served by the trigram index). Results are ranked by ts_rank_cd plus
+    trigram similarity.
+    """
+
+    name = 'postgres'
+    TABLES = ('users', 'service_requests', 'documents')
+
+    @classmethod
+    def is_installed(cls, engine) -> bool:
+        """Check that upgrade_db_2.sql has added the search columns"""
+        inspector = inspect(engine)
+        for table in cls.TABLES:
+            columns = {c['name'] for c in inspector.get_columns(table)}
+            if not {'search_text', 'search_vector'} <= columns:
+                return False
+        return True
+
+    @staticmethod
+    def _prefix_tsquery(term: str) -> str:
+        """Build a 'word1:* & word2:*' tsquery string from the search term"""
+        words = re.findall(r'\w+', term.lower())
+        return ' & '.join(f'{word}:*' for word in words)
+
+    def _match(self, query, table: str, term: str) -> Tuple[object, List]:
+        vector = literal_column(f'{table}.search_vector', TSVECTOR)
+        search_text = literal_column(f'{table}.search_text', Text)
+        conditions = []
+        rank = None
+
+        tsquery_string = self._prefix_tsquery(term)
+        if tsquery_string:
+            tsquery = func.to_tsquery('simple', tsquery_string)
+            conditions.append(vector.op('@@')(tsquery))
+            rank = func.ts_rank_cd(vector, tsquery)
+
+        if len(term) >= MIN_TRIGRAM_LENGTH:
+            needle = term.lower()
+            conditions.append(search_text.ilike(f'%{needle}%'))
+            similarity = func.similarity(search_text, needle)
+            rank = similarity if rank is None else rank + similarity
+
+        if not conditions:
+            return query.filter(false()), []
+        return query.filter(or_(*conditions)), [rank.desc()]
+
+    def match_users(self, query, term: str) -> Tuple[object, List]:
+        return self._match(query, 'users', term)
+
+    def match_requests(self, query, term: str) -> Tuple[object, List]:
+        # Service name and client details are denormalised into service_requests.search_*
+        return self._match(query, 'service_requests', term)
+
+    def match_documents(self, query, term: str) -> Tuple[object, List]:
+        return self._match(query, 'documents', term)
+
+
+class SqliteFtsSearchBackend(IlikeSearchBackend):
+    """
+    SQLite FTS5 backend used by the testing config.
+
+    Each searchable table gets a ``<table>_fts`` trigram table holding the
+    row id and a concatenated body, kept in sync by triggers. A whole-string
+    phrase match against the trigram index gives the same substring semantics
+    as ILIKE; terms shorter than three characters fall back to LIKE on the body.
+    """
+
+    name = 'sqlite_fts'
+
+    # SQL expressions building the indexed body, written against the trigger row alias
+    USERS_BODY = (
+        "coalesce({r}.email, '') || ' ' || coalesce({r}.first_name, '') || ' ' || "
+        "coalesce({r}.last_name, '') || ' ' || coalesce({r}.phone, '') || ' ' || "
+        "coalesce({r}.company_name, '')"
+    )
+    REQUESTS_BODY = (
+        "coalesce({r}.request_number, '') || ' ' || "
+        "coalesce((SELECT s.name FROM services s WHERE s.id = {r}.service_id), '') || ' ' || "
+        "coalesce({r}.description, '') || ' ' || coalesce({r}.internal_notes, '') || ' ' || "
+        "coalesce((SELECT coalesce(u.email, '') || ' ' || coalesce(u.first_name, '') || ' ' || "
+        "coalesce(u.last_name, '') FROM users u WHERE u.id = {r}.user_id), '')"
+    )
+    DOCUMENTS_BODY = "coalesce({r}.original_filename, '') || ' ' || coalesce({r}.description, '')"
+
+    @classmethod
+    def _table_ddl(cls, table: str, body: str, watched: str) -> List[str]:
+        fts = f'{table}_fts'
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(ref_id UNINDEXED, body, tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(ref_id, body) VALUES (NEW.id, {body.format(r='NEW')}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {watched} ON {table} BEGIN "
+            f"DELETE FROM {fts} WHERE ref_id = OLD.id; "
+            f"INSERT INTO {fts}(ref_id, body) VALUES (NEW.id, {body.format(r='NEW')}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM {fts} WHERE ref_id = OLD.id; END",
+            f"DELETE FROM {fts}",
+            f"INSERT INTO {fts}(ref_id, body) SELECT t.id, {body.format(r='t')} FROM {table} t",
+        ]
+
+    @classmethod
+    def install(cls, engine) -> bool:
+        """
+        Create the FTS tables and triggers and backfill them.
+
+        Returns:
+            False if this SQLite build lacks FTS5 or the trigram tokenizer
+        """
+        statements = (
+            cls._table_ddl('users', cls.USERS_BODY,
+                           'email, first_name, last_name, phone, company_name')
+            + cls._table_ddl('service_requests', cls.REQUESTS_BODY,
+                             'request_number, service_id, user_id, description, internal_notes')
+            + cls._table_ddl('documents', cls.DOCUMENTS_BODY, 'original_filename, description')
+            + [
+                # Renaming a client or service changes the denormalised request body
+                "CREATE TRIGGER IF NOT EXISTS service_requests_fts_users_au "
+                "AFTER UPDATE OF email, first_name, last_name ON users BEGIN "
+                "DELETE FROM service_requests_fts WHERE ref_id IN "
+                "(SELECT id FROM service_requests WHERE user_id = NEW.id); "
+                "INSERT INTO service_requests_fts(ref_id, body) SELECT t.id, "
+                f"{cls.REQUESTS_BODY.format(r='t')} FROM service_requests t WHERE t.user_id = NEW.id; END",
+                "CREATE TRIGGER IF NOT EXISTS service_requests_fts_services_au "
+                "AFTER UPDATE OF name ON services BEGIN "
+                "DELETE FROM service_requests_fts WHERE ref_id IN "
+                "(SELECT id FROM service_requests WHERE service_id = NEW.id); "
+                "INSERT INTO service_requests_fts(ref_id, body) SELECT t.id, "
+                f"{cls.REQUESTS_BODY.format(r='t')} FROM service_requests t WHERE t.service_id = NEW.id; END",
+            ]
+        )
+        try:
+            with engine.begin() as connection:
+                for statement in statements:
+                    connection.execute(text(statement))
+        except Exception as e:
+            logger.warning(f"SQLite FTS5 search index unavailable: {e}")
+            return False
+        return True
+
+    def _match(self, query, model, table: str, term: str) -> Tuple[object, List]:
+        fts = f'{table}_fts'
+        param = f'{fts}_term'
+        if len(term) >= MIN_TRIGRAM_LENGTH:
+            # A quoted phrase of trigrams matches the term as a substring
+            sql = f"SELECT ref_id, bm25({fts}) AS rank FROM {fts} WHERE {fts} MATCH :{param}"
+            value = '"' + term.replace('"', '""') + '"'
+        else:
+            sql = f"SELECT ref_id, 0.0 AS rank FROM {fts} WHERE body LIKE :{param}"
+            value = f'%{term}%'
+
+        matches = (
+            text(sql)
+            .bindparams(**{param: value})
+            .columns(ref_id=String, rank=Float)
+            .subquery(f'{fts}_matches')
+        )
+        # bm25() scores are negative; the lowest score is the best match
+        return query.join(matches, model.id == matches.c.ref_id), [matches.c.rank.asc()]
+
+    def match_users(self, query, term: str) -> Tuple[object, List]:
+        from app.modules.user.models import User
+        return self._match(query, User, 'users', term)
+
+    def match_requests(self, query, term: str) -> Tuple[object, List]:
+        from app.modules.services.models import ServiceRequest
+        return self._match(query, ServiceRequest, 'service_requests', term)
+
+    def match_documents(self, query, term: str) -> Tuple[object, List]:
+        from app.modules.documents.models import Document
+        return self._match(query, Document, 'documents', term)
+
+
+# Resolved backend per database URL (index installation is checked once per process)
+_backends = {}
+
+
+def get_search_backend() -> IlikeSearchBackend:
+    """
+    Get the search backend for the current database.
+
+    The SEARCH_BACKEND config value can force 'ilike'; the default 'auto'
+    picks the indexed backend for the dialect when its index is installed.
+    """
+    engine = db.engine
+    key = str(engine.url)
+    backend = _backends.get(key)
+    if backend is not None:
+        return backend
+
+    backend = IlikeSearchBackend()
+    if current_app.config.get('SEARCH_BACKEND', 'auto') == 'auto':
+        dialect = engine.dialect.name
+        if dialect == 'postgresql':
+            if PostgresSearchBackend.is_installed(engine):
+                backend = PostgresSearchBackend()
+            else:
+                logger.warning("Search columns missing (run sql_migrations/upgrade_db_2.sql); using ILIKE search")
+        elif dialect == 'sqlite' and SqliteFtsSearchBackend.install(engine):
+            backend = SqliteFtsSearchBackend()
+
+    logger.info(f"Using '{backend.name}' search backend")
+    _backends[key] = backend
+    return backend
@@ -3,16 +3,113 @@ Search Repository - Data access layer for search operations
 
 This module encapsulates all database queries for search functionality,
 following the repository pattern to separate data access from business logic.
+
+Text matching and ranking are delegated to the active search backend
+(see search_backends.py), which uses the tsvector/pg_trgm indexes on
+Postgres and FTS5 on SQLite.
 """
-from typing import List, Optional
-from sqlalchemy import or_
+from typing import Dict, List
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import selectinload
 
+from app.db_routing import reads_from_replica
 from app.extensions import db
+from .search_backends import get_search_backend
 
 
+@reads_from_replica
 class SearchRepository:
     """Repository for search-related database operations"""
 
+    # =========================================================================
+    # QUERY BUILDERS
+    # =========================================================================
+
+    @staticmethod
+    def _users_query(
+        query: str = None,
+        company_id: str = None,
+        role_filter: str = None,
+        tag_ids: List[int] = None
+    ):
+        """Build the filtered User query and its ranking clauses"""
+        from app.modules.user.models import User, Role
+        from app.modules.tags.models import user_tags
+
+        search_query = User.query
+
+        if company_id:
+            search_query = search_query.filter(User.company_id == company_id)
+
+        if role_filter:
+            search_query = search_query.join(Role).filter(Role.name == role_filter)
+
+        if tag_ids:
+            search_query = search_query.join(user_tags).filter(user_tags.c.tag_id.in_(tag_ids))
+
+        ranking = []
+        if query:
+            search_query, ranking = get_search_backend().match_users(search_query, query)
+
+        return search_query, ranking + [User.created_at.desc()]
+
+    @staticmethod
+    def _requests_query(
+        query: str = None,
+        company_id: str = None,
+        status: str = None,
+        assigned_to: str = None
+    ):
+        """Build the filtered ServiceRequest query and its ranking clauses"""
+        from app.modules.services.models import ServiceRequest
+        from app.modules.user.models import User
+
+        search_query = ServiceRequest.query.join(User, ServiceRequest.user_id == User.id)
+
+        if company_id:
+            search_query = search_query.filter(User.company_id == company_id)
+
+        if status:
+            search_query = search_query.filter(ServiceRequest.status == status)
+
+        if assigned_to:
+            search_query = search_query.filter(ServiceRequest.assigned_accountant_id == assigned_to)
+
+        ranking = []
+        if query:
+            search_query, ranking = get_search_backend().match_requests(search_query, query)
+
+        return search_query, ranking + [ServiceRequest.created_at.desc()]
+
+    @staticmethod
+    def _documents_query(
+        query: str = None,
+        company_id: str = None,
+        category: str = None
+    ):
+        """Build the filtered Document query and its ranking clauses"""
+        from app.modules.documents.models import Document
+        from app.modules.user.models import User
+
+        search_query = Document.query.join(User, Document.uploaded_by_id == User.id)
+
+        if company_id:
+            search_query = search_query.filter(User.company_id == company_id)
+
+        if category:
+            search_query = search_query.filter(Document.document_category == category)
+
+        ranking = []
+        if query:
+            search_query, ranking = get_search_backend().match_documents(search_query, query)
+
+        return search_query, ranking + [Document.created_at.desc()]
+
+    # =========================================================================
+    # SINGLE ENTITY SEARCH
+    # =========================================================================
+
     @staticmethod
     def find_users(
         query: str = None,
@@ -32,35 +129,10 @@ class SearchRepository:
             limit: Maximum number of results
 
         Returns:
-            List of User model instances
+            List of User model instances, best matches first
         """
-        from app.modules.user.models import User, Role
-        from app.modules.tags.models import user_tags
-
-        search_query = User.query
-
-        if company_id:
-            search_query = search_query.filter(User.company_id == company_id)
-
-        if role_filter:
-            search_query = search_query.join(Role).filter(Role.name == role_filter)
-
-        if tag_ids:
-            search_query = search_query.join(user_tags).filter(user_tags.c.tag_id.in_(tag_ids))
-
-        if query:
-            search_pattern = f'%{query}%'
-            search_query = search_query.filter(
-                or_(
-                    User.email.ilike(search_pattern),
-                    User.first_name.ilike(search_pattern),
-                    User.last_name.ilike(search_pattern),
-                    User.phone.ilike(search_pattern),
-                    User.company_name.ilike(search_pattern)
-                )
-            )
-
-        return search_query.order_by(User.created_at.desc()).limit(limit).all()
+        search_query, ranking = SearchRepository._users_query(query, company_id, role_filter, tag_ids)
+        return search_query.order_by(*ranking).limit(limit).all()
 
     @staticmethod
     def find_requests(
@@ -81,35 +153,10 @@ class SearchRepository:
             limit: Maximum number of results
 
         Returns:
-            List of ServiceRequest model instances
+            List of ServiceRequest model instances, best matches first
         """
-        from app.modules.services.models import ServiceRequest, Service
-        from app.modules.user.models import User
-
-        search_query = ServiceRequest.query.join(User, ServiceRequest.user_id == User.id)
-
-        if company_id:
-            search_query = search_query.filter(User.company_id == company_id)
-
-        if status:
-            search_query = search_query.filter(ServiceRequest.status == status)
-
-        if assigned_to:
-            search_query = search_query.filter(ServiceRequest.assigned_accountant_id == assigned_to)
-
-        if query:
-            search_pattern = f'%{query}%'
-            search_query = search_query.join(Service).filter(
-                or_(
-                    Service.name.ilike(search_pattern),
-                    ServiceRequest.internal_notes.ilike(search_pattern),
-                    User.email.ilike(search_pattern),
-                    User.first_name.ilike(search_pattern),
-                    User.last_name.ilike(search_pattern)
-                )
-            )
-
-        return search_query.order_by(ServiceRequest.created_at.desc()).limit(limit).all()
+        search_query, ranking = SearchRepository._requests_query(query, company_id, status, assigned_to)
+        return search_query.order_by(*ranking).limit(limit).all()
 
     @staticmethod
     def find_documents(
@@ -128,26 +175,78 @@ class SearchRepository:
             limit: Maximum number of results
 
         Returns:
-            List of Document model instances
+            List of Document model instances, best matches first
         """
-        from app.modules.documents.models import Document
-        from app.modules.user.models import User
+        search_query, ranking = SearchRepository._documents_query(query, company_id, category)
+        return search_query.order_by(*ranking).limit(limit).all()
 
-        search_query = Document.query.join(User, Document.uploaded_by_id == User.id)
+    # =========================================================================
+    # GLOBAL SEARCH
+    # =========================================================================
 
-        if company_id:
-            search_query = search_query.filter(User.company_id == company_id)
+    @staticmethod
+    def find_all(
+        query: str,
+        company_id: str = None,
+        limit_per_type: int = 10
+    ) -> Dict[str, List]:
+        """
+        Find users, service requests and documents.
 
-        if category:
-            search_query = search_query.filter(Document.category == category)
+        The three ranked lookups are combined with UNION ALL so matching runs
+        in one statement. The matched rows are then loaded by primary key, one
+        statement per entity type with matches plus one per eager-loaded
+        relationship, and returned in rank order.
 
-        if query:
-            search_pattern = f'%{query}%'
-            search_query = search_query.filter(
-                or_(
-                    Document.original_filename.ilike(search_pattern),
-                    Document.description.ilike(search_pattern)
-                )
-            )
-
-        return search_query.order_by(Document.created_at.desc()).limit(limit).all()
+        Args:
+            query: Search string
+            company_id: Filter by company ID
+            limit_per_type: Maximum results per entity type
+
+        Returns:
+            Dictionary with 'users', 'requests', 'documents' lists of model instances
+        """
+        from app.modules.documents.models import Document
+        from app.modules.services.models import ServiceRequest
+        from app.modules.user.models import User
+
+        lookups = (
+            ('users', User, SearchRepository._users_query(query, company_id)),
+            ('requests', ServiceRequest, SearchRepository._requests_query(query, company_id)),
+            ('documents', Document, SearchRepository._documents_query(query, company_id)),
+        )
+
+        ranked = []
+        for entity_type, model, (search_query, ranking) in lookups:
+            positioned = search_query.with_entities(
+                literal(entity_type).label('entity_type'),
+                model.id.label('id'),
+                func.row_number().over(order_by=ranking).label('position')
+            ).subquery()
+            ranked.append(select(positioned).where(positioned.c.position <= limit_per_type))
+
+        ids = {entity_type: [] for entity_type, _, _ in lookups}
+        rows = db.session.execute(union_all(*ranked)).all()
+        for entity_type, entity_id, position in sorted(rows, key=lambda row: row.position):
+            ids[entity_type].append(entity_id)
+
+        loaders = {
+            'users': [selectinload(User.role)],
+            'requests': [
+                selectinload(ServiceRequest.service),
+                selectinload(ServiceRequest.user),
+                selectinload(ServiceRequest.assigned_accountant),
+            ],
+            'documents': [],
+        }
+        results = {}
+        for entity_type, model, _ in lookups:
+            if not ids[entity_type]:
+                results[entity_type] = []
+                continue
+            loaded = {
+                entity.id: entity
+                for entity in model.query.options(*loaders[entity_type]).filter(model.id.in_(ids[entity_type]))
+            }
+            results[entity_type] = [loaded[i] for i in ids[entity_type] if i in loaded]
+        return results
@@ -117,6 +117,10 @@ class SearchUseCase:
         """
         Search across all entity types.
 
+        Matching for all three entity types runs as a single statement;
+        the matched rows are then loaded by primary key (see
+        SearchRepository.find_all).
+
         Args:
             query: Search string
             company_id: Filter by company
@@ -125,10 +129,14 @@ class SearchUseCase:
         Returns:
             Dictionary with 'users', 'requests', 'documents' keys
         """
+        results = self.repository.find_all(
+            query=query,
+            company_id=company_id,
+            limit_per_type=limit_per_type
+        )
         return {
-            'users': self.search_users(query, company_id, limit=limit_per_type),
-            'requests': self.search_requests(query, company_id, limit=limit_per_type),
-            'documents': self.search_documents(query, company_id, limit=limit_per_type)
+            entity_type: [entity.to_dict() for entity in entities]
+            for entity_type, entities in results.items()
         }
 
 
@@ -52,14 +52,12 @@ class ServiceRenewal(db.Model):
 
     def record_reminder_sent(self, days_before, email_id=None):
         """Record that a reminder was sent"""
-        if self.reminders_sent is None:
-            self.reminders_sent = []
-
-        self.reminders_sent.append({
+        # Assign a new list: in-place changes to a JSON column are not tracked
+        self.reminders_sent = list(self.reminders_sent or []) + [{
             'sent_at': datetime.utcnow().isoformat(),
             'days_before': days_before,
             'email_id': email_id
-        })
+        }]
         self.last_reminder_at = datetime.utcnow()
         self.status = self.STATUS_REMINDED
 
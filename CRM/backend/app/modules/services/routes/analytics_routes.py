@@ -15,6 +15,7 @@ from app.modules.services.models import (
 from app.modules.user.models import User
 from app.common.decorators import admin_required, accountant_required, get_current_user
 from app.common.responses import success_response, error_response
+from app.db_routing import reads_from_replica
 
 
 # ============== State Duration Analytics ==============
@@ -22,6 +23,7 @@ from app.common.responses import success_response, error_response
 @requests_bp.route('/analytics/state-durations', methods=['GET'])
 @jwt_required()
 @admin_required
+@reads_from_replica
 def get_state_duration_analytics():
     """Get analytics on average time spent in each state"""
     current_user = get_current_user()
@@ -57,6 +59,7 @@ def get_state_duration_analytics():
 @requests_bp.route('/analytics/overdue', methods=['GET'])
 @jwt_required()
 @admin_required
+@reads_from_replica
 def get_overdue_requests():
     """Get list of overdue requests (past deadline)"""
     current_user = get_current_user()
@@ -95,6 +98,7 @@ def get_overdue_requests():
 @requests_bp.route('/analytics/deadline-summary', methods=['GET'])
 @jwt_required()
 @admin_required
+@reads_from_replica
 def get_deadline_summary():
     """Get summary of requests by deadline status"""
     current_user = get_current_user()
@@ -149,6 +153,7 @@ def get_deadline_summary():
 @requests_bp.route('/analytics/revenue-cost', methods=['GET'])
 @jwt_required()
 @admin_required
+@reads_from_replica
 def get_revenue_cost_analytics():
     """Get revenue vs cost analytics with filtering options"""
     current_user = get_current_user()
@@ -323,6 +328,7 @@ def _group_analytics_data(requests_data, group_by):
 @requests_bp.route('/export', methods=['GET'])
 @jwt_required()
 @admin_required
+@reads_from_replica
 def export_requests():
     """Export service requests to CSV or Excel"""
     from app.common.export import generate_csv, generate_excel, SERVICE_REQUEST_EXPORT_COLUMNS
@@ -5,7 +5,7 @@ API endpoints for request status management.
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 
 from app.modules.services.schemas.status_schemas import (
@@ -27,19 +27,14 @@ from app.modules.services.usecases.status import (
 )
 from app.modules.services.models.status_transition import StatusTransition
 from app.modules.services.services.status_resolver import TransitionResolver
-from app.modules.user.models import User, Role
+from app.modules.user.models import Role
 from app.extensions import db
+from app.common.decorators import get_current_user
 
 # Create blueprint
 status_bp = Blueprint('statuses', __name__, url_prefix='/api/statuses')
 
 
-def get_current_user():
-    """Get the current authenticated user."""
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
-
-
 def error_response(message: str, status_code: int = 400):
     """Create an error response."""
     return jsonify({'error': message}), status_code
@@ -6,24 +6,18 @@ API endpoints for task management.
 
 from datetime import datetime
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 from app.extensions import db
 from app.modules.services.models.task import Task
 from app.modules.user.models import User
-from app.common.decorators import admin_required, accountant_required
+from app.common.decorators import admin_required, accountant_required, get_current_user
 from app.modules.services.services.status_resolver import StatusResolver
 
 # Create blueprint
 task_bp = Blueprint('tasks', __name__, url_prefix='/api/tasks')
 
 
-def get_current_user():
-    """Get the current authenticated user."""
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
-
-
 def error_response(message: str, status_code: int = 400):
     """Create an error response."""
     return jsonify({'success': False, 'error': message}), status_code
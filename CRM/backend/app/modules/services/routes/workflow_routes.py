@@ -5,24 +5,19 @@ CRUD endpoints for managing service workflows, steps, and transitions.
 """
 import uuid
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app.extensions import db
 from app.modules.services.models.workflow_models import (
     ServiceWorkflow, WorkflowStep, WorkflowTransition, WorkflowAutomation, StepType
 )
 from app.modules.services.services.workflow_service import WorkflowService
 from app.modules.services.models import ServiceRequest
-from app.modules.user.models import User, Role
+from app.modules.user.models import Role
+from app.common.decorators import get_current_user
 
 workflow_bp = Blueprint('workflows', __name__)
 
 
-def get_current_user():
-    """Get the current authenticated user"""
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
-
-
 def require_admin():
     """Check if current user is admin or super_admin"""
     user = get_current_user()
@@ -10,6 +10,7 @@ from .invoice_pdf_service import InvoicePDFService
 from .renewal_service import RenewalService
 from .workflow_service import WorkflowService
 from .workflow_automation import WorkflowAutomationExecutor
+from .workload_service import WorkloadService
 from .catalog_service import (
     ServiceCatalogService,
     ServiceRequestService,
@@ -23,6 +24,7 @@ __all__ = [
     'RenewalService',
     'WorkflowService',
     'WorkflowAutomationExecutor',
+    'WorkloadService',
     'ServiceCatalogService',
     'ServiceRequestService',
     'QueryService',
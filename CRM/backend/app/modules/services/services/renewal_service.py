@@ -1,9 +1,13 @@
 """
 Renewal Service - Handles recurring service renewal tracking and reminders
 """
-from datetime import datetime, date, timedelta
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, time, timedelta, timezone
 from dateutil.relativedelta import relativedelta
 from flask import current_app
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.orm import joinedload
 from app.extensions import db
 from app.modules.services.models import Service, ServiceRequest, ServiceRenewal
 from app.modules.notifications.models import EmailTemplate, Notification
@@ -119,43 +123,59 @@ class RenewalService:
         return renewal
 
     @staticmethod
-    def get_due_reminders():
+    def get_due_reminders(lock=False):
         """
         Get all renewals that need reminders sent today.
 
+        Selected in one query: renewals whose service lists a reminder N days
+        before the due date, due exactly N days from today, and not reminded
+        yet today (a reminder sent today can only have been the N-day one).
+        User, service and company are loaded in the same query.
+
+        Args:
+            lock: Lock the renewal rows on Postgres, skipping rows another
+                  process holds (for claiming them)
+
         Returns:
             List of (ServiceRenewal, days_before) tuples
         """
         today = date.today()
-        reminders_to_send = []
 
-        # Get all active pending/reminded renewals
-        renewals = ServiceRenewal.query.filter(
+        # Reminder thresholds are per service; group service IDs by threshold
+        services_by_days = defaultdict(set)
+        for service_id, reminder_days in db.session.query(Service.id, Service.renewal_reminder_days):
+            for days_before in reminder_days or []:
+                if isinstance(days_before, int) and days_before >= 0:
+                    services_by_days[days_before].add(service_id)
+        if not services_by_days:
+            return []
+
+        # last_reminder_at is UTC; today started at local midnight
+        today_start = datetime.combine(today, time()).astimezone(timezone.utc).replace(tzinfo=None)
+
+        renewals = ServiceRenewal.query.options(
+            joinedload(ServiceRenewal.user),
+            joinedload(ServiceRenewal.service),
+            joinedload(ServiceRenewal.company)
+        ).filter(
             ServiceRenewal.is_active == True,
             ServiceRenewal.status.in_([ServiceRenewal.STATUS_PENDING, ServiceRenewal.STATUS_REMINDED]),
-            ServiceRenewal.next_due_date >= today
-        ).all()
-
-        for renewal in renewals:
-            service = renewal.service
-            if not service or not service.renewal_reminder_days:
-                continue
-
-            days_until_due = (renewal.next_due_date - today).days
-
-            # Check each reminder threshold
-            for days_before in service.renewal_reminder_days:
-                if days_until_due == days_before:
-                    # Check if this reminder hasn't been sent yet
-                    already_sent = any(
-                        r.get('days_before') == days_before
-                        for r in (renewal.reminders_sent or [])
-                    )
-                    if not already_sent:
-                        reminders_to_send.append((renewal, days_before))
-                        break  # Only one reminder per day
-
-        return reminders_to_send
+            or_(*[
+                and_(
+                    ServiceRenewal.next_due_date == today + timedelta(days=days_before),
+                    ServiceRenewal.service_id.in_(service_ids)
+                )
+                for days_before, service_ids in services_by_days.items()
+            ]),
+            or_(ServiceRenewal.last_reminder_at.is_(None), ServiceRenewal.last_reminder_at < today_start)
+        ).order_by(ServiceRenewal.id)
+
+        if lock and db.engine.dialect.name == 'postgresql':
+            # Only the renewal rows: the eager-loaded joins are outer joins
+            renewals = renewals.with_for_update(skip_locked=True, of=ServiceRenewal)
+        renewals = renewals.all()
+
+        return [(renewal, (renewal.next_due_date - today).days) for renewal in renewals]
 
     @staticmethod
     def get_renewal_template(service, company_id):
@@ -224,32 +244,36 @@ class RenewalService:
         ).first()
 
     @staticmethod
-    def send_renewal_reminder(renewal, days_before):
+    def build_reminder_email(renewal, days_before, templates=None):
         """
-        Send a renewal reminder email.
+        Render the reminder email for a renewal.
 
         Args:
             renewal: ServiceRenewal instance
             days_before: Number of days before due date
+            templates: Optional dict memoising templates by (company_id, service_id)
 
         Returns:
-            bool: True if sent successfully
+            tuple: (subject, body), or None if data or template is missing
         """
-        from app.modules.notifications.services import NotificationService
-
         user = renewal.user
         service = renewal.service
         company = renewal.company
 
         if not user or not service or not company:
             current_app.logger.error(f'Missing data for renewal {renewal.id}')
-            return False
+            return None
 
         # Get appropriate template
-        template = RenewalService.get_renewal_template(service, renewal.company_id)
+        if templates is None:
+            templates = {}
+        key = (renewal.company_id, service.id)
+        if key not in templates:
+            templates[key] = RenewalService.get_renewal_template(service, renewal.company_id)
+        template = templates[key]
         if not template:
             current_app.logger.error(f'No renewal template found for service {service.id}')
-            return False
+            return None
 
         # Build context for template
         portal_url = current_app.config.get('FRONTEND_URL', 'http://localhost:5173')
@@ -274,36 +298,63 @@ class RenewalService:
         }
 
         # Render template
-        subject, body = template.render(context)
+        return template.render(context)
+
+    @staticmethod
+    def reminder_notification(renewal):
+        """In-app notification row for a sent reminder (for a bulk insert)"""
+        service = renewal.service
+        return {
+            'user_id': renewal.user_id,
+            'title': f'{service.name} Reminder',
+            'message': f'Your {service.name} is due on {renewal.next_due_date.strftime("%B %d, %Y")}',
+            'type': Notification.TYPE_INFO,
+            'link': '/services/new',
+            'is_read': False,
+            'created_at': datetime.utcnow()
+        }
+
+    @staticmethod
+    def send_renewal_reminder(renewal, days_before, templates=None):
+        """
+        Send a renewal reminder email.
+
+        Args:
+            renewal: ServiceRenewal instance
+            days_before: Number of days before due date
+            templates: Optional dict memoising templates by (company_id, service_id)
+
+        Returns:
+            bool: True if sent successfully
+        """
+        from app.modules.notifications.services import NotificationService
+
+        email = RenewalService.build_reminder_email(renewal, days_before, templates)
+        if email is None:
+            return False
+        subject, body = email
 
         # Send email
         try:
             NotificationService.send_email(
-                to_email=user.email,
+                to_email=renewal.user.email,
                 subject=subject,
-                html_body=body,
+                body_html=body,
                 company_id=renewal.company_id
             )
 
-            # Record reminder sent
+            # Record reminder sent and create in-app notification
             renewal.record_reminder_sent(days_before)
+            db.session.execute(insert(Notification), [RenewalService.reminder_notification(renewal)])
             db.session.commit()
 
-            # Create in-app notification
-            Notification.create(
-                user_id=user.id,
-                title=f'{service.name} Reminder',
-                message=f'Your {service.name} is due on {renewal.next_due_date.strftime("%B %d, %Y")}',
-                notification_type=Notification.TYPE_INFO,
-                link='/services/new'
-            )
-
             current_app.logger.info(
-                f'Sent {days_before}-day renewal reminder to {user.email} for service {service.name}'
+                f'Sent {days_before}-day renewal reminder to {renewal.user.email} for service {renewal.service.name}'
             )
             return True
 
         except Exception as e:
+            db.session.rollback()
             current_app.logger.error(f'Failed to send renewal reminder: {str(e)}')
             return False
 
@@ -313,24 +364,97 @@ class RenewalService:
         Process all due reminders for today.
         Called by the scheduler daily.
 
+        Emails are rendered up front (one template lookup per company and
+        service) and sent by a pool of RENEWAL_REMINDER_WORKERS threads under the
+        provider rate limits; the reminders and in-app notifications are then
+        recorded in one transaction.
+
+        Several processes may run the scheduler, so due renewals are claimed
+        first: selected FOR UPDATE SKIP LOCKED (Postgres) and marked with
+        last_reminder_at in a committed transaction, which takes them out of
+        every other run's selection. The claim commit also ends the read
+        transaction, so none sits idle while the emails go out. Renewals whose
+        reminder could not be sent get their previous last_reminder_at back.
+
         Returns:
             dict: Summary of reminders sent
         """
+        from app.modules.notifications.services import BulkEmailSender, EmailService
+
         current_app.logger.info('Starting daily renewal reminder processing')
 
-        reminders = RenewalService.get_due_reminders()
+        reminders = RenewalService.get_due_reminders(lock=True)
         sent_count = 0
         failed_count = 0
 
+        # Claim: renewal ID -> last_reminder_at before this run
+        claimed_at = datetime.utcnow()
+        previous_reminder_at = {}
+        for renewal, _ in reminders:
+            previous_reminder_at[renewal.id] = renewal.last_reminder_at
+            renewal.last_reminder_at = claimed_at
+
+        templates = {}
+        clients = {}
+        jobs = []
         for renewal, days_before in reminders:
-            try:
-                if RenewalService.send_renewal_reminder(renewal, days_before):
-                    sent_count += 1
-                else:
-                    failed_count += 1
-            except Exception as e:
-                current_app.logger.error(f'Error processing renewal {renewal.id}: {str(e)}')
+            email = RenewalService.build_reminder_email(renewal, days_before, templates)
+            if email is None:
+                failed_count += 1
+                continue
+            if renewal.company_id not in clients:
+                clients[renewal.company_id] = EmailService._get_email_client(renewal.company_id)
+            subject, body = email
+            jobs.append((
+                renewal.id, renewal.company_id, days_before,
+                {'to': renewal.user.email, 'subject': subject, 'html': body},
+                RenewalService.reminder_notification(renewal)
+            ))
+
+        # Everything needed is loaded: commit the claim before sending
+        db.session.commit()
+
+        app = current_app._get_current_object()
+
+        def send(job):
+            # Runs in a pool thread: network only, the session stays on this thread
+            _, company_id, _, message, _ = job
+            client = clients[company_id]
+            if client is None:
+                return 'No email client configured'
+            with app.app_context():
+                try:
+                    return BulkEmailSender.send(client, [message])[0]
+                except Exception as e:
+                    return str(e)
+
+        errors = []
+        if jobs:
+            workers = min(current_app.config.get('RENEWAL_REMINDER_WORKERS', 8), len(jobs))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='renewal-reminder') as pool:
+                errors = list(pool.map(send, jobs))
+
+        sent = {}
+        notifications = []
+        for (renewal_id, _, days_before, message, notification), error in zip(jobs, errors):
+            if error:
+                current_app.logger.error(f'Failed to send renewal reminder {renewal_id} to {message["to"]}: {error}')
                 failed_count += 1
+                continue
+            sent[renewal_id] = days_before
+            notifications.append(notification)
+            sent_count += 1
+
+        if previous_reminder_at:
+            # One query reloads the renewals the claim commit expired
+            for renewal in ServiceRenewal.query.filter(ServiceRenewal.id.in_(previous_reminder_at)).all():
+                if renewal.id in sent:
+                    renewal.record_reminder_sent(sent[renewal.id])
+                else:
+                    renewal.last_reminder_at = previous_reminder_at[renewal.id]
+        if notifications:
+            db.session.execute(insert(Notification), notifications)
+        db.session.commit()
 
         current_app.logger.info(
             f'Daily reminder processing complete. Sent: {sent_count}, Failed: {failed_count}'
@@ -5,6 +5,7 @@ Executes automation actions triggered by workflow step transitions.
 """
 import requests
 from flask import current_app
+from app.common.templating import DOUBLE_BRACE_PLACEHOLDER, TemplateRenderer
 from app.extensions import db
 from app.modules.services.models import ServiceRequest
 from app.modules.user.models import User, Role
@@ -156,66 +157,44 @@ class WorkflowAutomationExecutor:
             current_app.logger.info(f'Auto-assigned request {request.id} to {accountant.email}')
 
     @classmethod
-    def _get_least_busy_accountant(cls, company_id: str):
-        """Get the accountant with the fewest active requests"""
-        from sqlalchemy import func
-
-        accountant_role = Role.query.filter_by(name=Role.ACCOUNTANT).first()
-        if not accountant_role:
-            return None
-
-        # Get all accountants in the company
-        accountants = User.query.filter(
-            User.role_id == accountant_role.id,
+    def _get_company_accountants(cls, company_id: str):
+        """Get active accountants in the company, ordered by ID"""
+        return User.query.join(Role, User.role_id == Role.id).filter(
+            Role.name == Role.ACCOUNTANT,
             User.company_id == company_id,
             User.is_active == True
-        ).all()
+        ).order_by(User.id).all()
+
+    @classmethod
+    def _get_least_busy_accountant(cls, company_id: str):
+        """Get the accountant with the fewest active requests"""
+        from app.modules.services.services.workload_service import WorkloadService
 
+        accountants = cls._get_company_accountants(company_id)
         if not accountants:
             return None
 
-        # Count active requests per accountant
-        min_count = float('inf')
-        least_busy = None
-
-        for accountant in accountants:
-            count = ServiceRequest.query.filter(
-                ServiceRequest.assigned_accountant_id == accountant.id,
-                ServiceRequest.status.notin_(['completed', 'cancelled'])
-            ).count()
-
-            if count < min_count:
-                min_count = count
-                least_busy = accountant
-
-        return least_busy
+        workload = WorkloadService.get_company_workload(company_id)
+        return min(
+            accountants,
+            key=lambda a: workload.get(a.id, {}).get('active_requests', 0)
+        )
 
     @classmethod
     def _get_round_robin_accountant(cls, company_id: str):
         """Get the next accountant in round-robin fashion"""
-        accountant_role = Role.query.filter_by(name=Role.ACCOUNTANT).first()
-        if not accountant_role:
-            return None
-
-        accountants = User.query.filter(
-            User.role_id == accountant_role.id,
-            User.company_id == company_id,
-            User.is_active == True
-        ).order_by(User.id).all()
+        from app.modules.services.services.workload_service import WorkloadService
 
+        accountants = cls._get_company_accountants(company_id)
         if not accountants:
             return None
 
-        # Get the last assigned accountant for this company
-        last_request = ServiceRequest.query.join(
-            User, ServiceRequest.user_id == User.id
-        ).filter(
-            User.company_id == company_id,
-            ServiceRequest.assigned_accountant_id.isnot(None)
-        ).order_by(ServiceRequest.created_at.desc()).first()
+        # The last assigned staff member is the one with the most recent assigned request
+        workload = WorkloadService.get_company_workload(company_id)
+        assigned = [(w['last_assigned_at'], user_id) for user_id, w in workload.items() if w['last_assigned_at']]
 
-        if last_request:
-            last_accountant_id = last_request.assigned_accountant_id
+        if assigned:
+            last_accountant_id = max(assigned)[1]
             # Find the next accountant in the list
             for i, acc in enumerate(accountants):
                 if acc.id == last_accountant_id:
@@ -319,15 +298,12 @@ class WorkflowAutomationExecutor:
     def _replace_string_vars(cls, text: str, request: ServiceRequest):
         """Replace template variables in a string"""
         replacements = {
-            '{{request.id}}': request.id,
-            '{{request.request_number}}': request.request_number or '',
-            '{{request.status}}': request.status,
-            '{{request.xero_reference_job_id}}': request.xero_reference_job_id or '',
-            '{{request.internal_reference}}': request.internal_reference or '',
-            '{{request.invoice_amount}}': str(request.invoice_amount) if request.invoice_amount else '',
+            'request.id': request.id,
+            'request.request_number': request.request_number or '',
+            'request.status': request.status,
+            'request.xero_reference_job_id': request.xero_reference_job_id or '',
+            'request.internal_reference': request.internal_reference or '',
+            'request.invoice_amount': str(request.invoice_amount) if request.invoice_amount else '',
         }
 
-        for var, value in replacements.items():
-            text = text.replace(var, str(value))
-
-        return text
+        return TemplateRenderer.render(text, replacements, pattern=DOUBLE_BRACE_PLACEHOLDER)
@@ -177,15 +177,16 @@ class WorkflowService:
 
         # Send notifications if configured
         if transition.send_notification:
-            cls._send_transition_notification(request, transition, to_step, user)
+            from app.modules.services.tasks import send_transition_notification
+            send_transition_notification.delay(request.id, transition.id, to_step.id, user.id)
 
         return True, 'Transition executed successfully', request
 
     @classmethod
     def _execute_step_automations(cls, request: ServiceRequest, step, trigger: str, user: User):
-        """Execute automations for a step"""
+        """Queue the automations of a step (they run in the job worker, with retries)"""
         from app.modules.services.models.workflow_models import WorkflowAutomation
-        from app.modules.services.services.workflow_automation import WorkflowAutomationExecutor
+        from app.modules.services.tasks import run_workflow_automation
 
         automations = WorkflowAutomation.query.filter_by(
             step_id=step.id,
@@ -194,10 +195,7 @@ class WorkflowService:
         ).all()
 
         for automation in automations:
-            try:
-                WorkflowAutomationExecutor.execute(automation, request, user)
-            except Exception as e:
-                current_app.logger.error(f'Failed to execute automation {automation.id}: {str(e)}')
+            run_workflow_automation.delay(automation.id, request.id, user.id)
 
     @classmethod
     def _send_transition_notification(cls, request: ServiceRequest, transition,
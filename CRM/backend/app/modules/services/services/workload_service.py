@@ -0,0 +1,170 @@
+"""
+Accountant Workload Service
+
+Computes per-accountant request counts for a company with a single GROUP BY
+and keeps them in a short-lived per-company cache. Used by the analytics
+workload report and by workflow auto-assignment (least busy / round robin),
+which runs inside the request-create path.
+
+The cache is invalidated when a transaction of this process that changed a
+ServiceRequest's assignment or status commits; the TTL bounds staleness from
+other workers.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any
+
+from sqlalchemy import and_, case, event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.modules.services.models import ServiceRequest
+from app.modules.user.models import User, Role
+
+
+class WorkloadService:
+    """Shared accountant workload provider"""
+
+    # Seconds a company's counts are reused before being recomputed
+    CACHE_TTL_SECONDS = 30
+
+    # Requests in these statuses do not count towards an accountant's workload
+    INACTIVE_STATUSES = ('completed', 'cancelled')
+
+    _cache: Dict[str, tuple] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_company_workload(cls, company_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get workload counts for every staff member (non-client user) in a company.
+
+        Args:
+            company_id: The company ID
+
+        Returns:
+            Dict keyed by user ID with 'active_requests',
+            'completed_this_month' and 'last_assigned_at'
+        """
+        now = time.monotonic()
+        with cls._lock:
+            cached = cls._cache.get(company_id)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        workload = cls._compute(company_id)
+
+        with cls._lock:
+            cls._cache[company_id] = (now + cls.CACHE_TTL_SECONDS, workload)
+        return workload
+
+    @classmethod
+    def get_counts(cls, company_id: str, accountant_id: str) -> Dict[str, Any]:
+        """Get workload counts for one accountant (zeros if none assigned)"""
+        return cls.get_company_workload(company_id).get(accountant_id, {
+            'active_requests': 0,
+            'completed_this_month': 0,
+            'last_assigned_at': None
+        })
+
+    @classmethod
+    def _compute(cls, company_id: str) -> Dict[str, Dict[str, Any]]:
+        """Aggregate counts for all of the company's staff in one query"""
+        first_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        rows = db.session.query(
+            User.id,
+            func.sum(
+                case((ServiceRequest.status.notin_(cls.INACTIVE_STATUSES), 1), else_=0)
+            ).label('active_requests'),
+            func.sum(
+                case((and_(
+                    ServiceRequest.status == 'completed',
+                    ServiceRequest.completed_at >= first_of_month
+                ), 1), else_=0)
+            ).label('completed_this_month'),
+            func.max(ServiceRequest.created_at).label('last_assigned_at')
+        ).join(
+            Role, User.role_id == Role.id
+        ).outerjoin(
+            ServiceRequest, ServiceRequest.assigned_accountant_id == User.id
+        ).filter(
+            User.company_id == company_id,
+            Role.name != Role.USER
+        ).group_by(User.id).all()
+
+        return {
+            r.id: {
+                'active_requests': int(r.active_requests or 0),
+                'completed_this_month': int(r.completed_this_month or 0),
+                'last_assigned_at': r.last_assigned_at
+            }
+            for r in rows
+        }
+
+    @classmethod
+    def invalidate(cls, company_id: str = None):
+        """Drop cached counts for a company, or for every company if none given"""
+        with cls._lock:
+            if company_id is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop(company_id, None)
+
+    @classmethod
+    def invalidate_accountants(cls, *accountant_ids):
+        """Drop cached counts for any company whose counts include these accountants"""
+        accountant_ids = {a for a in accountant_ids if isinstance(a, str)}
+        if not accountant_ids:
+            return
+        with cls._lock:
+            stale = [
+                company_id for company_id, (_, workload) in cls._cache.items()
+                if accountant_ids & workload.keys()
+            ]
+            for company_id in stale:
+                del cls._cache[company_id]
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_workload_changes(session, flush_context):
+    """
+    Note the accountants whose counts flushed request changes affect.
+
+    Their cached counts are dropped only once the transaction commits: dropped
+    earlier, a concurrent lookup could recompute and cache the pre-commit
+    counts for the whole TTL.
+    """
+    stale = session.info.setdefault('workload_stale_accountants', set())
+    for request in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(request, ServiceRequest):
+            continue
+        state = inspect(request)
+        if request in session.dirty:
+            # Reassigning a request changes both the old and the new accountant's counts
+            assignment = state.attrs.assigned_accountant_id.history
+            stale.update(assignment.added or (), assignment.deleted or ())
+            # A status change moves a request in or out of its accountant's active count
+            if not state.attrs.status.history.has_changes():
+                continue
+        # Read from the instance dict so an expired request is not reloaded mid-flush
+        if 'assigned_accountant_id' in state.dict:
+            stale.add(state.dict['assigned_accountant_id'])
+        else:
+            session.info['workload_stale_all'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_workload(session):
+    stale = session.info.pop('workload_stale_accountants', None)
+    if session.info.pop('workload_stale_all', False):
+        WorkloadService.invalidate()
+    elif stale:
+        WorkloadService.invalidate_accountants(*stale)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_workload_changes(session):
+    session.info.pop('workload_stale_accountants', None)
+    session.info.pop('workload_stale_all', None)
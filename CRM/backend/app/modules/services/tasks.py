@@ -0,0 +1,83 @@
+"""
+Service Request Background Tasks
+
+Side effects of request creation, assignment and workflow transitions
+(emails, in-app notifications, automations such as webhooks) run here in the
+job worker, so the HTTP request only pays for enqueueing them.
+"""
+from flask import current_app
+from app.extensions import db
+from app.jobs.queue import background_task
+
+
+@background_task(queue='email')
+def notify_admins_of_new_request(request_id: str):
+    """Send the new request email and in-app notification to the company's admins"""
+    from app.modules.notifications.services import NotificationService
+    from app.modules.services.models import ServiceRequest
+    from app.modules.user.models import User, Role
+
+    request = db.session.get(ServiceRequest, request_id)
+    if not request:
+        return
+
+    # Get the company_id of the user who created the request
+    request_user = User.query.get(request.user_id)
+    if not request_user or not request_user.company_id:
+        current_app.logger.warning('Cannot notify admins: request user has no company')
+        return
+
+    admin_role = Role.query.filter_by(name=Role.ADMIN).first()
+
+    # Only notify admins from the SAME company
+    admins = User.query.filter(
+        User.role_id == admin_role.id,
+        User.company_id == request_user.company_id,
+        User.is_active == True
+    ).all()
+
+    if admins:
+        NotificationService.send_new_request_notification(request, admins)
+
+
+@background_task(queue='email')
+def notify_assigned_accountant(request_id: str):
+    """Send the assignment email and in-app notification to the assigned accountant"""
+    from app.modules.notifications.services import NotificationService
+    from app.modules.services.models import ServiceRequest
+
+    request = db.session.get(ServiceRequest, request_id)
+    if request and request.assigned_accountant_id:
+        NotificationService.send_assignment_notification(request)
+
+
+@background_task(queue='automations')
+def run_workflow_automation(automation_id: str, request_id: str, user_id: str):
+    """Run one workflow step automation (retried on failure, e.g. a webhook timeout)"""
+    from app.modules.services.models import ServiceRequest
+    from app.modules.services.models.workflow_models import WorkflowAutomation
+    from app.modules.services.services.workflow_automation import WorkflowAutomationExecutor
+    from app.modules.user.models import User
+
+    automation = db.session.get(WorkflowAutomation, automation_id)
+    request = db.session.get(ServiceRequest, request_id)
+    if not automation or not automation.is_active or not request:
+        return
+
+    WorkflowAutomationExecutor.execute(automation, request, db.session.get(User, user_id))
+
+
+@background_task(queue='email')
+def send_transition_notification(request_id: str, transition_id: str, to_step_id: str, user_id: str):
+    """Notify the client, configured roles and assignee about a workflow transition"""
+    from app.modules.services.models import ServiceRequest
+    from app.modules.services.models.workflow_models import WorkflowTransition, WorkflowStep
+    from app.modules.services.services.workflow_service import WorkflowService
+    from app.modules.user.models import User
+
+    request = db.session.get(ServiceRequest, request_id)
+    transition = db.session.get(WorkflowTransition, transition_id)
+    to_step = db.session.get(WorkflowStep, to_step_id)
+    user = db.session.get(User, user_id)
+    if request and transition and to_step and user:
+        WorkflowService._send_transition_notification(request, transition, to_step, user)
@@ -1,7 +1,10 @@
 """
 Get Dashboard Metrics Use Case
 """
+from sqlalchemy import and_, func, or_
+
 from app.common.usecase import BaseQueryUseCase, UseCaseResult
+from app.extensions import db
 from app.modules.services.models import ServiceRequest
 from app.modules.services.repositories import ServiceRequestRepository
 from app.modules.user.repositories import UserRepository
@@ -18,6 +21,7 @@ class GetDashboardMetricsUseCase(BaseQueryUseCase):
     - Accountant: Can see metrics for their assigned requests only
     - User: Can see metrics for their own requests only
     """
+    read_replica = True
 
     def __init__(self):
         self.request_repo = ServiceRequestRepository()
@@ -38,62 +42,72 @@ class GetDashboardMetricsUseCase(BaseQueryUseCase):
         if not user:
             return UseCaseResult.fail('User not found', 'NOT_FOUND')
 
-        # Get requests based on role and filter
-        requests = self._get_requests_for_metrics(user, company_id)
-
-        # Calculate metrics
-        total = len(requests)
-        pending = sum(1 for r in requests if r.status in [
-            ServiceRequest.STATUS_PENDING,
-            ServiceRequest.STATUS_INVOICE_RAISED,
-            ServiceRequest.STATUS_ASSIGNED
-        ])
-        processing = sum(1 for r in requests if r.status == ServiceRequest.STATUS_PROCESSING)
-        completed = sum(1 for r in requests if r.status == ServiceRequest.STATUS_COMPLETED)
-        queries = sum(1 for r in requests if r.status == ServiceRequest.STATUS_QUERY_RAISED)
-        under_review = sum(1 for r in requests if r.status == ServiceRequest.STATUS_ACCOUNTANT_REVIEW_PENDING)
-
-        # Invoice metrics
-        invoices_raised = sum(1 for r in requests if r.invoice_raised)
-        invoices_paid = sum(1 for r in requests if r.invoice_paid)
-        total_revenue = sum(r.invoice_amount or 0 for r in requests if r.invoice_paid)
-        pending_payments = sum(r.invoice_amount or 0 for r in requests if r.invoice_raised and not r.invoice_paid)
+        # Aggregate in the database rather than loading every request
+        totals = self._get_metric_totals(user, company_id)
 
         return UseCaseResult.ok({
             'metrics': {
                 'requests': {
-                    'total': total,
-                    'pending': pending,
-                    'processing': processing,
-                    'completed': completed,
-                    'queries': queries,
-                    'under_review': under_review
+                    'total': totals.total,
+                    'pending': totals.pending,
+                    'processing': totals.processing,
+                    'completed': totals.completed,
+                    'queries': totals.queries,
+                    'under_review': totals.under_review
                 },
                 'invoices': {
-                    'raised': invoices_raised,
-                    'paid': invoices_paid,
-                    'total_revenue': float(total_revenue),
-                    'pending_payments': float(pending_payments)
+                    'raised': totals.invoices_raised,
+                    'paid': totals.invoices_paid,
+                    'total_revenue': float(totals.total_revenue),
+                    'pending_payments': float(totals.pending_payments)
                 }
             }
         })
 
-    def _get_requests_for_metrics(self, user: User, company_id: str = None) -> list:
-        """Get requests based on user role for metrics calculation (excludes drafts)"""
+    def _get_metric_totals(self, user: User, company_id: str = None):
+        """Count statuses and sum invoice amounts in one query (excludes drafts)"""
+        paid = ServiceRequest.invoice_paid == True
+        unpaid_invoice = and_(
+            ServiceRequest.invoice_raised == True,
+            or_(ServiceRequest.invoice_paid == False, ServiceRequest.invoice_paid.is_(None))
+        )
+
+        query = db.session.query(
+            func.count(ServiceRequest.id).label('total'),
+            func.count(ServiceRequest.id).filter(ServiceRequest.status.in_([
+                ServiceRequest.STATUS_PENDING,
+                ServiceRequest.STATUS_INVOICE_RAISED,
+                ServiceRequest.STATUS_ASSIGNED
+            ])).label('pending'),
+            func.count(ServiceRequest.id).filter(
+                ServiceRequest.status == ServiceRequest.STATUS_PROCESSING).label('processing'),
+            func.count(ServiceRequest.id).filter(
+                ServiceRequest.status == ServiceRequest.STATUS_COMPLETED).label('completed'),
+            func.count(ServiceRequest.id).filter(
+                ServiceRequest.status == ServiceRequest.STATUS_QUERY_RAISED).label('queries'),
+            func.count(ServiceRequest.id).filter(
+                ServiceRequest.status == ServiceRequest.STATUS_ACCOUNTANT_REVIEW_PENDING).label('under_review'),
+            # Invoice metrics
+            func.count(ServiceRequest.id).filter(ServiceRequest.invoice_raised == True).label('invoices_raised'),
+            func.count(ServiceRequest.id).filter(paid).label('invoices_paid'),
+            func.coalesce(func.sum(ServiceRequest.invoice_amount).filter(paid), 0).label('total_revenue'),
+            func.coalesce(func.sum(ServiceRequest.invoice_amount).filter(unpaid_invoice), 0).label('pending_payments')
+        )
+
+        query = self._scope_to_user(query, user, company_id)
+        return query.filter(ServiceRequest.status != ServiceRequest.STATUS_DRAFT).one()
+
+    def _scope_to_user(self, query, user: User, company_id: str = None):
+        """Restrict a ServiceRequest query to the requests visible to the user's role"""
         if user.role.name == Role.SUPER_ADMIN:
             if company_id:
-                query = ServiceRequest.query.join(User, ServiceRequest.user_id == User.id)\
+                query = query.join(User, ServiceRequest.user_id == User.id)\
                     .filter(User.company_id == company_id)
-            else:
-                query = ServiceRequest.query
         elif user.role.name == Role.ADMIN:
-            query = ServiceRequest.query.join(User, ServiceRequest.user_id == User.id)\
+            query = query.join(User, ServiceRequest.user_id == User.id)\
                 .filter(User.company_id == user.company_id)
         elif user.role.name == Role.ACCOUNTANT:
-            query = ServiceRequest.query.filter_by(assigned_accountant_id=user.id)
+            query = query.filter(ServiceRequest.assigned_accountant_id == user.id)
         else:
-            query = ServiceRequest.query.filter_by(user_id=user.id)
-
-        # Exclude drafts from metrics
-        query = query.filter(ServiceRequest.status != ServiceRequest.STATUS_DRAFT)
-        return query.all()
+            query = query.filter(ServiceRequest.user_id == user.id)
+        return query
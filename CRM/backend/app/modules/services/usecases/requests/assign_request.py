@@ -1,7 +1,6 @@
 """
 Assign Request Use Case
 """
-from flask import current_app
 from app.common.usecase import BaseCommandUseCase, UseCaseResult
 from app.extensions import db
 from app.modules.services.models import ServiceRequest, RequestStateHistory, AssignmentHistory
@@ -117,8 +116,5 @@ class AssignRequestUseCase(BaseCommandUseCase):
 
     def _notify_accountant(self, request: ServiceRequest):
         """Send assignment notification to accountant"""
-        try:
-            from app.modules.notifications.services import NotificationService
-            NotificationService.send_assignment_notification(request)
-        except Exception as e:
-            current_app.logger.error(f'Failed to notify accountant: {str(e)}')
+        from app.modules.services.tasks import notify_assigned_accountant
+        notify_assigned_accountant.delay(request.id)
@@ -1,12 +1,11 @@
 """
 Create Service Request Use Case
 """
-from flask import current_app
 from app.common.usecase import BaseCommandUseCase, UseCaseResult
 from app.extensions import db
 from app.modules.services.models import ServiceRequest
 from app.modules.services.repositories import ServiceRepository, ServiceRequestRepository
-from app.modules.user.models import User, Role
+from app.modules.user.models import User
 
 
 class CreateServiceRequestUseCase(BaseCommandUseCase):
@@ -81,25 +80,5 @@ class CreateServiceRequestUseCase(BaseCommandUseCase):
 
     def _notify_admins(self, request: ServiceRequest):
         """Send notification to admins about new request (same company only)"""
-        try:
-            from app.modules.notifications.services import NotificationService
-
-            # Get the company_id of the user who created the request
-            request_user = User.query.get(request.user_id)
-            if not request_user or not request_user.company_id:
-                current_app.logger.warning('Cannot notify admins: request user has no company')
-                return
-
-            admin_role = Role.query.filter_by(name=Role.ADMIN).first()
-
-            # Only notify admins from the SAME company
-            admins = User.query.filter(
-                User.role_id == admin_role.id,
-                User.company_id == request_user.company_id,
-                User.is_active == True
-            ).all()
-
-            if admins:
-                NotificationService.send_new_request_notification(request, admins)
-        except Exception as e:
-            current_app.logger.error(f'Failed to notify admins: {str(e)}')
+        from app.modules.services.tasks import notify_admins_of_new_request
+        notify_admins_of_new_request.delay(request.id)
@@ -82,6 +82,7 @@ from app.modules.user.schemas import (
 from app.common.decorators import roles_required, admin_required, accountant_required, get_current_user
 from app.common.responses import success_response, error_response, paginated_response
 from app.common.exceptions import APIException
+from app.db_routing import reads_from_replica
 
 # Module-level logger
 logger = logging.getLogger(__name__)
@@ -579,6 +580,7 @@ def check_duplicates():
 @user_bp.route('/export', methods=['GET'])
 @jwt_required()
 @admin_required
+@reads_from_replica
 def export_users():
     """Export users to CSV or Excel"""
     from app.common.export import generate_csv, generate_excel, USER_EXPORT_COLUMNS
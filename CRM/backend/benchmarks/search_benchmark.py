@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Search Benchmark - ILIKE scan vs tsvector/pg_trgm index
+
+Builds a scratch table shaped like `users` at 10k / 100k / 1M rows, then
+times the legacy five-column ILIKE OR against the indexed predicate used by
+PostgresSearchBackend (see sql_migrations/upgrade_db_2.sql).
+
+Usage:
+    DB_HOST=localhost python benchmarks/search_benchmark.py
+    DB_HOST=localhost python benchmarks/search_benchmark.py --sizes 10000 100000 --repeat 20
+
+The scratch table is created in a throwaway schema and dropped afterwards.
+"""
+import argparse
+import os
+import re
+import statistics
+import time
+
+import psycopg2
+
+# Database connection settings (same variables as run_migrations.py)
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'db'),
+    'port': os.environ.get('DB_PORT', '5432'),
+    'database': os.environ.get('DB_NAME', 'accountant_crm'),
+    'user': os.environ.get('DB_USER', 'postgres'),
+    'password': os.environ.get('DB_PASSWORD', 'postgres')
+}
+
+SCHEMA = 'search_benchmark'
+
+# Search terms as typed into the global search box
+TERMS = ['smi', 'smith', 'john smith', 'acme', '0412', 'gmail.com']
+
+SETUP_SQL = f"""
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(120),
+    first_name VARCHAR(50),
+    last_name VARCHAR(50),
+    phone VARCHAR(20),
+    company_name VARCHAR(100),
+    created_at TIMESTAMP DEFAULT now(),
+    search_text TEXT,
+    search_vector TSVECTOR
+);
+"""
+
+POPULATE_SQL = f"""
+INSERT INTO {SCHEMA}.users (email, first_name, last_name, phone, company_name)
+SELECT
+    'user' || g || '@' || (ARRAY['gmail.com', 'outlook.com', 'acme.com.au', 'bigpond.net.au'])[1 + g %% 4],
+    (ARRAY['John', 'Jane', 'Priya', 'Wei', 'Oliver', 'Charlotte', 'Ahmed', 'Mia'])[1 + g %% 8],
+    (ARRAY['Smith', 'Nguyen', 'Patel', 'Brown', 'Wilson', 'Taylor', 'Singh', 'Lee'])[1 + (g / 8) %% 8] || (g %% 997),
+    '04' || lpad((g %% 100000000)::text, 8, '0'),
+    (ARRAY['Acme Super Fund', 'Harbour SMSF', 'Outback Holdings', NULL])[1 + g %% 4]
+FROM generate_series(1, %s) AS g;
+
+UPDATE {SCHEMA}.users SET
+    search_text = lower(concat_ws(' ', email, first_name, last_name, phone, company_name)),
+    search_vector =
+        setweight(to_tsvector('simple', concat_ws(' ', first_name, last_name, email)), 'A') ||
+        setweight(to_tsvector('simple', concat_ws(' ', company_name, phone)), 'B');
+"""
+
+INDEX_SQL = f"""
+CREATE INDEX ON {SCHEMA}.users USING GIN (search_vector);
+CREATE INDEX ON {SCHEMA}.users USING GIN (search_text gin_trgm_ops);
+ANALYZE {SCHEMA}.users;
+"""
+
+ILIKE_SQL = f"""
+SELECT id FROM {SCHEMA}.users
+WHERE email ILIKE %(pattern)s OR first_name ILIKE %(pattern)s OR last_name ILIKE %(pattern)s
+   OR phone ILIKE %(pattern)s OR company_name ILIKE %(pattern)s
+ORDER BY created_at DESC
+LIMIT 20
+"""
+
+INDEXED_SQL = f"""
+SELECT id FROM {SCHEMA}.users
+WHERE search_vector @@ to_tsquery('simple', %(tsquery)s) OR search_text ILIKE %(pattern)s
+ORDER BY ts_rank_cd(search_vector, to_tsquery('simple', %(tsquery)s)) + similarity(search_text, %(needle)s) DESC,
+         created_at DESC
+LIMIT 20
+"""
+
+
+def params_for(term):
+    """Build the bind parameters PostgresSearchBackend would use for a term"""
+    words = re.findall(r'\w+', term.lower())
+    return {
+        'pattern': f'%{term.lower()}%',
+        'needle': term.lower(),
+        'tsquery': ' & '.join(f'{w}:*' for w in words),
+    }
+
+
+def time_query(cursor, sql, params, repeat):
+    """Return the median wall-clock time in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(sizes, repeat):
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    try:
+        print(f"{'rows':>10}  {'term':<12} {'ilike ms':>10} {'indexed ms':>11} {'speedup':>8}")
+        for size in sizes:
+            cursor.execute(SETUP_SQL)
+            cursor.execute(POPULATE_SQL, (size,))
+            cursor.execute(f"ANALYZE {SCHEMA}.users")
+
+            # Legacy timings are taken before the indexes exist
+            ilike_times = {t: time_query(cursor, ILIKE_SQL, params_for(t), repeat) for t in TERMS}
+
+            cursor.execute(INDEX_SQL)
+            for term in TERMS:
+                indexed = time_query(cursor, INDEXED_SQL, params_for(term), repeat)
+                ilike = ilike_times[term]
+                print(f"{size:>10}  {term:<12} {ilike:>10.2f} {indexed:>11.2f} {ilike / indexed:>7.1f}x")
+    finally:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ILIKE vs indexed global search')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=10, help='Executions per query (median reported)')
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
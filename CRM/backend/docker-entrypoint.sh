@@ -0,0 +1,13 @@
+#!/bin/sh
+# Image entrypoint: with an IP range CSV as GEOIP_DATABASE_PATH, (re)build its
+# lookup index when missing or older than the CSV before starting the
+# container's command - it is never built while serving. Without one the
+# command starts straight away. Schema creation and seeding are a release
+# step (`flask bootstrap-db`, see app/bootstrap.py), not run here.
+set -e
+
+if [ -n "${GEOIP_DATABASE_PATH:-}" ]; then
+    flask build-geoip-index
+fi
+
+exec "$@"
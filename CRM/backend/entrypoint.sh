@@ -23,20 +23,22 @@ echo "Checking for model changes..."
 flask db migrate -m "Auto migration $(date +%Y%m%d_%H%M%S)" 2>/dev/null || echo "No new migrations needed or migration already exists"
 
 echo "Applying database migrations..."
-flask db upgrade || {
-    echo "Migration upgrade failed, trying to create tables directly..."
-    python -c "from app import create_app; from app.extensions import db; app = create_app(); app.app_context().push(); db.create_all(); print('Tables created successfully!')"
-}
+flask db upgrade || echo "Migration upgrade failed, bootstrap-db will create missing tables..."
 
 # Run versioned SQL migrations (data migrations, schema updates)
 echo "Running versioned SQL migrations..."
 python sql_migrations/migration_runner.py || echo "SQL migrations had issues, continuing..."
 
-# Initialize default data
-echo "Initializing default data..."
-flask init-db || echo "init-db had issues, continuing..."
-flask create-sample-services || echo "create-sample-services had issues, continuing..."
-flask create-demo-data || echo "create-demo-data had issues, continuing..."
+# Create missing tables and seed default data - once per bootstrap version, so
+# restarts skip it after one query. Demo users/services/data come with the
+# first bootstrap unless SEED_DEMO_DATA=false
+echo "Bootstrapping database..."
+if [ "${SEED_DEMO_DATA:-true}" = "true" ]; then
+    flask bootstrap-db --demo
+else
+    flask bootstrap-db
+fi
 
 echo "Starting Flask server with Gunicorn..."
-exec gunicorn --bind 0.0.0.0:5000 --workers 2 --threads 2 --timeout 120 --access-logfile - --error-logfile - --capture-output --log-level info --reload "app:create_app()"
+# gunicorn.conf.py sets up the shared Prometheus metrics directory for the workers
+exec gunicorn --config gunicorn.conf.py --bind 0.0.0.0:5000 --workers 2 --threads 2 --timeout 120 --access-logfile - --error-logfile - --capture-output --log-level info --reload "app:create_app()"
@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration (loaded automatically from the working directory)
+
+Prometheus multiprocess mode: every worker writes its metrics to files in
+PROMETHEUS_MULTIPROC_DIR and /metrics aggregates them, so a scrape sees all
+workers rather than whichever one served it. The directory is set here, before
+any worker imports prometheus_client, emptied when the server starts, and a
+worker's live gauges are dropped when it exits.
+"""
+import os
+import shutil
+
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+
+# Selects the web database timeouts (see DB_STATEMENT_TIMEOUT_MS)
+os.environ.setdefault('APP_PROCESS_ROLE', 'web')
+
+
+def on_starting(server):
+    """Start from an empty metrics directory (files of a previous run would be summed in)"""
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,20 @@
+#!/bin/sh
+# Image command wrapper: runs the background job worker (worker.py) next to
+# the given command - gunicorn - so deployments without a separate worker
+# service (Dockerfile.prod via deploy.sh, Dockerfile.windows) still run the
+# queued emails, automations, webhooks and uploads outside the requests. The
+# worker is restarted if it exits. Set RUN_JOB_WORKER=false where a worker
+# service runs the jobs instead (docker-compose.yml).
+set -e
+
+if [ "${RUN_JOB_WORKER:-true}" = "true" ]; then
+    (
+        while true; do
+            APP_PROCESS_ROLE=worker python worker.py || true
+            echo "Job worker exited, restarting in 5s" >&2
+            sleep 5
+        done
+    ) &
+fi
+
+exec "$@"
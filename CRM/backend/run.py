@@ -1,4 +1,8 @@
 import os
+
+# Serves requests: web database timeouts, and starts the scheduler
+os.environ.setdefault('APP_PROCESS_ROLE', 'web')
+
 from app import create_app
 
 app = create_app()
@@ -0,0 +1,10 @@
+-- Migration 10: Completion-Dated Counts in the Analytics Rollups
+-- A completed request without a completed_at sits in its creation-day rollup
+-- bucket, but is not a lodgement. These columns total only the requests with
+-- a completed_at, which the lodgement summary reads.
+
+ALTER TABLE analytics_daily_rollups ADD COLUMN IF NOT EXISTS completed_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE analytics_daily_rollups ADD COLUMN IF NOT EXISTS completed_invoiced_amount NUMERIC(14, 2) NOT NULL DEFAULT 0;
+
+-- Existing rows get the new totals from the nightly full rebuild, or immediately with:
+--   flask refresh-analytics-rollups --full
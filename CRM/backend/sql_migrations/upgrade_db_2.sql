@@ -0,0 +1,120 @@
+-- Migration 2: Indexed Global Search
+-- Adds trigger-maintained search columns to users, service_requests and documents
+-- so global search can use GIN (tsvector) and pg_trgm indexes instead of
+-- sequentially scanning every table with ILIKE '%q%'.
+--
+--   search_text   - lowercased concatenation of the searchable columns (pg_trgm, substring matches)
+--   search_vector - weighted tsvector of the same columns (prefix matches + ranking)
+--
+-- service_requests denormalise the service name and client name/email so a
+-- request search never has to join users/services to evaluate the predicate.
+
+-- 1. Extensions
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. Search columns
+ALTER TABLE users ADD COLUMN IF NOT EXISTS search_text TEXT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS search_text TEXT;
+ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_text TEXT;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- 3. Users
+CREATE OR REPLACE FUNCTION users_search_refresh() RETURNS trigger AS $$
+BEGIN
+    NEW.search_text := lower(concat_ws(' ', NEW.email, NEW.first_name, NEW.last_name, NEW.phone, NEW.company_name));
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.first_name, NEW.last_name, NEW.email)), 'A') ||
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.company_name, NEW.phone)), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_search_refresh ON users;
+CREATE TRIGGER trg_users_search_refresh
+    BEFORE INSERT OR UPDATE OF email, first_name, last_name, phone, company_name, search_text ON users
+    FOR EACH ROW EXECUTE FUNCTION users_search_refresh();
+
+-- 4. Service requests (denormalises service name and client name/email)
+CREATE OR REPLACE FUNCTION service_requests_search_refresh() RETURNS trigger AS $$
+DECLARE
+    v_service TEXT;
+    v_client TEXT;
+BEGIN
+    SELECT s.name INTO v_service FROM services s WHERE s.id = NEW.service_id;
+    SELECT concat_ws(' ', u.email, u.first_name, u.last_name) INTO v_client FROM users u WHERE u.id = NEW.user_id;
+
+    NEW.search_text := lower(concat_ws(' ', NEW.request_number, v_service, NEW.description, NEW.internal_notes, v_client));
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.request_number, v_service)), 'A') ||
+        setweight(to_tsvector('simple', coalesce(v_client, '')), 'B') ||
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.description, NEW.internal_notes)), 'C');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_service_requests_search_refresh ON service_requests;
+CREATE TRIGGER trg_service_requests_search_refresh
+    BEFORE INSERT OR UPDATE OF request_number, service_id, user_id, description, internal_notes, search_text ON service_requests
+    FOR EACH ROW EXECUTE FUNCTION service_requests_search_refresh();
+
+-- Keep denormalised request columns in sync when a client or service is renamed
+CREATE OR REPLACE FUNCTION users_search_propagate() RETURNS trigger AS $$
+BEGIN
+    UPDATE service_requests SET search_text = NULL WHERE user_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_search_propagate ON users;
+CREATE TRIGGER trg_users_search_propagate
+    AFTER UPDATE OF email, first_name, last_name ON users
+    FOR EACH ROW
+    WHEN (OLD.email IS DISTINCT FROM NEW.email
+          OR OLD.first_name IS DISTINCT FROM NEW.first_name
+          OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+    EXECUTE FUNCTION users_search_propagate();
+
+CREATE OR REPLACE FUNCTION services_search_propagate() RETURNS trigger AS $$
+BEGIN
+    UPDATE service_requests SET search_text = NULL WHERE service_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_services_search_propagate ON services;
+CREATE TRIGGER trg_services_search_propagate
+    AFTER UPDATE OF name ON services
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION services_search_propagate();
+
+-- 5. Documents
+CREATE OR REPLACE FUNCTION documents_search_refresh() RETURNS trigger AS $$
+BEGIN
+    NEW.search_text := lower(concat_ws(' ', NEW.original_filename, NEW.description));
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.original_filename, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_documents_search_refresh ON documents;
+CREATE TRIGGER trg_documents_search_refresh
+    BEFORE INSERT OR UPDATE OF original_filename, description, search_text ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_search_refresh();
+
+-- 6. Backfill existing rows (users first so requests pick up client names)
+UPDATE users SET search_text = NULL;
+UPDATE service_requests SET search_text = NULL;
+UPDATE documents SET search_text = NULL;
+
+-- 7. Indexes
+CREATE INDEX IF NOT EXISTS idx_users_search_vector ON users USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_users_search_text_trgm ON users USING GIN (search_text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_service_requests_search_vector ON service_requests USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_service_requests_search_text_trgm ON service_requests USING GIN (search_text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_documents_search_vector ON documents USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_documents_search_text_trgm ON documents USING GIN (search_text gin_trgm_ops);
@@ -0,0 +1,39 @@
+-- Migration 3: Daily Analytics Rollups
+-- Pre-aggregated service request totals per (company, day, service, client, status)
+-- for the revenue and lodgement reports. Maintained by AnalyticsRollupService:
+-- the scheduler refreshes changed days incrementally from service_requests.updated_at
+-- and rebuilds the table nightly.
+--
+-- day = completion date, or creation date while the request is open.
+
+-- 1. Rollup table
+CREATE TABLE IF NOT EXISTS analytics_daily_rollups (
+    company_id VARCHAR(36) NOT NULL,
+    day DATE NOT NULL,
+    service_id INTEGER NOT NULL,
+    client_id VARCHAR(36) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    request_count INTEGER NOT NULL DEFAULT 0,
+    paid_count INTEGER NOT NULL DEFAULT 0,
+    paid_revenue NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    invoiced_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    labor_hours NUMERIC(10, 2) NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP,
+    PRIMARY KEY (company_id, day, service_id, client_id, status)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analytics_daily_rollups_company_day
+    ON analytics_daily_rollups(company_id, day);
+
+-- 2. Refresh watermarks (highest service_requests.updated_at already rolled up)
+CREATE TABLE IF NOT EXISTS analytics_rollup_watermarks (
+    name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMP,
+    refreshed_at TIMESTAMP
+);
+
+-- 3. Incremental refreshes select changed requests by updated_at
+CREATE INDEX IF NOT EXISTS ix_service_requests_updated_at ON service_requests(updated_at);
+
+-- The table is populated by the first scheduled refresh, or immediately with:
+--   flask refresh-analytics-rollups --full
@@ -0,0 +1,31 @@
+-- Migration 4: Background Job Queue
+-- Jobs enqueued with @background_task (app/jobs/queue.py) and processed by
+-- worker.py: emails, in-app notifications and workflow automations that used
+-- to run inside the HTTP request.
+--
+-- status: pending -> running -> succeeded, or dead after max_attempts failures.
+
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id SERIAL PRIMARY KEY,
+    queue VARCHAR(50) NOT NULL DEFAULT 'default',
+    task VARCHAR(255) NOT NULL,
+    args JSON,
+    kwargs JSON,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    locked_by VARCHAR(100),
+    locked_until TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Workers claim due jobs per queue
+CREATE INDEX IF NOT EXISTS idx_background_jobs_claim
+    ON background_jobs(queue, status, run_at);
+
+-- Dead-lettered jobs can be retried with:
+--   flask requeue-dead-jobs [--queue email]
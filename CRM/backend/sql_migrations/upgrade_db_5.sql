@@ -0,0 +1,88 @@
+-- Migration 5: Monthly Partitions for access_logs / activity_logs
+-- Both audit tables are converted to native range partitioning on created_at:
+-- one <table>_pYYYYMM partition per month, plus <table>_default for rows outside
+-- the created months. Date-bounded queries (access stats, recent logs) only scan
+-- the partitions inside their window, and expired months are detached or dropped
+-- instead of DELETEd.
+--
+-- Partitions for the coming months are created ahead of time, and months past
+-- ACCESS_LOG_RETENTION_MONTHS / ACTIVITY_LOG_RETENTION_MONTHS are archived, by the
+-- daily AuditPartitionService job (or: flask maintain-audit-partitions).
+--
+-- The primary key becomes (id, created_at) since Postgres requires the partition
+-- key in unique constraints; ids are still UUIDs and unique in practice.
+
+CREATE OR REPLACE FUNCTION audit_partition_table(parent TEXT) RETURNS void AS $$
+DECLARE
+    legacy TEXT := parent || '_unpartitioned';
+    first_month DATE;
+    last_month DATE := date_trunc('month', timezone('utc', now()))::date + INTERVAL '3 months';
+    month DATE;
+BEGIN
+    -- Already partitioned (migration re-run)
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = parent AND pg_table_is_visible(c.oid)
+    ) THEN
+        RETURN;
+    END IF;
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', parent, legacy);
+    EXECUTE format('UPDATE %I SET created_at = timezone(''utc'', now()) WHERE created_at IS NULL', legacy);
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)',
+        parent, legacy
+    );
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN created_at SET NOT NULL', parent);
+
+    EXECUTE format('SELECT date_trunc(''month'', min(created_at))::date FROM %I', legacy) INTO first_month;
+    month := COALESCE(LEAST(first_month, date_trunc('month', timezone('utc', now()))::date),
+                      date_trunc('month', timezone('utc', now()))::date);
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            parent || '_p' || to_char(month, 'YYYYMM'), parent, month, (month + INTERVAL '1 month')::date
+        );
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', parent, legacy);
+    EXECUTE format('DROP TABLE %I', legacy);
+
+    -- Constraints and indexes are created on the parent once the rows are in
+    -- (they cascade to every partition)
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, created_at)', parent);
+    EXECUTE format('CREATE INDEX %I ON %I (created_at)', 'ix_' || parent || '_created_at', parent);
+    EXECUTE format('CREATE INDEX %I ON %I (company_id, created_at)', 'idx_' || parent || '_company_created', parent);
+END;
+$$ LANGUAGE plpgsql;
+
+-- 1. access_logs
+SELECT audit_partition_table('access_logs');
+
+ALTER TABLE access_logs DROP CONSTRAINT IF EXISTS access_logs_user_id_fkey;
+ALTER TABLE access_logs ADD CONSTRAINT access_logs_user_id_fkey
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE;
+ALTER TABLE access_logs DROP CONSTRAINT IF EXISTS access_logs_company_id_fkey;
+ALTER TABLE access_logs ADD CONSTRAINT access_logs_company_id_fkey
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS idx_access_logs_user ON access_logs(user_id, created_at);
+
+-- 2. activity_logs
+SELECT audit_partition_table('activity_logs');
+
+ALTER TABLE activity_logs DROP CONSTRAINT IF EXISTS activity_logs_performed_by_id_fkey;
+ALTER TABLE activity_logs ADD CONSTRAINT activity_logs_performed_by_id_fkey
+    FOREIGN KEY (performed_by_id) REFERENCES users(id) ON DELETE SET NULL;
+ALTER TABLE activity_logs DROP CONSTRAINT IF EXISTS activity_logs_company_id_fkey;
+ALTER TABLE activity_logs ADD CONSTRAINT activity_logs_company_id_fkey
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE;
+CREATE INDEX IF NOT EXISTS idx_activity_logs_entity ON activity_logs(entity_type, entity_id);
+
+DROP FUNCTION audit_partition_table(TEXT);
+
+-- Retention (months kept, 0 = forever) and archive mode (detach keeps expired
+-- months as standalone <table>_pYYYYMM tables, drop deletes them):
+--   ACCESS_LOG_RETENTION_MONTHS=12 ACTIVITY_LOG_RETENTION_MONTHS=0 AUDIT_ARCHIVE_MODE=detach
@@ -0,0 +1,31 @@
+-- Migration 6: Scheduled Email Dispatch
+-- ScheduledEmailDispatcher claims due scheduled_emails with FOR UPDATE SKIP LOCKED
+-- and leases them to one worker (locked_by / locked_until). Recipients of filter
+-- emails are resolved a page at a time (recipient_cursor) into
+-- scheduled_email_recipients, which records the delivery state of each recipient
+-- so an interrupted dispatch resumes without resending.
+
+-- 1. Lease and resolution progress
+ALTER TABLE scheduled_emails ADD COLUMN IF NOT EXISTS locked_by VARCHAR(100);
+ALTER TABLE scheduled_emails ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP;
+ALTER TABLE scheduled_emails ADD COLUMN IF NOT EXISTS recipient_cursor VARCHAR(36);
+ALTER TABLE scheduled_emails ADD COLUMN IF NOT EXISTS recipients_resolved BOOLEAN DEFAULT FALSE;
+
+-- Dispatchers poll for due emails
+CREATE INDEX IF NOT EXISTS idx_scheduled_emails_due
+    ON scheduled_emails(status, scheduled_at);
+
+-- 2. Per-recipient delivery state
+CREATE TABLE IF NOT EXISTS scheduled_email_recipients (
+    id SERIAL PRIMARY KEY,
+    scheduled_email_id INTEGER NOT NULL REFERENCES scheduled_emails(id) ON DELETE CASCADE,
+    user_id VARCHAR(36) REFERENCES users(id) ON DELETE SET NULL,
+    email VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    error_message TEXT,
+    sent_at TIMESTAMP,
+    CONSTRAINT uq_scheduled_email_recipient UNIQUE (scheduled_email_id, email)
+);
+
+CREATE INDEX IF NOT EXISTS idx_scheduled_email_recipients_status
+    ON scheduled_email_recipients(scheduled_email_id, status);
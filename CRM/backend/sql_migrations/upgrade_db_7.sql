@@ -0,0 +1,8 @@
+-- Migration 7: Bulk Email Campaigns
+-- Filtered bulk emails sent "now" are stored as a scheduled_emails row due
+-- immediately and dispatched in the background, so the request returns a
+-- campaign ID (the scheduled_emails id) whose progress can be polled.
+-- notify_in_app additionally creates an in-app notification for every
+-- recipient the email was sent to.
+
+ALTER TABLE scheduled_emails ADD COLUMN IF NOT EXISTS notify_in_app BOOLEAN DEFAULT FALSE;
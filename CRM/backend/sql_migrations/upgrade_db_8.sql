@@ -0,0 +1,11 @@
+-- Migration 8: Shared IP Geolocation Cache
+-- HTTP geolocation results (access log enrichment) are stored here, so every
+-- worker reuses a lookup instead of calling the geolocation APIs again for an
+-- IP another process already resolved. Rows older than GEOIP_CACHE_TTL_SECONDS
+-- are looked up again and overwritten.
+
+CREATE TABLE IF NOT EXISTS ip_geolocations (
+    ip_address VARCHAR(50) PRIMARY KEY,
+    data JSON NOT NULL,
+    looked_up_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,11 @@
+-- Migration 9: Completed Paid Revenue in the Analytics Rollups
+-- The revenue by client/service reports filter a date range on the completion
+-- date, but a paid request that is not completed yet sits in its creation-day
+-- rollup bucket. These columns total only the paid requests with a
+-- completed_at, which the reports use whenever a date range is given.
+
+ALTER TABLE analytics_daily_rollups ADD COLUMN IF NOT EXISTS paid_completed_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE analytics_daily_rollups ADD COLUMN IF NOT EXISTS paid_completed_revenue NUMERIC(14, 2) NOT NULL DEFAULT 0;
+
+-- Existing rows get the new totals from the nightly full rebuild, or immediately with:
+--   flask refresh-analytics-rollups --full
@@ -225,6 +225,24 @@ def inactive_user(app, init_database, test_company):
         return user
 
 
+def count_statements(func, *args, **kwargs):
+    """Run func and return (result, number of SQL statements executed)."""
+    from sqlalchemy import event
+    from app.extensions import db
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return result, len(statements)
+
+
 def get_auth_token(client, email, password):
     """Helper function to get authentication token."""
     response = client.post('/api/auth/login', json={
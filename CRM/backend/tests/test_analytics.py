@@ -4,6 +4,8 @@ Tests for dashboard metrics, reports, and statistics.
 """
 import pytest
 
+from tests.conftest import count_statements
+
 
 class TestDashboardMetrics:
     """Test cases for dashboard metrics."""
@@ -85,3 +87,262 @@ class TestWorkloadReport:
             headers={'Authorization': f'Bearer {admin_token}'})
 
         assert response.status_code == 200
+
+
+@pytest.fixture
+def dashboard_data(app, test_company):
+    """Create clients with requests, queries and job notes for the admin dashboard."""
+    from app.extensions import db
+    from app.modules.user.models import User, Role
+    from app.modules.services.models import Service, ServiceRequest, Query
+    from app.modules.services.models.job_note import JobNote
+
+    with app.app_context():
+        role = Role.query.filter_by(name=Role.USER).first()
+        service = Service(name='Dashboard Tax Return', category='Tax', base_price=300.00)
+        db.session.add(service)
+        db.session.flush()
+
+        created = []
+
+        def add_clients(count):
+            for i in range(count):
+                user = User(
+                    email=f'dash{len(created)}@test.com',
+                    role_id=role.id,
+                    company_id=test_company.id,
+                    first_name='Dash',
+                    last_name=f'Client{len(created)}'
+                )
+                user.set_password('Client@123')
+                db.session.add(user)
+                db.session.flush()
+                request = ServiceRequest(
+                    user_id=user.id,
+                    service_id=service.id,
+                    status='completed',
+                    invoice_paid=True,
+                    invoice_amount=300.00,
+                    labor_hours=2
+                )
+                db.session.add(request)
+                db.session.flush()
+                db.session.add_all([
+                    Query(service_request_id=request.id, sender_id=user.id, message='Question'),
+                    Query(service_request_id=request.id, sender_id=user.id, message='Follow-up'),
+                    JobNote(service_request_id=request.id, content='Prep', time_spent_minutes=30),
+                ])
+                created.append(request.id)
+            db.session.commit()
+
+        yield test_company.id, add_clients
+
+        Query.query.filter(Query.service_request_id.in_(created)).delete()
+        JobNote.query.filter(JobNote.service_request_id.in_(created)).delete()
+        ServiceRequest.query.filter(ServiceRequest.id.in_(created)).delete()
+        Service.query.filter_by(name='Dashboard Tax Return').delete()
+        db.session.commit()
+
+
+class TestAdminDashboardMetrics:
+    """Test cases for the admin dashboard aggregation."""
+
+    def test_admin_dashboard_totals(self, app, dashboard_data):
+        """Test per-client and per-request totals include queries and job notes."""
+        from app.modules.analytics import AnalyticsService
+
+        company_id, add_clients = dashboard_data
+        with app.app_context():
+            add_clients(3)
+            metrics = AnalyticsService.get_admin_dashboard_metrics(company_id)
+
+            assert metrics['summary']['total_requests'] == 3
+            assert metrics['summary']['total_revenue'] == 900.0
+            assert metrics['summary']['total_queries'] == 6
+            assert metrics['summary']['total_time_spent_hours'] == 7.5
+            assert metrics['summary']['status_breakdown'] == {'completed': 3}
+            assert len(metrics['clients']) == 3
+            assert all(c['query_count'] == 2 for c in metrics['clients'])
+            assert all(c['total_time_spent_hours'] == 2.5 for c in metrics['clients'])
+            assert all(r['query_count'] == 2 for r in metrics['requests_detail'])
+            assert all(r['service_name'] == 'Dashboard Tax Return' for r in metrics['requests_detail'])
+
+    def test_admin_dashboard_statement_count_is_fixed(self, app, dashboard_data):
+        """Test the number of SQL statements does not grow with the number of clients."""
+        from app.extensions import db
+        from app.modules.analytics import AnalyticsService
+
+        company_id, add_clients = dashboard_data
+        with app.app_context():
+            add_clients(2)
+            db.session.expire_all()
+            _, few_clients = count_statements(AnalyticsService.get_admin_dashboard_metrics, company_id)
+
+            add_clients(8)
+            db.session.expire_all()
+            metrics, many_clients = count_statements(AnalyticsService.get_admin_dashboard_metrics, company_id)
+
+            assert len(metrics['clients']) == 10
+            assert few_clients == many_clients
+            assert many_clients <= 3
+
+
+@pytest.fixture
+def rollup_data(app, test_company, client_user):
+    """Create paid and open requests for the rollup-backed reports."""
+    from datetime import datetime
+    from app.extensions import db
+    from app.modules.user.models import User
+    from app.modules.services.models import Service, ServiceRequest
+    from app.modules.analytics.models import DailyRequestRollup, RollupWatermark
+
+    with app.app_context():
+        client = User.query.filter_by(email='client@test.com').first()
+        service = Service(name='Rollup Bookkeeping', category='Bookkeeping', base_price=100.00)
+        db.session.add(service)
+        db.session.flush()
+
+        requests = [
+            ServiceRequest(user_id=client.id, service_id=service.id, status='completed',
+                           invoice_raised=True, invoice_paid=True, invoice_amount=100.00,
+                           created_at=datetime(2025, 1, 2), completed_at=datetime(2025, 1, 10)),
+            ServiceRequest(user_id=client.id, service_id=service.id, status='completed',
+                           invoice_raised=True, invoice_paid=True, invoice_amount=250.00,
+                           created_at=datetime(2025, 3, 1), completed_at=datetime(2025, 4, 5)),
+            ServiceRequest(user_id=client.id, service_id=service.id, status='processing',
+                           invoice_raised=True, invoice_amount=80.00,
+                           created_at=datetime(2025, 4, 6)),
+        ]
+        db.session.add_all(requests)
+        db.session.commit()
+        request_ids = [r.id for r in requests]
+
+        yield test_company.id, request_ids
+
+        ServiceRequest.query.filter(ServiceRequest.id.in_(request_ids)).delete()
+        Service.query.filter_by(name='Rollup Bookkeeping').delete()
+        DailyRequestRollup.query.delete()
+        RollupWatermark.query.delete()
+        db.session.commit()
+
+
+class TestAnalyticsRollups:
+    """Test cases for the daily analytics rollups."""
+
+    def test_revenue_reports_read_rollups(self, app, rollup_data):
+        """Test revenue by client/service totals come from the refreshed rollups."""
+        from app.modules.analytics import AnalyticsService
+        from app.modules.analytics.services import AnalyticsRollupService
+
+        company_id, _ = rollup_data
+        with app.app_context():
+            assert AnalyticsService.get_revenue_by_client(company_id) == []
+
+            AnalyticsRollupService.refresh()
+
+            by_client = AnalyticsService.get_revenue_by_client(company_id)
+            assert len(by_client) == 1
+            assert by_client[0]['total_revenue'] == 350.0
+            assert by_client[0]['request_count'] == 2
+
+            by_service = AnalyticsService.get_revenue_by_service(company_id)
+            assert by_service[0]['service']['name'] == 'Rollup Bookkeeping'
+            assert by_service[0]['total_revenue'] == 350.0
+
+    def test_revenue_date_range(self, app, rollup_data):
+        """Test the date range filters on completion day, inclusive of date_to."""
+        from datetime import datetime
+        from app.modules.analytics import AnalyticsService
+        from app.modules.analytics.services import AnalyticsRollupService
+
+        company_id, _ = rollup_data
+        with app.app_context():
+            AnalyticsRollupService.refresh()
+
+            revenue = AnalyticsService.get_revenue_by_client(
+                company_id, datetime(2025, 4, 1), datetime(2025, 4, 5))
+            assert revenue[0]['total_revenue'] == 250.0
+            assert revenue[0]['request_count'] == 1
+
+    def test_paid_open_request_only_counts_without_date_range(self, app, rollup_data):
+        """Test a paid request not yet completed has no completion day for a date range to match."""
+        from datetime import datetime
+        from app.extensions import db
+        from app.modules.services.models import ServiceRequest
+        from app.modules.analytics import AnalyticsService
+        from app.modules.analytics.services import AnalyticsRollupService
+
+        company_id, request_ids = rollup_data
+        with app.app_context():
+            db.session.get(ServiceRequest, request_ids[2]).invoice_paid = True
+            db.session.commit()
+            AnalyticsRollupService.refresh()
+
+            # Its rollup day is its creation day (6 April), inside the range
+            for report in (AnalyticsService.get_revenue_by_client, AnalyticsService.get_revenue_by_service):
+                ranged = report(company_id, datetime(2025, 4, 1), datetime(2025, 4, 30))
+                assert ranged[0]['total_revenue'] == 250.0
+                assert report(company_id)[0]['total_revenue'] == 430.0
+
+    def test_lodgement_summary_periods(self, app, rollup_data):
+        """Test completed requests are folded into monthly and quarterly periods."""
+        from app.modules.analytics import AnalyticsService
+        from app.modules.analytics.services import AnalyticsRollupService
+
+        company_id, _ = rollup_data
+        with app.app_context():
+            AnalyticsRollupService.refresh()
+
+            monthly = AnalyticsService.get_lodgement_summary(company_id, 'monthly')
+            assert monthly['data'] == [
+                {'period': '2025-01', 'completed_count': 1, 'total_revenue': 100.0},
+                {'period': '2025-04', 'completed_count': 1, 'total_revenue': 250.0},
+            ]
+            quarterly = AnalyticsService.get_lodgement_summary(company_id, 'quarterly')
+            assert [p['period'] for p in quarterly['data']] == ['2025-Q1', '2025-Q2']
+
+    def test_lodgement_summary_skips_completions_without_date(self, app, rollup_data):
+        """Test a completed request without a completed_at is not counted as a lodgement."""
+        from app.extensions import db
+        from app.modules.services.models import ServiceRequest
+        from app.modules.analytics import AnalyticsService
+        from app.modules.analytics.services import AnalyticsRollupService
+
+        company_id, request_ids = rollup_data
+        with app.app_context():
+            db.session.get(ServiceRequest, request_ids[2]).status = ServiceRequest.STATUS_COMPLETED
+            db.session.commit()
+            AnalyticsRollupService.refresh()
+
+            # It stays in its creation-day (April) bucket, but not in the summary
+            monthly = AnalyticsService.get_lodgement_summary(company_id, 'monthly')
+            assert monthly['data'] == [
+                {'period': '2025-01', 'completed_count': 1, 'total_revenue': 100.0},
+                {'period': '2025-04', 'completed_count': 1, 'total_revenue': 250.0},
+            ]
+
+    def test_incremental_refresh_moves_completed_request(self, app, rollup_data):
+        """Test a request completed after a refresh moves out of its creation-day bucket."""
+        from datetime import datetime
+        from app.extensions import db
+        from app.modules.services.models import ServiceRequest
+        from app.modules.analytics import AnalyticsService
+        from app.modules.analytics.models import DailyRequestRollup
+        from app.modules.analytics.services import AnalyticsRollupService
+
+        company_id, request_ids = rollup_data
+        with app.app_context():
+            AnalyticsRollupService.refresh()
+
+            request = db.session.get(ServiceRequest, request_ids[2])
+            request.status = 'completed'
+            request.invoice_paid = True
+            request.completed_at = datetime(2025, 5, 2)
+            db.session.commit()
+
+            AnalyticsRollupService.refresh()
+
+            assert DailyRequestRollup.query.filter_by(status='processing').count() == 0
+            revenue = AnalyticsService.get_revenue_by_client(company_id)
+            assert revenue[0]['total_revenue'] == 430.0
+            assert revenue[0]['request_count'] == 3
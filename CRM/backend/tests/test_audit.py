@@ -0,0 +1,394 @@
+"""
+Audit Module Tests
+Tests for IP geolocation lookups, access logging and the audit sink.
+"""
+import queue
+import threading
+import time
+import uuid
+
+import pytest
+from sqlalchemy import event
+from unittest.mock import patch
+
+from app.extensions import db
+from app.jobs.models import BackgroundJob
+from app.modules.audit.models import AccessLog, ActivityLog, IPGeolocation
+from app.modules.audit.services import AccessLogger, ActivityLogger, AuditSink, GeolocationService
+from app.modules.audit.services.ip_database import CSVRangeDatabase
+from app.modules.user.models import User
+
+
+@pytest.fixture
+def ip_csv(tmp_path):
+    """Create a small IP range CSV in IP2Location-style header layout."""
+    path = tmp_path / 'ip-city.csv'
+    path.write_text(
+        'ip_from,ip_to,country_code,country_name,region_name,city_name,latitude,longitude,time_zone\n'
+        '1.0.0.0,1.0.0.255,AU,Australia,Queensland,Brisbane,-27.47,153.02,+10:00\n'
+        '8.8.4.0,8.8.8.255,US,United States,California,Mountain View,37.4,-122.08,-07:00\n'
+        '2001:4860::,2001:4860:ffff:ffff:ffff:ffff:ffff:ffff,US,United States,California,Mountain View,37.4,-122.08,-07:00\n'
+        '16843008,16843263,AU,Australia,New South Wales,Sydney,-33.86,151.2,+10:00\n'
+    )
+    CSVRangeDatabase.build_index(str(path), f'{path}.idx')
+    return str(path)
+
+
+@pytest.fixture
+def geoip(app, ip_csv):
+    """Point GeolocationService at the test CSV with an empty cache."""
+    app.config['GEOIP_DATABASE_PATH'] = ip_csv
+    GeolocationService._cache = None
+    yield app
+    app.config['GEOIP_DATABASE_PATH'] = ''
+    GeolocationService._cache = None
+
+
+class TestIPRangeDatabase:
+    """Test cases for the memory-mapped IP range index."""
+
+    def test_lookup_ranges(self, ip_csv):
+        """Test IPv4, IPv6 and integer-encoded ranges resolve and gaps miss."""
+        database = CSVRangeDatabase(ip_csv)
+
+        assert database.lookup('1.0.0.7')['city'] == 'Brisbane'
+        assert database.lookup('8.8.8.8')['country_code'] == 'US'
+        assert database.lookup('8.8.4.0')['latitude'] == 37.4
+        assert database.lookup('2001:4860:4860::8888')['city'] == 'Mountain View'
+        assert database.lookup('1.1.1.1')['city'] == 'Sydney'
+        assert database.lookup('9.9.9.9') is None
+        assert database.lookup('0.0.0.1') is None
+        assert database.lookup('not-an-ip') is None
+
+    def test_headerless_dbip_layout(self, tmp_path):
+        """Test header-less DB-IP city lite files use its column order."""
+        path = tmp_path / 'dbip-city-lite.csv'
+        path.write_text('1.0.0.0,1.0.0.255,OC,AU,Queensland,South Brisbane,-27.4767,153.017\n')
+        CSVRangeDatabase.build_index(str(path), f'{path}.idx')
+
+        location = CSVRangeDatabase(str(path)).lookup('1.0.0.1')
+        assert location['country_code'] == 'AU'
+        assert location['region'] == 'Queensland'
+        assert location['city'] == 'South Brisbane'
+
+
+class TestGeolocationLookup:
+    """Test cases for GeolocationService lookups."""
+
+    def test_lookup_uses_local_database_without_http(self, geoip):
+        """Test lookups never call the HTTP APIs and are cached."""
+        with geoip.app_context(), patch('app.modules.audit.services.geolocation_service.requests.get') as get:
+            result = GeolocationService.lookup_ip('8.8.8.8')
+            assert result['city'] == 'Mountain View'
+            assert result['source'] == 'local'
+
+            GeolocationService.lookup_ip('8.8.8.8')
+            assert GeolocationService._cache.hits == 1
+            get.assert_not_called()
+
+    def test_unknown_ip_needs_enrichment(self, geoip):
+        """Test an IP missing from the local database is flagged for HTTP enrichment."""
+        with geoip.app_context():
+            result = GeolocationService.lookup_ip('9.9.9.9')
+            assert result['lookup_failed'] is True
+            assert GeolocationService.needs_enrichment(result) is True
+            assert GeolocationService.needs_enrichment(GeolocationService.lookup_ip('8.8.8.8')) is False
+
+            geoip.config['GEOIP_HTTP_ENRICHMENT'] = 'off'
+            assert GeolocationService.needs_enrichment(result) is False
+            geoip.config['GEOIP_HTTP_ENRICHMENT'] = 'missing'
+
+    def test_unbuilt_or_corrupt_database_is_skipped(self, app, tmp_path):
+        """Test a CSV without its index (never built inline) or a corrupt file fails soft."""
+        path = tmp_path / 'unindexed.csv'
+        path.write_text('1.0.0.0,1.0.0.255,OC,AU,Queensland,South Brisbane,-27.4767,153.017\n')
+        with pytest.raises(FileNotFoundError):
+            CSVRangeDatabase(str(path))
+        assert not (tmp_path / 'unindexed.csv.idx').exists()
+
+        corrupt = tmp_path / 'corrupt.csv'
+        corrupt.write_text('')
+        (tmp_path / 'corrupt.csv.idx').write_bytes(b'not an index at all')
+        for database in (path, corrupt):
+            app.config['GEOIP_DATABASE_PATH'] = str(database)
+            GeolocationService._cache = None
+            try:
+                with app.app_context():
+                    assert GeolocationService.lookup_ip('1.0.0.1')['lookup_failed'] is True
+            finally:
+                app.config['GEOIP_DATABASE_PATH'] = ''
+                GeolocationService._cache = None
+
+    def test_database_retried_after_failure(self, app, tmp_path):
+        """Test a database that failed to open is skipped for a while, then opened once available."""
+        path = tmp_path / 'mounted-late.csv'
+        path.write_text('1.0.0.0,1.0.0.255,AU,Australia,Queensland,Brisbane,-27.47,153.02,+10:00\n')
+        app.config['GEOIP_DATABASE_PATH'] = str(path)
+
+        def lookup():
+            GeolocationService._cache = None
+            with app.app_context():
+                return GeolocationService.lookup_ip('1.0.0.1')
+
+        try:
+            assert lookup()['lookup_failed'] is True
+            CSVRangeDatabase.build_index(str(path), f'{path}.idx')
+            assert lookup()['lookup_failed'] is True
+
+            retry_at = time.monotonic() + GeolocationService.DATABASE_RETRY_SECONDS + 1
+            with patch('app.modules.audit.services.geolocation_service.time.monotonic', return_value=retry_at):
+                assert lookup()['city'] == 'Brisbane'
+            assert str(path) not in GeolocationService._failed_databases
+        finally:
+            app.config['GEOIP_DATABASE_PATH'] = ''
+            GeolocationService._cache = None
+            GeolocationService._failed_databases.pop(str(path), None)
+
+
+class TestAccessLogEnrichment:
+    """Test cases for background HTTP enrichment of access logs."""
+
+    def test_log_access_queues_enrichment(self, geoip, client_user):
+        """Test logging an unknown IP enqueues enrichment instead of calling the APIs."""
+        geoip.config['JOB_QUEUE_EAGER'] = False
+        try:
+            with geoip.test_request_context(headers={'X-Forwarded-For': '9.9.9.9'}), \
+                    patch('app.modules.audit.services.geolocation_service.requests.get') as get:
+                log = AccessLogger.log_login(client_user.id)
+                db.session.commit()
+
+                get.assert_not_called()
+                job = BackgroundJob.query.filter_by(
+                    task='app.modules.audit.tasks.enrich_access_log_location'
+                ).one()
+                assert job.args == [log.id]
+                db.session.delete(job)
+                db.session.commit()
+        finally:
+            geoip.config['JOB_QUEUE_EAGER'] = True
+
+    def test_enrichment_updates_access_log(self, geoip, client_user):
+        """Test the enrichment task copies the HTTP result onto the access log."""
+        http_result = {
+            'country': 'Switzerland', 'country_code': 'CH', 'city': 'Zurich',
+            'isp': 'Quad9', 'is_proxy': False, 'is_hosting': True
+        }
+        with geoip.test_request_context(headers={'X-Forwarded-For': '9.9.9.9'}), \
+                patch.object(GeolocationService, '_lookup_ip_api', return_value=dict(http_result)):
+            log = AccessLogger.log_login(client_user.id)
+            db.session.commit()
+
+            log = db.session.get(AccessLog, log.id)
+            assert log.city == 'Zurich'
+            assert log.isp == 'Quad9'
+            assert log.is_suspicious is True
+            assert log.threat_level == 'medium'
+
+            # The HTTP result is cached for later lookups of the same IP
+            assert GeolocationService.lookup_ip('9.9.9.9')['source'] == 'http'
+
+    def test_http_result_shared_across_processes(self, geoip):
+        """Test an HTTP lookup stored by one process is reused by another without calling the APIs."""
+        http_result = {'country': 'Switzerland', 'country_code': 'CH', 'city': 'Zurich'}
+        with geoip.app_context():
+            with patch.object(GeolocationService, '_lookup_ip_api', return_value=dict(http_result)):
+                GeolocationService.lookup_ip_http('9.9.9.10')
+            assert db.session.get(IPGeolocation, '9.9.9.10').data['city'] == 'Zurich'
+
+            # Another process: empty in-process cache
+            GeolocationService._cache = None
+            with patch.object(GeolocationService, '_lookup_ip_api') as lookup_ip_api:
+                assert GeolocationService.lookup_ip_http('9.9.9.10')['city'] == 'Zurich'
+                lookup_ip_api.assert_not_called()
+
+            IPGeolocation.query.delete()
+            db.session.commit()
+
+
+def wait_for(condition, timeout=5):
+    """Poll until condition() is true (the sink writes from its own threads)"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out waiting for the audit sink'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def buffered_sink(app):
+    """Switch the audit sink to buffered mode with its real flusher and callback threads."""
+    app.config.update(AUDIT_SINK_MODE='buffered', AUDIT_SINK_FLUSH_SECONDS=0.2)
+    yield AuditSink
+    AuditSink.shutdown()
+    app.config.update(AUDIT_SINK_MODE='sync', AUDIT_SINK_FLUSH_SECONDS=1.0)
+
+
+class TestAuditSink:
+    """Test cases for the buffered audit writer."""
+
+    def test_activity_log_survives_rollback(self, app, client_user):
+        """Test audit rows are written outside the business transaction."""
+        with app.app_context():
+            entry = ActivityLogger.log('user', client_user.id, 'updated', performed_by_id=client_user.id)
+            db.session.rollback()
+
+            stored = db.session.get(ActivityLog, entry.id)
+            assert stored is not None
+            assert stored.company_id == client_user.company_id
+
+    def test_buffered_rows_are_batch_inserted(self, app, buffered_sink, client_user):
+        """Test queued rows are not written inline, then the flusher writes them in a single INSERT."""
+        inserts = []
+
+        def count_inserts(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO activity_logs'):
+                inserts.append(statement)
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', count_inserts)
+            try:
+                ids = [ActivityLogger.log('user', client_user.id, 'updated').id for _ in range(3)]
+                assert inserts == []
+
+                wait_for(lambda: ActivityLog.query.filter(ActivityLog.id.in_(ids)).count() == 3)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count_inserts)
+
+            assert len(inserts) == 1
+
+    def test_callbacks_do_not_block_the_flusher(self, app, buffered_sink, client_user):
+        """Test a slow after_write callback runs off the flusher thread and the request's session."""
+        release = threading.Event()
+        sessions = []
+
+        def slow_callback():
+            sessions.append(db.session())
+            release.wait(5)
+
+        with app.app_context():
+            AuditSink.submit(ActivityLog, {'id': str(uuid.uuid4()), 'entity_type': 'user',
+                                           'entity_id': client_user.id, 'action': 'viewed'},
+                             after_write=slow_callback)
+            wait_for(lambda: sessions)
+
+            # The callback is still waiting, yet later rows are written
+            later = ActivityLogger.log('user', client_user.id, 'updated')
+            wait_for(lambda: db.session.get(ActivityLog, later.id) is not None)
+            release.set()
+
+            assert sessions[0] is not db.session()
+
+    def test_full_buffer_writes_synchronously(self, app, buffered_sink, client_user):
+        """Test rows are written inline instead of dropped when the buffer is full."""
+        full = queue.Queue(maxsize=1)
+        full.put_nowait(None)
+        callbacks = []
+
+        with app.app_context():
+            AuditSink._ensure_started()
+            with patch.object(buffered_sink, '_queue', full):
+                entry = ActivityLogger.log('user', client_user.id, 'updated')
+                AuditSink.submit(ActivityLog, {'id': str(uuid.uuid4()), 'entity_type': 'user',
+                                               'entity_id': client_user.id, 'action': 'viewed'},
+                                 after_write=lambda: callbacks.append(threading.current_thread().name))
+                assert db.session.get(ActivityLog, entry.id) is not None
+
+            # The callback is left to the callback thread, not run on the request thread
+            wait_for(lambda: callbacks)
+            assert callbacks == ['audit-sink-callbacks']
+
+    def test_sync_callbacks_use_their_own_session(self, app, client_user):
+        """Test a sync-mode callback's commit cannot commit the caller's pending changes."""
+        sessions = []
+
+        with app.app_context():
+            user = db.session.get(User, client_user.id)
+            user.first_name = 'Pending'
+            AuditSink.submit(ActivityLog, {'id': str(uuid.uuid4()), 'entity_type': 'user',
+                                           'entity_id': client_user.id, 'action': 'viewed'},
+                             after_write=lambda: sessions.append(db.session()))
+
+            assert sessions and sessions[0] is not db.session()
+            assert user in db.session.dirty
+            db.session.rollback()
+
+
+class TestAccessStats:
+    """Test cases for the single-pass access statistics."""
+
+    def test_stats_in_one_query(self, app, client_user):
+        """Test every breakdown comes from one grouped query over the window."""
+        from datetime import datetime, timedelta
+
+        queries = []
+
+        def count_selects(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('SELECT'):
+                queries.append(statement)
+
+        with app.app_context():
+            now = datetime.utcnow()
+            rows = [
+                ('login', True, 'desktop', 'AU', False, now),
+                ('login', True, 'mobile', 'AU', False, now),
+                ('failed_login', False, 'mobile', 'US', True, now),
+                ('login', True, 'desktop', None, False, now - timedelta(days=60)),
+            ]
+            for access_type, successful, device, country, suspicious, created_at in rows:
+                db.session.add(AccessLog(
+                    user_id=client_user.id, ip_address='1.0.0.1', access_type=access_type,
+                    is_successful=successful, device_type=device, country_code=country,
+                    is_suspicious=suspicious, created_at=created_at
+                ))
+            db.session.commit()
+
+            event.listen(db.engine, 'before_cursor_execute', count_selects)
+            try:
+                stats = AccessLogger.get_access_stats(user_id=client_user.id, days=30)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count_selects)
+
+            assert len(queries) == 1
+            assert stats['total_accesses'] == 3
+            assert stats['successful_logins'] == 2
+            assert stats['failed_logins'] == 1
+            assert stats['suspicious_accesses'] == 1
+            assert stats['unique_countries'] == 2
+            assert stats['device_breakdown'] == {'desktop': 1, 'mobile': 2}
+
+
+class TestAuditRetention:
+    """Test cases for audit partition maintenance and retention."""
+
+    def test_month_arithmetic(self):
+        """Test partition month helpers across year boundaries."""
+        from datetime import date
+        from app.modules.audit.services.partition_service import add_months, month_start, partition_name
+
+        assert month_start(date(2024, 3, 17)) == date(2024, 3, 1)
+        assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+        assert add_months(date(2024, 1, 1), -13) == date(2022, 12, 1)
+        assert partition_name('access_logs', date(2024, 2, 1)) == 'access_logs_p202402'
+
+    def test_retention_deletes_expired_rows(self, app, client_user):
+        """Test unpartitioned tables drop rows older than the retention window only."""
+        from datetime import datetime
+        from app.modules.audit.services import AuditPartitionService
+
+        with app.app_context():
+            old = AccessLog(user_id=client_user.id, ip_address='1.0.0.1', created_at=datetime(2024, 1, 31, 23, 59))
+            kept = AccessLog(user_id=client_user.id, ip_address='1.0.0.1', created_at=datetime(2024, 2, 1))
+            activity = ActivityLog(entity_type='user', entity_id=client_user.id, action='updated',
+                                   created_at=datetime(2023, 1, 1))
+            db.session.add_all([old, kept, activity])
+            db.session.commit()
+            old_id, kept_id, activity_id = old.id, kept.id, activity.id
+
+            app.config['ACCESS_LOG_RETENTION_MONTHS'] = 12
+            result = AuditPartitionService.maintain(now=datetime(2025, 2, 14))
+            db.session.expire_all()
+
+            assert result['deleted'] == {'access_logs': 1}
+            assert db.session.get(AccessLog, old_id) is None
+            assert db.session.get(AccessLog, kept_id) is not None
+            # ACTIVITY_LOG_RETENTION_MONTHS=0 keeps everything
+            assert db.session.get(ActivityLog, activity_id) is not None
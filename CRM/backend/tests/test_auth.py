@@ -289,6 +289,32 @@ class TestGetCurrentUser:
         assert response.status_code == 401
 
 
+    def test_current_user_loaded_once_per_request(self, app, admin_token):
+        """Test stacked decorators and the route body share one user lookup."""
+        from flask_jwt_extended import verify_jwt_in_request
+        from sqlalchemy import event
+        from app.common.decorators import admin_required, get_current_user
+
+        @admin_required
+        def view():
+            user = get_current_user()
+            return user.role.name, user.company.name
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+
+        with app.test_request_context(headers={'Authorization': f'Bearer {admin_token}'}):
+            verify_jwt_in_request()
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                role_name, company_name = view()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert role_name == Role.ADMIN
+        assert company_name
+        assert len(statements) == 1
+
 class TestHealthCheck:
     """Test cases for API health check."""
 
@@ -0,0 +1,65 @@
+"""
+Database Bootstrap Tests
+Tests for the one-time `flask bootstrap-db` schema creation and seeding.
+"""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from app.bootstrap import DatabaseBootstrap, bootstrap_state
+from app.extensions import db
+from app.modules.ato_alerts.models import AtoAlert
+from app.modules.blog.models import Blog
+from app.modules.company.models import Company
+from app.modules.user.models import User
+
+
+@pytest.fixture
+def bootstrapped(app):
+    """Run the bootstrap, then remove what it seeded."""
+    with app.app_context():
+        yield DatabaseBootstrap.run()
+
+        User.query.filter_by(email='aggarwal.adarsh98@gmail.com').delete()
+        Company.query.filter_by(name='AusSuperSource').delete()
+        Blog.query.delete()
+        AtoAlert.query.delete()
+        db.session.commit()
+        bootstrap_state.drop(db.engine, checkfirst=True)
+
+
+class TestDatabaseBootstrap:
+    """Test cases for the idempotent, versioned bootstrap."""
+
+    def test_create_app_runs_no_queries(self):
+        """Test building the app (every worker boot) does not touch the database."""
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(Engine, 'before_cursor_execute', record)
+        try:
+            create_app('testing')
+        finally:
+            event.remove(Engine, 'before_cursor_execute', record)
+
+        assert statements == []
+
+    def test_bootstrap_runs_once_per_version(self, app, bootstrapped):
+        """Test the first run seeds the data and records the version; later runs skip."""
+        assert bootstrapped == {'version': DatabaseBootstrap.BOOTSTRAP_VERSION, 'bootstrapped': True}
+        assert DatabaseBootstrap.current_version() == DatabaseBootstrap.BOOTSTRAP_VERSION
+        assert Company.query.filter_by(name='AusSuperSource').count() == 1
+        assert User.query.filter_by(email='aggarwal.adarsh98@gmail.com').count() == 1
+        assert Blog.query.count() == 2
+        assert AtoAlert.query.count() == 2
+
+        result = app.test_cli_runner().invoke(args=['bootstrap-db'])
+        assert 'Database already bootstrapped (version 1)' in result.output
+
+        # Forced re-runs only add what is missing
+        assert DatabaseBootstrap.run(force=True)['bootstrapped'] is True
+        assert Company.query.filter_by(name='AusSuperSource').count() == 1
+        assert Blog.query.count() == 2
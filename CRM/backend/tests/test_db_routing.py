@@ -0,0 +1,123 @@
+"""
+Read Replica Routing Tests
+Tests for sending marked read-only queries to the replica bind.
+"""
+import pytest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, insert, select, union_all, update
+from sqlalchemy.pool import StaticPool
+
+from app.config import database_binds
+from app.db_routing import RoutingSession, read_replica, reads_from_replica
+from app.extensions import db
+from app.modules.user.models import Role
+
+
+@pytest.fixture
+def replica(app):
+    """A second in-memory database registered as the 'replica' bind, holding one role the primary lacks."""
+    engine = create_engine('sqlite://', poolclass=StaticPool)
+    db.metadata.create_all(engine, tables=[Role.__table__])
+    with engine.begin() as connection:
+        connection.execute(insert(Role.__table__).values(name='replica_only'))
+
+    with app.app_context():
+        db.engines['replica'] = engine
+        try:
+            yield engine
+        finally:
+            del db.engines['replica']
+            app.config['DB_REPLICA_STICKY'] = True
+    engine.dispose()
+
+
+def replica_role():
+    return Role.query.filter_by(name='replica_only').first()
+
+
+class TestReadReplicaRouting:
+    """Test cases for the routing session."""
+
+    def test_marked_reads_use_the_replica(self, app, replica):
+        """Test SELECTs go to the replica only inside read_replica()."""
+        @reads_from_replica
+        class Report:
+            @staticmethod
+            def role():
+                return replica_role()
+
+        assert replica_role() is None
+        with read_replica():
+            assert replica_role() is not None
+        assert Report.role() is not None
+
+    def test_writes_and_locking_reads_use_the_primary(self, app, replica):
+        """Test UPDATEs, FOR UPDATE and flushes are never routed to the replica."""
+        with read_replica():
+            assert db.session.get_bind(clause=select(Role)) is replica
+            assert db.session.get_bind(clause=select(Role).with_for_update()) is db.engine
+            assert db.session.get_bind(clause=update(Role).values(description='x')) is db.engine
+
+            db.session.get(Role, 1).description = 'Changed'
+            # Autoflush sends the change to the primary, so the read follows it there
+            assert Role.query.filter_by(description='Changed').count() == 1
+            assert replica_role() is None
+            db.session.rollback()
+
+            assert replica_role() is not None
+
+    def test_union_reads_use_the_replica(self, app, replica, admin_user):
+        """Test UNION statements are routed like SELECTs and global search matches on the replica."""
+        from app.modules.search import SearchUseCase
+
+        with read_replica():
+            assert db.session.get_bind(clause=union_all(select(Role), select(Role))) is replica
+            assert db.session.get_bind(
+                clause=union_all(select(Role), select(Role)).with_for_update()
+            ) is db.engine
+
+        # The replica fixture only holds roles: record where each statement
+        # would go and run it on the primary
+        routed = []
+        get_bind = RoutingSession.get_bind
+
+        def record(session, mapper=None, clause=None, bind=None, **kwargs):
+            engine = get_bind(session, mapper=mapper, clause=clause, bind=bind, **kwargs)
+            routed.append((type(clause).__name__, engine is replica))
+            return db.engine
+
+        with patch.object(RoutingSession, 'get_bind', record):
+            SearchUseCase().search_all('admin', company_id=admin_user.company_id)
+
+        assert ('CompoundSelect', True) in routed
+        assert all(to_replica for _, to_replica in routed)
+
+    def test_reads_stick_to_the_primary_after_a_write(self, app, replica):
+        """Test a committed write keeps the session's reads on the primary when sticky."""
+        role = Role.query.filter_by(name=Role.USER).first()
+        description, role.description = role.description, 'Sticky'
+        db.session.commit()
+
+        with read_replica():
+            assert replica_role() is None
+
+        app.config['DB_REPLICA_STICKY'] = False
+        with read_replica():
+            assert replica_role() is not None
+
+        role.description = description
+        db.session.commit()
+
+    def test_replica_bind_from_config(self):
+        """Test DATABASE_REPLICA_URL becomes the replica bind with its own statement timeout."""
+        assert database_binds({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}) == {}
+
+        binds = database_binds({
+            'DATABASE_REPLICA_URL': 'postgresql://crm@replica/crm',
+            'APP_PROCESS_ROLE': 'web',
+            'DB_STATEMENT_TIMEOUT_MS': 'web=30000',
+            'DB_REPLICA_STATEMENT_TIMEOUT_MS': 'web=120000',
+        })
+        assert binds['replica']['url'] == 'postgresql://crm@replica/crm'
+        assert binds['replica']['connect_args']['options'] == '-c statement_timeout=120000'
@@ -216,3 +216,196 @@ class TestGetUserDocuments:
             headers={'Authorization': f'Bearer {admin_token}'})
 
         assert response.status_code == 200
+
+
+class TestSharePointClientCaching:
+    """Test cases for SharePoint token, session and folder caching."""
+
+    def test_token_reused_until_expiry(self):
+        """Test the Graph token is acquired once and shared between calls."""
+        from unittest.mock import patch
+        from app.modules.documents.services.storage.graph_auth import GraphTokenCache
+
+        GraphTokenCache.invalidate()
+        with patch('msal.ConfidentialClientApplication') as app_cls:
+            app_cls.return_value.client_credential = 'secret'
+            app_cls.return_value.acquire_token_for_client.return_value = {
+                'access_token': 'token-1', 'expires_in': 3600
+            }
+
+            first = GraphTokenCache.get_token('tenant', 'client', 'secret')
+            second = GraphTokenCache.get_token('tenant', 'client', 'secret')
+
+        assert first == second == 'token-1'
+        assert app_cls.return_value.acquire_token_for_client.call_count == 1
+        GraphTokenCache.invalidate()
+
+    def test_rejected_token_refreshed_and_request_retried(self):
+        """Test a 401 drops the cached token and the request is retried once with a new one."""
+        from unittest.mock import MagicMock, patch
+        import requests
+        from app.modules.documents.services.storage.graph_auth import (
+            GraphTokenCache, create_pooled_session
+        )
+
+        GraphTokenCache.invalidate()
+        session = create_pooled_session()
+        unauthorized, ok = MagicMock(status_code=401), MagicMock(status_code=200)
+        with patch('msal.ConfidentialClientApplication') as app_cls, \
+                patch.object(requests.Session, 'request', side_effect=[unauthorized, ok]) as send:
+            app_cls.return_value.client_credential = 'secret'
+            app_cls.return_value.acquire_token_for_client.side_effect = [
+                {'access_token': 'token-1', 'expires_in': 3600},
+                {'access_token': 'token-2', 'expires_in': 3600},
+            ]
+
+            token = GraphTokenCache.get_token('tenant', 'client', 'secret')
+            response = session.get('https://graph.example/me', headers={
+                'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'
+            })
+
+            # A request that was still in flight with the old token reuses the new one
+            assert GraphTokenCache.refresh('token-1') == 'token-2'
+            assert GraphTokenCache.get_token('tenant', 'client', 'secret') == 'token-2'
+
+        assert response is ok
+        assert send.call_count == 2
+        retried_headers = send.call_args.kwargs['headers']
+        assert retried_headers == {'Authorization': 'Bearer token-2', 'Content-Type': 'application/json'}
+        assert app_cls.return_value.acquire_token_for_client.call_count == 2
+        GraphTokenCache.invalidate()
+
+    def test_folder_ids_cached(self, app):
+        """Test a resolved folder path is not looked up again on the next upload."""
+        from unittest.mock import MagicMock, patch
+        from app.modules.documents.services.storage import SharePointClient
+
+        with app.app_context():
+            original_drive_id = app.config.get('SHAREPOINT_DRIVE_ID')
+            app.config['SHAREPOINT_DRIVE_ID'] = 'drive-1'
+            client = SharePointClient()
+            app.config['SHAREPOINT_DRIVE_ID'] = original_drive_id
+            session = MagicMock()
+            session.get.return_value.status_code = 200
+            session.get.return_value.json.return_value = {'id': 'folder-1'}
+
+            with patch.object(SharePointClient, '_session', session), \
+                    patch.object(SharePointClient, '_folder_ids', {}), \
+                    patch.object(client, '_get_headers', return_value={}):
+                assert client._ensure_folder_exists('CRM_Documents/Jane/Tax') == 'folder-1'
+                assert client._ensure_folder_exists('CRM_Documents/Jane/Tax') == 'folder-1'
+
+                client._forget_folder('CRM_Documents/Jane')
+                assert client._ensure_folder_exists('CRM_Documents/Jane/Tax') == 'folder-1'
+
+            assert session.get.call_count == 2
+
+
+class TestDocumentProxy:
+    """Test cases for the streaming document proxy."""
+
+    @staticmethod
+    def _upstream(status_code, body, headers):
+        """Build a fake streamed storage provider response."""
+        from unittest.mock import MagicMock
+
+        resp = MagicMock()
+        resp.status_code = status_code
+        resp.headers = headers
+        resp.raw.stream.return_value = iter([body[i:i + 4] for i in range(0, len(body), 4)])
+        return resp
+
+    def test_proxy_forwards_range_and_streams_partial_content(self, client, client_token, test_document):
+        """Test a Range request is forwarded and answered with 206 from the provider."""
+        from unittest.mock import patch
+        from app.modules.documents.services.document_service import DocumentService
+
+        upstream = self._upstream(206, b'%PDF-1.7', {
+            'Content-Length': '8',
+            'Content-Range': 'bytes 0-7/1024',
+            'ETag': '"abc"'
+        })
+
+        with patch.object(DocumentService, 'get_download_url',
+                          return_value={'success': True, 'download_url': 'https://storage/file'}), \
+                patch('app.modules.documents.routes.document_routes.http_requests.get',
+                      return_value=upstream) as get:
+            response = client.get(f'/api/documents/{test_document.id}/proxy',
+                headers={'Authorization': f'Bearer {client_token}', 'Range': 'bytes=0-7'})
+
+            assert response.status_code == 206
+            assert response.data == b'%PDF-1.7'
+
+        assert get.call_args.kwargs['headers'] == {'Range': 'bytes=0-7'}
+        assert get.call_args.kwargs['stream'] is True
+        assert response.headers['Content-Range'] == 'bytes 0-7/1024'
+        assert response.headers['ETag'] == '"abc"'
+        upstream.close.assert_called()
+
+    def test_proxy_passes_not_modified(self, client, client_token, test_document):
+        """Test If-None-Match is forwarded and a 304 is returned without a body."""
+        from unittest.mock import patch
+        from app.modules.documents.services.document_service import DocumentService
+
+        upstream = self._upstream(304, b'', {'ETag': '"abc"'})
+
+        with patch.object(DocumentService, 'get_download_url',
+                          return_value={'success': True, 'download_url': 'https://storage/file'}), \
+                patch('app.modules.documents.routes.document_routes.http_requests.get',
+                      return_value=upstream):
+            response = client.get(f'/api/documents/{test_document.id}/proxy',
+                headers={'Authorization': f'Bearer {client_token}', 'If-None-Match': '"abc"'})
+
+        assert response.status_code == 304
+        assert response.data == b''
+
+
+class TestStreamingUploads:
+    """Test cases for chunked storage uploads."""
+
+    def test_sharepoint_large_upload_sends_chunks_from_stream(self, app):
+        """Test upload session chunks are read from the stream with correct ranges."""
+        from unittest.mock import MagicMock, patch
+        from app.modules.documents.services.storage import SharePointClient
+
+        payload = io.BytesIO(b'a' * 10 + b'b' * 10 + b'c' * 5)
+
+        with app.app_context():
+            original_drive_id = app.config.get('SHAREPOINT_DRIVE_ID')
+            app.config['SHAREPOINT_DRIVE_ID'] = 'drive-1'
+            client = SharePointClient()
+            app.config['SHAREPOINT_DRIVE_ID'] = original_drive_id
+
+            session = MagicMock()
+            session.post.return_value.status_code = 200
+            session.post.return_value.json.return_value = {'uploadUrl': 'https://upload/session'}
+            done = MagicMock(status_code=201)
+            done.json.return_value = {'id': 'item-1', 'webUrl': 'https://web/item-1'}
+            session.put.side_effect = [MagicMock(status_code=202), MagicMock(status_code=202), done]
+
+            with patch.object(SharePointClient, '_session', session), \
+                    patch.object(client, '_get_headers', return_value={}), \
+                    patch('app.modules.documents.services.storage.sharepoint_client.UPLOAD_CHUNK_SIZE', 10):
+                result = client._upload_large_file(payload, 'CRM_Documents/Jane', 'file.pdf')
+
+        assert result['success'] is True
+        assert result['file_size'] == 25
+        assert result['sharepoint_item_id'] == 'item-1'
+        sent = [(c.kwargs['headers']['Content-Range'], c.kwargs['data']) for c in session.put.call_args_list]
+        assert sent == [
+            ('bytes 0-9/25', b'a' * 10),
+            ('bytes 10-19/25', b'b' * 10),
+            ('bytes 20-24/25', b'c' * 5),
+        ]
+
+    def test_multipart_stream_matches_declared_length(self):
+        """Test the streamed multipart body has the advertised length and file content."""
+        from app.modules.documents.services.storage.upload_stream import MultipartFileStream
+
+        body = MultipartFileStream({'parent_id': 'p1'}, 'content', 'a.pdf', io.BytesIO(b'%PDF' * 1000))
+        data = b''.join(iter(body))
+
+        assert len(data) == len(body)
+        assert b'name="parent_id"\r\n\r\np1\r\n' in data
+        assert b'%PDF' * 1000 in data
+        assert body.content_type.startswith('multipart/form-data; boundary=')
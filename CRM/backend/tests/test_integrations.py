@@ -0,0 +1,227 @@
+"""
+Integrations Tests
+Tests for the batched Xero contact and invoice sync, run against a local fake Xero API.
+"""
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from app.extensions import db
+from app.modules.integrations.xero.sync_service import XeroSyncService
+from app.modules.integrations.xero.xero_client import XeroConfig, XeroRateLimiter
+from app.modules.services.models import Invoice, InvoiceLineItem
+from app.modules.user.models import Role, User
+
+
+class FakeXeroHandler(BaseHTTPRequestHandler):
+    """Accepts batch POSTs to /Contacts and /Invoices like the Xero accounting API"""
+
+    def do_POST(self):
+        path, _, query = self.path.partition('?')
+        collection = path.rsplit('/', 1)[-1]
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append({'collection': collection, 'query': query, 'items': body[collection]})
+
+        saved = []
+        for item in body[collection]:
+            if item.get('Name') == 'Reject Me':
+                saved.append({**item, 'StatusAttributeString': 'ERROR', 'HasValidationErrors': True,
+                              'ValidationErrors': [{'Message': 'Email address must be valid.'}]})
+            elif collection == 'Contacts':
+                saved.append({**item, 'ContactID': item.get('ContactID') or str(uuid.uuid4()),
+                              'StatusAttributeString': 'OK'})
+            else:
+                saved.append({**item, 'InvoiceID': item.get('InvoiceID') or str(uuid.uuid4()),
+                              'StatusAttributeString': 'OK'})
+
+        payload = json.dumps({collection: saved}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_xero():
+    """Local fake Xero API; XeroAPIClient is pointed at it for the test."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeXeroHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch.object(XeroConfig, 'API_BASE_URL', f'http://127.0.0.1:{server.server_port}/api.xro/2.0'):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='session')
+def xero_models(app):
+    """Register the Xero models (a factory, so only once per session) and create their tables."""
+    from app.modules.integrations.xero.models import create_xero_models
+
+    with app.app_context():
+        models = create_xero_models(db)
+        db.metadata.create_all(db.engine, tables=[model.__table__ for model in models])
+    return models
+
+
+@pytest.fixture
+def xero_sync(app, xero_models, fake_xero, admin_user):
+    """XeroSyncService for an active connection of the test company."""
+    XeroConnection, XeroContactMapping, XeroInvoiceMapping, XeroSyncLog = xero_models
+    with app.app_context():
+        connection = XeroConnection(
+            company_id=admin_user.company_id,
+            xero_tenant_id='tenant-1',
+            access_token='access',
+            refresh_token='refresh',
+            token_expires_at=datetime.utcnow() + timedelta(hours=1)
+        )
+        db.session.add(connection)
+        db.session.commit()
+
+        models = {
+            'XeroConnection': XeroConnection,
+            'XeroContactMapping': XeroContactMapping,
+            'XeroInvoiceMapping': XeroInvoiceMapping,
+            'XeroSyncLog': XeroSyncLog,
+            'User': User,
+            'Invoice': Invoice
+        }
+        yield XeroSyncService(db, connection, models)
+
+        db.session.rollback()
+        for model in (XeroSyncLog, XeroInvoiceMapping, XeroContactMapping, XeroConnection):
+            db.session.query(model).delete()
+        db.session.commit()
+
+
+def add_clients(company_id, count, **fields):
+    role = Role.query.filter_by(name=Role.USER).first()
+    users = [
+        User(email=f'xero-client-{i}@test.com', role_id=role.id, company_id=company_id,
+             password_hash='x', first_name='Client', last_name=str(i), **fields)
+        for i in range(count)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+class TestXeroBulkSync:
+    """Test cases for the batched, incremental Xero push."""
+
+    def test_contacts_pushed_in_batches(self, app, xero_sync, fake_xero, admin_user):
+        """Test contacts go to Xero 50 per request and each user gets a mapping."""
+        with app.app_context():
+            add_clients(admin_user.company_id, 59)
+
+            result = xero_sync.sync_contacts()
+
+            assert result['success'] is True
+            assert result['created'] == 60  # 59 clients + the admin
+            assert [len(r['items']) for r in fake_xero.requests] == [50, 10]
+            assert all(r['query'] == 'summarizeErrors=false' for r in fake_xero.requests)
+            XeroContactMapping = xero_sync.models['XeroContactMapping']
+            assert XeroContactMapping.query.count() == 60
+
+    def test_only_changed_records_are_pushed(self, app, xero_sync, fake_xero, admin_user):
+        """Test a repeat sync pushes only users changed since the last successful sync."""
+        with app.app_context():
+            users = add_clients(admin_user.company_id, 3)
+            xero_sync.sync_contacts()
+            fake_xero.requests.clear()
+
+            assert xero_sync.sync_contacts()['processed'] == 0
+            assert fake_xero.requests == []
+
+            users[1].phone = '+61 400 000 000'
+            db.session.commit()
+            result = xero_sync.sync_contacts()
+            assert result['updated'] == 1
+            [pushed] = fake_xero.requests[0]['items']
+            assert pushed['EmailAddress'] == users[1].email
+            assert pushed['ContactID']
+
+            fake_xero.requests.clear()
+            assert xero_sync.sync_contacts(full=True)['updated'] == 4
+            assert len(fake_xero.requests) == 1
+
+    def test_rejected_contact_is_retried(self, app, xero_sync, fake_xero, admin_user):
+        """Test a contact Xero rejects fails alone and is pushed again next sync."""
+        with app.app_context():
+            [rejected] = add_clients(admin_user.company_id, 1)
+            rejected.first_name, rejected.last_name = 'Reject', 'Me'
+            db.session.commit()
+
+            result = xero_sync.sync_contacts()
+            assert result['created'] == 1
+            assert result['failed'] == 1
+            assert 'Email address must be valid.' in result['errors'][0]
+
+            fake_xero.requests.clear()
+            result = xero_sync.sync_contacts()
+            assert result['processed'] == 1
+            assert fake_xero.requests[0]['items'][0]['Name'] == 'Reject Me'
+
+    def test_invoices_pushed_with_their_contacts(self, app, xero_sync, fake_xero, admin_user):
+        """Test invoices of unsynced clients create the contacts first, then go in one batch."""
+        with app.app_context():
+            [client] = add_clients(admin_user.company_id, 1)
+            for number in ('XERO-1', 'XERO-2'):
+                invoice = Invoice(
+                    invoice_number=number, company_id=admin_user.company_id, client_id=client.id,
+                    due_date=(datetime.utcnow() + timedelta(days=14)).date(), status=Invoice.STATUS_SENT
+                )
+                invoice.line_items.append(InvoiceLineItem(
+                    description='Tax return', quantity=Decimal('1'), unit_price=Decimal('300.00'),
+                    total=Decimal('300.00')
+                ))
+                db.session.add(invoice)
+            db.session.commit()
+
+            result = xero_sync.sync_invoices()
+
+            assert result['created'] == 2
+            assert [(r['collection'], len(r['items'])) for r in fake_xero.requests] == [
+                ('Contacts', 1), ('Invoices', 2)
+            ]
+            assert fake_xero.requests[0]['items'][0]['EmailAddress'] == client.email
+            mapping = xero_sync.models['XeroContactMapping'].query.filter_by(crm_user_id=client.id).one()
+            invoice = fake_xero.requests[1]['items'][0]
+            assert invoice['Contact'] == {'ContactID': mapping.xero_contact_id}
+            assert invoice['Status'] == 'AUTHORISED'
+            assert invoice['LineItems'][0]['UnitAmount'] == 300.0
+
+            fake_xero.requests.clear()
+            assert xero_sync.sync_invoices()['processed'] == 0
+            assert fake_xero.requests == []
+
+            db.session.query(InvoiceLineItem).delete()
+            db.session.query(Invoice).delete()
+            db.session.commit()
+
+    def test_every_call_takes_a_rate_limit_token(self, app, xero_sync, fake_xero, admin_user):
+        """Test each Xero request waits on the tenant's minute and day buckets."""
+        with app.app_context():
+            add_clients(admin_user.company_id, 59)
+
+            with patch.object(XeroRateLimiter, 'acquire', return_value=0.0) as acquire:
+                xero_sync.sync_contacts()
+
+            assert acquire.call_count == len(fake_xero.requests) == 2
+            acquire.assert_called_with('tenant-1')
+
+            minute, day = XeroRateLimiter.buckets('tenant-1')
+            assert (minute.rate, minute.capacity) == (XeroConfig.CALLS_PER_MINUTE / 60.0, XeroConfig.CALLS_PER_MINUTE)
+            assert (day.rate, day.capacity) == (XeroConfig.CALLS_PER_DAY / 86400.0, XeroConfig.CALLS_PER_DAY)
@@ -0,0 +1,215 @@
+"""
+Background Job Queue Tests
+Tests for enqueueing, claiming, retries, dead-lettering and per-queue limits.
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.extensions import db
+from app.jobs.models import BackgroundJob
+from app.jobs.queue import JobQueue, background_task
+
+calls = []
+
+
+@background_task(queue='tests', max_attempts=2)
+def record_call(value):
+    calls.append(value)
+
+
+@background_task(queue='tests', max_attempts=2)
+def always_fail(value):
+    raise RuntimeError(f'failed {value}')
+
+
+@pytest.fixture
+def job_queue(app):
+    """Run .delay() through the queue instead of inline, with a test queue of one slot."""
+    with app.app_context():
+        BackgroundJob.query.delete()
+        db.session.commit()
+    calls.clear()
+    app.config.update({'JOB_QUEUE_EAGER': False, 'JOB_QUEUE_CONCURRENCY': 'tests=1,email=2'})
+
+    yield app
+
+    app.config.update({'JOB_QUEUE_EAGER': True, 'JOB_QUEUE_CONCURRENCY': 'default=4,email=4,automations=2'})
+    with app.app_context():
+        BackgroundJob.query.delete()
+        db.session.commit()
+
+
+class TestJobQueue:
+    """Test cases for the database-backed job queue."""
+
+    def test_delay_enqueues_job(self, job_queue):
+        """Test .delay() stores a pending job instead of running the task."""
+        with job_queue.app_context():
+            job = record_call.delay('a')
+
+            assert calls == []
+            assert job.status == BackgroundJob.STATUS_PENDING
+            assert job.queue == 'tests'
+            assert job.task == 'tests.test_jobs.record_call'
+            assert job.args == ['a']
+
+    def test_delay_rejects_non_json_arguments(self, job_queue):
+        """Test passing a model instance fails at the call site."""
+        with job_queue.app_context():
+            with pytest.raises(TypeError):
+                record_call.delay(object())
+
+    def test_eager_mode_runs_inline(self, job_queue):
+        """Test JOB_QUEUE_EAGER runs the task immediately without a job row."""
+        job_queue.config['JOB_QUEUE_EAGER'] = True
+        with job_queue.app_context():
+            assert record_call.delay('inline') is None
+            assert calls == ['inline']
+            assert BackgroundJob.query.count() == 0
+
+    def test_claim_and_run(self, job_queue):
+        """Test a claimed job runs and is marked succeeded."""
+        with job_queue.app_context():
+            job_id = record_call.delay('b').id
+
+            assert JobQueue.claim('tests', 5, 'worker-1') == [job_id]
+            assert JobQueue.run(job_id) is True
+
+            job = db.session.get(BackgroundJob, job_id)
+            assert calls == ['b']
+            assert job.status == BackgroundJob.STATUS_SUCCEEDED
+            assert job.attempts == 1
+            assert job.locked_by is None
+
+    def test_failed_job_retries_then_dead_letters(self, job_queue):
+        """Test a failing job is retried with backoff and dead-lettered after max_attempts."""
+        with job_queue.app_context():
+            job_id = always_fail.delay('c').id
+
+            JobQueue.claim('tests', 1, 'worker-1')
+            assert JobQueue.run(job_id) is False
+
+            job = db.session.get(BackgroundJob, job_id)
+            assert job.status == BackgroundJob.STATUS_PENDING
+            assert job.run_at > datetime.utcnow()
+            assert 'failed c' in job.last_error
+
+            # Not due yet
+            assert JobQueue.claim('tests', 1, 'worker-1') == []
+
+            job.run_at = datetime.utcnow()
+            db.session.commit()
+            assert JobQueue.claim('tests', 1, 'worker-1') == [job_id]
+            JobQueue.run(job_id)
+
+            job = db.session.get(BackgroundJob, job_id)
+            assert job.status == BackgroundJob.STATUS_DEAD
+            assert job.attempts == 2
+
+            assert JobQueue.requeue_dead('tests') == 1
+            assert db.session.get(BackgroundJob, job_id).status == BackgroundJob.STATUS_PENDING
+
+    def test_claim_respects_queue_concurrency(self, job_queue):
+        """Test no more jobs run at once than the queue's limit across workers."""
+        with job_queue.app_context():
+            first, second = record_call.delay(1).id, record_call.delay(2).id
+
+            assert JobQueue.claim('tests', 5, 'worker-1') == [first]
+            assert JobQueue.claim('tests', 5, 'worker-2') == []
+
+            JobQueue.run(first)
+            assert JobQueue.claim('tests', 5, 'worker-2') == [second]
+
+    def test_expired_lease_is_reclaimed(self, job_queue):
+        """Test a job left running by a dead worker is claimed again."""
+        with job_queue.app_context():
+            job_id = record_call.delay('d').id
+            JobQueue.claim('tests', 1, 'worker-1')
+
+            job = db.session.get(BackgroundJob, job_id)
+            job.locked_until = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+
+            assert JobQueue.claim('tests', 1, 'worker-2') == [job_id]
+            job = db.session.get(BackgroundJob, job_id)
+            assert job.locked_by == 'worker-2'
+            assert job.attempts == 2
+
+
+class TestRequestSideEffects:
+    """Test request side effects are queued instead of run in the request."""
+
+    def test_create_request_queues_admin_notification(self, job_queue, client, client_token, admin_user):
+        """Test creating a request enqueues the admin notification without sending it."""
+        from app.modules.services.models import Service
+
+        with job_queue.app_context():
+            service = Service(name='Queued Service', is_active=True, is_default=True)
+            db.session.add(service)
+            db.session.commit()
+            service_id = service.id
+
+        with patch('app.modules.notifications.services.email_service.EmailService.send_new_request_notification') as send:
+            response = client.post('/api/requests/', json={'service_id': service_id},
+                                   headers={'Authorization': f'Bearer {client_token}'})
+            assert response.status_code == 201
+            send.assert_not_called()
+
+            with job_queue.app_context():
+                job = BackgroundJob.query.filter_by(
+                    task='app.modules.services.tasks.notify_admins_of_new_request'
+                ).one()
+                assert job.queue == 'email'
+                assert job.args == [response.get_json()['data']['request']['id']]
+
+                JobQueue.claim('email', 1, 'worker-1')
+                assert JobQueue.run(job.id) is True
+                send.assert_called_once()
+
+
+class TestScheduler:
+    """Test cases for which processes start the APScheduler cron jobs."""
+
+    @pytest.mark.parametrize('role, starts', [('web', True), ('worker', False), ('cli', False)])
+    def test_only_web_processes_start_the_scheduler(self, monkeypatch, role, starts):
+        """Test worker.py and CLI commands do not run the cron jobs a second time."""
+        from app import create_app
+        from app.config import TestingConfig
+
+        monkeypatch.setattr(TestingConfig, 'APP_PROCESS_ROLE', role)
+        with patch('app.jobs.init_scheduler') as init_scheduler:
+            create_app('testing')
+
+        assert init_scheduler.called is starts
+
+    def test_scheduled_jobs_use_worker_timeouts(self, app):
+        """Test scheduled jobs SET LOCAL the worker timeouts on Postgres transactions, and only inside the job."""
+        from unittest.mock import Mock
+        from app.jobs import _set_job_timeouts, job_timeouts, run_with_app_context
+
+        assert job_timeouts({
+            'DB_STATEMENT_TIMEOUT_MS': 'web=30000,worker=600000',
+            'DB_IDLE_IN_TRANSACTION_TIMEOUT_MS': 'web=60000,worker=300000',
+        }) == {'statement_timeout': 600000, 'idle_in_transaction_session_timeout': 300000}
+
+        connection = Mock()
+        connection.dialect.name = 'postgresql'
+        _set_job_timeouts(connection)
+        connection.exec_driver_sql.assert_not_called()
+
+        run_with_app_context(app, lambda: _set_job_timeouts(connection))
+        connection.exec_driver_sql.assert_any_call('SET LOCAL statement_timeout = 600000')
+        connection.exec_driver_sql.assert_any_call('SET LOCAL idle_in_transaction_session_timeout = 300000')
+
+    def test_rollup_refresh_runs_at_startup(self, app, monkeypatch):
+        """Test the interval rollup refresh is scheduled to run immediately, not after one interval."""
+        import app.jobs as jobs
+
+        monkeypatch.setattr(jobs, 'scheduler', None)
+        with patch('app.jobs.BackgroundScheduler') as scheduler_class, patch('app.jobs.atexit'):
+            jobs.init_scheduler(app)
+        monkeypatch.setattr(jobs, 'scheduler', None)
+
+        added = {call.kwargs['id']: call.kwargs for call in scheduler_class.return_value.add_job.call_args_list}
+        assert added['analytics_rollup_refresh']['next_run_time'] <= datetime.now()
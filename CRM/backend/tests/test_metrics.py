@@ -0,0 +1,176 @@
+"""
+Metrics Module Tests
+Tests for the SQLAlchemy query metrics and the per-request query budget.
+"""
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from app.modules.metrics.db_metrics import fingerprint_statement, normalize_statement
+
+
+class TestStatementFingerprint:
+    """Test cases for statement normalisation."""
+
+    def test_values_do_not_change_the_fingerprint(self):
+        """Test literals, bind styles and IN list lengths share one fingerprint."""
+        first = fingerprint_statement("SELECT * FROM users WHERE id IN (?, ?, ?) AND email = 'a@b.com' LIMIT 10")
+        second = fingerprint_statement("SELECT * FROM users WHERE id IN (?) AND email = 'x@y.com' LIMIT 1")
+        postgres = fingerprint_statement(
+            "SELECT * FROM users WHERE id IN (%(id_1_1)s, %(id_1_2)s) AND email = %(email_1)s LIMIT %(param_1)s"
+        )
+
+        assert first[0] == 'SELECT'
+        assert first[1] == second[1] == postgres[1]
+        assert first[2] == 'SELECT * FROM users WHERE id IN (?) AND email = ? LIMIT ?'
+
+    def test_multi_row_insert_and_casts(self):
+        """Test multi-row VALUES collapse and Postgres casts survive."""
+        assert normalize_statement('INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)') == \
+            'INSERT INTO t (a, b) VALUES (?)'
+        assert normalize_statement('SELECT users_1.id FROM users AS users_1 WHERE x::text = :x_1') == \
+            'SELECT users_1.id FROM users AS users_1 WHERE x::text = ?'
+        assert fingerprint_statement('PRAGMA foreign_keys')[0] == 'OTHER'
+
+
+class TestQueryMetrics:
+    """Test cases for the per-endpoint query metrics and budget."""
+
+    def test_queries_counted_per_endpoint(self, client, admin_token):
+        """Test statements run by a request are counted under its route."""
+        def queries():
+            return sum(
+                sample.value
+                for metric in REGISTRY.collect() if metric.name == 'database_queries'
+                for sample in metric.samples
+                if sample.name == 'database_queries_total' and sample.labels['endpoint'] == '/api/users/'
+            )
+
+        before = queries()
+        response = client.get('/api/users/', headers={'Authorization': f'Bearer {admin_token}'})
+        assert response.status_code == 200
+        assert queries() > before
+
+        # Latency series are per operation and endpoint; only the counter has fingerprints
+        assert REGISTRY.get_sample_value(
+            'database_query_duration_seconds_count', {'operation': 'SELECT', 'endpoint': '/api/users/'}
+        ) > 0
+
+    def test_over_budget_request_is_logged(self, app, client, admin_token):
+        """Test a request running more queries than DB_QUERY_BUDGET logs a warning."""
+        exceeded = REGISTRY.get_sample_value(
+            'database_query_budget_exceeded_total', {'endpoint': '/api/users/'}
+        ) or 0
+        app.config['DB_QUERY_BUDGET'] = 1
+        try:
+            with patch.object(app.logger, 'warning') as warning:
+                client.get('/api/users/', headers={'Authorization': f'Bearer {admin_token}'})
+        finally:
+            app.config['DB_QUERY_BUDGET'] = 50
+
+        message = warning.call_args[0][0]
+        assert message.startswith('Query budget exceeded: GET /api/users/ ran ')
+        assert 'top statement: SELECT' in message
+        assert REGISTRY.get_sample_value(
+            'database_query_budget_exceeded_total', {'endpoint': '/api/users/'}
+        ) == exceeded + 1
+
+
+class TestMultiprocessMetrics:
+    """Test cases for metrics shared across gunicorn workers."""
+
+    def test_unmatched_routes_share_one_label(self, app):
+        """Test requests matching no route are labelled 'unmatched', not by path."""
+        from app.modules.metrics.prometheus_metrics import get_endpoint_label
+
+        with app.test_request_context('/wp-login.php'):
+            assert get_endpoint_label() == 'unmatched'
+        with app.test_request_context('/api/users/42'):
+            assert get_endpoint_label() == '/api/users/<user_id>'
+
+    def test_registry_aggregates_worker_files(self, tmp_path, monkeypatch):
+        """Test /metrics reads the shared directory when PROMETHEUS_MULTIPROC_DIR is set."""
+        from prometheus_client import generate_latest
+        from app.modules.metrics.prometheus_metrics import metrics_registry
+
+        assert metrics_registry() is REGISTRY
+
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+        registry = metrics_registry()
+        assert registry is not REGISTRY
+        assert generate_latest(registry) == b''
+
+    def test_one_process_samples_system_gauges(self, tmp_path, monkeypatch):
+        """Test only the holder of the collector lock samples the system gauges."""
+        import fcntl
+        from app.modules.metrics import prometheus_metrics
+
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+        monkeypatch.setattr(prometheus_metrics, '_collector_lock', None)
+
+        with open(tmp_path / 'system_metrics.lock', 'a') as other_worker:
+            fcntl.flock(other_worker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            assert prometheus_metrics.is_system_collector() is False
+
+        # The other worker exited: the next check takes over
+        assert prometheus_metrics.is_system_collector() is True
+        prometheus_metrics._collector_lock.close()
+
+
+class TestDatabasePool:
+    """Test cases for engine pool options and pool utilisation metrics."""
+
+    def test_postgres_engine_options(self):
+        """Test pool and per-role timeout options, and PgBouncer mode."""
+        from app.config import engine_options
+
+        config = {
+            'SQLALCHEMY_DATABASE_URI': 'postgresql://crm@db/crm',
+            'APP_PROCESS_ROLE': 'worker',
+            'DB_POOL_SIZE': 8, 'DB_MAX_OVERFLOW': 4, 'DB_POOL_RECYCLE': 600,
+            'DB_STATEMENT_TIMEOUT_MS': 'web=30000,worker=600000',
+            'DB_IDLE_IN_TRANSACTION_TIMEOUT_MS': '60000',
+        }
+        options = engine_options(config)
+        assert (options['pool_size'], options['max_overflow'], options['pool_recycle']) == (8, 4, 600)
+        assert options['pool_pre_ping'] is True
+        assert options['connect_args']['application_name'] == 'crm-worker'
+        assert options['connect_args']['options'] == \
+            '-c statement_timeout=600000 -c idle_in_transaction_session_timeout=60000'
+
+        config['APP_PROCESS_ROLE'] = 'cli'
+        assert 'statement_timeout' not in engine_options(config)['connect_args']['options']
+
+        config['DB_PGBOUNCER'] = True
+        options = engine_options(config)
+        assert options['poolclass'].__name__ == 'NullPool'
+        assert 'options' not in options['connect_args']
+        assert engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}) == {}
+
+    def test_pool_utilisation_gauges(self):
+        """Test checkouts update the active, overflow and utilisation gauges."""
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import QueuePool
+        from app.modules.metrics.db_metrics import watch_pool
+
+        engine = create_engine('sqlite://', poolclass=QueuePool, pool_size=2, max_overflow=2)
+        replica = create_engine('sqlite://', poolclass=QueuePool, pool_size=2, max_overflow=2)
+        watch_pool(engine.pool)
+        watch_pool(replica.pool, bind='replica')
+        primary_labels, replica_labels = {'bind': 'primary'}, {'bind': 'replica'}
+
+        connections = [engine.connect() for _ in range(3)]
+        replica_connection = replica.connect()
+        assert REGISTRY.get_sample_value('database_connections_active', primary_labels) == 3
+        assert REGISTRY.get_sample_value('database_connection_pool_overflow', primary_labels) == 1
+        assert REGISTRY.get_sample_value('database_connection_pool_utilisation', primary_labels) == 0.75
+        # The replica pool has its own series instead of overwriting the primary's
+        assert REGISTRY.get_sample_value('database_connections_active', replica_labels) == 1
+        assert REGISTRY.get_sample_value('database_connection_pool_utilisation', replica_labels) == 0.25
+
+        for connection in connections:
+            connection.close()
+        replica_connection.close()
+        assert REGISTRY.get_sample_value('database_connection_pool_utilisation', primary_labels) == 0
+        engine.dispose()
+        replica.dispose()
@@ -2,11 +2,16 @@
 Notification Module Tests
 Tests for notifications, email templates, and automation triggers.
 """
+import smtplib
+
 import pytest
 from datetime import datetime, timedelta
+from unittest.mock import patch
 from app.modules.notifications.models import (
-    Notification, EmailTemplate, EmailAutomation, ScheduledEmail
+    Notification, EmailTemplate, EmailAutomation, ScheduledEmail, ScheduledEmailRecipient
 )
+from app.modules.notifications.clients import SMTPClient, SMTPConnectionPool
+from app.modules.notifications.services import BulkEmailSender, ScheduledEmailDispatcher
 from app.modules.user.models import User
 from app.extensions import db
 
@@ -133,6 +138,51 @@ class TestEmailTemplates:
         assert response.status_code == 403
 
 
+class TestTemplateRenderer:
+    """Test cases for compiled placeholder templates."""
+
+    def test_render_matches_replace_semantics(self):
+        """Test known placeholders are filled (falsy as empty) and unknown ones kept."""
+        from app.common.templating import TemplateRenderer
+
+        rendered = TemplateRenderer.render(
+            '<p>Hi {first_name} {last_name}, {unknown} {{client_name}} {due.date}</p>',
+            {'first_name': 'Ann', 'last_name': None, 'client_name': 'Ann Lee', 'due.date': '1 July'}
+        )
+        assert rendered == '<p>Hi Ann , {unknown} {Ann Lee} 1 July</p>'
+
+    def test_compiled_once_per_template_version(self, app, test_email_template):
+        """Test a stored template is compiled once per updated_at and recompiled after edits."""
+        with app.app_context():
+            template = db.session.get(EmailTemplate, test_email_template.id)
+            rendered = template.render_many([{'client_name': 'Ann'}, {'client_name': 'Bob'}])
+            assert [body for _, body in rendered] == [
+                '<p>Hello {Ann},</p><p>Welcome to our practice.</p>',
+                '<p>Hello {Bob},</p><p>Welcome to our practice.</p>'
+            ]
+
+            subject, body = template.compiled()
+            assert template.compiled()[1] is body
+
+            template.body_html = '<p>Bye {client_name}</p>'
+            assert template.render({'client_name': 'Ann'})[1] == '<p>Bye Ann</p>'
+            db.session.rollback()
+
+    def test_workflow_double_brace_vars(self):
+        """Test workflow automation payloads fill {{request.*}} placeholders."""
+        from types import SimpleNamespace
+        from app.modules.services.services.workflow_automation import WorkflowAutomationExecutor
+
+        request = SimpleNamespace(
+            id='r-1', request_number='REQ-0001', status='pending', xero_reference_job_id=None,
+            internal_reference='', invoice_amount=None
+        )
+        payload = WorkflowAutomationExecutor._replace_template_vars(
+            {'text': 'Request {{request.request_number}} is {{request.status}} {{request.other}}'}, request
+        )
+        assert payload == {'text': 'Request REQ-0001 is pending {{request.other}}'}
+
+
 class TestBulkEmail:
     """Test cases for bulk email functionality."""
 
@@ -280,6 +330,369 @@ class TestScheduledEmails:
                 assert response.status_code == 200
 
 
+class RecordingEmailClient:
+    """Email client double that records what would have been sent."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_email(self, to_email, subject, body, is_html=True):
+        self.sent.append((to_email, subject, body))
+        return {'success': True}
+
+
+@pytest.fixture
+def email_dispatch(app, test_company):
+    """Clear scheduled emails and route dispatcher sends to a recording client."""
+    with app.app_context():
+        ScheduledEmailRecipient.query.delete()
+        ScheduledEmail.query.delete()
+        db.session.commit()
+
+    email_client = RecordingEmailClient()
+    app.config.update({'SCHEDULED_EMAIL_PAGE_SIZE': 2, 'SCHEDULED_EMAIL_BATCH_SIZE': 2})
+    with patch('app.modules.notifications.services.email_service.EmailService._get_email_client',
+               return_value=email_client):
+        yield email_client
+    app.config.update({'SCHEDULED_EMAIL_PAGE_SIZE': 500, 'SCHEDULED_EMAIL_BATCH_SIZE': 50})
+
+
+def create_due_email(company_id, **kwargs):
+    """Create a filter scheduled email that is already due."""
+    scheduled = ScheduledEmail(
+        company_id=company_id,
+        recipient_type=ScheduledEmail.RECIPIENT_FILTER,
+        recipient_filter={'status': 'active'},
+        subject='Hello {first_name}',
+        body_html='<p>Dear {client_name}</p>',
+        scheduled_at=datetime.utcnow() - timedelta(minutes=1),
+        **kwargs
+    )
+    db.session.add(scheduled)
+    db.session.commit()
+    return scheduled
+
+
+class TestScheduledEmailDispatcher:
+    """Test cases for dispatching due scheduled emails."""
+
+    def test_dispatch_pages_and_sends_each_recipient_once(self, app, email_dispatch, admin_user,
+                                                           accountant_user, client_user):
+        """Test a filter email is resolved page by page and sent to every recipient."""
+        with app.app_context():
+            email_id = create_due_email(client_user.company_id).id
+
+            result = ScheduledEmailDispatcher.dispatch_due(worker_id='worker-1')
+
+            assert result == {'emails': 1, 'sent': 3, 'failed': 0}
+            assert sorted(to for to, _, _ in email_dispatch.sent) == [
+                'accountant@test.com', 'admin@test.com', 'client@test.com'
+            ]
+            assert ('client@test.com', 'Hello Test', '<p>Dear Test Client</p>') in email_dispatch.sent
+
+            scheduled = db.session.get(ScheduledEmail, email_id)
+            assert scheduled.status == ScheduledEmail.STATUS_SENT
+            assert scheduled.sent_count == 3
+            assert scheduled.recipients_count == 3
+            assert scheduled.locked_by is None
+
+    def test_expired_lease_resumes_without_resending(self, app, email_dispatch, admin_user, client_user):
+        """Test a crashed dispatch is picked up again and skips recipients already sent."""
+        with app.app_context():
+            scheduled = create_due_email(
+                client_user.company_id,
+                status=ScheduledEmail.STATUS_PROCESSING,
+                locked_by='dead-worker',
+                locked_until=datetime.utcnow() - timedelta(seconds=1),
+                sent_count=1
+            )
+            db.session.add(ScheduledEmailRecipient(
+                scheduled_email_id=scheduled.id, user_id=admin_user.id, email='admin@test.com',
+                status=ScheduledEmailRecipient.STATUS_SENT
+            ))
+            db.session.commit()
+
+            result = ScheduledEmailDispatcher.dispatch_due(worker_id='worker-2')
+
+            assert result['sent'] == 1
+            assert [to for to, _, _ in email_dispatch.sent] == ['client@test.com']
+            assert db.session.get(ScheduledEmail, scheduled.id).sent_count == 2
+
+    def test_batch_send_error_fails_batch(self, app, email_dispatch, admin_user, accountant_user, client_user):
+        """Test an exception from the sender marks the batch failed instead of leaving it pending."""
+        with app.app_context():
+            email_id = create_due_email(client_user.company_id).id
+
+            with patch.object(BulkEmailSender, 'send', side_effect=ValueError('bad header')):
+                result = ScheduledEmailDispatcher.dispatch_due(worker_id='worker-1')
+
+            assert result == {'emails': 1, 'sent': 0, 'failed': 3}
+            scheduled = db.session.get(ScheduledEmail, email_id)
+            assert scheduled.locked_by is None
+            assert scheduled.recipients.filter_by(status=ScheduledEmailRecipient.STATUS_PENDING).count() == 0
+
+    def test_claim_skips_live_leases(self, app, email_dispatch, client_user):
+        """Test an email leased to another running worker is not claimed."""
+        with app.app_context():
+            create_due_email(
+                client_user.company_id,
+                status=ScheduledEmail.STATUS_PROCESSING,
+                locked_by='worker-1',
+                locked_until=datetime.utcnow() + timedelta(minutes=5)
+            )
+            future = create_due_email(client_user.company_id)
+            future.scheduled_at = datetime.utcnow() + timedelta(days=1)
+            db.session.commit()
+
+            assert ScheduledEmailDispatcher.claim('worker-2') == []
+
+
+class TestBulkEmailCampaigns:
+    """Test cases for filtered bulk email sent as a background campaign."""
+
+    def test_send_now_returns_campaign_progress(self, app, client, admin_token, email_dispatch,
+                                                accountant_user, client_user):
+        """Test sending now returns before any recipient is sent and the campaign progress can be polled."""
+        from app.jobs.scheduled_emails import dispatch_scheduled_emails
+
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        response = client.post('/api/notifications/bulk-email/filtered', headers=headers, json={
+            'filter': {'status': 'active'},
+            'custom_subject': 'Hello {first_name}',
+            'custom_body': '<p>Dear {client_name}</p>',
+            'notify_in_app': True
+        })
+
+        assert response.status_code == 202
+        data = response.get_json()['data']
+        assert data['total_recipients'] == 3
+        assert data['status'] == ScheduledEmail.STATUS_PENDING
+        assert email_dispatch.sent == []
+
+        # Eager mode (no worker): the scheduled email dispatcher sends it
+        with app.app_context():
+            dispatch_scheduled_emails()
+
+        response = client.get(f"/api/notifications/bulk-email/campaigns/{data['campaign_id']}", headers=headers)
+        assert response.status_code == 200
+        campaign = response.get_json()['data']['campaign']
+        assert campaign['status'] == ScheduledEmail.STATUS_SENT
+        assert campaign['sent_count'] == 3
+        assert campaign['pending_count'] == 0
+        assert campaign['percent_complete'] == 100.0
+        assert len(email_dispatch.sent) == 3
+
+        with app.app_context():
+            assert Notification.query.filter_by(user_id=client_user.id, title='Hello Test').count() == 1
+
+    def test_sender_uses_batch_call_and_rate_limit(self, app):
+        """Test clients with a batch call get the whole batch, throttled per provider."""
+        class BatchClient:
+            PROVIDER = 'batchtest'
+
+            def __init__(self):
+                self.batches = []
+
+            def send_batch(self, messages, throttle=None):
+                self.batches.append((len(messages), throttle))
+                return [{'success': m['to'] != 'bad@test.com', 'error': 'Rejected'} for m in messages]
+
+        email_client = BatchClient()
+        messages = [{'to': to, 'subject': 'Hi', 'html': '<p>Hi</p>'} for to in ('a@test.com', 'bad@test.com')]
+        rate_limits = app.config['EMAIL_PROVIDER_RATE_LIMITS']
+        app.config['EMAIL_PROVIDER_RATE_LIMITS'] = 'batchtest=100'
+        try:
+            with app.app_context():
+                errors = BulkEmailSender.send(email_client, messages)
+                assert BulkEmailSender.limiter('batchtest').rate == 100
+        finally:
+            app.config['EMAIL_PROVIDER_RATE_LIMITS'] = rate_limits
+
+        assert errors == [None, 'Rejected']
+        assert email_client.batches[0][0] == 2
+        assert email_client.batches[0][1] is not None
+
+    def test_sendgrid_batch_substitutes_per_recipient(self, app):
+        """Test personalised messages share one SendGrid request with per-recipient substitutions."""
+        from app.common.templating import TemplateRenderer
+        from app.modules.notifications.clients.sendgrid_client import SendGridClient
+
+        body = TemplateRenderer.compile('<p>Hi {first_name}, {unknown}</p>')
+        messages = [
+            {'to': f'{name.lower()}@test.com', 'subject': 'Hi', 'html': body.render({'first_name': name}),
+             'template': body, 'context': {'first_name': name}}
+            for name in ('Ann', 'Bob')
+        ]
+        messages.append({'to': 'plain@test.com', 'subject': 'Hi', 'html': '<p>Plain</p>'})
+
+        with app.app_context(), patch('app.modules.notifications.clients.sendgrid_client.requests.post') as post:
+            post.return_value.status_code = 202
+            results = SendGridClient(api_key='key', sender_email='crm@test.com').send_batch(messages)
+
+        assert results == [{'success': True}] * 3
+        assert post.call_count == 2
+        payload = post.call_args_list[0].kwargs['json']
+        assert payload['content'][0]['value'] == '<p>Hi -first_name-, -unknown-</p>'
+        assert [p['substitutions'] for p in payload['personalizations']] == [
+            {'-first_name-': 'Ann', '-unknown-': '{unknown}'},
+            {'-first_name-': 'Bob', '-unknown-': '{unknown}'},
+        ]
+        assert post.call_args_list[1].kwargs['json']['content'][0]['value'] == '<p>Plain</p>'
+
+
+class FakeSMTP:
+    """smtplib.SMTP double that counts connections and can drop them."""
+
+    connections = []
+
+    def __init__(self, host, port):
+        self.sent = []
+        self.closed = False
+        FakeSMTP.connections.append(self)
+
+    def starttls(self, context=None):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def noop(self):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        return 250, b'OK'
+
+    def sendmail(self, sender, recipients, message):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.sent.append(recipients[0])
+
+    def quit(self):
+        self.closed = True
+
+    close = quit
+
+
+@pytest.fixture
+def smtp_pool(app):
+    """Route SMTP connections to FakeSMTP with an empty pool."""
+    FakeSMTP.connections = []
+    SMTPConnectionPool.close_all()
+    with patch('app.modules.notifications.clients.smtp_client.smtplib.SMTP', FakeSMTP), app.app_context():
+        yield SMTPClient({
+            'smtp_host': 'smtp.test.com', 'smtp_port': 587, 'smtp_username': 'user',
+            'smtp_password': 'secret', 'sender_email': 'noreply@test.com'
+        })
+        SMTPConnectionPool.close_all()
+
+
+class TestSMTPConnectionPool:
+    """Test cases for pooled SMTP sessions."""
+
+    def test_sends_reuse_one_connection(self, smtp_pool):
+        """Test consecutive sends share one authenticated connection."""
+        for to in ('a@test.com', 'b@test.com', 'c@test.com'):
+            assert smtp_pool.send_email(to, 'Hi', '<p>Hi</p>')['success'] is True
+
+        assert len(FakeSMTP.connections) == 1
+        assert FakeSMTP.connections[0].sent == ['a@test.com', 'b@test.com', 'c@test.com']
+
+    def test_connection_retired_after_max_messages(self, app, smtp_pool):
+        """Test a connection is closed and replaced once it reaches SMTP_POOL_MAX_MESSAGES."""
+        app.config['SMTP_POOL_MAX_MESSAGES'] = 2
+        try:
+            results = smtp_pool.send_batch([
+                {'to': f'user{i}@test.com', 'subject': 'Hi', 'html': '<p>Hi</p>'} for i in range(3)
+            ])
+        finally:
+            app.config['SMTP_POOL_MAX_MESSAGES'] = 100
+
+        assert all(result['success'] for result in results)
+        assert [len(c.sent) for c in FakeSMTP.connections] == [2, 1]
+        assert FakeSMTP.connections[0].closed is True
+
+    def test_unencodable_message_fails_alone(self, smtp_pool):
+        """Test a message whose headers cannot be built fails without aborting the batch."""
+        results = smtp_pool.send_batch([
+            {'to': 'a@test.com', 'subject': 'Hi\nBcc: c@test.com', 'html': '<p>Hi</p>'},
+            {'to': 'b@test.com', 'subject': 'Hi', 'html': '<p>Hi</p>'},
+        ])
+
+        assert results[0]['success'] is False
+        assert results[1] == {'success': True}
+        assert FakeSMTP.connections[0].sent == ['b@test.com']
+
+    def test_dropped_connection_reconnects(self, smtp_pool):
+        """Test a send on a connection the server dropped is retried on a new one."""
+        smtp_pool.send_email('a@test.com', 'Hi', '<p>Hi</p>')
+        FakeSMTP.connections[0].closed = True
+
+        assert smtp_pool.send_email('b@test.com', 'Hi', '<p>Hi</p>')['success'] is True
+        assert len(FakeSMTP.connections) == 2
+        assert FakeSMTP.connections[1].sent == ['b@test.com']
+
+    def test_sessions_not_shared_across_credentials(self, smtp_pool):
+        """Test a client with another password or sender opens its own session."""
+        smtp_pool.send_email('a@test.com', 'Hi', '<p>Hi</p>')
+
+        for changed in ({'smtp_password': 'guess'}, {'sender_email': 'other@test.com'}):
+            other = SMTPClient({
+                'smtp_host': 'smtp.test.com', 'smtp_port': 587, 'smtp_username': 'user',
+                'smtp_password': 'secret', 'sender_email': 'noreply@test.com', **changed
+            })
+            assert SMTPConnectionPool.key(other) != SMTPConnectionPool.key(smtp_pool)
+            other.send_email('b@test.com', 'Hi', '<p>Hi</p>')
+
+        assert [c.sent for c in FakeSMTP.connections] == [['a@test.com'], ['b@test.com'], ['b@test.com']]
+
+
+class TestEmailClientCache:
+    """Test cases for the per-company email client cache."""
+
+    def test_client_resolved_once_until_config_update(self, app, client, admin_token, admin_user):
+        """Test repeated lookups reuse the client and an email config update drops it."""
+        from app.modules.metrics.prometheus_metrics import EMAIL_CLIENT_CACHE
+        from app.modules.notifications.services import EmailService
+
+        company_id = admin_user.company_id
+        hits = EMAIL_CLIENT_CACHE.labels(result='hit')
+        with app.app_context(), patch.object(EmailService, '_resolve_email_client',
+                                             side_effect=lambda company_id: (object(), True)) as resolve:
+            EmailService.invalidate_email_client()
+            hits_before = hits._value.get()
+
+            first = EmailService._get_email_client(company_id)
+            assert EmailService._get_email_client(company_id) is first
+            assert resolve.call_count == 1
+            assert hits._value.get() == hits_before + 1
+
+            response = client.put(f'/api/companies/{company_id}/email-config',
+                                  headers={'Authorization': f'Bearer {admin_token}'},
+                                  json={'is_enabled': False})
+            assert response.status_code == 200
+
+            assert EmailService._get_email_client(company_id) is not first
+            assert resolve.call_count == 2
+
+    def test_fallback_after_config_error_not_cached(self, app, admin_user):
+        """Test the fallback used when the company config cannot be read is resolved again next time."""
+        from app.modules.notifications.services import EmailService
+        from app.modules.notifications.services.email_service import EmailClientFactory
+
+        company_id = admin_user.company_id
+        with app.app_context(), \
+                patch.dict(app.config, {'SMTP2GO_API_KEY': None, 'MAILERSEND_API_KEY': None,
+                                        'SYSTEM_SMTP_ENABLED': False}), \
+                patch.object(EmailClientFactory, 'get_client_for_company',
+                             side_effect=[RuntimeError('database unavailable'), (None, None)]) as lookup:
+            EmailService.invalidate_email_client()
+
+            assert EmailService._get_email_client(company_id) is None
+            assert EmailService._get_email_client(company_id) is None
+            assert EmailService._get_email_client(company_id) is None
+            assert lookup.call_count == 2
+            EmailService.invalidate_email_client()
+
+
 class TestAutomationTriggers:
     """Test cases for verifying automation trigger types."""
 
@@ -0,0 +1,109 @@
+"""
+Search Module Tests
+Tests for indexed global search across users, requests and documents.
+"""
+import pytest
+from app.modules.search import SearchUseCase
+from app.modules.search.repositories.search_backends import get_search_backend
+from app.modules.services.models import Service, ServiceRequest
+from app.modules.documents.models import Document
+from app.modules.user.models import User
+from app.extensions import db
+from tests.conftest import count_statements
+
+
+@pytest.fixture
+def search_data(app, client_user, accountant_user):
+    """Create a service request and document owned by the test client."""
+    with app.app_context():
+        user = User.query.filter_by(email='client@test.com').first()
+        service = Service(name='Searchable SMSF Audit', category='Audit', base_price=900.00)
+        db.session.add(service)
+        db.session.flush()
+
+        request = ServiceRequest(
+            user_id=user.id,
+            service_id=service.id,
+            request_number='REQ-SRCH-1',
+            internal_notes='Awaiting bank statements'
+        )
+        document = Document(
+            uploaded_by_id=user.id,
+            original_filename='quarterly_statement.pdf',
+            stored_filename='quarterly_statement_unique.pdf',
+            description='Bank statement for June quarter'
+        )
+        db.session.add_all([request, document])
+        db.session.commit()
+        yield user
+
+        db.session.delete(document)
+        db.session.delete(request)
+        db.session.delete(service)
+        db.session.commit()
+
+
+class TestSearchBackend:
+    """Test cases for the indexed search backend."""
+
+    def test_sqlite_uses_fts_backend(self, app):
+        """Test the testing config resolves to the FTS5 backend."""
+        with app.app_context():
+            assert get_search_backend().name == 'sqlite_fts'
+
+    def test_find_user_by_substring(self, app, search_data):
+        """Test users match on a substring of their name or email."""
+        with app.app_context():
+            results = SearchUseCase().search_users('lien', company_id=search_data.company_id)
+            assert [u['email'] for u in results] == ['client@test.com']
+
+    def test_find_user_short_term(self, app, search_data):
+        """Test terms shorter than a trigram still match."""
+        with app.app_context():
+            results = SearchUseCase().search_users('Te', company_id=search_data.company_id)
+            assert 'client@test.com' in [u['email'] for u in results]
+
+    def test_request_matches_service_and_client(self, app, search_data):
+        """Test requests match on denormalised service name and client email."""
+        with app.app_context():
+            use_case = SearchUseCase()
+            by_service = use_case.search_requests('smsf audit', company_id=search_data.company_id)
+            by_client = use_case.search_requests('client@test', company_id=search_data.company_id)
+            assert [r['request_number'] for r in by_service] == ['REQ-SRCH-1']
+            assert [r['request_number'] for r in by_client] == ['REQ-SRCH-1']
+
+    def test_index_follows_updates(self, app, search_data):
+        """Test the index is refreshed when a searchable column changes."""
+        with app.app_context():
+            user = User.query.filter_by(email='client@test.com').first()
+            user.last_name = 'Zephyrine'
+            db.session.commit()
+
+            use_case = SearchUseCase()
+            assert len(use_case.search_users('zephyr', company_id=user.company_id)) == 1
+            assert len(use_case.search_requests('zephyr', company_id=user.company_id)) == 1
+
+    def test_search_all_single_statement(self, app, search_data):
+        """Test global search matches every entity type in one statement and groups the results."""
+        from app.modules.search.repositories import SearchRepository
+
+        with app.app_context():
+            company_id = search_data.company_id
+            SearchRepository.find_all('statement', company_id=company_id)  # Sets up the FTS index
+
+            # One UNION ALL for the matching, then the matched request (with its
+            # service and client) and document loaded by primary key
+            _, statements = count_statements(SearchRepository.find_all, 'statement', company_id=company_id)
+            assert statements == 5
+
+            results = SearchUseCase().search_all('statement', company_id=search_data.company_id)
+
+            assert results['users'] == []
+            assert [r['request_number'] for r in results['requests']] == ['REQ-SRCH-1']
+            assert [d['original_filename'] for d in results['documents']] == ['quarterly_statement.pdf']
+
+    def test_search_all_respects_company_scope(self, app, search_data):
+        """Test global search does not leak rows from other companies."""
+        with app.app_context():
+            results = SearchUseCase().search_all('statement', company_id='other-company')
+            assert results == {'users': [], 'requests': [], 'documents': []}
@@ -376,3 +376,251 @@ class TestCompanyServiceSettings:
 
         # Might be 200 or 201 depending on if already activated
         assert response.status_code in [200, 201]
+
+
+class TestWorkloadService:
+    """Test cases for the shared accountant workload provider."""
+
+    def test_company_workload_counts(self, app, test_service_request):
+        """Test active counts are aggregated per accountant."""
+        from app.modules.services.services import WorkloadService
+
+        with app.app_context():
+            WorkloadService.invalidate()
+            accountant = User.query.filter_by(email='accountant@test.com').first()
+            counts = WorkloadService.get_counts(accountant.company_id, accountant.id)
+
+            assert counts['active_requests'] == 1
+            assert counts['completed_this_month'] == 0
+
+    def test_workload_is_cached_per_company(self, app, test_service_request):
+        """Test repeated lookups reuse the cached counts without querying."""
+        from sqlalchemy import event
+        from app.modules.services.services import WorkloadService
+
+        with app.app_context():
+            WorkloadService.invalidate()
+            accountant = User.query.filter_by(email='accountant@test.com').first()
+            WorkloadService.get_company_workload(accountant.company_id)
+
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                WorkloadService.get_company_workload(accountant.company_id)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+
+            assert statements == []
+
+    def test_status_change_invalidates_workload(self, app, test_service_request):
+        """Test completing a request drops it from the cached active count."""
+        from datetime import datetime
+        from app.modules.services.services import WorkloadService
+
+        with app.app_context():
+            WorkloadService.invalidate()
+            accountant = User.query.filter_by(email='accountant@test.com').first()
+            assert WorkloadService.get_counts(accountant.company_id, accountant.id)['active_requests'] == 1
+
+            request = db.session.get(ServiceRequest, test_service_request.id)
+            request.status = ServiceRequest.STATUS_COMPLETED
+            request.completed_at = datetime.utcnow()
+            db.session.commit()
+
+            counts = WorkloadService.get_counts(accountant.company_id, accountant.id)
+            assert counts['active_requests'] == 0
+            assert counts['completed_this_month'] == 1
+
+    def test_workload_invalidated_on_commit_only(self, app, test_service_request):
+        """Test flushed changes keep the cached counts until commit, and a rollback keeps them."""
+        from app.modules.services.services import WorkloadService
+
+        with app.app_context():
+            WorkloadService.invalidate()
+            accountant = User.query.filter_by(email='accountant@test.com').first()
+            cached = WorkloadService.get_company_workload(accountant.company_id)
+
+            request = db.session.get(ServiceRequest, test_service_request.id)
+            request.status = 'cancelled'
+            db.session.flush()
+            assert WorkloadService.get_company_workload(accountant.company_id) is cached
+            db.session.rollback()
+            assert WorkloadService.get_company_workload(accountant.company_id) is cached
+
+            request = db.session.get(ServiceRequest, test_service_request.id)
+            status, request.status = request.status, 'cancelled'
+            db.session.commit()
+            assert WorkloadService.get_counts(accountant.company_id, accountant.id)['active_requests'] == 0
+
+            request.status = status
+            db.session.commit()
+
+    def test_least_busy_auto_assign(self, app, test_service_request):
+        """Test least-busy assignment picks an accountant from the company."""
+        from app.modules.services.services import WorkflowAutomationExecutor
+
+        with app.app_context():
+            accountant = User.query.filter_by(email='accountant@test.com').first()
+            chosen = WorkflowAutomationExecutor._get_least_busy_accountant(accountant.company_id)
+            assert chosen.id == accountant.id
+
+
+class TestDashboardMetrics:
+    """Test cases for role-scoped request dashboard metrics."""
+
+    def test_metrics_aggregate_visible_requests(self, app, test_service_request, client_user):
+        """Test status and invoice totals for the client's own requests, excluding drafts."""
+        from app.modules.services.usecases import GetDashboardMetricsUseCase
+
+        with app.app_context():
+            user = User.query.filter_by(email='client@test.com').first()
+            service = Service.query.filter_by(name='Test Tax Return').first()
+            db.session.add_all([
+                ServiceRequest(user_id=user.id, service_id=service.id,
+                               status=ServiceRequest.STATUS_COMPLETED,
+                               invoice_raised=True, invoice_paid=True, invoice_amount=200.00),
+                ServiceRequest(user_id=user.id, service_id=service.id,
+                               status=ServiceRequest.STATUS_DRAFT,
+                               invoice_raised=True, invoice_amount=999.00),
+            ])
+            db.session.commit()
+
+            result = GetDashboardMetricsUseCase().execute(user.id)
+
+            assert result.success
+            metrics = result.data['metrics']
+            assert metrics['requests'] == {
+                'total': 2, 'pending': 1, 'processing': 0,
+                'completed': 1, 'queries': 0, 'under_review': 0
+            }
+            assert metrics['invoices'] == {
+                'raised': 2, 'paid': 1,
+                'total_revenue': 200.0, 'pending_payments': 350.0
+            }
+
+    def test_metrics_scoped_to_accountant(self, app, test_service_request, accountant_user):
+        """Test accountants only see totals for requests assigned to them."""
+        from app.modules.services.usecases import GetDashboardMetricsUseCase
+
+        with app.app_context():
+            accountant = User.query.filter_by(email='accountant@test.com').first()
+            result = GetDashboardMetricsUseCase().execute(accountant.id)
+
+            assert result.success
+            assert result.data['metrics']['requests']['total'] == 1
+            assert result.data['metrics']['invoices']['pending_payments'] == 350.0
+
+    def test_dashboard_metrics_endpoint(self, client, admin_token, test_service_request):
+        """Test admin can fetch company dashboard metrics."""
+        response = client.get('/api/requests/dashboard/metrics',
+            headers={'Authorization': f'Bearer {admin_token}'})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['data']['metrics']['requests']['total'] >= 1
+
+
+class TestRenewalReminders:
+    """Test cases for the daily renewal reminder run."""
+
+    def test_due_reminders_sent_once(self, app, test_service, client_user):
+        """Test only renewals due at a reminder threshold and not yet reminded are sent."""
+        from datetime import date, datetime, timedelta
+        from unittest.mock import patch
+        from app.modules.notifications.models import EmailTemplate, Notification
+        from app.modules.services.models import ServiceRenewal
+        from app.modules.services.services.renewal_service import RenewalService
+
+        class EmailClient:
+            def __init__(self):
+                self.sent = []
+
+            def send_email(self, to_email, subject, body, is_html=True):
+                self.sent.append((to_email, subject, body))
+                return {'success': True}
+
+        with app.app_context():
+            service = db.session.get(Service, test_service.id)
+            service.renewal_reminder_days = [30, 7]
+            template = EmailTemplate(
+                name='Renewal', slug='general_renewal_reminder', company_id=None, is_active=True,
+                subject='{service_name} is due', body_html='<p>Hi {client_name}, due in {days_remaining} days</p>'
+            )
+            today = date.today()
+            renewals = [
+                ServiceRenewal(next_due_date=today + timedelta(days=7)),
+                ServiceRenewal(next_due_date=today + timedelta(days=8)),
+                ServiceRenewal(next_due_date=today + timedelta(days=30), last_reminder_at=datetime.utcnow(),
+                               reminders_sent=[{'days_before': 30}], status=ServiceRenewal.STATUS_REMINDED),
+            ]
+            for renewal in renewals:
+                renewal.user_id, renewal.service_id, renewal.company_id = (
+                    client_user.id, service.id, client_user.company_id
+                )
+            db.session.add(template)
+            db.session.add_all(renewals)
+            db.session.commit()
+
+            email_client = EmailClient()
+            try:
+                with patch('app.modules.notifications.services.email_service.EmailService._get_email_client',
+                           return_value=email_client):
+                    assert RenewalService.process_daily_reminders() == {'sent': 1, 'failed': 0, 'total': 1}
+                    assert RenewalService.process_daily_reminders()['total'] == 0
+
+                assert email_client.sent == [
+                    ('client@test.com', 'Test Tax Return is due', '<p>Hi Test Client, due in 7 days</p>')
+                ]
+                reminded = db.session.get(ServiceRenewal, renewals[0].id)
+                assert [r['days_before'] for r in reminded.reminders_sent] == [7]
+                assert Notification.query.filter_by(
+                    user_id=client_user.id, title='Test Tax Return Reminder'
+                ).count() == 1
+            finally:
+                Notification.query.filter_by(user_id=client_user.id).delete()
+                ServiceRenewal.query.delete()
+                db.session.delete(template)
+                db.session.commit()
+
+    def test_reminders_claimed_before_sending(self, app, test_service, client_user):
+        """Test a run started while another is sending finds no due renewals, and failed sends are released."""
+        from datetime import date, timedelta
+        from unittest.mock import patch
+        from app.modules.notifications.models import EmailTemplate
+        from app.modules.services.models import ServiceRenewal
+        from app.modules.services.services.renewal_service import RenewalService
+
+        seen_by_other_run = []
+
+        class FailingEmailClient:
+            def send_email(self, to_email, subject, body, is_html=True):
+                with app.app_context():
+                    seen_by_other_run.append(len(RenewalService.get_due_reminders()))
+                return {'success': False, 'error': 'Rejected'}
+
+        with app.app_context():
+            service = db.session.get(Service, test_service.id)
+            service.renewal_reminder_days = [7]
+            template = EmailTemplate(
+                name='Renewal', slug='general_renewal_reminder', company_id=None, is_active=True,
+                subject='{service_name} is due', body_html='<p>Due in {days_remaining} days</p>'
+            )
+            renewal = ServiceRenewal(user_id=client_user.id, service_id=service.id, company_id=client_user.company_id,
+                                     next_due_date=date.today() + timedelta(days=7))
+            db.session.add_all([template, renewal])
+            db.session.commit()
+
+            try:
+                with patch('app.modules.notifications.services.email_service.EmailService._get_email_client',
+                           return_value=FailingEmailClient()):
+                    assert RenewalService.process_daily_reminders() == {'sent': 0, 'failed': 1, 'total': 1}
+
+                assert seen_by_other_run == [0]
+                # Released for a retry
+                assert db.session.get(ServiceRenewal, renewal.id).last_reminder_at is None
+                assert len(RenewalService.get_due_reminders()) == 1
+            finally:
+                ServiceRenewal.query.delete()
+                db.session.delete(template)
+                db.session.commit()
@@ -0,0 +1,25 @@
+"""
+Background job worker entry point
+
+Usage:
+    python worker.py                      # all queues in JOB_QUEUE_CONCURRENCY
+    python worker.py --queues email,webhooks
+"""
+import argparse
+import os
+
+# Selects the worker's database timeouts (read when the config is imported)
+os.environ.setdefault('APP_PROCESS_ROLE', 'worker')
+
+from app import create_app
+from app.jobs.worker import JobWorker
+
+app = create_app()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run background jobs')
+    parser.add_argument('--queues', help='Comma-separated queue names (default: all configured queues)')
+    options = parser.parse_args()
+
+    queues = [queue.strip() for queue in options.queues.split(',')] if options.queues else None
+    JobWorker(app, queues=queues).run()
@@ -337,14 +337,19 @@ else
     log "Database schema exists, skipping create_db.sql"
 fi
 
-# Initialize default data (roles, etc.) - required before migrations
-log "Initializing default data (roles, services)..."
-docker exec jaypee-crm-backend flask init-db 2>&1 | tee -a "$LOG_FILE" || warn "init-db completed with warnings"
-
 # Run SQL migrations
 log "Running SQL migrations..."
 docker exec jaypee-crm-backend python sql_migrations/migration_runner.py 2>&1 | tee -a "$LOG_FILE" || warn "SQL migration completed with warnings"
 
+# Create the tables create_db.sql does not have and seed roles/admin/default
+# content - once per bootstrap version, the containers never run it on start
+log "Bootstrapping database (missing tables, essential data)..."
+docker exec jaypee-crm-backend flask bootstrap-db 2>&1 | tee -a "$LOG_FILE"
+
+# Initialize default data (roles, etc.)
+log "Initializing default data (roles, services)..."
+docker exec jaypee-crm-backend flask init-db 2>&1 | tee -a "$LOG_FILE" || warn "init-db completed with warnings"
+
 # Create sample services if needed
 log "Creating sample services..."
 docker exec jaypee-crm-backend flask create-sample-services 2>&1 | tee -a "$LOG_FILE" || warn "create-sample-services completed with warnings"